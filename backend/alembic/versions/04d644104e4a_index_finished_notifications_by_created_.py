@@ -0,0 +1,45 @@
+"""index finished notifications by created_at
+
+Revision ID: 04d644104e4a
+Revises: fd9acdce213e
+Create Date: 2026-10-18 10:59:22.866476
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '04d644104e4a'
+down_revision: Union[str, Sequence[str], None] = 'fd9acdce213e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Replace the created_at BRIN index with a partial btree of finished rows.
+
+    Retention frees pages that new rows then reuse, so the BRIN ranges only
+    ever widened until the retention lookup read most of the table.
+    """
+    op.drop_index('idx_notifications_created_brin', table_name='notifications')
+    op.create_index(
+        'idx_notifications_finished_created',
+        'notifications',
+        ['created_at'],
+        postgresql_where=sa.text("status IN ('sent', 'failed')"),
+    )
+
+
+def downgrade() -> None:
+    """Restore the created_at BRIN index."""
+    op.drop_index('idx_notifications_finished_created', table_name='notifications')
+    op.create_index(
+        'idx_notifications_created_brin',
+        'notifications',
+        ['created_at'],
+        postgresql_using='brin',
+        postgresql_with={'autosummarize': 'on'},
+    )
@@ -0,0 +1,262 @@
+"""partition strava activities by start date
+
+Revision ID: 07c85d1a85aa
+Revises: f0fb039b3b2b
+Create Date: 2026-10-18 08:46:37.790308
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '07c85d1a85aa'
+down_revision: Union[str, Sequence[str], None] = 'f0fb039b3b2b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ACTIVITY_COLUMNS = (
+    'id, user_id, strava_activity_id, raw_data, activity_type, start_date, '
+    'distance_meters, moving_time_seconds, elapsed_time_seconds, '
+    'average_heartrate, max_heartrate, average_pace_seconds_per_meter, created_at'
+)
+
+# Snapshot of runcoach.partitions.KEY_TRIGGER_DDL at this revision
+KEY_TRIGGER_DDL = (
+    """
+    CREATE OR REPLACE FUNCTION strava_activity_keys_claim() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        existing record;
+    BEGIN
+        SELECT activity_id, user_id, start_date INTO existing
+        FROM strava_activity_keys
+        WHERE strava_activity_id = NEW.strava_activity_id
+        FOR UPDATE;
+
+        IF NOT FOUND THEN
+            INSERT INTO strava_activity_keys
+                (strava_activity_id, activity_id, user_id, start_date)
+            VALUES (NEW.strava_activity_id, NEW.id, NEW.user_id, NEW.start_date);
+        ELSIF existing.start_date = NEW.start_date THEN
+            NULL;
+        ELSIF existing.activity_id = NEW.id OR existing.user_id = NEW.user_id THEN
+            UPDATE strava_activity_keys SET start_date = NEW.start_date
+            WHERE strava_activity_id = NEW.strava_activity_id;
+            IF existing.activity_id <> NEW.id THEN
+                DELETE FROM strava_activities
+                WHERE id = existing.activity_id AND start_date = existing.start_date;
+                NEW.id := existing.activity_id;
+            END IF;
+        ELSE
+            RAISE unique_violation USING
+                MESSAGE = format(
+                    'duplicate strava_activity_id %s', NEW.strava_activity_id
+                ),
+                CONSTRAINT = 'strava_activity_keys_pkey';
+        END IF;
+        RETURN NEW;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION strava_activity_keys_release() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        DELETE FROM strava_activity_keys
+        WHERE activity_id = OLD.id AND start_date = OLD.start_date;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE TRIGGER strava_activities_claim_key
+    BEFORE INSERT OR UPDATE OF start_date ON strava_activities
+    FOR EACH ROW EXECUTE FUNCTION strava_activity_keys_claim()
+    """,
+    """
+    CREATE TRIGGER strava_activities_release_key
+    AFTER DELETE ON strava_activities
+    FOR EACH ROW EXECUTE FUNCTION strava_activity_keys_release()
+    """,
+)
+
+
+def activity_columns(start_date_nullable: bool) -> list[sa.Column]:
+    return [
+        sa.Column('id', sa.UUID(), nullable=False, server_default=sa.text('gen_random_uuid()')),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('strava_activity_id', sa.BigInteger(), nullable=False),
+        sa.Column('raw_data', postgresql.JSONB(), nullable=False),
+        sa.Column('activity_type', sa.String(50), nullable=True),
+        sa.Column('start_date', sa.DateTime(), nullable=start_date_nullable),
+        sa.Column('distance_meters', sa.Numeric(10, 2), nullable=True),
+        sa.Column('moving_time_seconds', sa.Integer(), nullable=True),
+        sa.Column('elapsed_time_seconds', sa.Integer(), nullable=True),
+        sa.Column('average_heartrate', sa.Numeric(5, 2), nullable=True),
+        sa.Column('max_heartrate', sa.Numeric(5, 2), nullable=True),
+        sa.Column('average_pace_seconds_per_meter', sa.Numeric(10, 6), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+    ]
+
+
+def upgrade() -> None:
+    """Range-partition strava_activities by year of start_date."""
+    op.drop_constraint(
+        'workout_completions_strava_activity_id_fkey',
+        'workout_completions',
+        type_='foreignkey',
+    )
+    op.rename_table('strava_activities', 'strava_activities_unpartitioned')
+    op.execute(
+        'ALTER TABLE strava_activities_unpartitioned '
+        'RENAME CONSTRAINT strava_activities_pkey TO strava_activities_unpartitioned_pkey'
+    )
+    op.execute(
+        'ALTER TABLE strava_activities_unpartitioned '
+        'RENAME CONSTRAINT strava_activities_strava_activity_id_key '
+        'TO strava_activities_unpartitioned_strava_activity_id_key'
+    )
+    op.execute(
+        'ALTER INDEX idx_strava_activities_user_date '
+        'RENAME TO idx_strava_activities_unpartitioned_user_date'
+    )
+
+    # The partition key must be NOT NULL; Strava always sends start_date
+    op.execute(
+        """
+        UPDATE strava_activities_unpartitioned
+        SET start_date = coalesce(
+            (raw_data->>'start_date')::timestamptz AT TIME ZONE 'UTC',
+            created_at
+        )
+        WHERE start_date IS NULL
+        """
+    )
+
+    op.create_table(
+        'strava_activity_keys',
+        sa.Column('strava_activity_id', sa.BigInteger(), nullable=False, autoincrement=False),
+        sa.Column('activity_id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('start_date', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('strava_activity_id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.UniqueConstraint('activity_id'),
+    )
+    op.create_table(
+        'strava_activities',
+        *activity_columns(start_date_nullable=False),
+        sa.PrimaryKeyConstraint('id', 'start_date'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.UniqueConstraint(
+            'strava_activity_id',
+            'start_date',
+            name='uq_strava_activities_strava_activity_id_start_date',
+        ),
+        postgresql_partition_by='RANGE (start_date)',
+    )
+    op.create_index('idx_strava_activities_user_date', 'strava_activities', ['user_id', 'start_date'])
+
+    # One partition per year from 2010 through next year (or the newest
+    # activity), plus one for everything older
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            last_year int := greatest(
+                extract(year FROM now())::int + 1,
+                coalesce(
+                    (SELECT extract(year FROM max(start_date))::int
+                     FROM strava_activities_unpartitioned),
+                    0
+                )
+            );
+        BEGIN
+            CREATE TABLE strava_activities_pre2010 PARTITION OF strava_activities
+                FOR VALUES FROM (MINVALUE) TO ('2010-01-01');
+            FOR y IN 2010..last_year LOOP
+                EXECUTE format(
+                    'CREATE TABLE strava_activities_y%s PARTITION OF strava_activities '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    y, make_date(y, 1, 1), make_date(y + 1, 1, 1)
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+
+    # Bulk copy before the triggers exist, claiming keys in one pass
+    op.execute(
+        """
+        INSERT INTO strava_activity_keys (strava_activity_id, activity_id, user_id, start_date)
+        SELECT strava_activity_id, id, user_id, start_date
+        FROM strava_activities_unpartitioned
+        """
+    )
+    op.execute(
+        f'INSERT INTO strava_activities ({ACTIVITY_COLUMNS}) '
+        f'SELECT {ACTIVITY_COLUMNS} FROM strava_activities_unpartitioned'
+    )
+    for statement in KEY_TRIGGER_DDL:
+        op.execute(statement)
+
+    op.create_foreign_key(
+        'workout_completions_strava_activity_id_fkey',
+        'workout_completions',
+        'strava_activity_keys',
+        ['strava_activity_id'],
+        ['activity_id'],
+        ondelete='SET NULL',
+    )
+    op.drop_table('strava_activities_unpartitioned')
+
+
+def downgrade() -> None:
+    """Restore the unpartitioned strava_activities table."""
+    op.drop_constraint(
+        'workout_completions_strava_activity_id_fkey',
+        'workout_completions',
+        type_='foreignkey',
+    )
+    op.create_table(
+        'strava_activities_unpartitioned',
+        *activity_columns(start_date_nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.UniqueConstraint('strava_activity_id'),
+    )
+    op.execute(
+        f'INSERT INTO strava_activities_unpartitioned ({ACTIVITY_COLUMNS}) '
+        f'SELECT {ACTIVITY_COLUMNS} FROM strava_activities'
+    )
+    # Drops the partitions with the parent
+    op.drop_table('strava_activities')
+    op.drop_table('strava_activity_keys')
+    op.execute('DROP FUNCTION strava_activity_keys_claim()')
+    op.execute('DROP FUNCTION strava_activity_keys_release()')
+
+    op.rename_table('strava_activities_unpartitioned', 'strava_activities')
+    op.execute(
+        'ALTER TABLE strava_activities '
+        'RENAME CONSTRAINT strava_activities_unpartitioned_pkey TO strava_activities_pkey'
+    )
+    op.execute(
+        'ALTER TABLE strava_activities '
+        'RENAME CONSTRAINT strava_activities_unpartitioned_strava_activity_id_key '
+        'TO strava_activities_strava_activity_id_key'
+    )
+    op.create_index('idx_strava_activities_user_date', 'strava_activities', ['user_id', 'start_date'])
+    op.create_foreign_key(
+        'workout_completions_strava_activity_id_fkey',
+        'workout_completions',
+        'strava_activities',
+        ['strava_activity_id'],
+        ['id'],
+        ondelete='SET NULL',
+    )
@@ -0,0 +1,32 @@
+"""add notification delivery attempts
+
+Revision ID: 16c501fcb71c
+Revises: e647da6e6fdb
+Create Date: 2026-10-18 09:09:47.086960
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '16c501fcb71c'
+down_revision: Union[str, Sequence[str], None] = 'e647da6e6fdb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Track delivery attempts, the last error and claim leases on notifications."""
+    op.add_column('notifications', sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('notifications', sa.Column('last_error', sa.Text(), nullable=True))
+    op.add_column('notifications', sa.Column('locked_until', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Drop the notification delivery columns."""
+    op.drop_column('notifications', 'locked_until')
+    op.drop_column('notifications', 'last_error')
+    op.drop_column('notifications', 'attempts')
@@ -0,0 +1,69 @@
+"""partial notification indexes and archive
+
+Revision ID: 1c9c4aefa309
+Revises: 16c501fcb71c
+Create Date: 2026-10-18 09:15:17.183069
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1c9c4aefa309'
+down_revision: Union[str, Sequence[str], None] = '16c501fcb71c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Index only claimable notifications and add the retention archive."""
+    op.create_index(
+        'idx_notifications_pending',
+        'notifications',
+        ['scheduled_for'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+    op.create_index(
+        'idx_notifications_sending',
+        'notifications',
+        ['locked_until'],
+        postgresql_where=sa.text("status = 'sending'"),
+    )
+    op.create_index(
+        'idx_notifications_created_brin',
+        'notifications',
+        ['created_at'],
+        postgresql_using='brin',
+        postgresql_with={'autosummarize': 'on'},
+    )
+    op.drop_index('idx_notifications_scheduled', table_name='notifications')
+
+    op.create_table(
+        'notifications_archive',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('notification_type', sa.String(30), nullable=False),
+        sa.Column('channel', sa.String(20), nullable=False),
+        sa.Column('subject', sa.String(200), nullable=True),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('scheduled_for', sa.DateTime(), nullable=False),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False, server_default=sa.text('now()')),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    """Restore the full (status, scheduled_for) index and drop the archive."""
+    op.drop_table('notifications_archive')
+    op.create_index('idx_notifications_scheduled', 'notifications', ['status', 'scheduled_for'])
+    op.drop_index('idx_notifications_created_brin', table_name='notifications')
+    op.drop_index('idx_notifications_sending', table_name='notifications')
+    op.drop_index('idx_notifications_pending', table_name='notifications')
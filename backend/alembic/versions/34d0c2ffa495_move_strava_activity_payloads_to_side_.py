@@ -0,0 +1,70 @@
+"""move strava activity payloads to side table
+
+Revision ID: 34d0c2ffa495
+Revises: 07c85d1a85aa
+Create Date: 2026-10-18 08:54:22.733153
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '34d0c2ffa495'
+down_revision: Union[str, Sequence[str], None] = '07c85d1a85aa'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Move raw Strava payloads out of strava_activities."""
+    op.create_table(
+        'strava_activity_payloads',
+        sa.Column('strava_activity_id', sa.BigInteger(), nullable=False, autoincrement=False),
+        sa.Column('raw_data', postgresql.JSONB(), nullable=False),
+        sa.PrimaryKeyConstraint('strava_activity_id'),
+        sa.ForeignKeyConstraint(
+            ['strava_activity_id'],
+            ['strava_activity_keys.strava_activity_id'],
+            ondelete='CASCADE',
+        ),
+    )
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            ALTER TABLE strava_activity_payloads ALTER COLUMN raw_data SET COMPRESSION lz4;
+        EXCEPTION WHEN feature_not_supported THEN
+            NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO strava_activity_payloads (strava_activity_id, raw_data)
+        SELECT strava_activity_id, raw_data FROM strava_activities
+        """
+    )
+    # The space held by the dropped column is reclaimed as rows are rewritten,
+    # or at once with VACUUM FULL / pg_repack on each partition
+    op.drop_column('strava_activities', 'raw_data')
+
+
+def downgrade() -> None:
+    """Move raw Strava payloads back inline."""
+    op.add_column('strava_activities', sa.Column('raw_data', postgresql.JSONB(), nullable=True))
+    op.execute(
+        """
+        UPDATE strava_activities a
+        SET raw_data = p.raw_data
+        FROM strava_activity_payloads p
+        WHERE p.strava_activity_id = a.strava_activity_id
+        """
+    )
+    op.execute("UPDATE strava_activities SET raw_data = '{}' WHERE raw_data IS NULL")
+    op.alter_column('strava_activities', 'raw_data', nullable=False)
+    op.drop_table('strava_activity_payloads')
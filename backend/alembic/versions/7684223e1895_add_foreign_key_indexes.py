@@ -0,0 +1,50 @@
+"""add foreign key indexes
+
+Revision ID: 7684223e1895
+Revises: d00dda0d3389
+Create Date: 2026-10-18 09:29:47.828653
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7684223e1895'
+down_revision: Union[str, Sequence[str], None] = 'd00dda0d3389'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index, table, columns) for every foreign key that had no index
+FOREIGN_KEY_INDEXES = [
+    ('idx_goals_user', 'goals', ['user_id']),
+    ('idx_training_plans_user', 'training_plans', ['user_id', 'start_date']),
+    ('idx_training_plans_goal', 'training_plans', ['goal_id']),
+    ('idx_workouts_training_plan', 'workouts', ['training_plan_id']),
+    ('idx_workout_completions_workout', 'workout_completions', ['workout_id']),
+    (
+        'idx_workout_completions_strava_activity',
+        'workout_completions',
+        ['strava_activity_id'],
+    ),
+    ('idx_workout_edits_workout', 'workout_edits', ['workout_id']),
+    ('idx_strava_tokens_user', 'strava_tokens', ['user_id']),
+    ('idx_user_memory_summaries_user', 'user_memory_summaries', ['user_id']),
+    ('idx_strava_activity_keys_user', 'strava_activity_keys', ['user_id']),
+    ('idx_notifications_user', 'notifications', ['user_id']),
+]
+
+
+def upgrade() -> None:
+    """Index every foreign key, for cascades and joins from the parent."""
+    for name, table, columns in FOREIGN_KEY_INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Drop the foreign key indexes."""
+    for name, table, _ in reversed(FOREIGN_KEY_INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,45 @@
+"""promote strava payload fields to columns
+
+Revision ID: 8c29198dee79
+Revises: 34d0c2ffa495
+Create Date: 2026-10-18 09:00:17.987197
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c29198dee79'
+down_revision: Union[str, Sequence[str], None] = '34d0c2ffa495'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add typed columns for promoted Strava payload fields.
+
+    The columns start out NULL; fill them with
+    ``python -m runcoach.workers.activity_fields`` after upgrading.
+    """
+    op.add_column('strava_activities', sa.Column('total_elevation_gain_meters', sa.Numeric(8, 2), nullable=True))
+    op.add_column('strava_activities', sa.Column('workout_type', sa.SmallInteger(), nullable=True))
+    op.add_column('strava_activities', sa.Column('average_cadence', sa.Numeric(5, 2), nullable=True))
+    op.add_column('strava_activities', sa.Column('suffer_score', sa.Integer(), nullable=True))
+    op.create_index(
+        'idx_strava_activities_user_workout_type',
+        'strava_activities',
+        ['user_id', 'workout_type', 'start_date'],
+        postgresql_where=sa.text('workout_type IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Drop the promoted Strava payload columns."""
+    op.drop_index('idx_strava_activities_user_workout_type', table_name='strava_activities')
+    op.drop_column('strava_activities', 'suffer_score')
+    op.drop_column('strava_activities', 'average_cadence')
+    op.drop_column('strava_activities', 'workout_type')
+    op.drop_column('strava_activities', 'total_elevation_gain_meters')
@@ -0,0 +1,109 @@
+"""add athlete fitness
+
+Revision ID: b30341312fc8
+Revises: c61ea61d6291
+Create Date: 2026-10-18 09:44:26.831317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b30341312fc8'
+down_revision: Union[str, Sequence[str], None] = 'c61ea61d6291'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Snapshot of runcoach.models.fitness.FITNESS_TRIGGER_DDL at this revision
+FITNESS_TRIGGER_DDL = (
+    """
+    CREATE OR REPLACE FUNCTION athlete_fitness_invalidate() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            DELETE FROM athlete_fitness AS state
+            USING new_rows
+            WHERE state.user_id = new_rows.user_id
+                AND state.as_of >= new_rows.start_date::date;
+        ELSIF TG_OP = 'DELETE' THEN
+            DELETE FROM athlete_fitness AS state
+            USING old_rows
+            WHERE state.user_id = old_rows.user_id
+                AND state.as_of >= old_rows.start_date::date;
+        ELSE
+            -- Only activities whose load inputs changed, not e.g. a new name
+            DELETE FROM athlete_fitness AS state
+            USING (
+                (
+                    SELECT user_id, start_date, moving_time_seconds, average_heartrate FROM new_rows
+                    EXCEPT
+                    SELECT user_id, start_date, moving_time_seconds, average_heartrate FROM old_rows
+                )
+                UNION ALL
+                (
+                    SELECT user_id, start_date, moving_time_seconds, average_heartrate FROM old_rows
+                    EXCEPT
+                    SELECT user_id, start_date, moving_time_seconds, average_heartrate FROM new_rows
+                )
+            ) AS changed
+            WHERE state.user_id = changed.user_id
+                AND state.as_of >= changed.start_date::date;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    # Transition tables allow one event per trigger
+    """
+    CREATE TRIGGER strava_activities_fitness_insert
+    AFTER INSERT ON strava_activities
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION athlete_fitness_invalidate()
+    """,
+    """
+    CREATE TRIGGER strava_activities_fitness_update
+    AFTER UPDATE ON strava_activities
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION athlete_fitness_invalidate()
+    """,
+    """
+    CREATE TRIGGER strava_activities_fitness_delete
+    AFTER DELETE ON strava_activities
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION athlete_fitness_invalidate()
+    """,
+)
+FITNESS_TRIGGERS = (
+    'strava_activities_fitness_insert',
+    'strava_activities_fitness_update',
+    'strava_activities_fitness_delete',
+)
+
+
+def upgrade() -> None:
+    """Add cached athlete fitness states and the triggers invalidating them."""
+    op.create_table(
+        'athlete_fitness',
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('as_of', sa.Date(), nullable=False),
+        sa.Column('ctl', sa.Float(), nullable=False),
+        sa.Column('atl', sa.Float(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    # States are filled in by the first nightly batch
+    for statement in FITNESS_TRIGGER_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    """Drop cached athlete fitness states and their triggers."""
+    for trigger in FITNESS_TRIGGERS:
+        op.execute(f'DROP TRIGGER {trigger} ON strava_activities')
+    op.execute('DROP FUNCTION athlete_fitness_invalidate()')
+    op.drop_table('athlete_fitness')
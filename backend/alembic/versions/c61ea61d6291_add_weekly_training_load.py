@@ -0,0 +1,153 @@
+"""add weekly training load
+
+Revision ID: c61ea61d6291
+Revises: 7684223e1895
+Create Date: 2026-10-18 09:36:18.044020
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c61ea61d6291'
+down_revision: Union[str, Sequence[str], None] = '7684223e1895'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Snapshot of runcoach.models.training_load's trigger DDL at this revision
+_IS_RUN = "activity_type IN ('Run', 'TrailRun', 'VirtualRun')"
+_CONTRIBUTIONS = {
+    'activity_count': '1',
+    'moving_time_seconds': 'coalesce(moving_time_seconds, 0)',
+    'suffer_score': 'coalesce(suffer_score, 0)',
+    'run_count': f'CASE WHEN {_IS_RUN} THEN 1 ELSE 0 END',
+    'run_distance_meters': f'CASE WHEN {_IS_RUN} THEN coalesce(distance_meters, 0) ELSE 0 END',
+    'run_moving_time_seconds': (
+        f'CASE WHEN {_IS_RUN} THEN coalesce(moving_time_seconds, 0) ELSE 0 END'
+    ),
+    'run_elevation_gain_meters': (
+        f'CASE WHEN {_IS_RUN} THEN coalesce(total_elevation_gain_meters, 0) ELSE 0 END'
+    ),
+}
+_WEEK = "date_trunc('week', start_date)::date"
+
+
+def _apply_changes(sources: list[tuple[str, str]]) -> str:
+    changes = '\n            UNION ALL\n            '.join(
+        f'SELECT user_id, {_WEEK} AS week_start, '
+        + ', '.join(f'{sign}({expr}) AS {name}' for name, expr in _CONTRIBUTIONS.items())
+        + f' FROM {table}'
+        for table, sign in sources
+    )
+    touched = ' UNION '.join(
+        f'SELECT user_id, {_WEEK} AS week_start FROM {table}' for table, _ in sources
+    )
+    columns = ', '.join(_CONTRIBUTIONS)
+    totals = ', '.join(f'sum({name})' for name in _CONTRIBUTIONS)
+    additions = ',\n            '.join(
+        f'{name} = weekly_training_load.{name} + EXCLUDED.{name}' for name in _CONTRIBUTIONS
+    )
+    return f"""
+        INSERT INTO weekly_training_load (user_id, week_start, {columns}, updated_at)
+        SELECT change.user_id, change.week_start, {totals}, now()
+        FROM (
+            {changes}
+        ) AS change
+        JOIN users ON users.id = change.user_id
+        GROUP BY change.user_id, change.week_start
+        ORDER BY change.user_id, change.week_start
+        ON CONFLICT (user_id, week_start) DO UPDATE SET
+            {additions},
+            updated_at = EXCLUDED.updated_at;
+        DELETE FROM weekly_training_load AS load
+        USING ({touched}) AS touched
+        WHERE load.user_id = touched.user_id
+            AND load.week_start = touched.week_start
+            AND load.activity_count <= 0;"""
+
+
+TRAINING_LOAD_TRIGGER_DDL = (
+    f"""
+    CREATE OR REPLACE FUNCTION weekly_training_load_apply() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {_apply_changes([('new_rows', '')])}
+        ELSIF TG_OP = 'DELETE' THEN
+            {_apply_changes([('old_rows', '-')])}
+        ELSE
+            {_apply_changes([('new_rows', ''), ('old_rows', '-')])}
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE TRIGGER strava_activities_load_insert
+    AFTER INSERT ON strava_activities
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION weekly_training_load_apply()
+    """,
+    """
+    CREATE TRIGGER strava_activities_load_update
+    AFTER UPDATE ON strava_activities
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION weekly_training_load_apply()
+    """,
+    """
+    CREATE TRIGGER strava_activities_load_delete
+    AFTER DELETE ON strava_activities
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION weekly_training_load_apply()
+    """,
+)
+TRAINING_LOAD_TRIGGERS = (
+    'strava_activities_load_insert',
+    'strava_activities_load_update',
+    'strava_activities_load_delete',
+)
+
+
+def upgrade() -> None:
+    """Add weekly training load buckets, maintained by triggers and backfilled."""
+    op.create_table(
+        'weekly_training_load',
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('week_start', sa.Date(), nullable=False),
+        sa.Column('activity_count', sa.Integer(), nullable=False),
+        sa.Column('moving_time_seconds', sa.BigInteger(), nullable=False),
+        sa.Column('suffer_score', sa.Integer(), nullable=False),
+        sa.Column('run_count', sa.Integer(), nullable=False),
+        sa.Column('run_distance_meters', sa.Numeric(12, 2), nullable=False),
+        sa.Column('run_moving_time_seconds', sa.BigInteger(), nullable=False),
+        sa.Column('run_elevation_gain_meters', sa.Numeric(10, 2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'week_start'),
+    )
+    # Holds off activity writes until the triggers and backfill are in place
+    op.execute('LOCK TABLE strava_activities IN SHARE ROW EXCLUSIVE MODE')
+    for statement in TRAINING_LOAD_TRIGGER_DDL:
+        op.execute(statement)
+    columns = ', '.join(_CONTRIBUTIONS)
+    totals = ', '.join(f'sum({expr})' for expr in _CONTRIBUTIONS.values())
+    op.execute(
+        f"""
+        INSERT INTO weekly_training_load (user_id, week_start, {columns}, updated_at)
+        SELECT user_id, {_WEEK}, {totals}, now()
+        FROM strava_activities
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade() -> None:
+    """Drop the weekly training load buckets and their triggers."""
+    for trigger in TRAINING_LOAD_TRIGGERS:
+        op.execute(f'DROP TRIGGER {trigger} ON strava_activities')
+    op.execute('DROP FUNCTION weekly_training_load_apply()')
+    op.drop_table('weekly_training_load')
@@ -0,0 +1,33 @@
+"""add pending notification user index
+
+Revision ID: d00dda0d3389
+Revises: 1c9c4aefa309
+Create Date: 2026-10-18 09:19:25.308821
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd00dda0d3389'
+down_revision: Union[str, Sequence[str], None] = '1c9c4aefa309'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Index pending notifications by user and channel for digests."""
+    op.create_index(
+        'idx_notifications_pending_user',
+        'notifications',
+        ['user_id', 'channel', 'scheduled_for'],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    """Drop the pending notification user index."""
+    op.drop_index('idx_notifications_pending_user', table_name='notifications')
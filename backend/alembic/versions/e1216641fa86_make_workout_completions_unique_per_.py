@@ -0,0 +1,50 @@
+"""make workout completions unique per workout
+
+Revision ID: e1216641fa86
+Revises: f62a9505a059
+Create Date: 2026-10-18 10:33:09.257094
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1216641fa86'
+down_revision: Union[str, Sequence[str], None] = 'f62a9505a059'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Make idx_workout_completions_workout unique.
+
+    Overlapping syncs could complete a workout twice; the earliest
+    completion of each workout is kept.
+    """
+    op.execute(
+        """
+        DELETE FROM workout_completions
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY workout_id ORDER BY created_at, id
+                ) AS n
+                FROM workout_completions
+            ) AS ranked
+            WHERE n > 1
+        )
+        """
+    )
+    op.drop_index('idx_workout_completions_workout', table_name='workout_completions')
+    op.create_index(
+        'idx_workout_completions_workout', 'workout_completions', ['workout_id'], unique=True
+    )
+
+
+def downgrade() -> None:
+    """Restore the non-unique idx_workout_completions_workout."""
+    op.drop_index('idx_workout_completions_workout', table_name='workout_completions')
+    op.create_index('idx_workout_completions_workout', 'workout_completions', ['workout_id'])
@@ -0,0 +1,30 @@
+"""add id to chat messages user index
+
+Revision ID: e647da6e6fdb
+Revises: ef6e8f1cc6e8
+Create Date: 2026-10-18 09:07:07.461106
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e647da6e6fdb'
+down_revision: Union[str, Sequence[str], None] = 'ef6e8f1cc6e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Extend idx_chat_messages_user to the history's keyset sort key."""
+    op.drop_index('idx_chat_messages_user', table_name='chat_messages')
+    op.create_index('idx_chat_messages_user', 'chat_messages', ['user_id', 'created_at', 'id'])
+
+
+def downgrade() -> None:
+    """Restore idx_chat_messages_user on (user_id, created_at)."""
+    op.drop_index('idx_chat_messages_user', table_name='chat_messages')
+    op.create_index('idx_chat_messages_user', 'chat_messages', ['user_id', 'created_at'])
@@ -0,0 +1,30 @@
+"""add id to workouts user date index
+
+Revision ID: ef6e8f1cc6e8
+Revises: 8c29198dee79
+Create Date: 2026-10-18 09:04:50.093999
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ef6e8f1cc6e8'
+down_revision: Union[str, Sequence[str], None] = '8c29198dee79'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Extend idx_workouts_user_date to the calendar's keyset sort key."""
+    op.drop_index('idx_workouts_user_date', table_name='workouts')
+    op.create_index('idx_workouts_user_date', 'workouts', ['user_id', 'scheduled_date', 'id'])
+
+
+def downgrade() -> None:
+    """Restore idx_workouts_user_date on (user_id, scheduled_date)."""
+    op.drop_index('idx_workouts_user_date', table_name='workouts')
+    op.create_index('idx_workouts_user_date', 'workouts', ['user_id', 'scheduled_date'])
@@ -0,0 +1,31 @@
+"""add user session generation
+
+Revision ID: f0fb039b3b2b
+Revises: 4f7102b89d74
+Create Date: 2026-10-18 08:32:29.678626
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f0fb039b3b2b'
+down_revision: Union[str, Sequence[str], None] = '4f7102b89d74'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add the per-user session generation counter."""
+    op.add_column(
+        'users',
+        sa.Column('session_generation', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade() -> None:
+    """Drop the per-user session generation counter."""
+    op.drop_column('users', 'session_generation')
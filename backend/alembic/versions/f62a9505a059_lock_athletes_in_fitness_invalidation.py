@@ -0,0 +1,120 @@
+"""lock athletes in fitness invalidation
+
+Revision ID: f62a9505a059
+Revises: b30341312fc8
+Create Date: 2026-10-18 10:29:24.892888
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f62a9505a059'
+down_revision: Union[str, Sequence[str], None] = 'b30341312fc8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Snapshots of athlete_fitness_invalidate() at this revision and the last
+INVALIDATE_DDL = (
+    """
+    CREATE OR REPLACE FUNCTION athlete_fitness_invalidate() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        -- A fitness batch holds its athletes' users rows FOR UPDATE until it
+        -- commits (runcoach.workers.fitness); waiting for it here means the
+        -- DELETE below sees, and drops, the state it wrote without this change
+        IF TG_OP = 'INSERT' THEN
+            PERFORM 1 FROM users
+            WHERE id IN (SELECT user_id FROM new_rows)
+            ORDER BY id FOR KEY SHARE;
+            DELETE FROM athlete_fitness AS state
+            USING new_rows
+            WHERE state.user_id = new_rows.user_id
+                AND state.as_of >= new_rows.start_date::date;
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM 1 FROM users
+            WHERE id IN (SELECT user_id FROM old_rows)
+            ORDER BY id FOR KEY SHARE;
+            DELETE FROM athlete_fitness AS state
+            USING old_rows
+            WHERE state.user_id = old_rows.user_id
+                AND state.as_of >= old_rows.start_date::date;
+        ELSE
+            PERFORM 1 FROM users
+            WHERE id IN (SELECT user_id FROM new_rows UNION SELECT user_id FROM old_rows)
+            ORDER BY id FOR KEY SHARE;
+            -- Only activities whose load inputs changed, not e.g. a new name
+            DELETE FROM athlete_fitness AS state
+            USING (
+                (
+                    SELECT user_id, start_date, moving_time_seconds, average_heartrate FROM new_rows
+                    EXCEPT
+                    SELECT user_id, start_date, moving_time_seconds, average_heartrate FROM old_rows
+                )
+                UNION ALL
+                (
+                    SELECT user_id, start_date, moving_time_seconds, average_heartrate FROM old_rows
+                    EXCEPT
+                    SELECT user_id, start_date, moving_time_seconds, average_heartrate FROM new_rows
+                )
+            ) AS changed
+            WHERE state.user_id = changed.user_id
+                AND state.as_of >= changed.start_date::date;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """
+)
+PREVIOUS_INVALIDATE_DDL = (
+    """
+    CREATE OR REPLACE FUNCTION athlete_fitness_invalidate() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            DELETE FROM athlete_fitness AS state
+            USING new_rows
+            WHERE state.user_id = new_rows.user_id
+                AND state.as_of >= new_rows.start_date::date;
+        ELSIF TG_OP = 'DELETE' THEN
+            DELETE FROM athlete_fitness AS state
+            USING old_rows
+            WHERE state.user_id = old_rows.user_id
+                AND state.as_of >= old_rows.start_date::date;
+        ELSE
+            -- Only activities whose load inputs changed, not e.g. a new name
+            DELETE FROM athlete_fitness AS state
+            USING (
+                (
+                    SELECT user_id, start_date, moving_time_seconds, average_heartrate FROM new_rows
+                    EXCEPT
+                    SELECT user_id, start_date, moving_time_seconds, average_heartrate FROM old_rows
+                )
+                UNION ALL
+                (
+                    SELECT user_id, start_date, moving_time_seconds, average_heartrate FROM old_rows
+                    EXCEPT
+                    SELECT user_id, start_date, moving_time_seconds, average_heartrate FROM new_rows
+                )
+            ) AS changed
+            WHERE state.user_id = changed.user_id
+                AND state.as_of >= changed.start_date::date;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """
+)
+
+
+def upgrade() -> None:
+    """Make fitness invalidation wait for a batch holding the athletes."""
+    op.execute(INVALIDATE_DDL)
+
+
+def downgrade() -> None:
+    """Invalidate without waiting for fitness batches."""
+    op.execute(PREVIOUS_INVALIDATE_DDL)
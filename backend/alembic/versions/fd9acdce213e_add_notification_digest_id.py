@@ -0,0 +1,37 @@
+"""add notification digest id
+
+Revision ID: fd9acdce213e
+Revises: e1216641fa86
+Create Date: 2026-10-18 10:55:26.646594
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fd9acdce213e'
+down_revision: Union[str, Sequence[str], None] = 'e1216641fa86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Add notifications.digest_id, fixing a digest's members on first claim."""
+    op.add_column('notifications', sa.Column('digest_id', sa.Uuid(), nullable=True))
+    op.create_index(
+        'idx_notifications_digest',
+        'notifications',
+        ['digest_id'],
+        postgresql_where=sa.text(
+            "digest_id IS NOT NULL AND status IN ('pending', 'sending')"
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Drop notifications.digest_id."""
+    op.drop_index('idx_notifications_digest', table_name='notifications')
+    op.drop_column('notifications', 'digest_id')
@@ -0,0 +1,244 @@
+"""Benchmark: raw Strava payloads inline vs in ``strava_activity_payloads``.
+
+Creates the schema in the database named by ``BENCH_DATABASE_URL`` (it is
+dropped afterwards, so point it at a scratch database) and seeds the same
+synthetic activities, each with a Strava-sized JSON payload, into two
+layouts:
+
+* ``inline``: the previous layout, ``raw_data`` stored in the activity row,
+* ``split``: the current layout, typed columns in ``strava_activities`` and
+  the payload in ``strava_activity_payloads``.
+
+It reports the bytes per activity row (heap, TOAST and indexes) and the
+latency of one athlete's 52-week activity list, loading every column the
+ORM maps, as the app would.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_activity_payloads.py
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from runcoach import models  # noqa: F401
+from runcoach.database import Base
+from runcoach.services.activities import recent_window
+
+INLINE_TABLE = "strava_activities_inline"
+
+# A summary the size of what Strava's list endpoint returns, including the
+# encoded map polyline that makes up most of it
+PAYLOAD_SQL = """
+    jsonb_build_object(
+        'id', i,
+        'name', 'Morning Run ' || i,
+        'type', 'Run',
+        'sport_type', 'Run',
+        'distance', distance,
+        'moving_time', 1500 + i % 5000,
+        'elapsed_time', 1600 + i % 5000,
+        'total_elevation_gain', i % 80,
+        'start_date', to_char(start_date, 'YYYY-MM-DD"T"HH24:MI:SS"Z"'),
+        'timezone', '(GMT-08:00) America/Los_Angeles',
+        'average_speed', 3.2,
+        'max_speed', 4.8,
+        'average_heartrate', 150,
+        'max_heartrate', 175,
+        'athlete', jsonb_build_object('id', 1234567, 'resource_state', 1),
+        'map', jsonb_build_object(
+            'id', 'a' || i,
+            'summary_polyline', (
+                SELECT string_agg(md5((i * 100 + n)::text), '')
+                FROM generate_series(1, 40) AS n
+            ),
+            'resource_state', 2
+        ),
+        'start_latlng', jsonb_build_array(37.77, -122.42),
+        'end_latlng', jsonb_build_array(37.78, -122.41),
+        'kudos_count', i % 12,
+        'achievement_count', i % 5,
+        'has_heartrate', true,
+        'gear_id', 'g123456'
+    )
+"""
+
+
+async def seed(conn: AsyncConnection, rows: int, users: int) -> list:
+    """Seed both layouts with the same activities; returns the user ids."""
+    await conn.execute(
+        text(
+            "INSERT INTO users (id, invite_code, name, email, password_hash, "
+            "session_generation, created_at, updated_at) "
+            "SELECT gen_random_uuid(), 'INVITE' || i, 'Runner ' || i, "
+            "'runner' || i || '@example.com', 'x', 0, now(), now() "
+            "FROM generate_series(1, :users) AS i"
+        ),
+        {"users": users},
+    )
+    await conn.execute(
+        text(
+            f"CREATE TABLE {INLINE_TABLE} "
+            "(LIKE strava_activities INCLUDING DEFAULTS, raw_data jsonb NOT NULL, "
+            "PRIMARY KEY (id), UNIQUE (strava_activity_id))"
+        )
+    )
+    await conn.execute(
+        text(f"CREATE INDEX idx_{INLINE_TABLE}_user_date ON {INLINE_TABLE} (user_id, start_date)")
+    )
+    await conn.execute(
+        text(
+            f"""
+            INSERT INTO {INLINE_TABLE} (
+                id, user_id, strava_activity_id, activity_type, start_date,
+                distance_meters, moving_time_seconds, elapsed_time_seconds,
+                average_heartrate, max_heartrate, average_pace_seconds_per_meter,
+                created_at, raw_data
+            )
+            SELECT
+                gen_random_uuid(), user_ids[1 + i % array_length(user_ids, 1)], i,
+                'Run', start_date, distance, 1500 + i % 5000, 1600 + i % 5000,
+                150, 175, 0.3, now(), {PAYLOAD_SQL}
+            FROM (
+                SELECT i,
+                       timestamp '2015-01-01'
+                           + random() * (now()::timestamp - timestamp '2015-01-01')
+                           AS start_date,
+                       round((5000 + random() * 15000)::numeric, 2) AS distance
+                FROM generate_series(1, :rows) AS i
+            ) AS g,
+            (SELECT array_agg(id) AS user_ids FROM users) AS u
+            """
+        ),
+        {"rows": rows},
+    )
+    # Same rows into the split layout, which the ingest path maintains
+    await conn.execute(
+        text(
+            "INSERT INTO strava_activity_keys "
+            "(strava_activity_id, activity_id, user_id, start_date) "
+            f"SELECT strava_activity_id, id, user_id, start_date FROM {INLINE_TABLE}"
+        )
+    )
+    await conn.execute(
+        text("ALTER TABLE strava_activities DISABLE TRIGGER strava_activities_claim_key")
+    )
+    await conn.execute(
+        text(
+            "INSERT INTO strava_activities "
+            "SELECT id, user_id, strava_activity_id, activity_type, start_date, "
+            "distance_meters, moving_time_seconds, elapsed_time_seconds, "
+            "average_heartrate, max_heartrate, average_pace_seconds_per_meter, created_at "
+            f"FROM {INLINE_TABLE}"
+        )
+    )
+    await conn.execute(
+        text("ALTER TABLE strava_activities ENABLE TRIGGER strava_activities_claim_key")
+    )
+    await conn.execute(
+        text(
+            "INSERT INTO strava_activity_payloads (strava_activity_id, raw_data) "
+            f"SELECT strava_activity_id, raw_data FROM {INLINE_TABLE}"
+        )
+    )
+    for table in (INLINE_TABLE, "strava_activities", "strava_activity_payloads"):
+        await conn.execute(text(f"VACUUM ANALYZE {table}"))
+    result = await conn.execute(text("SELECT id FROM users"))
+    return list(result.scalars())
+
+
+async def total_bytes(conn: AsyncConnection, table: str) -> int:
+    """Heap, TOAST and index bytes of ``table`` and any partitions."""
+    result = await conn.execute(
+        text(
+            # pg_partition_tree() is empty for unpartitioned tables
+            "SELECT coalesce(sum(pg_total_relation_size(relid)), "
+            "pg_total_relation_size(CAST(:table AS regclass))) "
+            "FROM pg_partition_tree(CAST(:table AS regclass))"
+        ),
+        {"table": table},
+    )
+    return int(result.scalar_one())
+
+
+async def time_list(
+    conn: AsyncConnection,
+    table: str,
+    user_ids: list,
+    iterations: int,
+) -> list[float]:
+    """Return per-query milliseconds for a 52-week activity list.
+
+    The driver decodes JSONB into Python objects, as the ORM would.
+    """
+    start, end = recent_window(52)
+    statement = text(
+        f"SELECT * FROM {table} WHERE user_id = :user_id "
+        "AND start_date >= :start AND start_date < :end ORDER BY start_date, id"
+    )
+    users = random.Random(0).choices(user_ids, k=iterations)
+    await conn.execute(statement, {"user_id": users[0], "start": start, "end": end})
+
+    timings = []
+    for user_id in users:
+        started = time.perf_counter()
+        result = await conn.execute(statement, {"user_id": user_id, "start": start, "end": end})
+        result.all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a scratch PostgreSQL database")
+
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {INLINE_TABLE}"))
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        # VACUUM cannot run inside a transaction block
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            user_ids = await seed(conn, args.rows, args.users)
+
+            inline = await total_bytes(conn, INLINE_TABLE)
+            hot = await total_bytes(conn, "strava_activities")
+            payloads = await total_bytes(conn, "strava_activity_payloads")
+            print(f"{'layout':<8} {'activity B/row':>15} {'payload B/row':>14} "
+                  f"{'list mean ms':>13} {'list p95 ms':>12}")
+            for layout, table, activity_bytes, payload_bytes in (
+                ("inline", INLINE_TABLE, inline, 0),
+                ("split", "strava_activities", hot, payloads),
+            ):
+                timings = await time_list(conn, table, user_ids, args.iterations)
+                print(
+                    f"{layout:<8} {activity_bytes / args.rows:>15.0f} "
+                    f"{payload_bytes / args.rows:>14.0f} "
+                    f"{statistics.mean(timings):>13.2f} "
+                    f"{statistics.quantiles(timings, n=20)[-1]:>12.2f}"
+                )
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {INLINE_TABLE}"))
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""Benchmark: latency of unrelated endpoints while logins are hammered.
+
+Runs a burst of bcrypt verifications (what ``/auth/login`` does per request)
+alongside a steady stream of ``/health`` requests against the ASGI app, once
+with bcrypt called inline on the event loop and once through the
+``PasswordHasher`` pool, and prints the ``/health`` latency percentiles.
+
+Usage:
+    python benchmarks/bench_auth_event_loop.py [--logins 40]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from runcoach.main import app
+from runcoach.services.password_hasher import (
+    PasswordHasher,
+    hash_password,
+    verify_password,
+)
+
+
+async def hammer_logins(mode: str, hasher: PasswordHasher, hashed: str, count: int) -> None:
+    """Run ``count`` verifications with up to 8 in flight."""
+    limiter = asyncio.Semaphore(8)
+
+    async def one_login() -> None:
+        async with limiter:
+            if mode == "inline":
+                verify_password("benchmark-password", hashed)
+                await asyncio.sleep(0)
+            else:
+                await hasher.verify("benchmark-password", hashed)
+
+    await asyncio.gather(*(one_login() for _ in range(count)))
+
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event) -> list[float]:
+    """Request /health every 5 ms until stopped, returning latencies in ms.
+
+    Latency is measured from when the probe was due, so time spent waiting
+    for a blocked event loop counts against it like it would for a client.
+    """
+    latencies = []
+    due = time.perf_counter()
+    while not stop.is_set():
+        response = await client.get("/health")
+        response.raise_for_status()
+        finished = time.perf_counter()
+        latencies.append((finished - due) * 1000)
+        due = finished + 0.005
+        await asyncio.sleep(0.005)
+    return latencies
+
+
+async def run(mode: str, logins: int) -> list[float]:
+    """Measure /health latency while ``logins`` verifications run."""
+    hasher = PasswordHasher(executor_kind="thread", max_workers=4)
+    hashed = hash_password("benchmark-password")
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_health(client, stop))
+        await hammer_logins(mode, hasher, hashed, logins)
+        stop.set()
+        latencies = await probe
+    hasher.shutdown()
+    return latencies
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Return the ``pct`` percentile of ``values``."""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'probes':>7} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for mode in ("inline", "pool"):
+        latencies = asyncio.run(run(mode, args.logins))
+        print(
+            f"{mode:<8} {len(latencies):>7} "
+            f"{statistics.median(latencies):>9.2f} "
+            f"{percentile(latencies, 99):>9.2f} "
+            f"{max(latencies):>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
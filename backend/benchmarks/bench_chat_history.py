@@ -0,0 +1,127 @@
+"""Benchmark: streamed vs fully loaded chat history export.
+
+Creates the schema in the database named by ``BENCH_DATABASE_URL`` (it is
+dropped afterwards, so point it at a scratch database), stores
+``--messages`` chat messages with context snapshots for one athlete, and
+serializes the whole history to NDJSON two ways:
+
+* ``load-all``: one query, every message loaded before serializing,
+* ``stream``: ``stream_history`` over a server-side cursor.
+
+It reports elapsed time and the peak Python heap (``tracemalloc``) of each.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_chat_history.py
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from runcoach import models  # noqa: F401
+from runcoach.database import Base
+from runcoach.models.chat_message import ChatMessage
+from runcoach.schemas.chat import ChatMessageDetail
+from runcoach.services.chat_history import stream_history
+
+
+async def seed(session: AsyncSession, messages: int) -> object:
+    """Store ``messages`` messages for one athlete; returns the athlete's id."""
+    user_id = await session.scalar(
+        text(
+            "INSERT INTO users (id, invite_code, name, email, password_hash, "
+            "session_generation, created_at, updated_at) "
+            "VALUES (gen_random_uuid(), 'BENCH', 'Bench Runner', 'bench@example.com', "
+            "'x', 0, now(), now()) RETURNING id"
+        )
+    )
+    # A coach reply with the training context it was generated from
+    await session.execute(
+        text(
+            "INSERT INTO chat_messages (id, user_id, role, content, context_snapshot, "
+            "created_at) "
+            "SELECT gen_random_uuid(), :user_id, "
+            "CASE WHEN i % 2 = 0 THEN 'user' ELSE 'assistant' END, "
+            "repeat('How should I pace the long run this weekend? ', 8), "
+            "jsonb_build_object('recent_runs', (SELECT jsonb_agg(jsonb_build_object("
+            "'distance', 8000 + n, 'pace', 330 + n, 'heartrate', 150)) "
+            "FROM generate_series(1, 20) AS n)), "
+            "timestamp '2020-01-01' + i * interval '1 minute' "
+            "FROM generate_series(1, :messages) AS i"
+        ),
+        {"user_id": user_id, "messages": messages},
+    )
+    await session.execute(text("ANALYZE chat_messages"))
+    return user_id
+
+
+async def export_load_all(session: AsyncSession, user_id) -> int:
+    result = await session.execute(
+        select(ChatMessage)
+        .where(ChatMessage.user_id == user_id)
+        .order_by(ChatMessage.created_at, ChatMessage.id)
+    )
+    written = 0
+    for message in result.scalars().all():
+        written += len(ChatMessageDetail.model_validate(message).model_dump_json()) + 1
+    return written
+
+
+async def export_stream(session: AsyncSession, user_id) -> int:
+    written = 0
+    async for batch in stream_history(session, user_id, include_context=True):
+        written += len(
+            "".join(
+                ChatMessageDetail.model_validate(message).model_dump_json() + "\n"
+                for message in batch
+            )
+        )
+    return written
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50_000)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a scratch PostgreSQL database")
+
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    try:
+        async with session_maker() as session:
+            user_id = await seed(session, args.messages)
+            await session.commit()
+
+        print(f"{'path':<10} {'elapsed':>9} {'peak MiB':>9} {'NDJSON MiB':>11}")
+        for label, export in (("load-all", export_load_all), ("stream", export_stream)):
+            async with session_maker() as session:
+                tracemalloc.start()
+                started = time.perf_counter()
+                written = await export(session, user_id)
+                elapsed = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            print(
+                f"{label:<10} {elapsed:>8.2f}s {peak / 2**20:>9.1f} {written / 2**20:>11.1f}"
+            )
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+"""Benchmark: decoding an uploaded FIT activity.
+
+Builds a ``--hours`` activity recorded every second (heart rate, speed,
+cadence, altitude, position and distance, as a Garmin watch writes them)
+and times decoding it into per-second channels two ways:
+
+* ``fit_tool``: ``iter_fit_stream``, the streaming decoder of the FIT
+  library, which builds a message object per record,
+* ``read_activity``: the upload path's decoder (``services.fit_decoder``).
+
+Peak memory is traced with ``tracemalloc`` for ``read_activity`` alone, at
+``--hours`` and at a quarter of it, to show how it grows with the activity.
+No database is needed.
+
+Usage:
+    python benchmarks/bench_fit_decoder.py [--hours 6]
+"""
+
+import argparse
+import io
+import time
+import tracemalloc
+
+from fit_tool.fit_file_builder import FitFileBuilder
+from fit_tool.fit_file_stream import iter_fit_stream
+from fit_tool.profile.messages.file_id_message import FileIdMessage
+from fit_tool.profile.messages.record_message import RecordMessage
+from fit_tool.profile.messages.session_message import SessionMessage
+from fit_tool.profile.profile_type import FileType, Manufacturer, Sport
+
+from runcoach.services.fit_decoder import read_activity
+
+# 2025-05-04 06:00 UTC, in the milliseconds fit_tool takes
+START_MS = 1_746_338_400_000
+
+
+def build_activity(seconds: int) -> bytes:
+    builder = FitFileBuilder(auto_define=True)
+    file_id = FileIdMessage()
+    file_id.type = FileType.ACTIVITY
+    file_id.manufacturer = Manufacturer.GARMIN.value
+    file_id.time_created = START_MS
+    builder.add(file_id)
+    records = []
+    for second in range(seconds):
+        record = RecordMessage()
+        record.timestamp = START_MS + second * 1000
+        record.position_lat = 45.0 + second * 1e-5
+        record.position_long = 7.0 + second * 1e-5
+        record.altitude = 800 + (second % 600) / 3
+        record.distance = second * 2.8
+        record.speed = 2.5 + (second % 60) / 60
+        record.cadence = 84 + second % 6
+        record.heart_rate = 135 + second % 30
+        records.append(record)
+    builder.add_all(records)
+    session = SessionMessage()
+    session.timestamp = START_MS + seconds * 1000
+    session.sport = Sport.RUNNING
+    builder.add(session)
+    return builder.build().to_bytes()
+
+
+def best_of(repeat: int, func) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def peak_memory(data: bytes, max_seconds: int) -> tuple[int, int]:
+    tracemalloc.start()
+    channels = read_activity(io.BytesIO(data), max_seconds)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, channels.nbytes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=6)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    seconds = int(args.hours * 3600)
+    max_seconds = seconds * 2
+    started = time.perf_counter()
+    data = build_activity(seconds)
+    quarter = build_activity(seconds // 4)
+    print(
+        f"built {seconds:,} records ({len(data) / 1e6:.1f} MB) "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+    fit_tool_seconds = best_of(1, lambda: sum(1 for _ in iter_fit_stream(io.BytesIO(data))))
+    decoder_seconds = best_of(args.repeat, lambda: read_activity(io.BytesIO(data), max_seconds))
+    print(f"{'decoder':<16} {'seconds':>8} {'records/s':>11} {'MB/s':>7}")
+    for name, elapsed in (("fit_tool", fit_tool_seconds), ("read_activity", decoder_seconds)):
+        print(
+            f"{name:<16} {elapsed:>8.3f} {seconds / elapsed:>11,.0f} "
+            f"{len(data) / elapsed / 1e6:>7.1f}"
+        )
+
+    print(f"{'activity':<16} {'file MB':>8} {'channels MB':>12} {'peak MB':>8}")
+    for name, file in ((f"{args.hours / 4:g} h", quarter), (f"{args.hours:g} h", data)):
+        peak, channel_bytes = peak_memory(file, max_seconds)
+        print(f"{name:<16} {len(file) / 1e6:>8.2f} {channel_bytes / 1e6:>12.2f} {peak / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Benchmark: the nightly fitness batch for a thousand athletes.
+
+Creates the schema in the database named by ``BENCH_DATABASE_URL`` (it is
+dropped afterwards, so point it at a scratch database), seeds ``--users``
+athletes with about ``--per-week`` activities a week over ``--years`` years,
+and times:
+
+* a per-activity Python loop over every athlete's history, decaying fitness
+  and fatigue day by day, as the baseline,
+* ``refresh_fitness`` with no cached states, recomputing every athlete from
+  their whole history with the vectorized engine,
+* the next night's ``refresh_fitness``, resuming every athlete from their
+  cached state and folding in one day.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_fitness.py
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from runcoach import models  # noqa: F401
+from runcoach.config import get_settings
+from runcoach.database import Base
+from runcoach.partitions import ensure_partitions
+from runcoach.services.fitness import (
+    ASSUMED_HEART_RATE_RESERVE,
+    ATL_DAYS,
+    CTL_DAYS,
+    TRIMP_EXPONENT,
+    TRIMP_FACTOR,
+)
+from runcoach.workers.fitness import refresh_fitness
+
+settings = get_settings()
+
+SEED_SQL = """
+    INSERT INTO strava_activities (
+        id, user_id, strava_activity_id, activity_type, start_date,
+        distance_meters, moving_time_seconds, average_heartrate, created_at
+    )
+    SELECT
+        gen_random_uuid(),
+        user_ids[1 + i % array_length(user_ids, 1)],
+        i,
+        'Run',
+        CAST(:start AS timestamp)
+            + random() * (CAST(:end AS timestamp) - CAST(:start AS timestamp)),
+        5000 + random() * 15000,
+        1500 + (random() * 5000)::int,
+        CASE WHEN random() < 0.9 THEN 120 + random() * 50 END,
+        now()
+    FROM generate_series(1, :rows) AS i,
+         (SELECT array_agg(id) AS user_ids FROM users) AS u
+"""
+
+HISTORY_SQL = """
+    SELECT user_id, start_date, moving_time_seconds, average_heartrate
+    FROM strava_activities
+    WHERE start_date < :until
+    ORDER BY user_id, start_date
+"""
+
+
+def loop_fitness(activities: list, until: date) -> dict:
+    """The baseline: one athlete at a time, one activity and day at a time."""
+    resting, maximum = settings.fitness_resting_heartrate, settings.fitness_max_heartrate
+    ctl_decay = math.exp(-1.0 / CTL_DAYS)
+    atl_decay = math.exp(-1.0 / ATL_DAYS)
+    by_user: dict = {}
+    for user_id, start_date, moving_time, heartrate in activities:
+        if heartrate is None:
+            reserve = ASSUMED_HEART_RATE_RESERVE
+        else:
+            reserve = min(max((float(heartrate) - resting) / (maximum - resting), 0.0), 1.0)
+        load = (moving_time or 0) / 60 * reserve * TRIMP_FACTOR * math.exp(
+            TRIMP_EXPONENT * reserve
+        )
+        days = by_user.setdefault(user_id, {})
+        day = start_date.date()
+        days[day] = days.get(day, 0.0) + load
+
+    states = {}
+    for user_id, days in by_user.items():
+        ctl = atl = 0.0
+        day = min(days)
+        while day < until:
+            load = days.get(day, 0.0)
+            ctl = ctl_decay * ctl + (1 - ctl_decay) * load
+            atl = atl_decay * atl + (1 - atl_decay) * load
+            day += timedelta(days=1)
+        states[user_id] = (ctl, atl)
+    return states
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--per-week", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=settings.fitness_batch_size)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a scratch PostgreSQL database")
+
+    today = date.today()
+    start = today - timedelta(days=365 * args.years)
+    rows = args.users * args.per_week * 52 * args.years
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(
+                text(
+                    "INSERT INTO users (id, invite_code, name, email, password_hash, "
+                    "session_generation, created_at, updated_at) "
+                    "SELECT gen_random_uuid(), 'INVITE' || i, 'Runner ' || i, "
+                    "'runner' || i || '@example.com', 'x', 0, now(), now() "
+                    "FROM generate_series(1, :users) AS i"
+                ),
+                {"users": args.users},
+            )
+            await conn.run_sync(
+                lambda sync_conn: ensure_partitions(
+                    sync_conn, range(start.year, today.year + 1)
+                )
+            )
+            started = time.perf_counter()
+            await conn.execute(
+                text(SEED_SQL),
+                {
+                    "rows": rows,
+                    "start": datetime.combine(start, datetime.min.time()),
+                    # Through yesterday, which the next night folds in
+                    "end": datetime.combine(today, datetime.min.time()),
+                },
+            )
+            await conn.execute(text("ANALYZE strava_activities"))
+            print(f"seeded {rows:,} activities in {time.perf_counter() - started:.1f}s")
+
+        yesterday = today - timedelta(days=1)
+        async with engine.connect() as conn:
+            started = time.perf_counter()
+            history = (
+                await conn.execute(
+                    text(HISTORY_SQL),
+                    {"until": datetime.combine(yesterday, datetime.min.time())},
+                )
+            ).all()
+            read_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        baseline = loop_fitness(history, yesterday)
+        loop_seconds = time.perf_counter() - started
+
+        full = await refresh_fitness(engine, args.batch_size, today=yesterday)
+        async with engine.connect() as conn:
+            cached = dict(
+                (await conn.execute(text("SELECT user_id, ctl FROM athlete_fitness"))).all()
+            )
+        error = max(
+            abs(cached[user_id] - ctl) / max(ctl, 1e-9)
+            for user_id, (ctl, _) in baseline.items()
+        )
+        nightly = await refresh_fitness(engine, args.batch_size, today=today)
+
+        print(f"{'run':<28} {'athletes':>9} {'activities':>11} {'seconds':>9}")
+        print(
+            f"{'python loop (+ read)':<28} {len(baseline):>9} {len(history):>11,} "
+            f"{loop_seconds:>9.2f}  (+{read_seconds:.2f}s read)"
+        )
+        runs = (("vectorized, full history", full), ("vectorized, next night", nightly))
+        for name, report in runs:
+            print(
+                f"{name:<28} {report.athletes:>9} {report.activities:>11,} "
+                f"{report.seconds:>9.2f}"
+            )
+        print(f"max relative CTL difference from the loop: {error:.1e}")
+        print(f"athlete-days folded: full {full.days:,}, next night {nightly.days:,}")
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""Benchmark: hot query registry vs ad-hoc ``select()`` per call.
+
+Seeds users into the database named by ``BENCH_DATABASE_URL`` (the schema is
+created and dropped by the script, so point it at a scratch database) and
+times ``user_by_id`` lookups four ways: an ad-hoc ``select()`` built per
+call or the registry's pre-built statement, each with the asyncpg prepared
+statement cache enabled and disabled.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_hot_queries.py
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from runcoach import models  # noqa: F401
+from runcoach.database import Base
+from runcoach.models.user import User
+from runcoach.query_registry import USER_BY_ID
+
+
+async def seed(url: str, users: int) -> list:
+    """Create the schema and insert ``users`` rows, returning their ids."""
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        rows = [
+            {
+                "invite_code": f"INVITE{i}",
+                "name": f"Runner {i}",
+                "email": f"runner{i}@example.com",
+                "password_hash": "x",
+            }
+            for i in range(users)
+        ]
+        result = await conn.execute(insert(User).returning(User.id), rows)
+        user_ids = list(result.scalars())
+    await engine.dispose()
+    return user_ids
+
+
+async def drop(url: str) -> None:
+    """Drop the benchmark schema."""
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+async def time_lookups(
+    url: str,
+    user_ids: list,
+    lookups: int,
+    registry: bool,
+    cache_size: int,
+) -> float:
+    """Return the mean microseconds per lookup on one session."""
+    engine = create_async_engine(
+        url,
+        pool_size=1,
+        connect_args={"prepared_statement_cache_size": cache_size},
+    )
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    sample = random.Random(0).choices(user_ids, k=lookups)
+
+    async with session_maker() as session:
+        # Warm the connection, the compiled cache and the prepared statement
+        await session.execute(select(User).where(User.id == sample[0]))
+        started = time.perf_counter()
+        for user_id in sample:
+            if registry:
+                result = await USER_BY_ID.execute(session, user_id=user_id)
+            else:
+                result = await session.execute(select(User).where(User.id == user_id))
+            result.scalar_one()
+            session.expunge_all()
+        elapsed = time.perf_counter() - started
+
+    await engine.dispose()
+    return elapsed / lookups * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--lookups", type=int, default=5_000)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a scratch PostgreSQL database")
+
+    user_ids = await seed(url, args.users)
+    print(f"{'path':<10} {'stmt cache':>10} {'us/lookup':>10}")
+    try:
+        for registry in (False, True):
+            for cache_size in (0, 256):
+                per_call = await time_lookups(url, user_ids, args.lookups, registry, cache_size)
+                path = "registry" if registry else "ad-hoc"
+                print(f"{path:<10} {cache_size:>10} {per_call:>10.1f}")
+    finally:
+        await drop(url)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,162 @@
+"""Benchmark: notification dispatch throughput.
+
+Creates the schema in the database named by ``BENCH_DATABASE_URL`` (it is
+dropped afterwards, so point it at a scratch database), queues
+``--notifications`` due email notifications, ``--fan-in`` per user, and
+drains them through ``NotificationDispatcher`` against an in-process stub
+of the email API that answers after ``--latency-ms``. Configurations:
+
+* ``serial``: batches of one, one send at a time,
+* ``batched``: batches of 100, ``--concurrency`` sends at once,
+* ``batched x4``: four dispatchers sharing the queue, as four processes would,
+* ``digest``: batched, coalescing each user's notifications into one email.
+
+Every configuration must deliver each notification exactly once.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_notification_dispatch.py
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from collections import Counter
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from runcoach import models  # noqa: F401
+from runcoach.database import Base
+from runcoach.services.email import ResendEmailSender
+from runcoach.workers.notifications import NotificationDispatcher, email_channel
+
+
+def stub_email_api(latency: float, sends: Counter) -> Starlette:
+    async def send(request: Request) -> JSONResponse:
+        await asyncio.sleep(latency)
+        payload = await request.json()
+        sends[request.headers["idempotency-key"]] += payload["text"].count("---") + 1
+        return JSONResponse({"id": "stub"})
+
+    return Starlette(routes=[Route("/emails", send, methods=["POST"])])
+
+
+async def queue(session_maker, notifications: int) -> None:
+    async with session_maker() as session:
+        await session.execute(text("DELETE FROM notifications"))
+        await session.execute(
+            text(
+                "INSERT INTO notifications (id, user_id, notification_type, channel, "
+                "subject, content, scheduled_for, status, attempts, created_at) "
+                "SELECT gen_random_uuid(), users.id, "
+                "'workout_reminder', 'email', 'Tomorrow', 'Easy 5 miles', "
+                "now() - interval '1 minute', 'pending', 0, now() "
+                "FROM generate_series(1, :notifications) AS i "
+                "JOIN (SELECT id, row_number() OVER () - 1 AS n FROM users) AS users "
+                "ON users.n = i % (SELECT count(*) FROM users)"
+            ),
+            {"notifications": notifications},
+        )
+        await session.commit()
+
+
+async def drain(dispatcher: NotificationDispatcher) -> None:
+    while await dispatcher.dispatch_once():
+        pass
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notifications", type=int, default=2_000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--fan-in", type=int, default=3)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a scratch PostgreSQL database")
+
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            text(
+                "INSERT INTO users (id, invite_code, name, email, password_hash, "
+                "session_generation, created_at, updated_at) "
+                "SELECT gen_random_uuid(), 'BENCH-' || i, 'Bench Runner', "
+                "'bench' || i || '@example.com', 'x', 0, now(), now() "
+                "FROM generate_series(1, :users) AS i"
+            ),
+            {"users": max(1, args.notifications // args.fan_in)},
+        )
+
+    try:
+        print(
+            f"{'config':<12} {'elapsed':>9} {'sent/s':>9} {'API calls':>10} "
+            f"{'ratio':>6} {'duplicates':>11}"
+        )
+        for label, dispatchers, batch_size, concurrency, window in (
+            ("serial", 1, 1, 1, 0),
+            ("batched", 1, 100, args.concurrency, 0),
+            ("batched x4", 4, 100, args.concurrency, 0),
+            ("digest", 1, 100, args.concurrency, 1800),
+        ):
+            await queue(session_maker, args.notifications)
+            sends: Counter = Counter()
+            app = stub_email_api(args.latency_ms / 1000, sends)
+            senders = [
+                ResendEmailSender(
+                    api_key="bench",
+                    base_url="http://resend.test",
+                    from_address="coach@example.com",
+                    max_connections=concurrency,
+                    timeout=30.0,
+                    transport=httpx.ASGITransport(app=app),
+                )
+                for _ in range(dispatchers)
+            ]
+            workers = [
+                NotificationDispatcher(
+                    session_maker,
+                    channels={"email": email_channel(sender, concurrency)},
+                    batch_size=batch_size,
+                    lease_seconds=300,
+                    max_attempts=5,
+                    retry_base_seconds=30,
+                    retry_max_seconds=3600,
+                    digest_window_seconds=window,
+                )
+                for sender in senders
+            ]
+            started = time.perf_counter()
+            await asyncio.gather(*(drain(worker) for worker in workers))
+            elapsed = time.perf_counter() - started
+            for sender in senders:
+                await sender.aclose()
+
+            delivered = sum(sends.values())
+            calls = sum(worker.messages for worker in workers)
+            assert delivered >= args.notifications
+            print(
+                f"{label:<12} {elapsed:>8.2f}s "
+                f"{args.notifications / elapsed:>9,.0f} {calls:>10,} "
+                f"{delivered / calls:>6.2f} {delivered - args.notifications:>11}"
+            )
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""Benchmark: notification queue indexes and retention.
+
+Creates the schema in the database named by ``BENCH_DATABASE_URL`` (it is
+dropped afterwards, so point it at a scratch database) and fills
+``notifications`` with ``--notifications`` rows, of which ``--pending`` are
+still queued and the rest sent over the past year. Reports:
+
+* the size of the partial queue index next to a full ``(status,
+  scheduled_for)`` index over the same rows, and the claim query's time,
+* the table and index sizes before and after ``purge_notifications``
+  removes rows older than ``--days``.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_notification_retention.py
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from runcoach import models  # noqa: F401
+from runcoach.database import Base
+from runcoach.workers.notification_retention import purge_notifications, relation_sizes
+from runcoach.workers.notifications import CLAIM_DUE
+
+MIB = 1024 * 1024
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notifications", type=int, default=1_000_000)
+    parser.add_argument("--pending", type=int, default=2_000)
+    parser.add_argument("--days", type=int, default=90)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a scratch PostgreSQL database")
+
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(
+            text(
+                "INSERT INTO users (id, invite_code, name, email, password_hash, "
+                "session_generation, created_at, updated_at) "
+                "VALUES (gen_random_uuid(), 'BENCH', 'Bench Runner', "
+                "'bench@example.com', 'x', 0, now(), now())"
+            )
+        )
+        # Rows arrive in creation order, as they would in production
+        await conn.execute(
+            text(
+                "INSERT INTO notifications (id, user_id, notification_type, channel, "
+                "subject, content, scheduled_for, sent_at, status, attempts, created_at) "
+                "SELECT gen_random_uuid(), (SELECT id FROM users LIMIT 1), "
+                "'workout_reminder', 'email', 'Tomorrow', 'Easy 5 miles', at, "
+                "CASE WHEN pending THEN NULL ELSE at END, "
+                "CASE WHEN pending THEN 'pending' ELSE 'sent' END, 1, at "
+                "FROM (SELECT now() - interval '365 days' * (1 - i::float / :total) AS at, "
+                "i > :total - :pending AS pending "
+                "FROM generate_series(1, :total) AS i) AS rows"
+            ),
+            {"total": args.notifications, "pending": args.pending},
+        )
+        await conn.execute(text("CREATE INDEX bench_full ON notifications (status, scheduled_for)"))
+    async with engine.connect() as conn:
+        autocommit = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await autocommit.execute(text("VACUUM (ANALYZE) notifications"))
+
+    try:
+        async with engine.connect() as conn:
+            sizes = await relation_sizes(conn, "notifications")
+        print(f"{'index':<32} {'size':>10}")
+        for name in ("bench_full", "idx_notifications_pending", "idx_notifications_sending"):
+            print(f"{name:<32} {sizes.index_bytes[name] / MIB:>8.2f} MiB")
+
+        now = datetime.utcnow()
+        params = {"now": now, "lease_until": now, "batch_size": 100, "max_attempts": 5}
+        async with engine.connect() as conn:
+            started = time.perf_counter()
+            for _ in range(100):
+                await conn.execute(CLAIM_DUE, params)
+                await conn.rollback()
+            elapsed = (time.perf_counter() - started) / 100
+        print(f"claim of 100: {elapsed * 1000:.2f} ms")
+
+        async with engine.begin() as conn:
+            await conn.execute(text("DROP INDEX bench_full"))
+        started = time.perf_counter()
+        report = await purge_notifications(
+            engine,
+            older_than=timedelta(days=args.days),
+            batch_size=5_000,
+        )
+        elapsed = time.perf_counter() - started
+        print(
+            f"\npurged {report.removed:,} rows in {report.batches} batches, "
+            f"{elapsed:.1f}s"
+        )
+        print(f"{'relation':<32} {'before':>10} {'after':>10}")
+        print(
+            f"{'notifications (heap)':<32} {report.before.table_bytes / MIB:>6.2f} MiB "
+            f"{report.after.table_bytes / MIB:>6.2f} MiB"
+        )
+        for name, before in report.before.index_bytes.items():
+            after = report.after.index_bytes[name]
+            print(f"{name:<32} {before / MIB:>6.2f} MiB {after / MIB:>6.2f} MiB")
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
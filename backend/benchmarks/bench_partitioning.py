@@ -0,0 +1,187 @@
+"""Benchmark: partitioned vs unpartitioned ``strava_activities``.
+
+Creates the schema in the database named by ``BENCH_DATABASE_URL`` (it is
+dropped afterwards, so point it at a scratch database) and seeds the same
+synthetic activities, spread over 2012 to today, into two layouts:
+
+* ``flat``: a plain table with the pre-partitioning indexes,
+* ``partitioned``: the yearly-partitioned ``strava_activities``.
+
+It then times the date-bounded reads the app issues: one athlete's last 4
+and 52 weeks, and an all-athlete aggregate over the last 4 weeks.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_partitioning.py
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from runcoach import models  # noqa: F401
+from runcoach.database import Base
+from runcoach.services.activities import recent_window
+
+FLAT_TABLE = "strava_activities_flat"
+
+SEED_SQL = f"""
+    INSERT INTO {FLAT_TABLE} (
+        id, user_id, strava_activity_id, activity_type, start_date,
+        distance_meters, moving_time_seconds, elapsed_time_seconds,
+        average_heartrate, max_heartrate, average_pace_seconds_per_meter, created_at
+    )
+    SELECT
+        gen_random_uuid(),
+        user_ids[1 + i % array_length(user_ids, 1)],
+        i,
+        'Run',
+        timestamp '2012-01-01'
+            + random() * (now()::timestamp - timestamp '2012-01-01'),
+        5000 + random() * 15000,
+        1500 + (random() * 5000)::int,
+        1600 + (random() * 5000)::int,
+        130 + random() * 40,
+        160 + random() * 30,
+        0.3,
+        now()
+    FROM generate_series(1, :rows) AS i,
+         (SELECT array_agg(id) AS user_ids FROM users) AS u
+"""
+
+READS = {
+    "user last 4w": (
+        "SELECT * FROM {table} WHERE user_id = :user_id "
+        "AND start_date >= :start AND start_date < :end ORDER BY start_date, id",
+        4,
+    ),
+    "user last 52w": (
+        "SELECT * FROM {table} WHERE user_id = :user_id "
+        "AND start_date >= :start AND start_date < :end ORDER BY start_date, id",
+        52,
+    ),
+    "all users 4w agg": (
+        "SELECT count(*), sum(distance_meters) FROM {table} "
+        "WHERE start_date >= :start AND start_date < :end",
+        4,
+    ),
+}
+
+
+async def seed(conn: AsyncConnection, rows: int, users: int) -> list:
+    """Seed both layouts with the same rows; returns the user ids."""
+    await conn.execute(
+        text(
+            "INSERT INTO users (id, invite_code, name, email, password_hash, "
+            "session_generation, created_at, updated_at) "
+            "SELECT gen_random_uuid(), 'INVITE' || i, 'Runner ' || i, "
+            "'runner' || i || '@example.com', 'x', 0, now(), now() "
+            "FROM generate_series(1, :users) AS i"
+        ),
+        {"users": users},
+    )
+    await conn.execute(
+        text(
+            f"CREATE TABLE {FLAT_TABLE} "
+            "(LIKE strava_activities INCLUDING DEFAULTS, PRIMARY KEY (id), "
+            "UNIQUE (strava_activity_id))"
+        )
+    )
+    await conn.execute(
+        text(f"CREATE INDEX idx_{FLAT_TABLE}_user_date ON {FLAT_TABLE} (user_id, start_date)")
+    )
+    await conn.execute(text(SEED_SQL), {"rows": rows})
+
+    # Copy across with the per-row key trigger off; keys are claimed in bulk
+    await conn.execute(
+        text(
+            "INSERT INTO strava_activity_keys "
+            "(strava_activity_id, activity_id, user_id, start_date) "
+            f"SELECT strava_activity_id, id, user_id, start_date FROM {FLAT_TABLE}"
+        )
+    )
+    await conn.execute(
+        text("ALTER TABLE strava_activities DISABLE TRIGGER strava_activities_claim_key")
+    )
+    await conn.execute(text(f"INSERT INTO strava_activities SELECT * FROM {FLAT_TABLE}"))
+    await conn.execute(
+        text("ALTER TABLE strava_activities ENABLE TRIGGER strava_activities_claim_key")
+    )
+    await conn.execute(text(f"ANALYZE {FLAT_TABLE}"))
+    await conn.execute(text("ANALYZE strava_activities"))
+    result = await conn.execute(text("SELECT id FROM users"))
+    return list(result.scalars())
+
+
+async def time_read(
+    conn: AsyncConnection,
+    sql: str,
+    weeks: int,
+    user_ids: list,
+    iterations: int,
+) -> list[float]:
+    """Return per-query milliseconds for ``iterations`` runs of ``sql``."""
+    start, end = recent_window(weeks)
+    users = random.Random(0).choices(user_ids, k=iterations)
+    statement = text(sql)
+    # Warm caches and the prepared statement
+    await conn.execute(statement, {"user_id": users[0], "start": start, "end": end})
+
+    timings = []
+    for user_id in users:
+        started = time.perf_counter()
+        result = await conn.execute(statement, {"user_id": user_id, "start": start, "end": end})
+        result.all()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a scratch PostgreSQL database")
+
+    engine = create_async_engine(url)
+    try:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {FLAT_TABLE}"))
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            started = time.perf_counter()
+            user_ids = await seed(conn, args.rows, args.users)
+            print(f"seeded {args.rows:,} rows per layout in {time.perf_counter() - started:.1f}s")
+
+        print(f"{'read':<18} {'layout':<12} {'mean ms':>9} {'p95 ms':>9}")
+        async with engine.connect() as conn:
+            for name, (sql, weeks) in READS.items():
+                for layout, table in (("flat", FLAT_TABLE), ("partitioned", "strava_activities")):
+                    timings = await time_read(
+                        conn,
+                        sql.format(table=table),
+                        weeks,
+                        user_ids,
+                        args.iterations,
+                    )
+                    p95 = statistics.quantiles(timings, n=20)[-1]
+                    print(f"{name:<18} {layout:<12} {statistics.mean(timings):>9.2f} {p95:>9.2f}")
+    finally:
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {FLAT_TABLE}"))
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,138 @@
+"""Benchmark: bulk Strava ingest vs one ORM insert per activity.
+
+Creates the schema in the database named by ``BENCH_DATABASE_URL`` (it is
+dropped afterwards, so point it at a scratch database), then ingests a
+synthetic first sync of ``--activities`` summaries for one athlete in pages
+of ``--page-size``, as the Strava list endpoint would return them:
+
+* ``per-row``: ``session.add`` for each activity and payload, flushed per page,
+* ``upsert``: ``ingest_activity_pages`` (activity and payload upserts per page),
+* ``re-sync``: the same pages again through the upsert, which should write
+  nothing.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_strava_ingest.py
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from runcoach import models  # noqa: F401
+from runcoach.database import Base
+from runcoach.models.strava_activity import StravaActivity, StravaActivityPayload
+from runcoach.models.user import User
+from runcoach.services.strava_ingest import activity_row, ingest_activity_pages
+
+
+def make_pages(activities: int, page_size: int) -> list[list[dict]]:
+    """Build ``activities`` synthetic summaries, newest first, in pages."""
+    first_day = datetime(2015, 1, 1, 6, 30)
+    summaries = [
+        {
+            "id": 10_000_000_000 + i,
+            "name": f"Morning Run {i}",
+            "type": "Run",
+            "sport_type": "Run",
+            "start_date": (first_day + timedelta(hours=9 * i)).isoformat() + "Z",
+            "distance": 5000.0 + (i % 150) * 100,
+            "moving_time": 1500 + (i % 150) * 30,
+            "elapsed_time": 1600 + (i % 150) * 30,
+            "total_elevation_gain": float(i % 80),
+            "average_speed": 3.2,
+            "max_speed": 4.8,
+            "average_heartrate": 140.0 + i % 20,
+            "max_heartrate": 165.0 + i % 20,
+            "has_heartrate": True,
+        }
+        for i in reversed(range(activities))
+    ]
+    return [summaries[i : i + page_size] for i in range(0, len(summaries), page_size)]
+
+
+async def ingest_per_row(session: AsyncSession, user_id, pages: list[list[dict]]) -> None:
+    """Baseline: ORM objects for each activity and its payload."""
+    for page in pages:
+        for summary in page:
+            session.add(StravaActivity(**activity_row(user_id, summary)))
+        # Payloads reference the keys the activity inserts claim
+        await session.flush()
+        for summary in page:
+            session.add(StravaActivityPayload(strava_activity_id=summary["id"], raw_data=summary))
+        await session.flush()
+
+
+async def timed(session_maker, label: str, activities: int, run) -> None:
+    async with session_maker() as session:
+        started = time.perf_counter()
+        await run(session)
+        await session.commit()
+        elapsed = time.perf_counter() - started
+    print(f"{label:<10} {elapsed:>9.2f}s {activities / elapsed:>12,.0f}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--activities", type=int, default=10_000)
+    parser.add_argument("--page-size", type=int, default=200)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a scratch PostgreSQL database")
+
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    pages = make_pages(args.activities, args.page_size)
+    try:
+        async with session_maker() as session:
+            user = User(
+                invite_code="BENCH",
+                name="Bench Runner",
+                email="bench@example.com",
+                password_hash="x",
+            )
+            session.add(user)
+            await session.commit()
+
+        print(f"{'path':<10} {'elapsed':>10} {'activities/s':>12}")
+        await timed(
+            session_maker,
+            "per-row",
+            args.activities,
+            lambda session: ingest_per_row(session, user.id, pages),
+        )
+        async with session_maker() as session:
+            await session.execute(delete(StravaActivity))
+            await session.commit()
+
+        await timed(
+            session_maker,
+            "upsert",
+            args.activities,
+            lambda session: ingest_activity_pages(session, user.id, pages),
+        )
+        await timed(
+            session_maker,
+            "re-sync",
+            args.activities,
+            lambda session: ingest_activity_pages(session, user.id, pages),
+        )
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,224 @@
+"""Benchmark: weekly training load from buckets vs from a scan of activities.
+
+Creates the schema in the database named by ``BENCH_DATABASE_URL`` (it is
+dropped afterwards, so point it at a scratch database), seeds synthetic
+activities spread over the last few years, and times:
+
+* reads of one athlete's weekly totals over 12 and 104 weeks, as SQL
+  aggregating ``strava_activities`` against SQL reading the
+  ``weekly_training_load`` buckets, and ``get_training_load`` end to end,
+* the cost the triggers add to ingesting a page of activities.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_training_load.py
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import UTC, date, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, async_sessionmaker, create_async_engine
+
+from runcoach import models  # noqa: F401
+from runcoach.database import Base
+from runcoach.partitions import ensure_partitions
+from runcoach.services.strava_ingest import ingest_activity_page
+from runcoach.services.training_load import CHRONIC_WEEKS, get_training_load
+
+START_YEAR = 2022
+
+SEED_SQL = """
+    INSERT INTO strava_activities (
+        id, user_id, strava_activity_id, activity_type, start_date,
+        distance_meters, moving_time_seconds, suffer_score, created_at
+    )
+    SELECT
+        gen_random_uuid(),
+        user_ids[1 + i % array_length(user_ids, 1)],
+        i,
+        CASE WHEN i % 5 = 0 THEN 'Ride' ELSE 'Run' END,
+        timestamp '2022-01-01'
+            + random() * (now()::timestamp - timestamp '2022-01-01'),
+        5000 + random() * 15000,
+        1500 + (random() * 5000)::int,
+        (random() * 150)::int,
+        now()
+    FROM generate_series(1, :rows) AS i,
+         (SELECT array_agg(id) AS user_ids FROM users) AS u
+"""
+
+SCAN_SQL = """
+    SELECT date_trunc('week', start_date)::date AS week_start,
+        count(*), sum(moving_time_seconds), sum(suffer_score),
+        count(*) FILTER (WHERE activity_type IN ('Run', 'TrailRun', 'VirtualRun')),
+        sum(distance_meters)
+            FILTER (WHERE activity_type IN ('Run', 'TrailRun', 'VirtualRun'))
+    FROM strava_activities
+    WHERE user_id = :user_id AND start_date >= :start AND start_date < :end
+    GROUP BY 1
+    ORDER BY 1
+"""
+
+BUCKET_SQL = """
+    SELECT * FROM weekly_training_load
+    WHERE user_id = :user_id AND week_start >= :start AND week_start < :end
+    ORDER BY week_start
+"""
+
+
+async def seed(conn: AsyncConnection, rows: int, users: int) -> list:
+    """Seed users and activities; returns the user ids."""
+    await conn.execute(
+        text(
+            "INSERT INTO users (id, invite_code, name, email, password_hash, "
+            "session_generation, created_at, updated_at) "
+            "SELECT gen_random_uuid(), 'INVITE' || i, 'Runner ' || i, "
+            "'runner' || i || '@example.com', 'x', 0, now(), now() "
+            "FROM generate_series(1, :users) AS i"
+        ),
+        {"users": users},
+    )
+    await conn.run_sync(
+        lambda sync_conn: ensure_partitions(
+            sync_conn, range(START_YEAR, date.today().year + 1)
+        )
+    )
+    await conn.execute(text(SEED_SQL), {"rows": rows})
+    await conn.execute(text("ANALYZE strava_activities"))
+    await conn.execute(text("ANALYZE weekly_training_load"))
+    result = await conn.execute(text("SELECT id FROM users"))
+    return list(result.scalars())
+
+
+def summarize(timings: list[float]) -> str:
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    return f"{statistics.mean(timings):>9.2f} {p95:>9.2f}"
+
+
+async def time_sql(engine, sql: str, weeks: int, users: list) -> list[float]:
+    """Per-read milliseconds for ``sql`` over ``weeks`` weeks and the baseline."""
+    today = date.today()
+    end = today - timedelta(days=today.weekday()) + timedelta(weeks=1)
+    start = end - timedelta(weeks=weeks + CHRONIC_WEEKS)
+    statement = text(sql)
+    timings = []
+    async with engine.connect() as conn:
+        for user_id in users:
+            started = time.perf_counter()
+            result = await conn.execute(
+                statement,
+                {"user_id": user_id, "start": start, "end": end},
+            )
+            result.all()
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def time_buckets(session_maker, weeks: int, users: list) -> list[float]:
+    """Per-read milliseconds for ``get_training_load``."""
+    timings = []
+    for user_id in users:
+        # A session per read, as per request
+        async with session_maker() as session:
+            started = time.perf_counter()
+            await get_training_load(session, user_id, weeks)
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def time_ingest(
+    session_maker,
+    user_id,
+    first_id: int,
+    pages: int,
+    page_size: int,
+) -> list[float]:
+    """Per-page milliseconds ingesting new activities into this week."""
+    now = datetime.now(UTC).replace(tzinfo=None)
+    timings = []
+    for page in range(pages):
+        summaries = [
+            {
+                "id": first_id + page * page_size + i,
+                "type": "Run",
+                "start_date": f"{(now - timedelta(minutes=i)).isoformat()}Z",
+                "distance": 8000.0,
+                "moving_time": 2400,
+            }
+            for i in range(page_size)
+        ]
+        async with session_maker() as session:
+            started = time.perf_counter()
+            await ingest_activity_page(session, user_id, summaries)
+            await session.commit()
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    # About seven activities a week each
+    parser.add_argument("--users", type=int, default=700)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a scratch PostgreSQL database")
+
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+            started = time.perf_counter()
+            user_ids = await seed(conn, args.rows, args.users)
+            print(f"seeded {args.rows:,} activities in {time.perf_counter() - started:.1f}s")
+
+        users = random.Random(0).choices(user_ids, k=args.iterations)
+        print(f"{'read':<22} {'mean ms':>9} {'p95 ms':>9}")
+        for weeks in (12, 104):
+            for name, sql in (("scan", SCAN_SQL), ("buckets", BUCKET_SQL)):
+                # Warm caches
+                await time_sql(engine, sql, weeks, users[:5])
+                timings = await time_sql(engine, sql, weeks, users)
+                print(f"{f'{name} sql {weeks}w':<22} {summarize(timings)}")
+            await time_buckets(session_maker, weeks, users[:5])
+            timings = await time_buckets(session_maker, weeks, users)
+            print(f"{f'get_training_load {weeks}w':<22} {summarize(timings)}")
+
+        pages = max(args.iterations // 10, 5)
+        with_triggers = await time_ingest(
+            session_maker, users[0], 10_000_000_000, pages, args.page_size
+        )
+        async with engine.begin() as conn:
+            for event in ("insert", "update", "delete"):
+                await conn.execute(
+                    text(
+                        "ALTER TABLE strava_activities "
+                        f"DISABLE TRIGGER strava_activities_load_{event}"
+                    )
+                )
+        without_triggers = await time_ingest(
+            session_maker, users[1], 20_000_000_000, pages, args.page_size
+        )
+        print(f"{f'ingest {args.page_size}/page':<22} {'mean ms':>9} {'p95 ms':>9}")
+        print(f"{'  with triggers':<22} {summarize(with_triggers)}")
+        print(f"{'  without triggers':<22} {summarize(without_triggers)}")
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,168 @@
+"""Benchmark: keyset vs OFFSET pagination of the workout calendar.
+
+Creates the schema in the database named by ``BENCH_DATABASE_URL`` (it is
+dropped afterwards, so point it at a scratch database) and schedules
+``--workouts`` workouts for each of ``--users`` athletes. It then times
+reading one page of ``--page-size`` workouts at increasing depths into one
+athlete's calendar, two ways:
+
+* ``offset``: ``ORDER BY scheduled_date, id LIMIT n OFFSET depth``,
+* ``keyset``: ``get_calendar_page`` seeking past the previous page's last row.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_workout_calendar.py
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import date
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import load_only
+
+from runcoach import models  # noqa: F401
+from runcoach.database import Base
+from runcoach.models.workout import Workout
+from runcoach.services.workouts import get_calendar_page
+
+CALENDAR_COLUMNS = (
+    Workout.id,
+    Workout.training_plan_id,
+    Workout.scheduled_date,
+    Workout.workout_type,
+    Workout.title,
+    Workout.estimated_duration_minutes,
+    Workout.estimated_distance_meters,
+    Workout.status,
+)
+START = date(2020, 1, 1)
+END = date(2030, 1, 1)
+
+
+async def seed(session: AsyncSession, users: int, workouts: int) -> object:
+    """Schedule workouts for every athlete; returns one athlete's id."""
+    await session.execute(
+        text(
+            "INSERT INTO users (id, invite_code, name, email, password_hash, "
+            "session_generation, created_at, updated_at) "
+            "SELECT gen_random_uuid(), 'INVITE' || i, 'Runner ' || i, "
+            "'runner' || i || '@example.com', 'x', 0, now(), now() "
+            "FROM generate_series(1, :users) AS i"
+        ),
+        {"users": users},
+    )
+    await session.execute(
+        text(
+            "INSERT INTO training_plans (id, user_id, title, start_date, end_date, "
+            "status, created_at, updated_at) "
+            "SELECT gen_random_uuid(), id, 'Plan', date '2020-01-01', date '2030-01-01', "
+            "'active', now(), now() FROM users"
+        )
+    )
+    # Two workouts a day, each with a plan-sized structure document
+    await session.execute(
+        text(
+            "INSERT INTO workouts (id, training_plan_id, user_id, scheduled_date, "
+            "workout_type, title, description, structure, status, created_at, updated_at) "
+            "SELECT gen_random_uuid(), p.id, p.user_id, date '2020-01-01' + i / 2, "
+            "'easy', 'Easy run', repeat('Keep it conversational. ', 20), "
+            "jsonb_build_object('steps', (SELECT jsonb_agg(jsonb_build_object("
+            "'type', 'run', 'minutes', n, 'pace', 'easy')) FROM generate_series(1, 12) AS n)), "
+            "'scheduled', now(), now() "
+            "FROM training_plans AS p, generate_series(0, :workouts - 1) AS i"
+        ),
+        {"workouts": workouts},
+    )
+    await session.execute(text("ANALYZE workouts"))
+    return await session.scalar(text("SELECT id FROM users LIMIT 1"))
+
+
+async def time_offset(session: AsyncSession, user_id, depth: int, page_size: int) -> float:
+    statement = (
+        select(Workout)
+        .options(load_only(*CALENDAR_COLUMNS))
+        .where(Workout.user_id == user_id)
+        .order_by(Workout.scheduled_date, Workout.id)
+        .limit(page_size)
+        .offset(depth)
+    )
+    started = time.perf_counter()
+    (await session.execute(statement)).scalars().all()
+    return (time.perf_counter() - started) * 1000
+
+
+async def time_keyset(session: AsyncSession, user_id, after, page_size: int) -> float:
+    started = time.perf_counter()
+    await get_calendar_page(session, user_id, START, END, page_size, after=after)
+    return (time.perf_counter() - started) * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--workouts", type=int, default=5_000)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a scratch PostgreSQL database")
+
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    try:
+        async with session_maker() as session:
+            user_id = await seed(session, args.users, args.workouts)
+            await session.commit()
+
+        depths = [0, args.workouts // 10, args.workouts // 2, args.workouts - args.page_size]
+        print(f"{'depth':>7} {'offset ms':>10} {'keyset ms':>10}")
+        async with session_maker() as session:
+            # The sort key of the row just before each depth, as a client
+            # paging through would hold in its cursor
+            keys = {}
+            for depth in depths:
+                if depth == 0:
+                    keys[depth] = None
+                    continue
+                row = (
+                    await session.execute(
+                        select(Workout.scheduled_date, Workout.id)
+                        .where(Workout.user_id == user_id)
+                        .order_by(Workout.scheduled_date, Workout.id)
+                        .offset(depth - 1)
+                        .limit(1)
+                    )
+                ).one()
+                keys[depth] = tuple(row)
+
+            for depth in depths:
+                offset_ms, keyset_ms = [], []
+                for _ in range(args.repeat):
+                    offset_ms.append(await time_offset(session, user_id, depth, args.page_size))
+                    keyset_ms.append(
+                        await time_keyset(session, user_id, keys[depth], args.page_size)
+                    )
+                    session.expunge_all()
+                print(
+                    f"{depth:>7} {statistics.median(offset_ms):>10.2f} "
+                    f"{statistics.median(keyset_ms):>10.2f}"
+                )
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""Benchmark: exporting a plan week as FIT workout files.
+
+Builds ``--weeks`` weeks of six structured workouts (warm-up, a repeat block
+of intervals and recoveries, cool-down) and times rendering each week and
+streaming it as a zip, the way ``GET /workouts/export`` does:
+
+* ``cold``: an empty cache, so every workout is encoded,
+* ``cached``: the same weeks again, every file from the cache,
+* ``one changed``: one workout of each week edited, so one file is encoded.
+
+No database is needed.
+
+Usage:
+    python benchmarks/bench_workout_export.py [--weeks 50]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from runcoach.services.workout_export import render_workouts, stream_zip, workout_file_cache
+
+START = date(2025, 1, 6)
+
+
+def make_week(week: int) -> list[SimpleNamespace]:
+    workouts = []
+    for day in range(6):
+        repeats = 4 + (week + day) % 6
+        workouts.append(
+            SimpleNamespace(
+                id=uuid.uuid4(),
+                scheduled_date=START + timedelta(weeks=week, days=day),
+                workout_type="intervals",
+                title=f"{repeats} x 800m",
+                structure={
+                    "steps": [
+                        {"type": "warmup", "minutes": 15},
+                        {
+                            "repeat": repeats,
+                            "steps": [
+                                {"type": "interval", "meters": 800, "pace": ["3:55", "4:05"]},
+                                {"type": "recovery", "seconds": 90},
+                            ],
+                        },
+                        {"type": "cooldown", "minutes": 10, "heart_rate": [120, 145]},
+                    ]
+                },
+                estimated_duration_minutes=None,
+                estimated_distance_meters=None,
+            )
+        )
+    return workouts
+
+
+async def export(weeks: list[list[SimpleNamespace]]) -> list[float]:
+    timings = []
+    for workouts in weeks:
+        started = time.perf_counter()
+        files = await render_workouts(workouts)
+        for _ in stream_zip(files):
+            pass
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=50)
+    args = parser.parse_args()
+
+    weeks = [make_week(week) for week in range(args.weeks)]
+    timings = {"cold": await export(weeks), "cached": await export(weeks)}
+    for workouts in weeks:
+        workouts[0].structure = {"steps": [{"type": "easy", "minutes": 45}]}
+    timings["one changed"] = await export(weeks)
+
+    print(f"{'per week':<12} {'median ms':>10} {'max ms':>8}")
+    for name, seconds in timings.items():
+        print(
+            f"{name:<12} {statistics.median(seconds) * 1000:>10.2f} "
+            f"{max(seconds) * 1000:>8.2f}"
+        )
+    print(workout_file_cache.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,197 @@
+"""Benchmark: matching a season of activities to scheduled workouts.
+
+Creates the schema in the database named by ``BENCH_DATABASE_URL`` (it is
+dropped afterwards, so point it at a scratch database) and gives each of
+``--users`` athletes a ``--weeks``-week plan of six workouts and a rest day a
+week, and a run for most workouts, some a day early or late. It then times:
+
+* the in-memory matcher on each athlete's rows, two ways: ``all pairs``
+  compares every activity with every workout, ``indexed`` bisects the sorted
+  workout dates (``match_workouts``),
+* the backfill, ``match_activities`` over each athlete's whole season in its
+  own transaction: both reads, the matching and the batched insert.
+
+Usage:
+    BENCH_DATABASE_URL=postgresql+asyncpg://... python benchmarks/bench_workout_matching.py
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from runcoach import models  # noqa: F401
+from runcoach.config import get_settings
+from runcoach.database import Base
+from runcoach.partitions import ensure_partitions
+from runcoach.query_registry import (
+    OPEN_WORKOUTS_BY_USER_DATE_RANGE,
+    UNMATCHED_ACTIVITIES_BY_USER_DATE_RANGE,
+)
+from runcoach.services.workout_matching import (
+    ACTIVITY_SPORTS,
+    DEFAULT_SPORTS,
+    OTHER,
+    WORKOUT_SPORTS,
+    WorkoutMatch,
+    deviation,
+    match_activities,
+    match_workouts,
+)
+
+settings = get_settings()
+
+START = date(2025, 1, 6)
+
+SEED_SQL = [
+    "INSERT INTO users (id, invite_code, name, email, password_hash, "
+    "session_generation, created_at, updated_at) "
+    "SELECT gen_random_uuid(), 'INVITE' || i, 'Runner ' || i, "
+    "'runner' || i || '@example.com', 'x', 0, now(), now() "
+    "FROM generate_series(1, :users) AS i",
+    "INSERT INTO training_plans (id, user_id, title, start_date, end_date, "
+    "status, created_at, updated_at) "
+    "SELECT gen_random_uuid(), id, 'Plan', CAST(:start AS date), CAST(:start AS date) + 7 * :weeks, "
+    "'active', now(), now() FROM users",
+    # Sundays off; the rest between 5 and 20 km
+    "INSERT INTO workouts (id, training_plan_id, user_id, scheduled_date, "
+    "workout_type, title, structure, estimated_distance_meters, status, "
+    "created_at, updated_at) "
+    "SELECT gen_random_uuid(), p.id, p.user_id, CAST(:start AS date) + d, "
+    "CASE WHEN d % 7 = 6 THEN 'rest' ELSE 'easy' END, 'Run', '{}', "
+    "CASE WHEN d % 7 <> 6 THEN 5000 + (random() * 15000)::int END, "
+    "'scheduled', now(), now() "
+    "FROM training_plans AS p, generate_series(0, 7 * :weeks - 1) AS d",
+    # Nine in ten workouts run, one in five of those a day either side
+    "INSERT INTO strava_activities (id, user_id, strava_activity_id, "
+    "activity_type, start_date, distance_meters, moving_time_seconds, created_at) "
+    "SELECT gen_random_uuid(), user_id, row_number() OVER (), 'Run', "
+    "scheduled_date + CASE WHEN random() < 0.2 THEN (random() * 2)::int * 2 - 1 ELSE 0 END "
+    "+ time '07:00', estimated_distance_meters * (0.85 + random() * 0.3), "
+    "estimated_distance_meters * 0.3, now() "
+    "FROM workouts WHERE workout_type <> 'rest' AND random() < 0.9",
+]
+
+
+def match_all_pairs(workouts, activities, day_window: int, tolerance: float) -> list:
+    """The baseline: every activity compared with every workout.
+
+    ``workouts`` in ``(scheduled_date, id)`` order, as read, so ties go the
+    same way as in ``match_workouts``.
+    """
+    claimed = set()
+    matches = []
+    for activity in sorted(activities, key=lambda activity: (activity.start_date, activity.id)):
+        day = activity.start_date.date()
+        sport = ACTIVITY_SPORTS.get(activity.activity_type, OTHER)
+        best, best_key = None, None
+        for workout in workouts:
+            days = abs((workout.scheduled_date - day).days)
+            if (
+                workout.id in claimed
+                or days > day_window
+                or sport not in WORKOUT_SPORTS.get(workout.workout_type, DEFAULT_SPORTS)
+            ):
+                continue
+            off = deviation(workout, activity)
+            if off <= tolerance and (best_key is None or (days, off) < best_key):
+                best, best_key = workout, (days, off)
+        if best is not None:
+            claimed.add(best.id)
+            matches.append(WorkoutMatch(best.id, activity.id))
+    return matches
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--weeks", type=int, default=26)
+    args = parser.parse_args()
+
+    url = os.environ.get("BENCH_DATABASE_URL")
+    if not url:
+        sys.exit("Set BENCH_DATABASE_URL to a scratch PostgreSQL database")
+
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    end = START + timedelta(weeks=args.weeks)
+    season = {
+        "start": datetime.combine(START - timedelta(days=1), datetime.min.time()),
+        "end": datetime.combine(end + timedelta(days=1), datetime.min.time()),
+    }
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(
+                lambda sync_conn: ensure_partitions(sync_conn, range(START.year, end.year + 1))
+            )
+            for statement in SEED_SQL:
+                await conn.execute(
+                    text(statement),
+                    {"users": args.users, "weeks": args.weeks, "start": START},
+                )
+            await conn.execute(text("ANALYZE"))
+            user_ids = (await conn.execute(text("SELECT id FROM users"))).scalars().all()
+            activities = await conn.scalar(text("SELECT count(*) FROM strava_activities"))
+        print(
+            f"{args.users} athletes, {args.weeks} weeks: "
+            f"{args.users * args.weeks * 7:,} workouts, {activities:,} activities"
+        )
+
+        window, tolerance = settings.workout_match_day_window, settings.workout_match_tolerance
+        timings: dict[str, list[float]] = {"all pairs": [], "indexed": [], "backfill": []}
+        matched = 0
+        for user_id in user_ids:
+            async with session_maker() as session:
+                workout_rows = (
+                    await OPEN_WORKOUTS_BY_USER_DATE_RANGE.execute(
+                        session,
+                        user_id=user_id,
+                        start=START - timedelta(days=window),
+                        end=end + timedelta(days=window + 1),
+                    )
+                ).all()
+                activity_rows = (
+                    await UNMATCHED_ACTIVITIES_BY_USER_DATE_RANGE.execute(
+                        session, user_id=user_id, **season
+                    )
+                ).all()
+            started = time.perf_counter()
+            baseline = match_all_pairs(workout_rows, activity_rows, window, tolerance)
+            timings["all pairs"].append(time.perf_counter() - started)
+            started = time.perf_counter()
+            indexed = match_workouts(workout_rows, activity_rows, window, tolerance)
+            timings["indexed"].append(time.perf_counter() - started)
+            if indexed != baseline:
+                sys.exit(f"matchers disagree for athlete {user_id}")
+
+            started = time.perf_counter()
+            async with session_maker() as session:
+                matched += len(await match_activities(session, user_id, **season))
+                await session.commit()
+            timings["backfill"].append(time.perf_counter() - started)
+
+        print(f"{'per athlete':<12} {'median ms':>10} {'max ms':>8}")
+        for name, seconds in timings.items():
+            print(
+                f"{name:<12} {statistics.median(seconds) * 1000:>10.2f} "
+                f"{max(seconds) * 1000:>8.2f}"
+            )
+        print(f"matched {matched:,} of {activities:,} activities")
+    finally:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
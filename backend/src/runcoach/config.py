@@ -1,6 +1,7 @@
 """Application configuration using pydantic-settings."""
 
 from functools import lru_cache
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -16,6 +17,25 @@ class Settings(BaseSettings):
 
     # Database
     database_url: str = "postgresql+asyncpg://localhost/runcoach"
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = False
+    db_statement_timeout_ms: int = 30_000
+    db_application_name: str = "runcoach"
+    # Per-connection LRU of asyncpg prepared statements (0 disables)
+    db_prepared_statement_cache_size: int = 256
+    # Optional read replica for read-only sessions; reads fall back to the
+    # primary when unset or unreachable, and for this long after a write
+    database_replica_url: str | None = None
+    replica_read_after_write_seconds: int = 5
+    # A replica connection attempt gives up after this long, and after a
+    # failed one reads skip the replica for replica_retry_seconds
+    replica_connect_timeout_seconds: float = 2.0
+    replica_retry_seconds: float = 30.0
+    # Yearly strava_activities partitions created ahead of time at startup
+    strava_partition_years_ahead: int = 1
 
     # Anthropic
     anthropic_api_key: str = ""
@@ -26,11 +46,98 @@ class Settings(BaseSettings):
 
     # Resend (email)
     resend_api_key: str = ""
+    resend_api_url: str = "https://api.resend.com"
+    resend_from_address: str = "RunCoach <coach@runcoach.app>"
 
     # Application
     secret_key: str = "change-me-in-production"
     debug: bool = False
 
+    # Password hashing (bcrypt runs in a worker pool, off the event loop)
+    password_hash_executor: Literal["thread", "process"] = "thread"
+    password_hash_workers: int = 4
+    # bcrypt cost is calibrated at startup to the largest work factor whose
+    # verification stays within the target; a fixed value skips calibration
+    # (recommended when several processes share the users table)
+    password_hash_target_ms: float = 250.0
+    password_hash_min_rounds: int = 10
+    password_hash_max_rounds: int = 14
+    password_hash_rounds: int | None = None
+
+    # Authenticated-user cache
+    user_cache_max_size: int = 10_000
+    user_cache_ttl_seconds: float = 60.0
+
+    # Sessions: identity-only routes check that the token's session generation
+    # is still current (a cached user lookup), so logout-all and password
+    # changes revoke them; disabling trusts the signed claims until expiry
+    session_revocation_check: bool = True
+
+    # Operational metrics (/metrics): callers send "Authorization: Bearer
+    # <metrics_token>"; while it is unset the endpoints are refused
+    metrics_token: str = ""
+
+    # Admission control for CPU-heavy auth routes (login, register)
+    auth_max_concurrency: int = 4
+    auth_max_queue: int = 32
+    auth_queue_timeout_seconds: float = 5.0
+    auth_ip_burst: int = 20
+    auth_ip_refill_per_second: float = 1.0
+    auth_email_burst: int = 5
+    auth_email_refill_per_second: float = 0.1
+
+    # Notification dispatcher (python -m runcoach.workers.notifications).
+    # Any number of dispatcher processes can run; each claims due
+    # notifications in batches and holds them for the lease while sending.
+    notification_batch_size: int = 100
+    notification_poll_interval_seconds: float = 5.0
+    notification_lease_seconds: int = 300
+    notification_max_attempts: int = 5
+    notification_retry_base_seconds: float = 30.0
+    notification_retry_max_seconds: float = 3600.0
+    # Concurrent sends per channel, across the batch
+    notification_email_concurrency: int = 10
+    notification_http_timeout_seconds: float = 10.0
+    # Pending notifications for the same user and channel due within this
+    # many seconds of a claimed one are sent with it as one digest; 0 sends
+    # every notification on its own
+    notification_digest_window_seconds: float = 1800.0
+    # Each dispatcher logs its counters (stats()) this often
+    notification_stats_interval_seconds: float = 60.0
+    # Retention (python -m runcoach.workers.notification_retention): sent and
+    # failed notifications older than this are deleted, or moved to
+    # notifications_archive, a short transaction per batch
+    notification_retention_days: int = 90
+    notification_retention_batch_size: int = 1000
+    notification_retention_pause_seconds: float = 0.1
+    notification_retention_archive: bool = False
+
+    # Fitness model (services.fitness). No per-athlete heart rates are stored
+    # yet, so TRIMP uses these for everyone. The nightly batch
+    # (python -m runcoach.workers.fitness) caches each athlete's state in
+    # batches of this many athletes.
+    fitness_resting_heartrate: int = 60
+    fitness_max_heartrate: int = 190
+    fitness_batch_size: int = 500
+
+    # Workout matching (services.workout_matching): an activity completes an
+    # open workout of its sport scheduled up to this many days either side
+    # (start dates are UTC, so one covers time zones and swapped days) whose
+    # planned distance, or else duration, it is within this fraction of
+    workout_match_day_window: int = 1
+    workout_match_tolerance: float = 0.3
+
+    # FIT uploads (POST /activities/upload). Bodies are streamed to a
+    # temporary file in fit_upload_dir (the system default when unset) and
+    # decoded in worker threads, this many at a time.
+    fit_upload_max_bytes: int = 32 * 1024 * 1024
+    fit_upload_max_hours: int = 48
+    fit_upload_dir: str | None = None
+    fit_upload_concurrency: int = 2
+    # FIT workout export (GET /workouts/{id}/fit, /workouts/export): encoded
+    # files are cached in-process by content hash, up to this many bytes
+    workout_export_cache_max_bytes: int = 8 * 1024 * 1024
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -1,11 +1,28 @@
 """Async SQLAlchemy database setup."""
 
-from collections.abc import AsyncGenerator
+import logging
+import time
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from fastapi import Request, Response
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from runcoach.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
 
-from runcoach.config import get_settings
+# Set after a write so the client's next reads go to the primary
+PRIMARY_PIN_COOKIE = "read_primary"
 
 
 class Base(DeclarativeBase):
@@ -14,11 +31,77 @@ class Base(DeclarativeBase):
     pass
 
 
+class PoolMetrics:
+    """Checkout counters for one engine's connection pool."""
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        """Record how long a successful checkout waited for a connection."""
+        self.checkouts += 1
+        self.total_wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+
+def _instrumented_pool_class(metrics: PoolMetrics) -> type[AsyncAdaptedQueuePool]:
+    # The pool recreates itself via ``self.__class__`` (e.g. on dispose), so
+    # the metrics object rides along as a class attribute.
+    class InstrumentedPool(AsyncAdaptedQueuePool):
+        """Queue pool that records checkout wait time and timeouts."""
+
+        def _do_get(self) -> Any:
+            started = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                metrics.timeouts += 1
+                raise
+            metrics.record_wait(time.perf_counter() - started)
+            return connection
+
+    return InstrumentedPool
+
+
+def create_engine_from_settings(
+    url: str,
+    settings: Settings,
+    metrics: PoolMetrics,
+    connect_timeout: float | None = None,
+) -> AsyncEngine:
+    """Create an async engine with the configured pool and server settings.
+
+    ``connect_timeout`` bounds each new connection attempt in seconds
+    (asyncpg's default is 60).
+    """
+    connect_args: dict[str, Any] = {
+        "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+        "server_settings": {
+            "application_name": settings.db_application_name,
+            "statement_timeout": str(settings.db_statement_timeout_ms),
+        },
+    }
+    if connect_timeout is not None:
+        connect_args["timeout"] = connect_timeout
+    return create_async_engine(
+        url,
+        echo=settings.debug,
+        poolclass=_instrumented_pool_class(metrics),
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        pool_recycle=settings.db_pool_recycle_seconds,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args,
+    )
+
+
 settings = get_settings()
-engine = create_async_engine(
-    settings.database_url,
-    echo=settings.debug,
-)
+pool_metrics = PoolMetrics()
+engine = create_engine_from_settings(settings.database_url, settings, pool_metrics)
 
 async_session_maker = async_sessionmaker(
     engine,
@@ -27,6 +110,137 @@ async_session_maker = async_sessionmaker(
 )
 
 
+class ReadSessionRouter:
+    """Opens read-only sessions, on a replica when one is configured.
+
+    Sessions begin ``READ ONLY`` transactions (asyncpg sets this when it
+    opens the transaction, so it costs no extra round trip) and are closed
+    without a commit. If the replica cannot be reached the session falls
+    back to the primary, and so do all sessions for the next
+    ``retry_seconds``, so an outage costs one failed connect per interval
+    rather than one per request.
+    """
+
+    def __init__(
+        self,
+        primary: AsyncEngine,
+        replica: AsyncEngine | None = None,
+        retry_seconds: float = 30.0,
+    ) -> None:
+        self._primary_maker = async_sessionmaker(
+            primary.execution_options(postgresql_readonly=True),
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
+        self._replica_maker = (
+            async_sessionmaker(
+                replica.execution_options(postgresql_readonly=True),
+                class_=AsyncSession,
+                expire_on_commit=False,
+            )
+            if replica is not None
+            else None
+        )
+        self.retry_seconds = retry_seconds
+        # monotonic() before which the replica is not tried
+        self._replica_down_until = 0.0
+        self.primary_sessions = 0
+        self.replica_sessions = 0
+        self.replica_fallbacks = 0
+        self.replica_skips = 0
+
+    @property
+    def has_replica(self) -> bool:
+        """Whether a replica is configured."""
+        return self._replica_maker is not None
+
+    @property
+    def replica_available(self) -> bool:
+        """Whether reads currently try the replica."""
+        return self.has_replica and time.monotonic() >= self._replica_down_until
+
+    async def _open(self, prefer_replica: bool) -> AsyncSession:
+        if prefer_replica and self.has_replica and not self.replica_available:
+            self.replica_skips += 1
+        elif prefer_replica and self._replica_maker is not None:
+            session = self._replica_maker()
+            try:
+                # Connect eagerly so an unreachable replica is detected here
+                await session.connection()
+            except (OSError, exc.DBAPIError, exc.TimeoutError, TimeoutError):
+                logger.warning(
+                    "Read replica unavailable, reading from primary for %.0fs",
+                    self.retry_seconds,
+                    exc_info=True,
+                )
+                await session.close()
+                self._replica_down_until = time.monotonic() + self.retry_seconds
+                self.replica_fallbacks += 1
+            else:
+                self.replica_sessions += 1
+                return session
+
+        self.primary_sessions += 1
+        return self._primary_maker()
+
+    @asynccontextmanager
+    async def session(self, prefer_replica: bool = True) -> AsyncIterator[AsyncSession]:
+        """Provide a read-only session; closing it ends the transaction."""
+        session = await self._open(prefer_replica)
+        async with session:
+            yield session
+
+    def stats(self) -> dict[str, Any]:
+        """Return routing counters."""
+        return {
+            "replica_configured": self.has_replica,
+            "replica_available": self.replica_available,
+            "primary_sessions": self.primary_sessions,
+            "replica_sessions": self.replica_sessions,
+            "replica_fallbacks": self.replica_fallbacks,
+            "replica_skips": self.replica_skips,
+        }
+
+
+replica_pool_metrics = PoolMetrics()
+replica_engine = (
+    create_engine_from_settings(
+        settings.database_replica_url,
+        settings,
+        replica_pool_metrics,
+        connect_timeout=settings.replica_connect_timeout_seconds,
+    )
+    if settings.database_replica_url
+    else None
+)
+read_router = ReadSessionRouter(engine, replica_engine, settings.replica_retry_seconds)
+
+
+def get_pool_stats(
+    db_engine: AsyncEngine = engine,
+    metrics: PoolMetrics = pool_metrics,
+) -> dict[str, Any]:
+    """Return live occupancy and checkout statistics for an engine's pool."""
+    pool = db_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "open": pool.size() + pool.overflow(),
+        # pool.overflow() counts down from -size until the pool is full
+        "overflow": max(0, pool.overflow()),
+        "max_overflow": pool._max_overflow,
+        "checkouts": metrics.checkouts,
+        "timeouts": metrics.timeouts,
+        "avg_wait_ms": (
+            metrics.total_wait_seconds / metrics.checkouts * 1000
+            if metrics.checkouts
+            else 0.0
+        ),
+        "max_wait_ms": metrics.max_wait_seconds * 1000,
+    }
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     """Dependency that provides a database session."""
     async with async_session_maker() as session:
@@ -36,3 +250,28 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         except Exception:
             await session.rollback()
             raise
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """Dependency that provides a read-only session, preferring the replica.
+
+    Requests carrying the primary-pin cookie (set by ``pin_reads_to_primary``
+    right after a write) read from the primary so they see their own writes.
+    """
+    prefer_replica = PRIMARY_PIN_COOKIE not in request.cookies
+    async with read_router.session(prefer_replica=prefer_replica) as session:
+        yield session
+
+
+def pin_reads_to_primary(response: Response) -> None:
+    """Route this client's reads to the primary for a short while after a write."""
+    if not read_router.has_replica:
+        return
+    response.set_cookie(
+        key=PRIMARY_PIN_COOKIE,
+        value="1",
+        max_age=settings.replica_read_after_write_seconds,
+        httponly=True,
+        secure=True,
+        samesite="lax",
+    )
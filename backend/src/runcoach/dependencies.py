@@ -1,40 +1,68 @@
 """FastAPI dependencies."""
 
+import hmac
+from collections.abc import AsyncIterator, Callable
 from typing import Annotated
 
-from fastapi import Cookie, Depends, HTTPException, status
+from fastapi import Cookie, Depends, Header, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from runcoach.config import get_settings
 from runcoach.database import get_db
 from runcoach.models.user import User
-from runcoach.services.auth import get_user_by_id, verify_session_token
+from runcoach.schemas.auth import UserResponse
+from runcoach.services.admission import (
+    AdmissionRejected,
+    RateLimited,
+    auth_admission,
+)
+from runcoach.services.auth import SessionClaims, verify_session_claims
+from runcoach.services.user_cache import get_user_cached
 
+settings = get_settings()
 
-async def get_current_user(
-    db: Annotated[AsyncSession, Depends(get_db)],
-    session: Annotated[str | None, Cookie()] = None,
-) -> User:
-    """Get the current authenticated user from the session cookie."""
+
+def _require_claims(session: str | None) -> SessionClaims:
     if session is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
         )
 
-    user_id = verify_session_token(session)
-    if user_id is None:
+    claims = verify_session_claims(session)
+    if claims is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired session",
         )
 
-    user = await get_user_by_id(db, user_id)
+    return claims
+
+
+def _is_revoked(claims: SessionClaims, user: User) -> bool:
+    return not claims.is_legacy and claims.generation != user.session_generation
+
+
+async def get_current_user(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    session: Annotated[str | None, Cookie()] = None,
+) -> User:
+    """Get the current authenticated user from the session cookie."""
+    claims = _require_claims(session)
+
+    user = await get_user_cached(db, claims.user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
         )
 
+    if _is_revoked(claims, user):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Session has been revoked",
+        )
+
     return user
 
 
@@ -46,8 +74,100 @@ async def get_current_user_optional(
     if session is None:
         return None
 
-    user_id = verify_session_token(session)
-    if user_id is None:
+    claims = verify_session_claims(session)
+    if claims is None:
         return None
 
-    return await get_user_by_id(db, user_id)
+    user = await get_user_cached(db, claims.user_id)
+    if user is None or _is_revoked(claims, user):
+        return None
+
+    return user
+
+
+async def get_session_identity(
+    db: Annotated[AsyncSession, Depends(get_db)],
+    session: Annotated[str | None, Cookie()] = None,
+) -> UserResponse:
+    """Get the current user's identity from the session token.
+
+    With ``session_revocation_check`` (the default) the token's session
+    generation is checked against the user, served from ``user_cache``, so
+    revoked sessions are refused. Turning it off answers v2 tokens from their
+    signed claims alone. Legacy tokens only carry the user ID and always
+    fall back to the (cached) user lookup.
+    """
+    claims = _require_claims(session)
+
+    if claims.is_legacy or settings.session_revocation_check:
+        user = await get_current_user(db, session)
+        return UserResponse.model_validate(user)
+
+    return UserResponse(
+        id=claims.user_id,
+        name=claims.name,
+        email=claims.email,
+        created_at=claims.created_at,
+    )
+
+
+def require_metrics_token(
+    authorization: Annotated[str | None, Header()] = None,
+) -> None:
+    """Admit internal callers carrying the configured ``metrics_token``."""
+    if not settings.metrics_token:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Metrics are disabled",
+        )
+    if authorization is None or not hmac.compare_digest(
+        authorization.encode(), f"Bearer {settings.metrics_token}".encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def _admission_error(exc: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=(
+            status.HTTP_429_TOO_MANY_REQUESTS
+            if isinstance(exc, RateLimited)
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+        detail=exc.reason,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def admit(route: str) -> Callable[[Request], AsyncIterator[None]]:
+    """Dependency factory gating an expensive auth route.
+
+    Rate-limits the client address, then holds one of the route's
+    concurrency slots for the rest of the request. The client address is
+    whatever the ASGI server reports, so run behind ``--proxy-headers``.
+    """
+
+    async def dependency(request: Request) -> AsyncIterator[None]:
+        client_ip = request.client.host if request.client else "unknown"
+        try:
+            auth_admission.check_ip(client_ip)
+            admitted_at = await auth_admission.acquire(route)
+        except AdmissionRejected as exc:
+            raise _admission_error(exc) from None
+        try:
+            yield
+        finally:
+            auth_admission.release(route, admitted_at)
+
+    return dependency
+
+
+def enforce_email_rate_limit(email: str) -> None:
+    """Reject the request with 429 if ``email`` has too many recent attempts."""
+    try:
+        auth_admission.check_email(email)
+    except AdmissionRejected as exc:
+        raise _admission_error(exc) from None
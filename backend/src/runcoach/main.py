@@ -1,17 +1,45 @@
 """FastAPI application entry point."""
 
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from runcoach.config import get_settings
-from runcoach.routers import auth
+from runcoach.database import engine
+from runcoach.partitions import ensure_future_partitions
+from runcoach.routers import activities, auth, chat, dashboard, metrics, workouts
+from runcoach.services.password_hasher import password_hasher
 
+logger = logging.getLogger(__name__)
 settings = get_settings()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start up and tear down process-wide resources."""
+    if settings.password_hash_rounds is None:
+        await password_hasher.calibrate(
+            settings.password_hash_target_ms,
+            settings.password_hash_min_rounds,
+            settings.password_hash_max_rounds,
+        )
+    try:
+        await ensure_future_partitions(engine, settings.strava_partition_years_ahead)
+    except Exception:
+        # Ingest creates missing partitions on demand, so this is not fatal
+        logger.exception("Could not create upcoming strava_activities partitions")
+    yield
+    password_hasher.shutdown()
+
+
 app = FastAPI(
     title="RunCoach AI",
     description="Personalized AI running coach",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -31,4 +59,9 @@ async def health_check() -> dict:
 
 
 # Include routers
+app.include_router(activities.router, prefix="/activities", tags=["activities"])
 app.include_router(auth.router, prefix="/auth", tags=["auth"])
+app.include_router(chat.router, prefix="/chat", tags=["chat"])
+app.include_router(dashboard.router, prefix="/dashboard", tags=["dashboard"])
+app.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
+app.include_router(workouts.router, prefix="/workouts", tags=["workouts"])
@@ -7,11 +7,17 @@ from runcoach.models.goal import Goal
 from runcoach.models.training_plan import TrainingPlan
 from runcoach.models.workout import Workout
 from runcoach.models.workout_edit import WorkoutEdit
-from runcoach.models.strava_activity import StravaActivity
+from runcoach.models.strava_activity import (
+    StravaActivity,
+    StravaActivityKey,
+    StravaActivityPayload,
+)
 from runcoach.models.workout_completion import WorkoutCompletion
 from runcoach.models.chat_message import ChatMessage
 from runcoach.models.user_memory_summary import UserMemorySummary
-from runcoach.models.notification import Notification
+from runcoach.models.notification import Notification, NotificationArchive
+from runcoach.models.training_load import WeeklyTrainingLoad
+from runcoach.models.fitness import AthleteFitness
 
 __all__ = [
     "User",
@@ -22,8 +28,13 @@ __all__ = [
     "Workout",
     "WorkoutEdit",
     "StravaActivity",
+    "StravaActivityKey",
+    "StravaActivityPayload",
     "WorkoutCompletion",
     "ChatMessage",
     "UserMemorySummary",
     "Notification",
+    "NotificationArchive",
+    "WeeklyTrainingLoad",
+    "AthleteFitness",
 ]
@@ -28,7 +28,10 @@ class ChatMessage(Base):
     context_snapshot: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
-    __table_args__ = (Index("idx_chat_messages_user", "user_id", "created_at"),)
+    __table_args__ = (
+        # Covers keyset pagination on (created_at, id) within a user
+        Index("idx_chat_messages_user", "user_id", "created_at", "id"),
+    )
 
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="chat_messages")
@@ -0,0 +1,115 @@
+"""Cached fitness state."""
+
+import uuid
+from datetime import date, datetime
+
+from sqlalchemy import Date, Float, ForeignKey, event, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from runcoach.database import Base
+from runcoach.models.strava_activity import StravaActivity
+
+
+class AthleteFitness(Base):
+    """An athlete's fitness (CTL) and fatigue (ATL) at the end of ``as_of``.
+
+    Written by the nightly fitness batch (``runcoach.workers.fitness``) so
+    later reads only fold in the days since. Triggers on
+    ``strava_activities`` delete the row when an activity on or before
+    ``as_of`` is added, removed, or has its date, duration or heart rate
+    changed, and the next read or batch recomputes it from the full history.
+    """
+
+    __tablename__ = "athlete_fitness"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # Last day (UTC) folded into the state
+    as_of: Mapped[date] = mapped_column(Date, nullable=False)
+    ctl: Mapped[float] = mapped_column(Float, nullable=False)
+    atl: Mapped[float] = mapped_column(Float, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(nullable=False)
+
+
+# Columns an activity's training load is computed from
+_LOAD_COLUMNS = "user_id, start_date, moving_time_seconds, average_heartrate"
+
+FITNESS_TRIGGER_DDL = (
+    f"""
+    CREATE OR REPLACE FUNCTION athlete_fitness_invalidate() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        -- A fitness batch holds its athletes' users rows FOR UPDATE until it
+        -- commits (runcoach.workers.fitness); waiting for it here means the
+        -- DELETE below sees, and drops, the state it wrote without this change
+        IF TG_OP = 'INSERT' THEN
+            PERFORM 1 FROM users
+            WHERE id IN (SELECT user_id FROM new_rows)
+            ORDER BY id FOR KEY SHARE;
+            DELETE FROM athlete_fitness AS state
+            USING new_rows
+            WHERE state.user_id = new_rows.user_id
+                AND state.as_of >= new_rows.start_date::date;
+        ELSIF TG_OP = 'DELETE' THEN
+            PERFORM 1 FROM users
+            WHERE id IN (SELECT user_id FROM old_rows)
+            ORDER BY id FOR KEY SHARE;
+            DELETE FROM athlete_fitness AS state
+            USING old_rows
+            WHERE state.user_id = old_rows.user_id
+                AND state.as_of >= old_rows.start_date::date;
+        ELSE
+            PERFORM 1 FROM users
+            WHERE id IN (SELECT user_id FROM new_rows UNION SELECT user_id FROM old_rows)
+            ORDER BY id FOR KEY SHARE;
+            -- Only activities whose load inputs changed, not e.g. a new name
+            DELETE FROM athlete_fitness AS state
+            USING (
+                (
+                    SELECT {_LOAD_COLUMNS} FROM new_rows
+                    EXCEPT
+                    SELECT {_LOAD_COLUMNS} FROM old_rows
+                )
+                UNION ALL
+                (
+                    SELECT {_LOAD_COLUMNS} FROM old_rows
+                    EXCEPT
+                    SELECT {_LOAD_COLUMNS} FROM new_rows
+                )
+            ) AS changed
+            WHERE state.user_id = changed.user_id
+                AND state.as_of >= changed.start_date::date;
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    # Transition tables allow one event per trigger
+    """
+    CREATE TRIGGER strava_activities_fitness_insert
+    AFTER INSERT ON strava_activities
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION athlete_fitness_invalidate()
+    """,
+    """
+    CREATE TRIGGER strava_activities_fitness_update
+    AFTER UPDATE ON strava_activities
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION athlete_fitness_invalidate()
+    """,
+    """
+    CREATE TRIGGER strava_activities_fitness_delete
+    AFTER DELETE ON strava_activities
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION athlete_fitness_invalidate()
+    """,
+)
+
+
+@event.listens_for(StravaActivity.__table__, "after_create")
+def _create_fitness_triggers(target, connection, **kw) -> None:
+    if connection.dialect.name == "postgresql":
+        for statement in FITNESS_TRIGGER_DDL:
+            connection.execute(text(statement))
@@ -4,7 +4,7 @@ import uuid
 from datetime import date, datetime
 from decimal import Decimal
 
-from sqlalchemy import Date, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import Date, ForeignKey, Index, Integer, Numeric, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from runcoach.database import Base
@@ -44,6 +44,8 @@ class Goal(Base):
         onupdate=datetime.utcnow,
     )
 
+    __table_args__ = (Index("idx_goals_user", "user_id"),)
+
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="goals")
     training_plans: Mapped[list["TrainingPlan"]] = relationship(
@@ -3,14 +3,21 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, Index, String, Text
+from sqlalchemy import ForeignKey, Index, Integer, String, Text, func, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from runcoach.database import Base
 
 
 class Notification(Base):
-    """Notification queue for emails and other notifications."""
+    """Notification queue for emails and other notifications.
+
+    ``status`` moves from ``pending`` to ``sending`` when a dispatcher
+    claims the row, then to ``sent`` or ``failed``, or back to ``pending``
+    with a later ``scheduled_for`` to be retried. A ``sending`` row whose
+    ``locked_until`` has passed belonged to a dispatcher that died and may
+    be claimed again.
+    """
 
     __tablename__ = "notifications"
 
@@ -29,9 +36,78 @@ class Notification(Base):
     scheduled_for: Mapped[datetime] = mapped_column(nullable=False)
     sent_at: Mapped[datetime | None] = mapped_column(nullable=True)
     status: Mapped[str] = mapped_column(String(20), default="pending")
+    # Delivery attempts so far; also fences a dispatcher whose lease expired
+    attempts: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    locked_until: Mapped[datetime | None] = mapped_column(nullable=True)
+    # Set when the row is first sent in a digest; retries resend exactly the
+    # same digest under the same idempotency key
+    digest_id: Mapped[uuid.UUID | None] = mapped_column(nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
-    __table_args__ = (Index("idx_notifications_scheduled", "status", "scheduled_for"),)
+    __table_args__ = (
+        # The dispatcher only looks for due pending rows and expired leases,
+        # so only those rows are indexed; sent and failed rows cost nothing
+        Index(
+            "idx_notifications_pending",
+            "scheduled_for",
+            postgresql_where=text("status = 'pending'"),
+        ),
+        # Deleting a user cascades to all their notifications
+        Index("idx_notifications_user", "user_id"),
+        # Finds the rest of a user's queue to coalesce into a digest
+        Index(
+            "idx_notifications_pending_user",
+            "user_id",
+            "channel",
+            "scheduled_for",
+            postgresql_where=text("status = 'pending'"),
+        ),
+        Index(
+            "idx_notifications_sending",
+            "locked_until",
+            postgresql_where=text("status = 'sending'"),
+        ),
+        # Finds the rest of a digest being retried
+        Index(
+            "idx_notifications_digest",
+            "digest_id",
+            postgresql_where=text(
+                "digest_id IS NOT NULL AND status IN ('pending', 'sending')"
+            ),
+        ),
+        # Finds old finished rows for the retention job; only finished rows
+        # are indexed, matching its predicate
+        Index(
+            "idx_notifications_finished_created",
+            "created_at",
+            postgresql_where=text("status IN ('sent', 'failed')"),
+        ),
+    )
 
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="notifications")
+
+
+class NotificationArchive(Base):
+    """Sent and failed notifications moved out of the queue by retention.
+
+    Only written when ``notification_retention_archive`` is enabled. Rows
+    outlive their user, so there is no foreign key.
+    """
+
+    __tablename__ = "notifications_archive"
+
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(nullable=False)
+    notification_type: Mapped[str] = mapped_column(String(30), nullable=False)
+    channel: Mapped[str] = mapped_column(String(20), nullable=False)
+    subject: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    scheduled_for: Mapped[datetime] = mapped_column(nullable=False)
+    sent_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(server_default=func.now())
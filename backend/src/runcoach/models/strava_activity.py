@@ -4,15 +4,45 @@ import uuid
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import BigInteger, ForeignKey, Index, Integer, Numeric, String
+from sqlalchemy import (
+    BigInteger,
+    ForeignKey,
+    Index,
+    Integer,
+    Numeric,
+    SmallInteger,
+    String,
+    UniqueConstraint,
+    event,
+    text,
+)
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from runcoach.database import Base
+from runcoach.partitions import create_partitioning_objects
+
+
+# lz4 decompresses several times faster than the default pglz; servers
+# built without it keep pglz
+PAYLOAD_COMPRESSION_DDL = """
+DO $$
+BEGIN
+    ALTER TABLE strava_activity_payloads ALTER COLUMN raw_data SET COMPRESSION lz4;
+EXCEPTION WHEN feature_not_supported THEN
+    NULL;
+END
+$$
+"""
 
 
 class StravaActivity(Base):
-    """Raw Strava activity data."""
+    """Typed summary of a Strava activity, range-partitioned by ``start_date``.
+
+    See ``runcoach.partitions`` for how partitions are created and how the
+    global uniqueness of ``strava_activity_id`` is enforced. The full Strava
+    payload lives in ``StravaActivityPayload`` and is only read on request.
+    """
 
     __tablename__ = "strava_activities"
 
@@ -24,14 +54,10 @@ class StravaActivity(Base):
         ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
     )
-    strava_activity_id: Mapped[int] = mapped_column(
-        BigInteger,
-        unique=True,
-        nullable=False,
-    )
-    raw_data: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    strava_activity_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     activity_type: Mapped[str | None] = mapped_column(String(50), nullable=True)
-    start_date: Mapped[datetime | None] = mapped_column(nullable=True)
+    # Partition key, so part of the primary key
+    start_date: Mapped[datetime] = mapped_column(primary_key=True)
     distance_meters: Mapped[Decimal | None] = mapped_column(
         Numeric(10, 2),
         nullable=True,
@@ -50,10 +76,35 @@ class StravaActivity(Base):
         Numeric(10, 6),
         nullable=True,
     )
+    # Promoted from the raw payload (see services.activity_fields)
+    total_elevation_gain_meters: Mapped[Decimal | None] = mapped_column(
+        Numeric(8, 2),
+        nullable=True,
+    )
+    # Strava's run workout type: 0 default, 1 race, 2 long run, 3 workout
+    workout_type: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    average_cadence: Mapped[Decimal | None] = mapped_column(
+        Numeric(5, 2),
+        nullable=True,
+    )
+    suffer_score: Mapped[int | None] = mapped_column(Integer, nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
     __table_args__ = (
+        UniqueConstraint(
+            "strava_activity_id",
+            "start_date",
+            name="uq_strava_activities_strava_activity_id_start_date",
+        ),
         Index("idx_strava_activities_user_date", "user_id", "start_date"),
+        Index(
+            "idx_strava_activities_user_workout_type",
+            "user_id",
+            "workout_type",
+            "start_date",
+            postgresql_where=text("workout_type IS NOT NULL"),
+        ),
+        {"postgresql_partition_by": "RANGE (start_date)"},
     )
 
     # Relationships
@@ -61,4 +112,64 @@ class StravaActivity(Base):
     workout_completions: Mapped[list["WorkoutCompletion"]] = relationship(
         "WorkoutCompletion",
         back_populates="strava_activity",
+        primaryjoin="StravaActivity.id == foreign(WorkoutCompletion.strava_activity_id)",
+    )
+    # Never loaded implicitly; use selectinload() or get_activity_raw_data()
+    payload: Mapped["StravaActivityPayload | None"] = relationship(
+        "StravaActivityPayload",
+        primaryjoin=(
+            "StravaActivity.strava_activity_id"
+            " == foreign(StravaActivityPayload.strava_activity_id)"
+        ),
+        lazy="raise",
+        viewonly=True,
     )
+
+
+class StravaActivityKey(Base):
+    """Claims a Strava activity id across all ``strava_activities`` partitions.
+
+    Maintained by triggers on ``strava_activities``; never written directly.
+    """
+
+    __tablename__ = "strava_activity_keys"
+
+    strava_activity_id: Mapped[int] = mapped_column(
+        BigInteger,
+        primary_key=True,
+        autoincrement=False,
+    )
+    activity_id: Mapped[uuid.UUID] = mapped_column(unique=True, nullable=False)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    start_date: Mapped[datetime] = mapped_column(nullable=False)
+
+    __table_args__ = (Index("idx_strava_activity_keys_user", "user_id"),)
+
+
+class StravaActivityPayload(Base):
+    """Strava's full activity payload, kept out of the hot activity rows."""
+
+    __tablename__ = "strava_activity_payloads"
+
+    strava_activity_id: Mapped[int] = mapped_column(
+        BigInteger,
+        ForeignKey("strava_activity_keys.strava_activity_id", ondelete="CASCADE"),
+        primary_key=True,
+        autoincrement=False,
+    )
+    raw_data: Mapped[dict] = mapped_column(JSONB, nullable=False)
+
+
+@event.listens_for(StravaActivity.__table__, "after_create")
+def _create_partitions(target, connection, **kw) -> None:
+    if connection.dialect.name == "postgresql":
+        create_partitioning_objects(connection)
+
+
+@event.listens_for(StravaActivityPayload.__table__, "after_create")
+def _compress_payloads(target, connection, **kw) -> None:
+    if connection.dialect.name == "postgresql":
+        connection.execute(text(PAYLOAD_COMPRESSION_DDL))
@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import BigInteger, ForeignKey, Text
+from sqlalchemy import BigInteger, ForeignKey, Index, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from runcoach.database import Base
@@ -32,5 +32,7 @@ class StravaToken(Base):
         onupdate=datetime.utcnow,
     )
 
+    __table_args__ = (Index("idx_strava_tokens_user", "user_id"),)
+
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="strava_token")
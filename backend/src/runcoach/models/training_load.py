@@ -0,0 +1,149 @@
+"""Weekly training load aggregate."""
+
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from sqlalchemy import BigInteger, Date, ForeignKey, Integer, Numeric, event, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from runcoach.database import Base
+from runcoach.models.strava_activity import StravaActivity
+
+# Strava activity types counted as running volume
+RUN_ACTIVITY_TYPES = ("Run", "TrailRun", "VirtualRun")
+
+
+class WeeklyTrainingLoad(Base):
+    """Per-athlete totals of their Strava activities for one ISO week.
+
+    Maintained by statement-level triggers on ``strava_activities``: each
+    statement that inserts, updates or deletes activities adds the change
+    in their totals to the buckets of the weeks it touched, so a late or
+    edited activity adjusts only its own week. Weeks without activities
+    have no row. Weeks run Monday to Sunday in UTC, like ``start_date``.
+    """
+
+    __tablename__ = "weekly_training_load"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    # Monday of the week
+    week_start: Mapped[date] = mapped_column(Date, primary_key=True)
+    # All activities
+    activity_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    moving_time_seconds: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    suffer_score: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Runs only (RUN_ACTIVITY_TYPES)
+    run_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    run_distance_meters: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    run_moving_time_seconds: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    run_elevation_gain_meters: Mapped[Decimal] = mapped_column(
+        Numeric(10, 2),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(nullable=False)
+
+
+_IS_RUN = "activity_type IN ({})".format(
+    ", ".join(f"'{activity_type}'" for activity_type in RUN_ACTIVITY_TYPES)
+)
+# What one activity contributes to each total
+_CONTRIBUTIONS = {
+    "activity_count": "1",
+    "moving_time_seconds": "coalesce(moving_time_seconds, 0)",
+    "suffer_score": "coalesce(suffer_score, 0)",
+    "run_count": f"CASE WHEN {_IS_RUN} THEN 1 ELSE 0 END",
+    "run_distance_meters": f"CASE WHEN {_IS_RUN} THEN coalesce(distance_meters, 0) ELSE 0 END",
+    "run_moving_time_seconds": (
+        f"CASE WHEN {_IS_RUN} THEN coalesce(moving_time_seconds, 0) ELSE 0 END"
+    ),
+    "run_elevation_gain_meters": (
+        f"CASE WHEN {_IS_RUN} THEN coalesce(total_elevation_gain_meters, 0) ELSE 0 END"
+    ),
+}
+_WEEK = "date_trunc('week', start_date)::date"
+
+
+def _apply_changes(sources: list[tuple[str, str]]) -> str:
+    """SQL adding each transition table's totals, signed, to their weeks."""
+    changes = "\n            UNION ALL\n            ".join(
+        f"SELECT user_id, {_WEEK} AS week_start, "
+        + ", ".join(f"{sign}({expr}) AS {name}" for name, expr in _CONTRIBUTIONS.items())
+        + f" FROM {table}"
+        for table, sign in sources
+    )
+    touched = " UNION ".join(
+        f"SELECT user_id, {_WEEK} AS week_start FROM {table}" for table, _ in sources
+    )
+    columns = ", ".join(_CONTRIBUTIONS)
+    totals = ", ".join(f"sum({name})" for name in _CONTRIBUTIONS)
+    additions = ",\n            ".join(
+        f"{name} = weekly_training_load.{name} + EXCLUDED.{name}" for name in _CONTRIBUTIONS
+    )
+    return f"""
+        INSERT INTO weekly_training_load (user_id, week_start, {columns}, updated_at)
+        SELECT change.user_id, change.week_start, {totals}, now()
+        FROM (
+            {changes}
+        ) AS change
+        -- Skips athletes deleted earlier in this statement's cascade
+        JOIN users ON users.id = change.user_id
+        GROUP BY change.user_id, change.week_start
+        -- A stable lock order for concurrent statements
+        ORDER BY change.user_id, change.week_start
+        ON CONFLICT (user_id, week_start) DO UPDATE SET
+            {additions},
+            updated_at = EXCLUDED.updated_at;
+        DELETE FROM weekly_training_load AS load
+        USING ({touched}) AS touched
+        WHERE load.user_id = touched.user_id
+            AND load.week_start = touched.week_start
+            AND load.activity_count <= 0;"""
+
+
+TRAINING_LOAD_TRIGGER_DDL = (
+    f"""
+    CREATE OR REPLACE FUNCTION weekly_training_load_apply() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            {_apply_changes([("new_rows", "")])}
+        ELSIF TG_OP = 'DELETE' THEN
+            {_apply_changes([("old_rows", "-")])}
+        ELSE
+            {_apply_changes([("new_rows", ""), ("old_rows", "-")])}
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    # Transition tables allow one event per trigger
+    """
+    CREATE TRIGGER strava_activities_load_insert
+    AFTER INSERT ON strava_activities
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION weekly_training_load_apply()
+    """,
+    """
+    CREATE TRIGGER strava_activities_load_update
+    AFTER UPDATE ON strava_activities
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION weekly_training_load_apply()
+    """,
+    """
+    CREATE TRIGGER strava_activities_load_delete
+    AFTER DELETE ON strava_activities
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION weekly_training_load_apply()
+    """,
+)
+
+
+@event.listens_for(StravaActivity.__table__, "after_create")
+def _create_load_triggers(target, connection, **kw) -> None:
+    if connection.dialect.name == "postgresql":
+        for statement in TRAINING_LOAD_TRIGGER_DDL:
+            connection.execute(text(statement))
@@ -3,7 +3,7 @@
 import uuid
 from datetime import date, datetime
 
-from sqlalchemy import Date, ForeignKey, String
+from sqlalchemy import Date, ForeignKey, Index, String
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -39,6 +39,12 @@ class TrainingPlan(Base):
         onupdate=datetime.utcnow,
     )
 
+    __table_args__ = (
+        # Also serves the dashboard's current-plan lookup by start date
+        Index("idx_training_plans_user", "user_id", "start_date"),
+        Index("idx_training_plans_goal", "goal_id"),
+    )
+
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="training_plans")
     goal: Mapped["Goal | None"] = relationship("Goal", back_populates="training_plans")
@@ -3,7 +3,7 @@
 import uuid
 from datetime import date, datetime
 
-from sqlalchemy import Date, ForeignKey, String, Text
+from sqlalchemy import Date, ForeignKey, Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from runcoach.database import Base
@@ -32,5 +32,7 @@ class UserMemorySummary(Base):
         onupdate=datetime.utcnow,
     )
 
+    __table_args__ = (Index("idx_user_memory_summaries_user", "user_id"),)
+
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="memory_summaries")
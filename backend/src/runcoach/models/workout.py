@@ -48,7 +48,9 @@ class Workout(Base):
     )
 
     __table_args__ = (
-        Index("idx_workouts_user_date", "user_id", "scheduled_date"),
+        # Covers keyset pagination on (scheduled_date, id) within a user
+        Index("idx_workouts_user_date", "user_id", "scheduled_date", "id"),
+        Index("idx_workouts_training_plan", "training_plan_id"),
     )
 
     # Relationships
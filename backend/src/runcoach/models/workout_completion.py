@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, String, Text
+from sqlalchemy import ForeignKey, Index, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from runcoach.database import Base
@@ -22,17 +22,26 @@ class WorkoutCompletion(Base):
         ForeignKey("workouts.id", ondelete="CASCADE"),
         nullable=False,
     )
+    # strava_activities is partitioned, so the reference goes through the
+    # table that claims each activity's id across partitions
     strava_activity_id: Mapped[uuid.UUID | None] = mapped_column(
-        ForeignKey("strava_activities.id", ondelete="SET NULL"),
+        ForeignKey("strava_activity_keys.activity_id", ondelete="SET NULL"),
         nullable=True,
     )
     completion_status: Mapped[str] = mapped_column(String(20), nullable=False)
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
+    __table_args__ = (
+        # A workout is completed at most once; overlapping syncs skip it
+        Index("idx_workout_completions_workout", "workout_id", unique=True),
+        Index("idx_workout_completions_strava_activity", "strava_activity_id"),
+    )
+
     # Relationships
     workout: Mapped["Workout"] = relationship("Workout", back_populates="completions")
     strava_activity: Mapped["StravaActivity | None"] = relationship(
         "StravaActivity",
         back_populates="workout_completions",
+        primaryjoin="StravaActivity.id == foreign(WorkoutCompletion.strava_activity_id)",
     )
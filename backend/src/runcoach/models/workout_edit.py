@@ -3,7 +3,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import ForeignKey, String, Text
+from sqlalchemy import ForeignKey, Index, String, Text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -29,5 +29,7 @@ class WorkoutEdit(Base):
     edit_reason: Mapped[str | None] = mapped_column(Text, nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
 
+    __table_args__ = (Index("idx_workout_edits_workout", "workout_id"),)
+
     # Relationships
     workout: Mapped["Workout"] = relationship("Workout", back_populates="edits")
@@ -0,0 +1,175 @@
+"""Range partitioning of ``strava_activities`` by ``start_date``.
+
+The table is declared ``PARTITION BY RANGE (start_date)`` with one partition
+per calendar year, plus ``strava_activities_pre2010`` for everything older.
+Reads that bound ``start_date`` (e.g. "the last N weeks") are pruned to the
+one or two partitions they can touch.
+
+PostgreSQL only enforces unique constraints on a partitioned table when they
+include the partition key, so the global uniqueness of
+``strava_activity_id`` is kept in ``strava_activity_keys``: the
+``strava_activities_claim_key`` trigger claims a key for every new row and
+rejects a second activity with the same Strava id. If Strava reports a new
+start date for an activity it already has, the trigger moves the row to the
+right partition and keeps its ``id``, so ``workout_completions`` (which
+references ``strava_activity_keys.activity_id``) stays linked.
+
+Yearly partitions are created ahead of time at startup (see
+``ensure_future_partitions``) and on demand by the ingest path for any
+other year it sees.
+"""
+
+from collections.abc import Iterable
+from datetime import datetime
+
+from sqlalchemy import Connection, Engine, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+PARENT_TABLE = "strava_activities"
+FIRST_PARTITION_YEAR = 2010
+HISTORY_PARTITION = f"{PARENT_TABLE}_pre{FIRST_PARTITION_YEAR}"
+
+KEY_TRIGGER_DDL = (
+    """
+    CREATE OR REPLACE FUNCTION strava_activity_keys_claim() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        existing record;
+    BEGIN
+        SELECT activity_id, user_id, start_date INTO existing
+        FROM strava_activity_keys
+        WHERE strava_activity_id = NEW.strava_activity_id
+        FOR UPDATE;
+
+        IF NOT FOUND THEN
+            INSERT INTO strava_activity_keys
+                (strava_activity_id, activity_id, user_id, start_date)
+            VALUES (NEW.strava_activity_id, NEW.id, NEW.user_id, NEW.start_date);
+        ELSIF existing.start_date = NEW.start_date THEN
+            -- Same partition: the (strava_activity_id, start_date) unique
+            -- index decides between ON CONFLICT handling and an error
+            NULL;
+        ELSIF existing.activity_id = NEW.id OR existing.user_id = NEW.user_id THEN
+            -- The start date changed: re-key, then drop the copy in the old
+            -- partition so the new row takes over its id
+            UPDATE strava_activity_keys SET start_date = NEW.start_date
+            WHERE strava_activity_id = NEW.strava_activity_id;
+            IF existing.activity_id <> NEW.id THEN
+                DELETE FROM strava_activities
+                WHERE id = existing.activity_id AND start_date = existing.start_date;
+                NEW.id := existing.activity_id;
+            END IF;
+        ELSE
+            RAISE unique_violation USING
+                MESSAGE = format(
+                    'duplicate strava_activity_id %s', NEW.strava_activity_id
+                ),
+                CONSTRAINT = 'strava_activity_keys_pkey';
+        END IF;
+        RETURN NEW;
+    END
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION strava_activity_keys_release() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        DELETE FROM strava_activity_keys
+        WHERE activity_id = OLD.id AND start_date = OLD.start_date;
+        RETURN NULL;
+    END
+    $$
+    """,
+    """
+    CREATE TRIGGER strava_activities_claim_key
+    BEFORE INSERT OR UPDATE OF start_date ON strava_activities
+    FOR EACH ROW EXECUTE FUNCTION strava_activity_keys_claim()
+    """,
+    """
+    CREATE TRIGGER strava_activities_release_key
+    AFTER DELETE ON strava_activities
+    FOR EACH ROW EXECUTE FUNCTION strava_activity_keys_release()
+    """,
+)
+
+# Years known to have a committed partition in this process
+_known_years: set[int] = set()
+# Years whose partition a connection's open transaction created; recorded in
+# _known_years when it commits and dropped if it rolls back
+_PENDING_YEARS_KEY = "runcoach_pending_partition_years"
+
+
+def partition_name(year: int) -> str:
+    """Name of the partition holding activities that start in ``year``."""
+    if year < FIRST_PARTITION_YEAR:
+        return HISTORY_PARTITION
+    return f"{PARENT_TABLE}_y{year}"
+
+
+def partition_ddl(year: int) -> str:
+    """``CREATE TABLE`` statement for the partition covering ``year``."""
+    if year < FIRST_PARTITION_YEAR:
+        bounds = f"FROM (MINVALUE) TO ('{FIRST_PARTITION_YEAR}-01-01')"
+    else:
+        bounds = f"FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(year)} "
+        f"PARTITION OF {PARENT_TABLE} FOR VALUES {bounds}"
+    )
+
+
+def ensure_partitions(connection: Connection, years: Iterable[int]) -> list[str]:
+    """Create any missing partitions for ``years``; returns the names issued.
+
+    ``CREATE TABLE ... PARTITION OF`` locks the parent table until the
+    transaction ends, so years already seen by this process are skipped
+    without touching the database. A year counts as seen once the
+    transaction that created its partition commits; if it rolls back, the
+    partition is gone and the next transaction creates it again.
+    """
+    pending = connection.info.setdefault(_PENDING_YEARS_KEY, set())
+    names = []
+    for year in sorted(set(years)):
+        bucket = max(year, FIRST_PARTITION_YEAR - 1)
+        if bucket in _known_years or bucket in pending:
+            continue
+        connection.execute(text(partition_ddl(bucket)))
+        pending.add(bucket)
+        names.append(partition_name(bucket))
+    return names
+
+
+@event.listens_for(Engine, "commit")
+def _record_committed_partitions(connection: Connection) -> None:
+    _known_years.update(connection.info.pop(_PENDING_YEARS_KEY, ()))
+
+
+@event.listens_for(Engine, "rollback")
+def _discard_rolled_back_partitions(connection: Connection) -> None:
+    connection.info.pop(_PENDING_YEARS_KEY, None)
+
+
+def create_partitioning_objects(connection: Connection, years_ahead: int = 1) -> None:
+    """Create the key triggers and the partitions up to ``years_ahead``.
+
+    Runs after ``strava_activities`` is created by ``metadata.create_all``;
+    migrations create the same objects themselves.
+    """
+    for statement in KEY_TRIGGER_DDL:
+        connection.execute(text(statement))
+    _known_years.clear()
+    current_year = datetime.utcnow().year
+    ensure_partitions(
+        connection,
+        range(FIRST_PARTITION_YEAR - 1, current_year + years_ahead + 1),
+    )
+
+
+async def ensure_future_partitions(engine: AsyncEngine, years_ahead: int) -> list[str]:
+    """Create partitions from the current year through ``years_ahead``."""
+    current_year = datetime.utcnow().year
+    async with engine.begin() as conn:
+        return await conn.run_sync(
+            ensure_partitions,
+            range(current_year, current_year + years_ahead + 1),
+        )
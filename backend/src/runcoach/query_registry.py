@@ -0,0 +1,338 @@
+"""Registry of named hot queries.
+
+The lookups on every request path (users by id/email/invite code, per-user
+date-range reads) are built once here with ``bindparam()`` placeholders
+instead of constructing a fresh ``select()`` per call. Reusing one statement
+object keeps SQLAlchemy's compiled cache hot, and because the SQL text is
+identical on every call the asyncpg driver reuses the server-side prepared
+statement cached on each connection (see ``db_prepared_statement_cache_size``).
+Each query records its call count and latency.
+"""
+
+import time
+from typing import Any
+
+from sqlalchemy import Executable, Result, bindparam, exists, select, true, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload, load_only, raiseload
+
+from runcoach.models.chat_message import ChatMessage
+from runcoach.models.goal import Goal
+from runcoach.models.strava_activity import StravaActivity
+from runcoach.models.training_load import WeeklyTrainingLoad
+from runcoach.models.training_plan import TrainingPlan
+from runcoach.models.user import User
+from runcoach.models.user_profile import UserProfile
+from runcoach.models.workout import Workout
+from runcoach.models.workout_completion import WorkoutCompletion
+
+
+class HotQuery:
+    """A named, pre-built statement with call and latency counters."""
+
+    def __init__(self, name: str, statement: Executable) -> None:
+        self.name = name
+        self.statement = statement
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    async def execute(self, db: AsyncSession, **params: Any) -> Result[Any]:
+        """Execute the statement with ``params`` bound to its placeholders."""
+        started = time.perf_counter()
+        try:
+            return await db.execute(self.statement, params)
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            self.calls += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+
+    def stats(self) -> dict[str, Any]:
+        """Return call count and latency."""
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "avg_ms": self.total_seconds / self.calls * 1000 if self.calls else 0.0,
+            "max_ms": self.max_seconds * 1000,
+        }
+
+
+class QueryRegistry:
+    """Name-indexed collection of hot queries."""
+
+    def __init__(self) -> None:
+        self._queries: dict[str, HotQuery] = {}
+
+    def register(self, name: str, statement: Executable) -> HotQuery:
+        """Register ``statement`` under ``name``."""
+        if name in self._queries:
+            raise ValueError(f"Hot query {name!r} is already registered")
+        query = HotQuery(name, statement)
+        self._queries[name] = query
+        return query
+
+    def __getitem__(self, name: str) -> HotQuery:
+        return self._queries[name]
+
+    def __iter__(self):
+        return iter(self._queries.values())
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Return per-query counters."""
+        return {name: query.stats() for name, query in self._queries.items()}
+
+
+hot_queries = QueryRegistry()
+
+USER_BY_ID = hot_queries.register(
+    "user_by_id",
+    select(User).where(User.id == bindparam("user_id")),
+)
+USER_BY_EMAIL = hot_queries.register(
+    "user_by_email",
+    select(User).where(User.email == bindparam("email")),
+)
+USER_BY_INVITE_CODE = hot_queries.register(
+    "user_by_invite_code",
+    select(User).where(User.invite_code == bindparam("invite_code")),
+)
+
+# Per-user date-range reads; both use the (user_id, <date>) index.
+# Ranges are half-open: start <= date < end.
+WORKOUTS_BY_USER_DATE_RANGE = hot_queries.register(
+    "workouts_by_user_date_range",
+    select(Workout)
+    .where(
+        Workout.user_id == bindparam("user_id"),
+        Workout.scheduled_date >= bindparam("start"),
+        Workout.scheduled_date < bindparam("end"),
+    )
+    .order_by(Workout.scheduled_date, Workout.id),
+)
+ACTIVITIES_BY_USER_DATE_RANGE = hot_queries.register(
+    "activities_by_user_date_range",
+    select(StravaActivity)
+    .where(
+        StravaActivity.user_id == bindparam("user_id"),
+        StravaActivity.start_date >= bindparam("start"),
+        StravaActivity.start_date < bindparam("end"),
+    )
+    .order_by(StravaActivity.start_date, StravaActivity.id),
+)
+
+# Weekly training load buckets, read by primary key: one row per week with
+# activities, however many activities the weeks hold
+TRAINING_LOAD_BY_USER_WEEKS = hot_queries.register(
+    "training_load_by_user_weeks",
+    select(WeeklyTrainingLoad)
+    .where(
+        WeeklyTrainingLoad.user_id == bindparam("user_id"),
+        WeeklyTrainingLoad.week_start >= bindparam("start"),
+        WeeklyTrainingLoad.week_start < bindparam("end"),
+    )
+    .order_by(WeeklyTrainingLoad.week_start),
+)
+
+# Inputs to the fitness model (services.fitness): only the columns an
+# activity's training load is computed from
+ACTIVITY_LOAD_INPUTS_BY_USER_DATE_RANGE = hot_queries.register(
+    "activity_load_inputs_by_user_date_range",
+    select(
+        StravaActivity.start_date,
+        StravaActivity.moving_time_seconds,
+        StravaActivity.average_heartrate,
+    )
+    .where(
+        StravaActivity.user_id == bindparam("user_id"),
+        StravaActivity.start_date >= bindparam("start"),
+        StravaActivity.start_date < bindparam("end"),
+    )
+    .order_by(StravaActivity.start_date),
+)
+
+# Workout matching (services.workout_matching): a sync's activities not yet
+# linked to a workout, and the scheduled workouts around them with no
+# completion; each NOT EXISTS is an index probe on workout_completions
+UNMATCHED_ACTIVITIES_BY_USER_DATE_RANGE = hot_queries.register(
+    "unmatched_activities_by_user_date_range",
+    select(
+        StravaActivity.id,
+        StravaActivity.start_date,
+        StravaActivity.activity_type,
+        StravaActivity.distance_meters,
+        StravaActivity.moving_time_seconds,
+    )
+    .where(
+        StravaActivity.user_id == bindparam("user_id"),
+        StravaActivity.start_date >= bindparam("start"),
+        StravaActivity.start_date < bindparam("end"),
+        ~exists().where(WorkoutCompletion.strava_activity_id == StravaActivity.id),
+    )
+    .order_by(StravaActivity.start_date, StravaActivity.id),
+)
+OPEN_WORKOUTS_BY_USER_DATE_RANGE = hot_queries.register(
+    "open_workouts_by_user_date_range",
+    select(
+        Workout.id,
+        Workout.scheduled_date,
+        Workout.workout_type,
+        Workout.estimated_distance_meters,
+        Workout.estimated_duration_minutes,
+    )
+    .where(
+        Workout.user_id == bindparam("user_id"),
+        Workout.scheduled_date >= bindparam("start"),
+        Workout.scheduled_date < bindparam("end"),
+        Workout.status == "scheduled",
+        ~exists().where(WorkoutCompletion.workout_id == Workout.id),
+    )
+    .order_by(Workout.scheduled_date, Workout.id),
+)
+
+# Dashboard reads. Everything the dashboard shows is loaded up front and any
+# other relationship raises instead of lazy loading, so the page costs a
+# fixed number of round trips however much data the athlete has.
+_active_goal = aliased(
+    Goal,
+    select(Goal)
+    .where(Goal.user_id == User.id, Goal.status == "active")
+    # The nearest race first; open-ended goals after dated ones
+    .order_by(Goal.target_race_date.asc().nulls_last(), Goal.created_at.desc())
+    .limit(1)
+    .lateral("active_goal"),
+)
+_current_plan = aliased(
+    TrainingPlan,
+    select(TrainingPlan)
+    .where(
+        TrainingPlan.user_id == User.id,
+        TrainingPlan.status == "active",
+        TrainingPlan.start_date <= bindparam("today"),
+        TrainingPlan.end_date >= bindparam("today"),
+    )
+    .order_by(TrainingPlan.start_date.desc())
+    .limit(1)
+    .lateral("current_plan"),
+)
+DASHBOARD_HEADER = hot_queries.register(
+    "dashboard_header",
+    select(UserProfile, _active_goal, _current_plan)
+    .select_from(User)
+    .outerjoin(UserProfile, UserProfile.user_id == User.id)
+    .outerjoin(_active_goal, true())
+    .outerjoin(_current_plan, true())
+    .where(User.id == bindparam("user_id"))
+    .options(raiseload("*")),
+)
+WORKOUTS_WITH_COMPLETIONS_BY_USER_DATE_RANGE = hot_queries.register(
+    "workouts_with_completions_by_user_date_range",
+    WORKOUTS_BY_USER_DATE_RANGE.statement.options(
+        joinedload(Workout.completions),
+        raiseload("*"),
+    ),
+)
+
+# Workout calendar pages, seeking past the (scheduled_date, id) of the last
+# row seen; the first page seeks past (start, nil UUID). Both read the
+# (user_id, scheduled_date, id) index in order and stop after ``limit`` rows.
+_calendar_page = (
+    select(Workout)
+    .where(
+        Workout.user_id == bindparam("user_id"),
+        tuple_(Workout.scheduled_date, Workout.id)
+        > tuple_(bindparam("after_date"), bindparam("after_id")),
+        Workout.scheduled_date < bindparam("end"),
+    )
+    .order_by(Workout.scheduled_date, Workout.id)
+    .limit(bindparam("limit"))
+)
+WORKOUT_CALENDAR_PAGE = hot_queries.register(
+    "workout_calendar_page",
+    _calendar_page.options(
+        load_only(
+            Workout.id,
+            Workout.training_plan_id,
+            Workout.scheduled_date,
+            Workout.workout_type,
+            Workout.title,
+            Workout.estimated_duration_minutes,
+            Workout.estimated_distance_meters,
+            Workout.status,
+            raiseload=True,
+        ),
+        raiseload("*"),
+    ),
+)
+WORKOUT_CALENDAR_PAGE_WITH_STRUCTURE = hot_queries.register(
+    "workout_calendar_page_with_structure",
+    _calendar_page.options(raiseload("*")),
+)
+
+# Workouts for FIT export (services.workout_export): only the columns encoded
+# into the file, one workout by id or a user's week in calendar order. Rest
+# days have nothing to put on a watch.
+_workout_export = (
+    select(Workout)
+    .where(Workout.user_id == bindparam("user_id"))
+    .options(
+        load_only(
+            Workout.id,
+            Workout.scheduled_date,
+            Workout.workout_type,
+            Workout.title,
+            Workout.structure,
+            Workout.estimated_duration_minutes,
+            Workout.estimated_distance_meters,
+            raiseload=True,
+        ),
+        raiseload("*"),
+    )
+)
+WORKOUT_EXPORT_BY_ID = hot_queries.register(
+    "workout_export_by_id",
+    _workout_export.where(Workout.id == bindparam("workout_id")),
+)
+WORKOUT_EXPORTS_BY_USER_DATE_RANGE = hot_queries.register(
+    "workout_exports_by_user_date_range",
+    _workout_export.where(
+        Workout.scheduled_date >= bindparam("start"),
+        Workout.scheduled_date < bindparam("end"),
+        Workout.workout_type != "rest",
+    ).order_by(Workout.scheduled_date, Workout.id),
+)
+
+# Chat history pages, newest first, seeking before the (created_at, id) of
+# the oldest message seen. Both walk the (user_id, created_at, id) index
+# backwards and stop after ``limit`` rows.
+_chat_history_page = (
+    select(ChatMessage)
+    .where(
+        ChatMessage.user_id == bindparam("user_id"),
+        tuple_(ChatMessage.created_at, ChatMessage.id)
+        < tuple_(bindparam("before_created_at"), bindparam("before_id")),
+    )
+    .order_by(ChatMessage.created_at.desc(), ChatMessage.id.desc())
+    .limit(bindparam("limit"))
+)
+CHAT_HISTORY_PAGE = hot_queries.register(
+    "chat_history_page",
+    _chat_history_page.options(
+        load_only(
+            ChatMessage.id,
+            ChatMessage.role,
+            ChatMessage.content,
+            ChatMessage.created_at,
+            raiseload=True,
+        ),
+        raiseload("*"),
+    ),
+)
+CHAT_HISTORY_PAGE_WITH_CONTEXT = hot_queries.register(
+    "chat_history_page_with_context",
+    _chat_history_page.options(raiseload("*")),
+)
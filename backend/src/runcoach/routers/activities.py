@@ -0,0 +1,75 @@
+"""Activities router."""
+
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from runcoach.config import get_settings
+from runcoach.database import get_db, pin_reads_to_primary
+from runcoach.dependencies import get_current_user
+from runcoach.models.user import User
+from runcoach.schemas.activity import ActivityUploadResponse
+from runcoach.services.activity_upload import (
+    UploadConflict,
+    UploadTooLarge,
+    upload_fit_activity,
+)
+from runcoach.services.fit_decoder import FitError
+
+router = APIRouter()
+settings = get_settings()
+
+
+@router.post(
+    "/upload",
+    response_model=ActivityUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def upload_activity(
+    request: Request,
+    response: Response,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    filename: str | None = None,
+) -> ActivityUploadResponse:
+    """Create an activity from a FIT file sent as the request body."""
+    # Refuse a declared oversize body before reading any of it
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > settings.fit_upload_max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Uploads are limited to {settings.fit_upload_max_bytes} bytes",
+        )
+    try:
+        upload = await upload_fit_activity(db, current_user.id, request.stream(), filename)
+    except UploadTooLarge as exc:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=str(exc),
+        ) from None
+    except FitError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=str(exc),
+        ) from None
+    except UploadConflict as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc),
+        ) from None
+
+    pin_reads_to_primary(response)
+    summary = upload.summary
+    return ActivityUploadResponse(
+        strava_activity_id=summary["id"],
+        activity_type=summary["sport_type"],
+        start_date=datetime.fromisoformat(summary["start_date"].removesuffix("Z")),
+        elapsed_time_seconds=summary["elapsed_time"],
+        moving_time_seconds=summary["moving_time"],
+        distance_meters=summary["distance"],
+        average_heartrate=summary["average_heartrate"],
+        samples=upload.channels.seconds,
+        matched_workouts=upload.matched,
+    )
@@ -5,8 +5,13 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from runcoach.database import get_db
-from runcoach.dependencies import get_current_user
+from runcoach.database import get_db, pin_reads_to_primary
+from runcoach.dependencies import (
+    admit,
+    enforce_email_rate_limit,
+    get_current_user,
+    get_session_identity,
+)
 from runcoach.models.user import User
 from runcoach.schemas.auth import (
     MessageResponse,
@@ -16,50 +21,50 @@ from runcoach.schemas.auth import (
 )
 from runcoach.services.auth import (
     SESSION_MAX_AGE,
+    RegistrationConflict,
     authenticate_user,
     create_session_token,
     create_user,
-    get_user_by_email,
-    get_user_by_invite_code,
+    revoke_user_sessions,
 )
 
 router = APIRouter()
 
+REGISTRATION_CONFLICT_DETAILS = {
+    "invite_code": "Invite code already used",
+    "email": "Email already registered",
+}
+
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admit("register"))],
+)
 async def register(
     data: UserRegister,
     response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> User:
     """Register a new user with an invite code."""
-    # Check if invite code is already used
-    existing_invite = await get_user_by_invite_code(db, data.invite_code)
-    if existing_invite is not None:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invite code already used",
+    enforce_email_rate_limit(data.email)
+    try:
+        user = await create_user(
+            db=db,
+            invite_code=data.invite_code,
+            name=data.name,
+            email=data.email,
+            password=data.password,
         )
-
-    # Check if email is already registered
-    existing_email = await get_user_by_email(db, data.email)
-    if existing_email is not None:
+    except RegistrationConflict as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered",
-        )
-
-    # Create user
-    user = await create_user(
-        db=db,
-        invite_code=data.invite_code,
-        name=data.name,
-        email=data.email,
-        password=data.password,
-    )
+            detail=REGISTRATION_CONFLICT_DETAILS[exc.field],
+        ) from None
 
     # Set session cookie
-    session_token = create_session_token(user.id)
+    session_token = create_session_token(user)
     response.set_cookie(
         key="session",
         value=session_token,
@@ -68,17 +73,23 @@ async def register(
         secure=True,
         samesite="lax",
     )
+    pin_reads_to_primary(response)
 
     return user
 
 
-@router.post("/login", response_model=UserResponse)
+@router.post(
+    "/login",
+    response_model=UserResponse,
+    dependencies=[Depends(admit("login"))],
+)
 async def login(
     data: UserLogin,
     response: Response,
     db: Annotated[AsyncSession, Depends(get_db)],
 ) -> User:
     """Login with email and password."""
+    enforce_email_rate_limit(data.email)
     user = await authenticate_user(db, data.email, data.password)
     if user is None:
         raise HTTPException(
@@ -87,7 +98,7 @@ async def login(
         )
 
     # Set session cookie
-    session_token = create_session_token(user.id)
+    session_token = create_session_token(user)
     response.set_cookie(
         key="session",
         value=session_token,
@@ -96,6 +107,7 @@ async def login(
         secure=True,
         samesite="lax",
     )
+    pin_reads_to_primary(response)
 
     return user
 
@@ -107,9 +119,22 @@ async def logout(response: Response) -> MessageResponse:
     return MessageResponse(message="Logged out successfully")
 
 
+@router.post("/logout-all", response_model=MessageResponse)
+async def logout_all(
+    response: Response,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> MessageResponse:
+    """Revoke every session of the current user, including this one."""
+    await revoke_user_sessions(db, current_user.id)
+    response.delete_cookie(key="session")
+    pin_reads_to_primary(response)
+    return MessageResponse(message="Logged out of all sessions")
+
+
 @router.get("/me", response_model=UserResponse)
 async def get_me(
-    current_user: Annotated[User, Depends(get_current_user)],
-) -> User:
-    """Get the current authenticated user."""
-    return current_user
+    identity: Annotated[UserResponse, Depends(get_session_identity)],
+) -> UserResponse:
+    """Get the current authenticated user (served from the session token)."""
+    return identity
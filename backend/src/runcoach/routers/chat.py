@@ -0,0 +1,75 @@
+"""Chat router."""
+
+import uuid
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from runcoach.database import get_read_db
+from runcoach.dependencies import get_session_identity
+from runcoach.schemas.auth import UserResponse
+from runcoach.schemas.chat import (
+    ChatHistoryResponse,
+    ChatMessageDetail,
+    ChatMessageSummary,
+)
+from runcoach.services.chat_history import get_history_page, stream_history
+from runcoach.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+router = APIRouter()
+
+
+@router.get("/history", response_model=ChatHistoryResponse)
+async def read_history(
+    identity: Annotated[UserResponse, Depends(get_session_identity)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    cursor: str | None = None,
+    include_context: bool = False,
+) -> ChatHistoryResponse:
+    """Get chat messages, newest first, a page at a time."""
+    before = None
+    if cursor is not None:
+        try:
+            before = decode_cursor(cursor, datetime, uuid.UUID)
+        except InvalidCursor as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc),
+            ) from None
+
+    page = await get_history_page(
+        db,
+        identity.id,
+        limit,
+        before=before,
+        include_context=include_context,
+    )
+    schema = ChatMessageDetail if include_context else ChatMessageSummary
+    return ChatHistoryResponse(
+        messages=[schema.model_validate(message) for message in page.messages],
+        next_cursor=encode_cursor(*page.next_key) if page.next_key else None,
+    )
+
+
+@router.get("/history/export")
+async def export_history(
+    identity: Annotated[UserResponse, Depends(get_session_identity)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    include_context: bool = False,
+) -> StreamingResponse:
+    """Stream the whole chat history, oldest first, as NDJSON."""
+    schema = ChatMessageDetail if include_context else ChatMessageSummary
+
+    async def lines() -> AsyncIterator[str]:
+        # The session stays open until the response has been sent
+        async for batch in stream_history(db, identity.id, include_context):
+            yield "".join(
+                schema.model_validate(message).model_dump_json() + "\n" for message in batch
+            )
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
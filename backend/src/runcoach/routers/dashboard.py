@@ -0,0 +1,25 @@
+"""Athlete dashboard router."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from runcoach.database import get_read_db
+from runcoach.dependencies import get_session_identity
+from runcoach.schemas.auth import UserResponse
+from runcoach.schemas.dashboard import DashboardResponse
+from runcoach.services.dashboard import Dashboard, get_dashboard
+
+router = APIRouter()
+
+
+@router.get("", response_model=DashboardResponse)
+async def read_dashboard(
+    identity: Annotated[UserResponse, Depends(get_session_identity)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    activity_weeks: Annotated[int, Query(ge=1, le=52)] = 4,
+    load_weeks: Annotated[int, Query(ge=1, le=52)] = 8,
+) -> Dashboard:
+    """Get the dashboard: profile, goal, plan, week, recent activities and training load."""
+    return await get_dashboard(db, identity.id, activity_weeks, load_weeks)
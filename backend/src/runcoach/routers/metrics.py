@@ -0,0 +1,63 @@
+"""Operational metrics router."""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from runcoach.database import (
+    get_db,
+    get_pool_stats,
+    read_router,
+    replica_engine,
+    replica_pool_metrics,
+)
+from runcoach.dependencies import require_metrics_token
+from runcoach.query_registry import hot_queries
+from runcoach.services.admission import auth_admission
+from runcoach.services.auth import get_password_cost_distribution
+from runcoach.services.password_hasher import password_hasher
+from runcoach.services.user_cache import user_cache
+from runcoach.services.workout_export import workout_file_cache
+from runcoach.workers.notification_retention import notification_storage
+
+# Internal only: some endpoints scan tables
+router = APIRouter(dependencies=[Depends(require_metrics_token)])
+
+
+@router.get("")
+async def get_metrics() -> dict:
+    """Return in-process runtime metrics."""
+    return {
+        "auth_admission": auth_admission.stats(),
+        "database_pool": get_pool_stats(),
+        "replica_pool": (
+            get_pool_stats(replica_engine, replica_pool_metrics)
+            if replica_engine is not None
+            else None
+        ),
+        "read_routing": read_router.stats(),
+        "hot_queries": hot_queries.stats(),
+        "password_hasher": password_hasher.stats(),
+        "user_cache": user_cache.stats(),
+        "workout_file_cache": workout_file_cache.stats(),
+    }
+
+
+@router.get("/password-costs")
+async def get_password_costs(
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> dict:
+    """Return how stored password hashes are distributed across bcrypt costs."""
+    return {
+        "target_rounds": password_hasher.rounds,
+        "stored_hashes_by_rounds": await get_password_cost_distribution(db),
+    }
+
+
+@router.get("/notification-storage")
+async def get_notification_storage(
+    db: Annotated[AsyncSession, Depends(get_db)],
+) -> dict:
+    """Return table and index sizes of the notification queue and archive."""
+    return await notification_storage(await db.connection())
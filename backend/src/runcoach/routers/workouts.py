@@ -0,0 +1,150 @@
+"""Workouts router."""
+
+import uuid
+from datetime import date, timedelta
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from runcoach.database import get_read_db
+from runcoach.dependencies import get_session_identity
+from runcoach.query_registry import (
+    WORKOUT_EXPORT_BY_ID,
+    WORKOUT_EXPORTS_BY_USER_DATE_RANGE,
+)
+from runcoach.schemas.auth import UserResponse
+from runcoach.schemas.workout import (
+    CalendarPageResponse,
+    CalendarWorkout,
+    CalendarWorkoutDetail,
+)
+from runcoach.services.workout_export import (
+    WorkoutFile,
+    WorkoutStructureError,
+    export_etag,
+    export_key,
+    render_workouts,
+    stream_zip,
+)
+from runcoach.services.workouts import get_calendar_page
+from runcoach.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+router = APIRouter()
+
+FIT_MEDIA_TYPE = "application/vnd.ant.fit"
+# Clients may keep exports but must revalidate them with the ETag
+EXPORT_CACHE_CONTROL = "private, no-cache"
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match", "")
+    return etag in (tag.strip() for tag in if_none_match.split(",")) or if_none_match == "*"
+
+
+async def _render(workouts) -> list[WorkoutFile]:
+    try:
+        return await render_workouts(workouts)
+    except WorkoutStructureError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail=str(exc),
+        ) from None
+
+
+@router.get("/calendar", response_model=CalendarPageResponse)
+async def read_calendar(
+    identity: Annotated[UserResponse, Depends(get_session_identity)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    start: date,
+    end: date,
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    cursor: str | None = None,
+    include_structure: bool = False,
+) -> CalendarPageResponse:
+    """Get workouts scheduled in ``[start, end)``, a page at a time."""
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor, date, uuid.UUID)
+        except InvalidCursor as exc:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(exc),
+            ) from None
+
+    page = await get_calendar_page(
+        db,
+        identity.id,
+        start,
+        end,
+        limit,
+        after=after,
+        include_structure=include_structure,
+    )
+    schema = CalendarWorkoutDetail if include_structure else CalendarWorkout
+    return CalendarPageResponse(
+        workouts=[schema.model_validate(workout) for workout in page.workouts],
+        next_cursor=encode_cursor(*page.next_key) if page.next_key else None,
+    )
+
+
+@router.get("/export")
+async def export_week(
+    request: Request,
+    identity: Annotated[UserResponse, Depends(get_session_identity)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    week: date,
+) -> Response:
+    """Download the workouts of the week (Monday to Sunday) holding ``week``.
+
+    The response is a zip of FIT workout files, one per workout, streamed a
+    file at a time.
+    """
+    start = week - timedelta(days=week.weekday())
+    result = await WORKOUT_EXPORTS_BY_USER_DATE_RANGE.execute(
+        db,
+        user_id=identity.id,
+        start=start,
+        end=start + timedelta(days=7),
+    )
+    workouts = result.scalars().all()
+    if not workouts:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No workouts to export that week",
+        )
+
+    etag = export_etag(export_key(workout) for workout in workouts)
+    headers = {"ETag": etag, "Cache-Control": EXPORT_CACHE_CONTROL}
+    if _not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    files = await _render(workouts)
+    headers["Content-Disposition"] = f'attachment; filename="workouts-{start.isoformat()}.zip"'
+    return StreamingResponse(stream_zip(files), media_type="application/zip", headers=headers)
+
+
+@router.get("/{workout_id}/fit")
+async def export_workout(
+    request: Request,
+    identity: Annotated[UserResponse, Depends(get_session_identity)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    workout_id: uuid.UUID,
+) -> Response:
+    """Download a workout as a FIT workout file."""
+    result = await WORKOUT_EXPORT_BY_ID.execute(db, user_id=identity.id, workout_id=workout_id)
+    workout = result.scalar_one_or_none()
+    if workout is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Workout not found",
+        )
+
+    etag = export_etag([export_key(workout)])
+    headers = {"ETag": etag, "Cache-Control": EXPORT_CACHE_CONTROL}
+    if _not_modified(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    [file] = await _render([workout])
+    headers["Content-Disposition"] = f'attachment; filename="{file.filename}"'
+    return Response(file.data, media_type=FIT_MEDIA_TYPE, headers=headers)
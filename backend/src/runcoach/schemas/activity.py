@@ -0,0 +1,22 @@
+"""Activity schemas."""
+
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class ActivityUploadResponse(BaseModel):
+    """Schema for an activity created from an uploaded FIT file."""
+
+    # Negative: uploads are keyed apart from Strava's ids
+    strava_activity_id: int
+    activity_type: str
+    start_date: datetime
+    elapsed_time_seconds: int
+    moving_time_seconds: int
+    distance_meters: float | None
+    average_heartrate: float | None
+    # Length of the decoded per-second channels
+    samples: int
+    # Scheduled workouts the activity completed
+    matched_workouts: int
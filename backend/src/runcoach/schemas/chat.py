@@ -0,0 +1,31 @@
+"""Chat schemas."""
+
+import uuid
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class ChatMessageSummary(BaseModel):
+    """Schema for a chat message, without its context snapshot."""
+
+    id: uuid.UUID
+    role: str
+    content: str
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class ChatMessageDetail(ChatMessageSummary):
+    """Schema for a chat message, including its context snapshot."""
+
+    context_snapshot: dict | None
+
+
+class ChatHistoryResponse(BaseModel):
+    """Schema for one page of chat history, newest first."""
+
+    messages: list[ChatMessageDetail | ChatMessageSummary]
+    # Pass as ``cursor`` to get older messages; None on the last page
+    next_cursor: str | None
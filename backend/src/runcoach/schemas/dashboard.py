@@ -0,0 +1,115 @@
+"""Dashboard schemas."""
+
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+
+from pydantic import BaseModel
+
+
+class ProfileSummary(BaseModel):
+    """Schema for the athlete's running profile."""
+
+    current_weekly_mileage_miles: Decimal | None
+    days_available_per_week: int | None
+    easy_pace_per_mile_seconds: int | None
+    injury_notes: str | None
+
+    model_config = {"from_attributes": True}
+
+
+class GoalSummary(BaseModel):
+    """Schema for the active goal."""
+
+    id: uuid.UUID
+    goal_type: str
+    title: str
+    target_race_distance_meters: int | None
+    target_race_date: date | None
+    target_time_seconds: int | None
+
+    model_config = {"from_attributes": True}
+
+
+class PlanSummary(BaseModel):
+    """Schema for the current training plan."""
+
+    id: uuid.UUID
+    goal_id: uuid.UUID | None
+    title: str
+    methodology: str | None
+    start_date: date
+    end_date: date
+
+    model_config = {"from_attributes": True}
+
+
+class CompletionSummary(BaseModel):
+    """Schema for a workout completion."""
+
+    completion_status: str
+    strava_activity_id: uuid.UUID | None
+
+    model_config = {"from_attributes": True}
+
+
+class WorkoutSummary(BaseModel):
+    """Schema for a scheduled workout and its completions."""
+
+    id: uuid.UUID
+    scheduled_date: date
+    workout_type: str
+    title: str | None
+    estimated_duration_minutes: int | None
+    estimated_distance_meters: int | None
+    status: str
+    completions: list[CompletionSummary]
+
+    model_config = {"from_attributes": True}
+
+
+class ActivitySummary(BaseModel):
+    """Schema for a synced Strava activity."""
+
+    id: uuid.UUID
+    strava_activity_id: int
+    activity_type: str | None
+    start_date: datetime
+    distance_meters: Decimal | None
+    moving_time_seconds: int | None
+    average_heartrate: Decimal | None
+    total_elevation_gain_meters: Decimal | None
+
+    model_config = {"from_attributes": True}
+
+
+class WeekLoadSummary(BaseModel):
+    """Schema for one week's training load."""
+
+    week_start: date
+    activity_count: int
+    moving_time_seconds: int
+    suffer_score: int
+    run_count: int
+    run_distance_meters: Decimal
+    run_distance_miles: Decimal
+    run_moving_time_seconds: int
+    run_elevation_gain_meters: Decimal
+    ramp_rate_percent: float | None
+    acute_chronic_ratio: float | None
+
+    model_config = {"from_attributes": True}
+
+
+class DashboardResponse(BaseModel):
+    """Schema for the athlete dashboard."""
+
+    week_start: date
+    profile: ProfileSummary | None
+    active_goal: GoalSummary | None
+    current_plan: PlanSummary | None
+    workouts: list[WorkoutSummary]
+    recent_activities: list[ActivitySummary]
+    training_load: list[WeekLoadSummary]
+
+    model_config = {"from_attributes": True}
@@ -0,0 +1,36 @@
+"""Workout schemas."""
+
+import uuid
+from datetime import date
+
+from pydantic import BaseModel
+
+
+class CalendarWorkout(BaseModel):
+    """Schema for a workout on the calendar, without its structure."""
+
+    id: uuid.UUID
+    training_plan_id: uuid.UUID
+    scheduled_date: date
+    workout_type: str
+    title: str | None
+    estimated_duration_minutes: int | None
+    estimated_distance_meters: int | None
+    status: str
+
+    model_config = {"from_attributes": True}
+
+
+class CalendarWorkoutDetail(CalendarWorkout):
+    """Schema for a workout on the calendar, including its structure."""
+
+    description: str | None
+    structure: dict
+
+
+class CalendarPageResponse(BaseModel):
+    """Schema for one page of the workout calendar."""
+
+    workouts: list[CalendarWorkoutDetail | CalendarWorkout]
+    # Pass as ``cursor`` to get the next page; None on the last page
+    next_cursor: str | None
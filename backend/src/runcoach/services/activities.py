@@ -0,0 +1,58 @@
+"""Reads of a user's Strava activities."""
+
+import uuid
+from collections.abc import Sequence
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from runcoach.models.strava_activity import StravaActivity, StravaActivityPayload
+from runcoach.query_registry import ACTIVITIES_BY_USER_DATE_RANGE
+
+
+def recent_window(weeks: int, now: datetime | None = None) -> tuple[datetime, datetime]:
+    """Half-open ``[start, end)`` bounds covering the last ``weeks`` weeks.
+
+    The bounds are passed as parameters on the bare ``start_date`` column, so
+    the planner can prune ``strava_activities`` down to the partitions that
+    overlap the window. Wrapping the column in an expression (``date(...)``,
+    ``extract(...)``) would defeat pruning.
+    """
+    now = now or datetime.utcnow()
+    # Strava clocks and ours can disagree slightly; keep "just now" in range
+    return now - timedelta(weeks=weeks), now + timedelta(days=1)
+
+
+async def get_recent_activities(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    weeks: int,
+    now: datetime | None = None,
+) -> Sequence[StravaActivity]:
+    """Return a user's activities from the last ``weeks`` weeks, oldest first."""
+    start, end = recent_window(weeks, now)
+    result = await ACTIVITIES_BY_USER_DATE_RANGE.execute(
+        db,
+        user_id=user_id,
+        start=start,
+        end=end,
+    )
+    return result.scalars().all()
+
+
+async def get_activity_raw_data(
+    db: AsyncSession,
+    strava_activity_id: int,
+) -> dict[str, Any] | None:
+    """Return Strava's full payload for one activity, if stored.
+
+    Activity reads only load the typed summary columns; the payload is
+    fetched separately, and only by callers that need it.
+    """
+    return await db.scalar(
+        select(StravaActivityPayload.raw_data).where(
+            StravaActivityPayload.strava_activity_id == strava_activity_id
+        )
+    )
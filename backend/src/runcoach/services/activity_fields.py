@@ -0,0 +1,138 @@
+"""Raw Strava payload fields promoted to typed ``strava_activities`` columns.
+
+Analytics filter and aggregate on a handful of fields that only exist in
+Strava's payload. Rather than decoding ``strava_activity_payloads.raw_data``
+row by row, each field in ``PROMOTED_FIELDS`` is projected into a typed
+column on ``strava_activities``: the ingest path fills it from the summary,
+and ``backfill_promoted_fields`` fills it for rows stored before the column
+existed.
+
+Promoting another field takes a column on ``StravaActivity`` (plus a
+migration) and an entry here; ingest and backfill pick it up from this list.
+"""
+
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any
+
+from sqlalchemy import ColumnElement, Integer, Numeric, case, cast, func, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from runcoach.models.strava_activity import (
+    StravaActivity,
+    StravaActivityKey,
+    StravaActivityPayload,
+)
+
+
+@dataclass(frozen=True)
+class PromotedField:
+    """A numeric payload key projected into a ``strava_activities`` column.
+
+    ``places`` is the number of decimal places kept, or None for an integer
+    column.
+    """
+
+    column: str
+    key: str
+    places: int | None = None
+
+    def extract(self, summary: dict[str, Any]) -> Decimal | int | None:
+        """Read the field from a Strava summary, or None if absent or not a number."""
+        value = summary.get(self.key)
+        if isinstance(value, bool) or not isinstance(value, int | float):
+            return None
+        # Half away from zero, like Postgres round(numeric)
+        rounded = Decimal(str(value)).quantize(
+            Decimal(1).scaleb(-(self.places or 0)),
+            rounding=ROUND_HALF_UP,
+        )
+        return int(rounded) if self.places is None else rounded
+
+    def expression(self, raw_data: ColumnElement) -> ColumnElement:
+        """SQL equivalent of ``extract`` over a JSONB payload column."""
+        value = cast(raw_data[self.key].astext, Numeric)
+        if self.places is None:
+            value = cast(func.round(value), Integer)
+        else:
+            value = func.round(value, self.places)
+        return case(
+            (func.jsonb_typeof(raw_data[self.key]) == "number", value),
+            else_=None,
+        )
+
+
+PROMOTED_FIELDS = (
+    PromotedField("total_elevation_gain_meters", "total_elevation_gain", places=2),
+    PromotedField("workout_type", "workout_type"),
+    PromotedField("average_cadence", "average_cadence", places=2),
+    PromotedField("suffer_score", "suffer_score"),
+)
+
+
+def promoted_values(summary: dict[str, Any]) -> dict[str, Any]:
+    """Column values for every promoted field of a Strava summary."""
+    return {field.column: field.extract(summary) for field in PROMOTED_FIELDS}
+
+
+async def backfill_batch(
+    db: AsyncSession,
+    after_strava_activity_id: int,
+    batch_size: int,
+) -> tuple[int, int | None]:
+    """Project the promoted fields for the next batch of stored payloads.
+
+    Walks payloads in ``strava_activity_id`` order starting after
+    ``after_strava_activity_id``. Returns the number of activities changed
+    and the last id covered, or None once there are no more payloads.
+    """
+    batch = (
+        select(StravaActivityPayload.strava_activity_id)
+        .where(StravaActivityPayload.strava_activity_id > after_strava_activity_id)
+        .order_by(StravaActivityPayload.strava_activity_id)
+        .limit(batch_size)
+        .subquery()
+    )
+    upper = await db.scalar(select(func.max(batch.c.strava_activity_id)))
+    if upper is None:
+        return 0, None
+
+    columns = [StravaActivity.__table__.c[field.column] for field in PROMOTED_FIELDS]
+    values = [field.expression(StravaActivityPayload.raw_data) for field in PROMOTED_FIELDS]
+    result = await db.execute(
+        update(StravaActivity)
+        .values({field.column: value for field, value in zip(PROMOTED_FIELDS, values)})
+        .where(
+            StravaActivityPayload.strava_activity_id > after_strava_activity_id,
+            StravaActivityPayload.strava_activity_id <= upper,
+            StravaActivityKey.strava_activity_id == StravaActivityPayload.strava_activity_id,
+            # Match on the full primary key so each lookup is pruned to
+            # the activity's partition
+            StravaActivity.id == StravaActivityKey.activity_id,
+            StravaActivity.start_date == StravaActivityKey.start_date,
+            # Rows that are already current are not rewritten
+            tuple_(*columns).is_distinct_from(tuple_(*values)),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount, upper
+
+
+async def backfill_promoted_fields(
+    session_maker: async_sessionmaker[AsyncSession],
+    batch_size: int = 1000,
+) -> int:
+    """Backfill the promoted columns for all stored activities.
+
+    Each batch commits on its own, so the backfill can run against a live
+    database and be stopped and restarted at any point.
+    """
+    changed = 0
+    last_id: int | None = 0
+    while last_id is not None:
+        async with session_maker() as db:
+            batch_changed, last_id = await backfill_batch(db, last_id, batch_size)
+            await db.commit()
+        changed += batch_changed
+    return changed
+
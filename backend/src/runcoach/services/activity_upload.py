@@ -0,0 +1,185 @@
+"""Activity uploads from FIT files.
+
+Athletes with Garmin (or other device) exports upload ``.fit`` files as the
+raw request body. The body is streamed to a temporary file a chunk at a time,
+within ``fit_upload_max_bytes`` and hashed as it goes; the file is decoded
+into per-second channels in a worker thread (``services.fit_decoder``); and
+the channels are summarized into a Strava-shaped activity summary that goes
+through the same ingest as a Strava sync (``services.strava_ingest``), so an
+upload counts toward training load, fitness and workout matching like any
+other activity.
+
+Uploads have no Strava id. Each is keyed by a negative
+``strava_activity_id`` derived from the athlete and the file's hash, so
+uploading the same file again updates the same activity, while another
+athlete's copy of the file is an activity of its own. An upload that writes
+nothing (the same file and name sent again) is refused as a conflict.
+"""
+
+import asyncio
+import hashlib
+import tempfile
+import uuid
+from collections.abc import AsyncIterable
+from dataclasses import dataclass
+from typing import Any, BinaryIO
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from runcoach.config import get_settings
+from runcoach.services.fit_decoder import ActivityChannels, read_activity
+from runcoach.services.strava_ingest import ingest_activity_pages
+
+settings = get_settings()
+
+# Seconds at or above this speed (m/s) count as moving
+MOVING_SPEED = 0.5
+# FIT sport and sub-sport to Strava activity type; sports not listed are
+# "Workout"
+SPORT_TYPES = {1: "Run", 2: "Ride", 5: "Swim", 10: "Workout", 11: "Walk", 17: "Hike"}
+SUB_SPORT_TYPES = {(1, 3): "TrailRun", (1, 58): "VirtualRun", (2, 58): "VirtualRide"}
+# Bytes of an upload buffered before they are written out in a worker thread
+UPLOAD_WRITE_BYTES = 1 << 20
+
+_decode_slots = asyncio.Semaphore(settings.fit_upload_concurrency)
+
+
+class UploadTooLarge(Exception):
+    """The request body is over ``fit_upload_max_bytes``."""
+
+
+class UploadConflict(Exception):
+    """The upload wrote nothing: the activity is already stored as sent."""
+
+
+@dataclass
+class ActivityUpload:
+    """An uploaded activity: its summary as ingested and its channels."""
+
+    summary: dict[str, Any]
+    channels: ActivityChannels
+    # Workouts the activity completed
+    matched: int
+
+
+async def save_upload(
+    chunks: AsyncIterable[bytes],
+    file: BinaryIO,
+    max_bytes: int,
+) -> bytes:
+    """Write a request body to ``file`` as it arrives; returns its SHA-256.
+
+    Chunks are buffered up to ``UPLOAD_WRITE_BYTES`` and written out in a
+    worker thread, so disk writes never block the event loop and a body of
+    small chunks costs one thread hop per buffer rather than per chunk.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    buffered: list[bytes] = []
+    buffered_size = 0
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > max_bytes:
+            raise UploadTooLarge(f"Uploads are limited to {max_bytes} bytes")
+        digest.update(chunk)
+        buffered.append(chunk)
+        buffered_size += len(chunk)
+        if buffered_size >= UPLOAD_WRITE_BYTES:
+            await asyncio.to_thread(file.writelines, buffered)
+            buffered, buffered_size = [], 0
+    if buffered:
+        await asyncio.to_thread(file.writelines, buffered)
+    return digest.digest()
+
+
+def upload_activity_id(user_id: uuid.UUID, digest: bytes) -> int:
+    """A ``strava_activity_id`` for a user's uploaded file, below every Strava id."""
+    key = hashlib.sha256(user_id.bytes + digest).digest()
+    return -(int.from_bytes(key[:7], "big") + 1)
+
+
+def _rounded(value: float, places: int = 2) -> float | None:
+    return None if np.isnan(value) else round(float(value), places)
+
+
+def _latlng(latitude: np.ndarray, longitude: np.ndarray, index: int) -> list[float]:
+    positions = np.flatnonzero(~np.isnan(latitude) & ~np.isnan(longitude))
+    if not len(positions):
+        return []
+    at = positions[index]
+    return [round(float(latitude[at]), 6), round(float(longitude[at]), 6)]
+
+
+def activity_summary(
+    channels: ActivityChannels,
+    activity_id: int,
+    external_id: str | None = None,
+) -> dict[str, Any]:
+    """Summarize channels as a Strava activity summary (see ``activity_row``)."""
+    heartrate, speed, cadence = channels.heartrate, channels.speed, channels.cadence
+    if np.isnan(speed).all():
+        moving_time = int(np.count_nonzero(channels.recording))
+    else:
+        moving_time = int(np.count_nonzero(speed >= MOVING_SPEED))
+    if not np.isnan(channels.distance).all():
+        distance = np.nanmax(channels.distance)
+    elif not np.isnan(speed).all():
+        distance = np.nansum(speed)
+    else:
+        distance = np.nan
+    altitude = channels.altitude[~np.isnan(channels.altitude)]
+    climbs = np.diff(altitude)
+    has_heartrate = not np.isnan(heartrate).all()
+    pedaling = cadence[cadence > 0]
+    sport_type = SUB_SPORT_TYPES.get(
+        (channels.sport, channels.sub_sport),
+        SPORT_TYPES.get(channels.sport, "Workout"),
+    )
+    return {
+        "id": activity_id,
+        "external_id": external_id,
+        "type": sport_type,
+        "sport_type": sport_type,
+        "start_date": channels.start.isoformat() + "Z",
+        "elapsed_time": channels.seconds,
+        "moving_time": moving_time,
+        "distance": _rounded(distance),
+        "average_speed": _rounded(distance / moving_time, 3) if moving_time else None,
+        "max_speed": None if np.isnan(speed).all() else _rounded(np.nanmax(speed), 3),
+        "has_heartrate": has_heartrate,
+        "average_heartrate": _rounded(np.nanmean(heartrate)) if has_heartrate else None,
+        "max_heartrate": _rounded(np.nanmax(heartrate)) if has_heartrate else None,
+        "average_cadence": _rounded(pedaling.mean()) if len(pedaling) else None,
+        "total_elevation_gain": _rounded(climbs[climbs > 0].sum()) if len(climbs) else None,
+        "start_latlng": _latlng(channels.latitude, channels.longitude, 0),
+        "end_latlng": _latlng(channels.latitude, channels.longitude, -1),
+    }
+
+
+async def upload_fit_activity(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    chunks: AsyncIterable[bytes],
+    filename: str | None = None,
+) -> ActivityUpload:
+    """Store a FIT file's activity for the user from its streamed bytes.
+
+    Raises ``UploadTooLarge`` for an oversized body, ``FitError`` for a
+    file that is not a readable activity and ``UploadConflict`` when nothing
+    was written.
+    """
+    with tempfile.TemporaryFile(dir=settings.fit_upload_dir) as file:
+        digest = await save_upload(chunks, file, settings.fit_upload_max_bytes)
+        file.seek(0)
+        async with _decode_slots:
+            channels = await asyncio.to_thread(
+                read_activity,
+                file,
+                settings.fit_upload_max_hours * 3600,
+            )
+    summary = activity_summary(channels, upload_activity_id(user_id, digest), filename)
+    result = await ingest_activity_pages(db, user_id, [[summary]])
+    if not result.written:
+        raise UploadConflict("This activity has already been uploaded")
+    return ActivityUpload(summary=summary, channels=channels, matched=result.matched)
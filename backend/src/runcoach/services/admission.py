@@ -0,0 +1,246 @@
+"""Admission control and load shedding for expensive routes.
+
+Login and register spend most of their time in bcrypt. Without a limit, a
+credential-stuffing burst queues unbounded work and every worker ends up
+hashing. ``AdmissionController`` puts two gates in front of those routes:
+
+* per-client-IP and per-email token buckets (429 when empty),
+* a per-route concurrency limit with a bounded wait queue (503 when the
+  queue is full or the wait times out).
+
+Rejections carry a ``retry_after`` hint in seconds. All state is in memory
+and per process.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Any
+
+from runcoach.config import get_settings
+
+# Upper bound on Retry-After hints, e.g. when a bucket never refills
+MAX_RETRY_AFTER = 3600
+
+
+class AdmissionRejected(Exception):
+    """Base class for requests turned away by admission control."""
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(min(retry_after, MAX_RETRY_AFTER)))
+
+
+class RateLimited(AdmissionRejected):
+    """The caller exhausted its token bucket."""
+
+
+class Overloaded(AdmissionRejected):
+    """The route is at capacity and its wait queue is full."""
+
+
+class TokenBucketLimiter:
+    """Token buckets keyed by an arbitrary string, bounded in number of keys."""
+
+    def __init__(
+        self,
+        capacity: int,
+        refill_per_second: float,
+        max_keys: int = 100_000,
+    ) -> None:
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self.rejected = 0
+
+    def acquire(self, key: str) -> float:
+        """Take one token for ``key``.
+
+        Returns 0 if a token was available, otherwise the number of seconds
+        until one will be.
+        """
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.get(key, (float(self.capacity), now))
+        tokens = min(
+            float(self.capacity),
+            tokens + (now - updated_at) * self.refill_per_second,
+        )
+
+        if tokens >= 1:
+            wait = 0.0
+            tokens -= 1
+        else:
+            self.rejected += 1
+            wait = (
+                (1 - tokens) / self.refill_per_second
+                if self.refill_per_second > 0
+                else float("inf")
+            )
+
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        # A full bucket is indistinguishable from a forgotten one, so the
+        # least recently seen keys can be dropped safely.
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self) -> dict[str, Any]:
+        """Return bucket counts and rejections."""
+        return {"tracked_keys": len(self._buckets), "rejected": self.rejected}
+
+
+class ConcurrencyLimiter:
+    """Caps concurrent executions of a route, with a bounded wait queue."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore: asyncio.Semaphore | None = None
+        self._semaphore_loop: asyncio.AbstractEventLoop | None = None
+
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.timed_out = 0
+        self._service_time_ewma = 0.5
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _retry_after(self) -> float:
+        backlog = self.waiting + self.active + 1
+        return backlog / self.max_concurrency * self._service_time_ewma
+
+    async def acquire(self) -> float:
+        """Wait for a slot; returns the admission time for ``release``."""
+        semaphore = self._get_semaphore()
+        if semaphore.locked() and self.waiting >= self.max_queue:
+            self.shed += 1
+            raise Overloaded(f"{self.name} is at capacity", self._retry_after())
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+        except TimeoutError:
+            self.timed_out += 1
+            raise Overloaded(
+                f"{self.name} queue wait timed out",
+                self._retry_after(),
+            ) from None
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+        return time.monotonic()
+
+    def release(self, admitted_at: float) -> None:
+        """Free a slot taken by ``acquire``."""
+        elapsed = time.monotonic() - admitted_at
+        self._service_time_ewma += 0.2 * (elapsed - self._service_time_ewma)
+        self.active -= 1
+        self._get_semaphore().release()
+
+    def stats(self) -> dict[str, Any]:
+        """Return occupancy and shedding counters."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "timed_out": self.timed_out,
+            "avg_service_ms": self._service_time_ewma * 1000,
+        }
+
+
+class AdmissionController:
+    """Concurrency limits per route plus per-IP and per-email rate limits."""
+
+    def __init__(
+        self,
+        routes: tuple[str, ...],
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        ip_burst: int,
+        ip_refill_per_second: float,
+        email_burst: int,
+        email_refill_per_second: float,
+    ) -> None:
+        self.routes = {
+            route: ConcurrencyLimiter(route, max_concurrency, max_queue, queue_timeout)
+            for route in routes
+        }
+        self.ip_buckets = TokenBucketLimiter(ip_burst, ip_refill_per_second)
+        self.email_buckets = TokenBucketLimiter(email_burst, email_refill_per_second)
+
+    def check_ip(self, ip: str) -> None:
+        """Raise ``RateLimited`` if ``ip`` has exhausted its bucket."""
+        wait = self.ip_buckets.acquire(ip)
+        if wait:
+            raise RateLimited("Too many requests from this address", wait)
+
+    def check_email(self, email: str) -> None:
+        """Raise ``RateLimited`` if ``email`` has exhausted its bucket."""
+        wait = self.email_buckets.acquire(email.strip().lower())
+        if wait:
+            raise RateLimited("Too many attempts for this account", wait)
+
+    async def acquire(self, route: str) -> float:
+        """Wait for a slot on ``route``; raises ``Overloaded`` when shedding."""
+        return await self.routes[route].acquire()
+
+    def release(self, route: str, admitted_at: float) -> None:
+        """Free a slot on ``route``."""
+        self.routes[route].release(admitted_at)
+
+    def reset(self) -> None:
+        """Forget all rate-limit state (e.g. between tests)."""
+        self.ip_buckets = TokenBucketLimiter(
+            self.ip_buckets.capacity,
+            self.ip_buckets.refill_per_second,
+        )
+        self.email_buckets = TokenBucketLimiter(
+            self.email_buckets.capacity,
+            self.email_buckets.refill_per_second,
+        )
+
+    def stats(self) -> dict[str, Any]:
+        """Return per-route and rate-limiter counters."""
+        return {
+            "routes": {name: limiter.stats() for name, limiter in self.routes.items()},
+            "ip_rate_limit": self.ip_buckets.stats(),
+            "email_rate_limit": self.email_buckets.stats(),
+        }
+
+
+settings = get_settings()
+auth_admission = AdmissionController(
+    routes=("login", "register"),
+    max_concurrency=settings.auth_max_concurrency,
+    max_queue=settings.auth_max_queue,
+    queue_timeout=settings.auth_queue_timeout_seconds,
+    ip_burst=settings.auth_ip_burst,
+    ip_refill_per_second=settings.auth_ip_refill_per_second,
+    email_burst=settings.auth_email_burst,
+    email_refill_per_second=settings.auth_email_refill_per_second,
+)
@@ -1,67 +1,135 @@
 """Authentication service for password hashing and session management."""
 
 import uuid
+from dataclasses import dataclass
+from datetime import datetime
 
-import bcrypt
 from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
-from sqlalchemy import select
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from runcoach.config import get_settings
 from runcoach.models.user import User
+from runcoach.query_registry import USER_BY_EMAIL, USER_BY_ID, USER_BY_INVITE_CODE
+from runcoach.services.password_hasher import (  # noqa: F401 - re-exported
+    hash_password,
+    password_hasher,
+    verify_password,
+)
 
 settings = get_settings()
 
-# Session serializer
+# Legacy (v1) session serializer: the token payload is just the user ID.
+# Still accepted so sessions issued before v2 keep working until they expire.
 session_serializer = URLSafeTimedSerializer(settings.secret_key)
 
+# v2 session serializer: the payload carries the identity claims. A distinct
+# salt keeps v1 and v2 signatures from being interchangeable.
+SESSION_TOKEN_VERSION = 2
+claims_serializer = URLSafeTimedSerializer(
+    settings.secret_key,
+    salt="runcoach.session.v2",
+)
+
 # Session duration (7 days)
 SESSION_MAX_AGE = 60 * 60 * 24 * 7
 
 
-def hash_password(password: str) -> str:
-    """Hash a password using bcrypt."""
-    salt = bcrypt.gensalt()
-    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+class RegistrationConflict(Exception):
+    """Raised when a registration collides with an existing user."""
+
+    def __init__(self, field: str) -> None:
+        super().__init__(f"{field} already in use")
+        self.field = field
+
+
+@dataclass(frozen=True)
+class SessionClaims:
+    """Identity claims carried by a verified session token.
+
+    Legacy v1 tokens only carry the user ID; every other field is None and
+    the caller must load the user from the database.
+    """
 
+    user_id: uuid.UUID
+    name: str | None = None
+    email: str | None = None
+    created_at: datetime | None = None
+    generation: int | None = None
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    return bcrypt.checkpw(
-        plain_password.encode("utf-8"),
-        hashed_password.encode("utf-8"),
+    @property
+    def is_legacy(self) -> bool:
+        """Whether the token predates the v2 claims format."""
+        return self.generation is None
+
+
+def create_session_token(user: User) -> str:
+    """Create a signed v2 session token carrying the user's identity claims."""
+    return claims_serializer.dumps(
+        {
+            "v": SESSION_TOKEN_VERSION,
+            "uid": str(user.id),
+            "name": user.name,
+            "email": user.email,
+            "created_at": user.created_at.isoformat(),
+            "gen": user.session_generation or 0,
+        }
     )
 
 
-def create_session_token(user_id: uuid.UUID) -> str:
-    """Create a signed session token containing the user ID."""
-    return session_serializer.dumps(str(user_id))
+def verify_session_claims(token: str) -> SessionClaims | None:
+    """Verify a v2 or legacy session token and return its claims if valid."""
+    try:
+        payload = claims_serializer.loads(token, max_age=SESSION_MAX_AGE)
+    except SignatureExpired:
+        return None
+    except BadSignature:
+        return _verify_legacy_session_token(token)
 
+    try:
+        if payload["v"] != SESSION_TOKEN_VERSION:
+            return None
+        return SessionClaims(
+            user_id=uuid.UUID(payload["uid"]),
+            name=payload["name"],
+            email=payload["email"],
+            created_at=datetime.fromisoformat(payload["created_at"]),
+            generation=int(payload["gen"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
 
-def verify_session_token(token: str) -> uuid.UUID | None:
-    """Verify a session token and return the user ID if valid."""
+
+def _verify_legacy_session_token(token: str) -> SessionClaims | None:
     try:
         user_id_str = session_serializer.loads(token, max_age=SESSION_MAX_AGE)
-        return uuid.UUID(user_id_str)
-    except (BadSignature, SignatureExpired, ValueError):
+        return SessionClaims(user_id=uuid.UUID(user_id_str))
+    except (BadSignature, SignatureExpired, AttributeError, TypeError, ValueError):
         return None
 
 
+def verify_session_token(token: str) -> uuid.UUID | None:
+    """Verify a session token and return the user ID if valid."""
+    claims = verify_session_claims(token)
+    return claims.user_id if claims is not None else None
+
+
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     """Get a user by email address."""
-    result = await db.execute(select(User).where(User.email == email))
+    result = await USER_BY_EMAIL.execute(db, email=email)
     return result.scalar_one_or_none()
 
 
 async def get_user_by_id(db: AsyncSession, user_id: uuid.UUID) -> User | None:
     """Get a user by ID."""
-    result = await db.execute(select(User).where(User.id == user_id))
+    result = await USER_BY_ID.execute(db, user_id=user_id)
     return result.scalar_one_or_none()
 
 
 async def get_user_by_invite_code(db: AsyncSession, invite_code: str) -> User | None:
     """Get a user by invite code."""
-    result = await db.execute(select(User).where(User.invite_code == invite_code))
+    result = await USER_BY_INVITE_CODE.execute(db, invite_code=invite_code)
     return result.scalar_one_or_none()
 
 
@@ -72,28 +140,83 @@ async def create_user(
     email: str,
     password: str,
 ) -> User:
-    """Create a new user."""
-    user = User(
-        invite_code=invite_code,
-        name=name,
-        email=email,
-        password_hash=hash_password(password),
+    """Create a new user with a single INSERT ... ON CONFLICT DO NOTHING RETURNING.
+
+    The unique constraints on ``invite_code`` and ``email`` arbitrate
+    concurrent signups atomically. Raises ``RegistrationConflict`` naming the
+    colliding field if either is already taken.
+    """
+    password_hash = await password_hasher.hash(password)
+    user = await db.scalar(
+        insert(User)
+        .values(
+            invite_code=invite_code,
+            name=name,
+            email=email,
+            password_hash=password_hash,
+        )
+        .on_conflict_do_nothing()
+        .returning(User)
     )
-    db.add(user)
-    await db.flush()
-    await db.refresh(user)
+    if user is None:
+        raise RegistrationConflict(
+            await _registration_conflict_field(db, invite_code, email)
+        )
     return user
 
 
+async def _registration_conflict_field(
+    db: AsyncSession,
+    invite_code: str,
+    email: str,
+) -> str:
+    # Only runs on the failure path; the invite code is reported first, as
+    # the pre-insert checks used to.
+    result = await db.execute(
+        select(User.invite_code == invite_code).where(
+            or_(User.invite_code == invite_code, User.email == email)
+        )
+    )
+    return "invite_code" if any(result.scalars()) else "email"
+
+
+async def revoke_user_sessions(db: AsyncSession, user_id: uuid.UUID) -> None:
+    """Invalidate every session token issued to a user so far."""
+    user = await db.get(User, user_id)
+    if user is None:
+        return
+    user.session_generation = User.session_generation + 1
+    await db.flush()
+
+
 async def authenticate_user(
     db: AsyncSession,
     email: str,
     password: str,
 ) -> User | None:
-    """Authenticate a user by email and password."""
+    """Authenticate a user by email and password.
+
+    A successful login also upgrades (or downgrades) the stored hash when its
+    bcrypt cost differs from the calibrated target.
+    """
     user = await get_user_by_email(db, email)
     if user is None:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await password_hasher.verify(password, user.password_hash):
         return None
+    if password_hasher.needs_rehash(user.password_hash):
+        user.password_hash = await password_hasher.hash(password)
+        await db.flush()
     return user
+
+
+async def get_password_cost_distribution(db: AsyncSession) -> dict[int, int]:
+    """Count stored password hashes by bcrypt work factor."""
+    # "$2b$12$..." -> 12
+    cost = func.split_part(User.password_hash, "$", 3)
+    result = await db.execute(select(cost, func.count()).group_by(cost))
+    return {
+        int(rounds): count
+        for rounds, count in result.all()
+        if rounds.isdigit()
+    }
@@ -0,0 +1,101 @@
+"""Reads of a user's chat history with the coach."""
+
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, raiseload
+
+from runcoach.models.chat_message import ChatMessage
+from runcoach.query_registry import CHAT_HISTORY_PAGE, CHAT_HISTORY_PAGE_WITH_CONTEXT
+
+# Seeking before (LATEST, MAX_UUID) includes every stored message
+LATEST = datetime.max
+MAX_UUID = uuid.UUID(int=2**128 - 1)
+
+# Rows fetched per round trip from the export's server-side cursor
+EXPORT_BATCH_SIZE = 500
+
+
+@dataclass
+class HistoryPage:
+    """One page of chat history, newest message first."""
+
+    messages: Sequence[ChatMessage]
+    # Sort key of the oldest message, if older messages follow
+    next_key: tuple[datetime, uuid.UUID] | None
+
+
+async def get_history_page(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    limit: int,
+    before: tuple[datetime, uuid.UUID] | None = None,
+    include_context: bool = False,
+) -> HistoryPage:
+    """Return up to ``limit`` messages older than ``before``, newest first.
+
+    Pass the previous page's ``next_key`` as ``before`` to continue. Unless
+    ``include_context`` is set, ``context_snapshot`` is not loaded and
+    raises if accessed.
+    """
+    before_created_at, before_id = before if before is not None else (LATEST, MAX_UUID)
+    query = CHAT_HISTORY_PAGE_WITH_CONTEXT if include_context else CHAT_HISTORY_PAGE
+    # One extra row tells whether another page follows
+    result = await query.execute(
+        db,
+        user_id=user_id,
+        before_created_at=before_created_at,
+        before_id=before_id,
+        limit=limit + 1,
+    )
+    messages = result.scalars().all()
+    if len(messages) <= limit:
+        return HistoryPage(messages=messages, next_key=None)
+    oldest = messages[limit - 1]
+    return HistoryPage(
+        messages=messages[:limit],
+        next_key=(oldest.created_at, oldest.id),
+    )
+
+
+async def stream_history(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    include_context: bool = False,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[Sequence[ChatMessage]]:
+    """Yield all of a user's messages, oldest first, in batches.
+
+    Rows come from a server-side cursor ``batch_size`` at a time, so memory
+    use is bounded by the batch rather than the size of the history.
+    """
+    statement = (
+        select(ChatMessage)
+        .where(ChatMessage.user_id == user_id)
+        .order_by(ChatMessage.created_at, ChatMessage.id)
+        .execution_options(yield_per=batch_size)
+    )
+    if include_context:
+        statement = statement.options(raiseload("*"))
+    else:
+        statement = statement.options(
+            load_only(
+                ChatMessage.id,
+                ChatMessage.role,
+                ChatMessage.content,
+                ChatMessage.created_at,
+                raiseload=True,
+            ),
+            raiseload("*"),
+        )
+
+    result = await db.stream_scalars(statement)
+    async for batch in result.partitions():
+        yield batch
+        # Exported rows are not needed again; keep the identity map small
+        for message in batch:
+            db.expunge(message)
@@ -0,0 +1,83 @@
+"""Athlete dashboard read model."""
+
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from runcoach.models.goal import Goal
+from runcoach.models.strava_activity import StravaActivity
+from runcoach.models.training_plan import TrainingPlan
+from runcoach.models.user_profile import UserProfile
+from runcoach.models.workout import Workout
+from runcoach.query_registry import (
+    DASHBOARD_HEADER,
+    WORKOUTS_WITH_COMPLETIONS_BY_USER_DATE_RANGE,
+)
+from runcoach.services.activities import get_recent_activities
+from runcoach.services.training_load import WeekLoad, get_training_load
+
+
+@dataclass
+class Dashboard:
+    """Everything the athlete dashboard shows."""
+
+    week_start: date
+    profile: UserProfile | None
+    active_goal: Goal | None
+    current_plan: TrainingPlan | None
+    # Monday to Sunday of ``week_start``, with their completions loaded
+    workouts: Sequence[Workout]
+    # Newest first
+    recent_activities: Sequence[StravaActivity]
+    # Oldest first, ending with this week
+    training_load: Sequence[WeekLoad]
+
+
+def week_bounds(today: date) -> tuple[date, date]:
+    """Half-open ``[monday, next monday)`` bounds of the week containing ``today``."""
+    monday = today - timedelta(days=today.weekday())
+    return monday, monday + timedelta(weeks=1)
+
+
+async def get_dashboard(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    activity_weeks: int,
+    load_weeks: int,
+    now: datetime | None = None,
+) -> Dashboard:
+    """Load a user's dashboard in four queries.
+
+    The profile, active goal and current plan come from one query, this
+    week's workouts and their completions from a second, the recent
+    activities from a third and the weekly training load from a fourth.
+    Nothing is lazy loaded afterwards.
+    """
+    now = now or datetime.utcnow()
+    today = now.date()
+    week_start, week_end = week_bounds(today)
+
+    header = await DASHBOARD_HEADER.execute(db, user_id=user_id, today=today)
+    profile, active_goal, current_plan = header.one_or_none() or (None, None, None)
+
+    workouts = await WORKOUTS_WITH_COMPLETIONS_BY_USER_DATE_RANGE.execute(
+        db,
+        user_id=user_id,
+        start=week_start,
+        end=week_end,
+    )
+    activities = await get_recent_activities(db, user_id, activity_weeks, now)
+    training_load = await get_training_load(db, user_id, load_weeks, today)
+
+    return Dashboard(
+        week_start=week_start,
+        profile=profile,
+        active_goal=active_goal,
+        current_plan=current_plan,
+        workouts=workouts.unique().scalars().all(),
+        recent_activities=list(reversed(activities)),
+        training_load=training_load,
+    )
@@ -0,0 +1,100 @@
+"""Outbound email through the Resend API."""
+
+import httpx
+
+from runcoach.config import get_settings
+
+settings = get_settings()
+
+
+class DeliveryError(Exception):
+    """Raised when a message could not be handed to the provider.
+
+    ``retryable`` is set for failures that may succeed later (timeouts,
+    connection errors, rate limiting, provider errors) and cleared for ones
+    that will not (e.g. a rejected recipient).
+    """
+
+    def __init__(self, message: str, retryable: bool) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class ResendEmailSender:
+    """Sends email through Resend over one pooled HTTP client.
+
+    The client keeps up to ``max_connections`` connections alive, so
+    concurrent sends reuse TLS sessions instead of reconnecting per message.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        from_address: str,
+        max_connections: int,
+        timeout: float,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.from_address = from_address
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=timeout,
+            transport=transport,
+        )
+
+    async def send(
+        self,
+        to: str,
+        subject: str,
+        text: str,
+        idempotency_key: str,
+    ) -> None:
+        """Send one message; raises ``DeliveryError`` if it was not accepted.
+
+        Resend drops a request whose ``idempotency_key`` it has already
+        accepted, so retrying a send that timed out after delivery does
+        not send the message twice.
+        """
+        try:
+            response = await self._client.post(
+                "/emails",
+                json={
+                    "from": self.from_address,
+                    "to": [to],
+                    "subject": subject,
+                    "text": text,
+                },
+                headers={"Idempotency-Key": idempotency_key},
+            )
+        except httpx.TransportError as exc:
+            raise DeliveryError(f"{type(exc).__name__}: {exc}", retryable=True) from exc
+
+        if response.is_success:
+            return
+        retryable = response.status_code == 429 or response.status_code >= 500
+        raise DeliveryError(
+            f"HTTP {response.status_code}: {response.text[:500]}",
+            retryable=retryable,
+        )
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        await self._client.aclose()
+
+
+def create_email_sender(transport: httpx.AsyncBaseTransport | None = None) -> ResendEmailSender:
+    """Create a sender from the configured Resend settings."""
+    return ResendEmailSender(
+        api_key=settings.resend_api_key,
+        base_url=settings.resend_api_url,
+        from_address=settings.resend_from_address,
+        max_connections=settings.notification_email_concurrency,
+        timeout=settings.notification_http_timeout_seconds,
+        transport=transport,
+    )
@@ -0,0 +1,413 @@
+"""Streaming decoder for FIT activity files.
+
+Garmin and most other devices record activities as FIT files: a header, a
+run of definition and data messages, and a CRC. A six-hour ultra is a few
+megabytes and tens of thousands of ``record`` messages, and decoding every
+message into objects (as ``fit_tool`` does) is slow and holds the whole file.
+
+This decoder reads the file in ``CHUNK_SIZE`` chunks and decodes only what an
+activity needs: the ``record`` message channels, the ``session`` sport and
+the ``file_id`` type. Every definition message compiles into one
+``struct.Struct`` that unpacks the wanted fields of its data messages and
+skips the rest, so a record costs one ``unpack_from`` and an append per
+channel to an ``array.array``. Memory is one chunk plus the raw samples; the
+result is per-second NumPy channels (see ``ActivityChannels``).
+"""
+
+import math
+import struct
+from array import array
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import BinaryIO
+
+import numpy as np
+
+CHUNK_SIZE = 64 * 1024
+# FIT timestamps are seconds since this instant, UTC
+FIT_EPOCH = datetime(1989, 12, 31)
+# Gaps between samples up to this long (smart recording, short dropouts)
+# are interpolated; longer ones are pauses and stay NaN
+MAX_FILL_SECONDS = 10
+
+# Global message numbers
+FILE_ID = 0
+SESSION = 18
+RECORD = 20
+ACTIVITY_FILE = 4
+TIMESTAMP_FIELD = 253
+
+# Base type byte: struct format and the value meaning "no data"
+_BASE_TYPES = {
+    0x00: ("B", 0xFF),
+    0x01: ("b", 0x7F),
+    0x02: ("B", 0xFF),
+    0x83: ("h", 0x7FFF),
+    0x84: ("H", 0xFFFF),
+    0x85: ("i", 0x7FFFFFFF),
+    0x86: ("I", 0xFFFFFFFF),
+    0x0A: ("B", 0x00),
+    0x8B: ("H", 0x0000),
+    0x8C: ("I", 0x00000000),
+}
+# Field numbers decoded from each message; everything else is skipped
+_FILE_ID_FIELDS = {0: "type"}
+_SESSION_FIELDS = {5: "sport", 6: "sub_sport"}
+# Record fields by channel, preferred field first
+_RECORD_CHANNELS = {
+    "latitude": (0,),
+    "longitude": (1,),
+    "altitude": (78, 2),
+    "heartrate": (3,),
+    "cadence": (4,),
+    "distance": (5,),
+    "speed": (73, 6),
+}
+# Raw value to unit, as value / scale - offset; positions are in semicircles
+_CHANNEL_UNITS = {
+    "latitude": (2**31 / 180, 0.0),
+    "longitude": (2**31 / 180, 0.0),
+    "altitude": (5.0, 500.0),
+    "heartrate": (1.0, 0.0),
+    "cadence": (1.0, 0.0),
+    "distance": (100.0, 0.0),
+    "speed": (1000.0, 0.0),
+}
+_CHANNEL_DTYPES = {"latitude": np.float64, "longitude": np.float64, "distance": np.float64}
+
+
+def _crc_table() -> list[int]:
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return table
+
+
+_CRC_TABLE = _crc_table()
+
+
+def fit_crc(data: bytes, crc: int = 0) -> int:
+    """The FIT CRC-16 of ``data``, continuing from ``crc``."""
+    table = _CRC_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+class FitError(ValueError):
+    """The file is not a FIT activity this decoder can read."""
+
+
+@dataclass
+class ActivityChannels:
+    """An activity's samples, one per second from ``start``.
+
+    Every channel has one value per second; seconds the device recorded
+    nothing for (pauses, sensor dropouts) are NaN. ``time`` is seconds since
+    ``start``; positions are degrees, altitude and distance meters, speed
+    meters per second, heart rate beats and cadence revolutions per minute.
+    """
+
+    start: datetime
+    time: np.ndarray
+    heartrate: np.ndarray
+    speed: np.ndarray
+    cadence: np.ndarray
+    altitude: np.ndarray
+    latitude: np.ndarray
+    longitude: np.ndarray
+    distance: np.ndarray
+    # Seconds within MAX_FILL_SECONDS of a record either side
+    recording: np.ndarray
+    # FIT sport and sub-sport of the first session, when there is one
+    sport: int | None = None
+    sub_sport: int | None = None
+
+    @property
+    def seconds(self) -> int:
+        return len(self.time)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(
+            getattr(self, name).nbytes
+            for name in ("time", "recording", *_RECORD_CHANNELS)
+        )
+
+
+@dataclass
+class _Definition:
+    """How to unpack one local message type's data messages."""
+
+    global_number: int
+    layout: struct.Struct
+    # Decoded fields by name, as positions in the unpacked tuple
+    fields: dict[str, int]
+    invalid: tuple[int, ...]
+    # Record channels: (append, position or -1, invalid value)
+    sinks: tuple[tuple[Callable[[float], None], int, int], ...] = ()
+
+
+class _ChunkReader:
+    """Buffered reads of a file, a chunk at a time, with a running CRC."""
+
+    def __init__(self, file: BinaryIO, chunk_size: int) -> None:
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = bytearray()
+        self.pos = 0
+        self.crc = 0
+
+    def need(self, size: int) -> None:
+        """Make ``size`` unread bytes available from ``pos``."""
+        if len(self.buffer) - self.pos >= size:
+            return
+        self.crc = fit_crc(self.buffer[: self.pos], self.crc)
+        del self.buffer[: self.pos]
+        self.pos = 0
+        while len(self.buffer) < size:
+            chunk = self.file.read(max(self.chunk_size, size - len(self.buffer)))
+            if not chunk:
+                raise FitError("File ends before its data does")
+            self.buffer += chunk
+
+    def checksum(self) -> int:
+        """The CRC of every byte consumed so far."""
+        return fit_crc(self.buffer[: self.pos], self.crc)
+
+
+def _compile(
+    global_number: int,
+    endian: str,
+    fields: list[tuple[int, int, int]],
+    developer_size: int,
+    channels: dict[str, array],
+) -> _Definition:
+    wanted = {TIMESTAMP_FIELD: "timestamp"}
+    if global_number == FILE_ID:
+        wanted.update(_FILE_ID_FIELDS)
+    elif global_number == SESSION:
+        wanted.update(_SESSION_FIELDS)
+    elif global_number == RECORD:
+        wanted.update(
+            (number, f"{channel}:{number}")
+            for channel, numbers in _RECORD_CHANNELS.items()
+            for number in numbers
+        )
+
+    layout, decoded, invalid = [], {}, []
+    for number, size, base_type in fields:
+        name = wanted.get(number)
+        fmt, missing = _BASE_TYPES.get(base_type, ("", 0))
+        # Array and string fields, and types nothing here reads, are skipped
+        if name is not None and fmt and struct.calcsize(fmt) == size:
+            decoded[name] = len(invalid)
+            layout.append(fmt)
+            invalid.append(missing)
+        elif size:
+            layout.append(f"{size}x")
+    if developer_size:
+        layout.append(f"{developer_size}x")
+    definition = _Definition(
+        global_number,
+        struct.Struct(endian + "".join(layout)),
+        decoded,
+        tuple(invalid),
+    )
+
+    if global_number == RECORD:
+        sinks = []
+        for channel, numbers in _RECORD_CHANNELS.items():
+            position = next(
+                (decoded[f"{channel}:{n}"] for n in numbers if f"{channel}:{n}" in decoded),
+                -1,
+            )
+            sinks.append(
+                (
+                    channels[channel].append,
+                    position,
+                    invalid[position] if position >= 0 else 0,
+                )
+            )
+        definition.sinks = tuple(sinks)
+    return definition
+
+
+def _fill(
+    sample_seconds: np.ndarray,
+    values: np.ndarray,
+    seconds: int,
+) -> np.ndarray:
+    """Place samples on the per-second grid, interpolating short gaps."""
+    grid = np.arange(seconds)
+    valid = ~np.isnan(values)
+    times, values = sample_seconds[valid], values[valid]
+    if not len(times):
+        return np.full(seconds, np.nan)
+    filled = np.interp(grid, times, values)
+    after = np.searchsorted(times, grid, side="right")
+    previous = times[np.maximum(after - 1, 0)]
+    following = times[np.minimum(after, len(times) - 1)]
+    covered = (after > 0) & (
+        (previous == grid) | ((after < len(times)) & (following - previous <= MAX_FILL_SECONDS))
+    )
+    filled[~covered] = np.nan
+    return filled
+
+
+def read_activity(
+    file: BinaryIO,
+    max_seconds: int,
+    chunk_size: int = CHUNK_SIZE,
+) -> ActivityChannels:
+    """Decode a FIT activity file into per-second channels.
+
+    Reads the first FIT segment of ``file`` and checks its CRC. Raises
+    ``FitError`` for anything that is not a readable activity, including one
+    spanning more than ``max_seconds``.
+    """
+    reader = _ChunkReader(file, chunk_size)
+    reader.need(12)
+    header_size = reader.buffer[0]
+    if header_size not in (12, 14):
+        raise FitError("Not a FIT file")
+    reader.need(header_size)
+    data_size = int.from_bytes(reader.buffer[4:8], "little")
+    if reader.buffer[8:12] != b".FIT":
+        raise FitError("Not a FIT file")
+    reader.pos = header_size
+
+    channels = {channel: array("d") for channel in _RECORD_CHANNELS}
+    timestamps = array("I")
+    definitions: dict[int, _Definition] = {}
+    first_timestamp = last_timestamp = None
+    sport = sub_sport = None
+    nan = math.nan
+    end = header_size + data_size
+    consumed = header_size
+
+    while consumed < end:
+        reader.need(1)
+        record_header = reader.buffer[reader.pos]
+        compressed = None
+        if record_header & 0x80:
+            local = (record_header >> 5) & 0x03
+            if last_timestamp is None:
+                raise FitError("Compressed timestamp before any timestamp")
+            offset = record_header & 0x1F
+            compressed = last_timestamp + ((offset - last_timestamp) & 0x1F)
+        elif record_header & 0x40:
+            local = record_header & 0x0F
+            reader.need(6)
+            buffer, pos = reader.buffer, reader.pos + 1
+            big_endian = buffer[pos + 1] == 1
+            global_number = int.from_bytes(
+                buffer[pos + 2 : pos + 4], "big" if big_endian else "little"
+            )
+            count = buffer[pos + 4]
+            size = 6 + 3 * count
+            reader.need(size + (1 if record_header & 0x20 else 0))
+            buffer, pos = reader.buffer, reader.pos + 6
+            field_definitions = [
+                tuple(buffer[pos + 3 * i : pos + 3 * i + 3]) for i in range(count)
+            ]
+            developer_size = 0
+            if record_header & 0x20:
+                developer_count = buffer[reader.pos + size]
+                reader.need(size + 1 + 3 * developer_count)
+                buffer, pos = reader.buffer, reader.pos + size + 1
+                developer_size = sum(buffer[pos + 3 * i + 1] for i in range(developer_count))
+                size += 1 + 3 * developer_count
+            definitions[local] = _compile(
+                global_number,
+                ">" if big_endian else "<",
+                field_definitions,
+                developer_size,
+                channels,
+            )
+            reader.pos += size
+            consumed += size
+            continue
+        else:
+            local = record_header & 0x0F
+
+        definition = definitions.get(local)
+        if definition is None:
+            raise FitError(f"Data message for undefined local type {local}")
+        size = 1 + definition.layout.size
+        reader.need(size)
+        values = definition.layout.unpack_from(reader.buffer, reader.pos + 1)
+        reader.pos += size
+        consumed += size
+
+        fields = definition.fields
+        timestamp = compressed
+        position = fields.get("timestamp")
+        if position is not None and values[position] != definition.invalid[position]:
+            timestamp = values[position]
+        if timestamp is not None:
+            last_timestamp = timestamp
+
+        if definition.global_number == RECORD:
+            if timestamp is None:
+                continue
+            if first_timestamp is None:
+                first_timestamp = timestamp
+            elif timestamp - first_timestamp > max_seconds:
+                raise FitError(f"Activity is longer than {max_seconds} seconds")
+            timestamps.append(timestamp)
+            for append, position, invalid in definition.sinks:
+                if position < 0:
+                    append(nan)
+                else:
+                    value = values[position]
+                    append(nan if value == invalid else value)
+        elif definition.global_number == SESSION and sport is None:
+            if "sport" in fields and values[fields["sport"]] != 0xFF:
+                sport = values[fields["sport"]]
+            if "sub_sport" in fields and values[fields["sub_sport"]] != 0xFF:
+                sub_sport = values[fields["sub_sport"]]
+        elif definition.global_number == FILE_ID and "type" in fields:
+            if values[fields["type"]] != ACTIVITY_FILE:
+                raise FitError("Not an activity file")
+
+    if consumed != end:
+        raise FitError("Last message runs past the end of the data")
+    reader.need(2)
+    calculated = reader.checksum()
+    stored = int.from_bytes(reader.buffer[reader.pos : reader.pos + 2], "little")
+    if stored != calculated:
+        raise FitError("File CRC does not match; the file is corrupt")
+    if first_timestamp is None:
+        raise FitError("Activity has no records")
+
+    sample_seconds = np.frombuffer(timestamps, dtype=np.uint32).astype(np.int64) - first_timestamp
+    if np.any(np.diff(sample_seconds) < 0):
+        order = np.argsort(sample_seconds, kind="stable")
+        sample_seconds = sample_seconds[order]
+    else:
+        order = None
+    seconds = int(sample_seconds[-1]) + 1
+
+    resampled = {}
+    for channel, raw in channels.items():
+        values = np.frombuffer(raw, dtype=np.float64)
+        if order is not None:
+            values = values[order]
+        scale, offset = _CHANNEL_UNITS[channel]
+        resampled[channel] = (_fill(sample_seconds, values, seconds) / scale - offset).astype(
+            _CHANNEL_DTYPES.get(channel, np.float32)
+        )
+    recording = ~np.isnan(_fill(sample_seconds, np.zeros(len(sample_seconds)), seconds))
+    return ActivityChannels(
+        start=FIT_EPOCH + timedelta(seconds=first_timestamp),
+        time=np.arange(seconds, dtype=np.int32),
+        recording=recording,
+        sport=sport,
+        sub_sport=sub_sport,
+        **resampled,
+    )
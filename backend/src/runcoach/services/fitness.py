@@ -0,0 +1,214 @@
+"""Fitness, fatigue and form from activity heart rate and duration.
+
+Each activity's training load is its Banister TRIMP: moving minutes weighted
+by the heart-rate reserve it was run at, exponentially so that hard minutes
+count for more. A day's load is the sum over its activities, and
+
+* fitness (CTL) and fatigue (ATL) are exponentially weighted averages of
+  daily load with time constants of ``CTL_DAYS`` and ``ATL_DAYS``,
+* form (TSB) on a day is the fitness minus the fatigue carried into it.
+
+Everything runs on NumPy arrays: TRIMP over all of an athlete's activities
+at once, daily loads with one ``bincount``, and the averages in closed form
+over blocks of days, for one athlete or for a matrix of athletes by days.
+
+Folding in a day only needs the previous day's fitness and fatigue, so the
+nightly batch (``runcoach.workers.fitness``) caches them in
+``athlete_fitness`` and a read only folds in the days since.
+"""
+
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from runcoach.config import get_settings
+from runcoach.models.fitness import AthleteFitness
+from runcoach.query_registry import ACTIVITY_LOAD_INPUTS_BY_USER_DATE_RANGE
+
+settings = get_settings()
+
+CTL_DAYS = 42
+ATL_DAYS = 7
+# Banister's TRIMP weighting
+TRIMP_FACTOR = 0.64
+TRIMP_EXPONENT = 1.92
+# Heart-rate reserve assumed for activities recorded without heart rate
+ASSUMED_HEART_RATE_RESERVE = 0.5
+# Days per closed-form block; keeps decay ** -days well inside float range
+_BLOCK_DAYS = 256
+# Reads of the whole history start here
+HISTORY_START = datetime(1970, 1, 1)
+
+
+def trimp(
+    moving_time_seconds: np.ndarray,
+    average_heartrate: np.ndarray,
+    resting_heartrate: float,
+    max_heartrate: float,
+) -> np.ndarray:
+    """Banister TRIMP of each activity; missing values are NaN."""
+    minutes = np.nan_to_num(moving_time_seconds / 60.0)
+    reserve = np.clip(
+        (average_heartrate - resting_heartrate) / (max_heartrate - resting_heartrate),
+        0.0,
+        1.0,
+    )
+    reserve = np.where(np.isnan(reserve), ASSUMED_HEART_RATE_RESERVE, reserve)
+    return minutes * reserve * TRIMP_FACTOR * np.exp(TRIMP_EXPONENT * reserve)
+
+
+def exponential_average(
+    loads: np.ndarray,
+    initial: np.ndarray | float,
+    time_constant: float,
+) -> np.ndarray:
+    """Exponentially weighted average along the last axis of ``loads``.
+
+    ``initial`` is the average before the first day, one per row. Day ``k``
+    of a block starting from ``y0`` is
+
+        y[k] = decay**k * (y0 + (1 - decay) * sum(decay**-j * x[j] for j <= k))
+
+    so each block is a ``cumsum`` rather than a loop over days.
+    """
+    decay = np.exp(-1.0 / time_constant)
+    averages = np.empty(loads.shape, dtype=np.float64)
+    state = np.asarray(initial, dtype=np.float64)
+    for start in range(0, loads.shape[-1], _BLOCK_DAYS):
+        block = loads[..., start : start + _BLOCK_DAYS]
+        days = np.arange(1, block.shape[-1] + 1)
+        weighted = np.cumsum(block * decay ** -days, axis=-1)
+        averaged = decay**days * (state[..., None] + (1.0 - decay) * weighted)
+        averages[..., start : start + _BLOCK_DAYS] = averaged
+        state = averaged[..., -1]
+    return averages
+
+
+@dataclass
+class FitnessCurve:
+    """Daily load, fitness, fatigue and form from ``start``, one per day."""
+
+    start: date
+    load: np.ndarray
+    ctl: np.ndarray
+    atl: np.ndarray
+    tsb: np.ndarray
+
+    @property
+    def end(self) -> date:
+        return self.start + timedelta(days=len(self.load) - 1)
+
+    def dates(self) -> list[date]:
+        return [self.start + timedelta(days=i) for i in range(len(self.load))]
+
+
+@dataclass
+class FitnessPoint:
+    """Fitness, fatigue and form at the end of ``day``."""
+
+    day: date
+    ctl: float
+    atl: float
+    tsb: float
+
+
+def fitness_curve(
+    loads: np.ndarray,
+    start: date,
+    ctl: float = 0.0,
+    atl: float = 0.0,
+) -> FitnessCurve:
+    """Fold daily ``loads`` from ``start`` into a state of ``ctl`` and ``atl``."""
+    ctls = exponential_average(loads, ctl, CTL_DAYS)
+    atls = exponential_average(loads, atl, ATL_DAYS)
+    # Form going into each day
+    tsb = np.concatenate(([ctl - atl], ctls[:-1] - atls[:-1]))
+    return FitnessCurve(start=start, load=loads, ctl=ctls, atl=atls, tsb=tsb)
+
+
+def daily_loads(
+    rows: Sequence[Any],
+    start: date,
+    days: int,
+    resting_heartrate: float | None = None,
+    max_heartrate: float | None = None,
+) -> np.ndarray:
+    """Sum the TRIMP of ``(start_date, moving_time, heart_rate)`` rows by day."""
+    if not rows:
+        return np.zeros(days)
+    start_dates, moving_times, heartrates = zip(*rows)
+    offsets = (
+        np.array(start_dates, dtype="datetime64[D]") - np.datetime64(start, "D")
+    ).astype(np.int64)
+    loads = trimp(
+        np.array(moving_times, dtype=np.float64),
+        np.array(heartrates, dtype=np.float64),
+        resting_heartrate or settings.fitness_resting_heartrate,
+        max_heartrate or settings.fitness_max_heartrate,
+    )
+    return np.bincount(offsets, weights=loads, minlength=days)[:days]
+
+
+async def get_fitness_curve(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    today: date | None = None,
+) -> FitnessCurve | None:
+    """Compute the curve from an athlete's first activity through ``today``.
+
+    One read of the athlete's history, then array operations; ``None`` for
+    an athlete without activities.
+    """
+    today = today or datetime.utcnow().date()
+    result = await ACTIVITY_LOAD_INPUTS_BY_USER_DATE_RANGE.execute(
+        db,
+        user_id=user_id,
+        start=HISTORY_START,
+        end=datetime.combine(today + timedelta(days=1), datetime.min.time()),
+    )
+    rows = result.all()
+    if not rows:
+        return None
+    start = rows[0].start_date.date()
+    days = (today - start).days + 1
+    return fitness_curve(daily_loads(rows, start, days), start)
+
+
+async def get_current_fitness(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    today: date | None = None,
+) -> FitnessPoint:
+    """Fitness, fatigue and form at the end of ``today``.
+
+    Resumes from the cached state when there is one, reading only the
+    activities since and folding in the days since; otherwise computes the
+    whole curve.
+    """
+    today = today or datetime.utcnow().date()
+    state = await db.get(AthleteFitness, user_id)
+    if state is None or state.as_of >= today:
+        curve = await get_fitness_curve(db, user_id, today)
+        if curve is None:
+            return FitnessPoint(day=today, ctl=0.0, atl=0.0, tsb=0.0)
+    else:
+        start = state.as_of + timedelta(days=1)
+        result = await ACTIVITY_LOAD_INPUTS_BY_USER_DATE_RANGE.execute(
+            db,
+            user_id=user_id,
+            start=datetime.combine(start, datetime.min.time()),
+            end=datetime.combine(today + timedelta(days=1), datetime.min.time()),
+        )
+        loads = daily_loads(result.all(), start, (today - start).days + 1)
+        curve = fitness_curve(loads, start, state.ctl, state.atl)
+    return FitnessPoint(
+        day=today,
+        ctl=float(curve.ctl[-1]),
+        atl=float(curve.atl[-1]),
+        tsb=float(curve.ctl[-1] - curve.atl[-1]),
+    )
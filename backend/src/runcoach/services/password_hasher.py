@@ -0,0 +1,204 @@
+"""Async password hashing backed by a bounded worker pool.
+
+bcrypt is deliberately slow, so calling it directly from a coroutine blocks
+the event loop for every other request. ``PasswordHasher`` runs the bcrypt
+primitives in a thread or process pool and caps how many run at once;
+callers beyond the cap wait in a queue whose depth is reported by ``stats()``.
+"""
+
+import asyncio
+import math
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, TypeVar
+
+import bcrypt
+
+from runcoach.config import get_settings
+
+T = TypeVar("T")
+
+
+# bcrypt accepts work factors 4..31; each step doubles the cost
+BCRYPT_MIN_ROUNDS = 4
+BCRYPT_MAX_ROUNDS = 31
+DEFAULT_ROUNDS = 12
+
+
+def hash_password(password: str, rounds: int = DEFAULT_ROUNDS) -> str:
+    """Hash a password using bcrypt."""
+    salt = bcrypt.gensalt(rounds)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash."""
+    return bcrypt.checkpw(
+        plain_password.encode("utf-8"),
+        hashed_password.encode("utf-8"),
+    )
+
+
+def password_cost(hashed_password: str) -> int | None:
+    """Return the bcrypt work factor of a stored hash, or None if unparseable."""
+    # Modular crypt format: $2b$<cost>$<22-char salt><31-char hash>
+    parts = hashed_password.split("$")
+    if len(parts) != 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def calibrate_rounds(
+    target_ms: float,
+    min_rounds: int = 10,
+    max_rounds: int = 14,
+    samples: int = 3,
+) -> int:
+    """Pick the largest work factor whose verification fits in ``target_ms``.
+
+    Times a hash at ``min_rounds`` (best of ``samples`` to damp noise) and
+    extrapolates, since every extra round doubles the cost.
+    """
+    min_rounds = max(min_rounds, BCRYPT_MIN_ROUNDS)
+    max_rounds = min(max_rounds, BCRYPT_MAX_ROUNDS)
+    salt = bcrypt.gensalt(min_rounds)
+    best = math.inf
+    for _ in range(samples):
+        started = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", salt)
+        best = min(best, time.perf_counter() - started)
+
+    best_ms = max(best * 1000, 1e-3)
+    if best_ms >= target_ms:
+        return min_rounds
+    extra_rounds = math.floor(math.log2(target_ms / best_ms))
+    return max(min_rounds, min(max_rounds, min_rounds + extra_rounds))
+
+
+class PasswordHasher:
+    """Runs bcrypt hashing and verification in a bounded worker pool."""
+
+    def __init__(
+        self,
+        executor_kind: str = "thread",
+        max_workers: int = 4,
+        rounds: int = DEFAULT_ROUNDS,
+    ) -> None:
+        if executor_kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind: {executor_kind!r}")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.executor_kind = executor_kind
+        self.max_workers = max_workers
+        self.rounds = rounds
+        self._executor: Executor | None = None
+        self._semaphore: asyncio.Semaphore | None = None
+        self._semaphore_loop: asyncio.AbstractEventLoop | None = None
+
+        self._in_flight = 0
+        self._queued = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait_seconds = 0.0
+        self._total_run_seconds = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.executor_kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hasher",
+                )
+        return self._executor
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # asyncio primitives bind to the loop they first wait on; tests and
+        # benchmarks may drive the hasher from more than one loop.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run a CPU-bound password function in the pool, respecting the cap."""
+        semaphore = self._get_semaphore()
+        queued_at = time.perf_counter()
+        self._queued += 1
+        self._max_queued = max(self._max_queued, self._queued)
+        try:
+            await semaphore.acquire()
+        finally:
+            self._queued -= 1
+
+        started_at = time.perf_counter()
+        self._total_wait_seconds += started_at - queued_at
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), func, *args)
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            self._total_run_seconds += time.perf_counter() - started_at
+            semaphore.release()
+
+        self._completed += 1
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash a password at the current work factor without blocking the loop."""
+        return await self.run(hash_password, password, self.rounds)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop."""
+        return await self.run(verify_password, plain_password, hashed_password)
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """Whether a stored hash uses a work factor other than the current one."""
+        return password_cost(hashed_password) != self.rounds
+
+    async def calibrate(self, target_ms: float, min_rounds: int, max_rounds: int) -> int:
+        """Set ``rounds`` from a timing run on this machine's workers."""
+        self.rounds = await self.run(calibrate_rounds, target_ms, min_rounds, max_rounds)
+        return self.rounds
+
+    def stats(self) -> dict[str, Any]:
+        """Return pool utilisation and queue-depth counters."""
+        finished = self._completed + self._failed
+        return {
+            "executor": self.executor_kind,
+            "rounds": self.rounds,
+            "workers": self.max_workers,
+            "in_flight": self._in_flight,
+            "queue_depth": self._queued,
+            "max_queue_depth": self._max_queued,
+            "completed": self._completed,
+            "failed": self._failed,
+            "avg_wait_ms": (
+                self._total_wait_seconds / finished * 1000 if finished else 0.0
+            ),
+            "avg_run_ms": (
+                self._total_run_seconds / finished * 1000 if finished else 0.0
+            ),
+        }
+
+    def shutdown(self) -> None:
+        """Shut down the worker pool; it is recreated on next use."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+settings = get_settings()
+password_hasher = PasswordHasher(
+    executor_kind=settings.password_hash_executor,
+    max_workers=settings.password_hash_workers,
+    rounds=settings.password_hash_rounds or DEFAULT_ROUNDS,
+)
@@ -0,0 +1,240 @@
+"""Bulk ingest of Strava activity summaries.
+
+Strava's activity list endpoint returns pages of up to 200 summaries, and a
+first sync for a new athlete can mean thousands of them. Each page is
+written with two multi-row upserts, one for the typed summary columns
+(``strava_activities``) and one for the raw payloads
+(``strava_activity_payloads``), so a page costs two round trips rather than
+one or two per activity. Re-syncing the same pages is idempotent: rows whose
+columns or payload are unchanged are left untouched, so they produce no dead
+tuples either. Activities whose start date changed are moved between
+partitions by the ``strava_activities`` key trigger (see
+``runcoach.partitions``). Once every page of a sync is in, the sync's
+activities are matched to the athlete's scheduled workouts (see
+``runcoach.services.workout_matching``).
+"""
+
+import uuid
+from collections.abc import AsyncIterable, Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import BigInteger, bindparam, func, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from runcoach.models.strava_activity import (
+    StravaActivity,
+    StravaActivityKey,
+    StravaActivityPayload,
+)
+from runcoach.partitions import ensure_partitions
+from runcoach.services.activity_fields import PROMOTED_FIELDS, promoted_values
+from runcoach.services.workout_matching import match_activities
+
+# Columns refreshed when Strava sends a newer version of an activity
+UPSERT_COLUMNS = (
+    "activity_type",
+    "distance_meters",
+    "moving_time_seconds",
+    "elapsed_time_seconds",
+    "average_heartrate",
+    "max_heartrate",
+    "average_pace_seconds_per_meter",
+    *(field.column for field in PROMOTED_FIELDS),
+)
+
+
+@dataclass
+class IngestResult:
+    """Counts from an ingest run."""
+
+    received: int = 0
+    written: int = 0
+    skipped: int = 0
+    # Workouts completed by the sync's activities
+    matched: int = 0
+    # Start dates of the earliest and latest activities received
+    first_start_date: datetime | None = None
+    last_start_date: datetime | None = None
+
+
+def _decimal(value: Any, places: int) -> Decimal | None:
+    if value is None:
+        return None
+    return round(Decimal(str(value)), places)
+
+
+def _int(value: Any) -> int | None:
+    return int(value) if value is not None else None
+
+
+def _parse_start_date(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        # Timestamps are stored as naive UTC throughout the schema
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def activity_row(user_id: uuid.UUID, summary: dict[str, Any]) -> dict[str, Any]:
+    """Extract the typed ``strava_activities`` columns from a Strava summary."""
+    distance = summary.get("distance")
+    moving_time = summary.get("moving_time")
+    pace = (
+        _decimal(moving_time / distance, 6)
+        if distance and moving_time
+        else None
+    )
+    return {
+        "user_id": user_id,
+        "strava_activity_id": int(summary["id"]),
+        "activity_type": summary.get("sport_type") or summary.get("type"),
+        "start_date": _parse_start_date(summary.get("start_date")),
+        "distance_meters": _decimal(distance, 2),
+        "moving_time_seconds": _int(moving_time),
+        "elapsed_time_seconds": _int(summary.get("elapsed_time")),
+        "average_heartrate": _decimal(summary.get("average_heartrate"), 2),
+        "max_heartrate": _decimal(summary.get("max_heartrate"), 2),
+        "average_pace_seconds_per_meter": pace,
+        **promoted_values(summary),
+    }
+
+
+def _upsert_statement():
+    stmt = insert(StravaActivity)
+    return stmt.on_conflict_do_update(
+        index_elements=[StravaActivity.strava_activity_id, StravaActivity.start_date],
+        set_={name: stmt.excluded[name] for name in UPSERT_COLUMNS},
+        # Never move an activity between athletes, and skip rows Strava has
+        # not changed since the last sync
+        where=(StravaActivity.user_id == stmt.excluded.user_id)
+        & tuple_(*(StravaActivity.__table__.c[name] for name in UPSERT_COLUMNS))
+        .is_distinct_from(tuple_(*(stmt.excluded[name] for name in UPSERT_COLUMNS))),
+    ).returning(StravaActivity.strava_activity_id)
+
+
+def _payload_upsert_statement():
+    # The page arrives as two parallel arrays, so the statement text (and its
+    # prepared statement) is the same whatever the page size
+    page = (
+        func.unnest(
+            bindparam("strava_activity_ids", type_=ARRAY(BigInteger)),
+            bindparam("payloads", type_=ARRAY(JSONB)),
+        )
+        .table_valued("strava_activity_id", "raw_data")
+        .render_derived(name="page")
+    )
+    # Core insert: the parameters bind the arrays, not rows to insert
+    stmt = insert(StravaActivityPayload.__table__).from_select(
+        ["strava_activity_id", "raw_data"],
+        # Only payloads for activities this athlete owns
+        select(page.c.strava_activity_id, page.c.raw_data).join(
+            StravaActivityKey,
+            (StravaActivityKey.strava_activity_id == page.c.strava_activity_id)
+            & (StravaActivityKey.user_id == bindparam("user_id")),
+        ),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[StravaActivityPayload.strava_activity_id],
+        set_={"raw_data": stmt.excluded.raw_data},
+        where=StravaActivityPayload.raw_data.is_distinct_from(stmt.excluded.raw_data),
+    ).returning(StravaActivityPayload.strava_activity_id)
+
+
+ACTIVITY_UPSERT = _upsert_statement()
+PAYLOAD_UPSERT = _payload_upsert_statement()
+
+
+async def ingest_activity_page(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    summaries: Iterable[dict[str, Any]],
+) -> IngestResult:
+    """Upsert one page of Strava activity summaries in a single statement."""
+    rows: dict[int, dict[str, Any]] = {}
+    payloads: dict[int, dict[str, Any]] = {}
+    result = IngestResult()
+    for summary in summaries:
+        result.received += 1
+        if summary.get("id") is None or not summary.get("start_date"):
+            result.skipped += 1
+            continue
+        row = activity_row(user_id, summary)
+        # A row may only be upserted once per statement; keep the latest copy
+        rows[row["strava_activity_id"]] = row
+        payloads[row["strava_activity_id"]] = summary
+
+    if not rows:
+        return result
+
+    start_dates = [row["start_date"] for row in rows.values()]
+    result.first_start_date = min(start_dates)
+    result.last_start_date = max(start_dates)
+    # A no-op for years this process has already seen
+    years = {row["start_date"].year for row in rows.values()}
+    await db.run_sync(lambda session: ensure_partitions(session.connection(), years))
+    written = set(
+        (await db.execute(ACTIVITY_UPSERT, list(rows.values()))).scalars()
+    )
+    # Runs after the activity upsert so newly claimed keys are visible
+    written.update(
+        (
+            await db.execute(
+                PAYLOAD_UPSERT,
+                {
+                    "user_id": user_id,
+                    "strava_activity_ids": list(payloads),
+                    "payloads": list(payloads.values()),
+                },
+            )
+        ).scalars()
+    )
+    result.written = len(written)
+    return result
+
+
+async def ingest_activity_pages(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    pages: Iterable[list[dict[str, Any]]] | AsyncIterable[list[dict[str, Any]]],
+) -> IngestResult:
+    """Ingest every page of a sync, one upsert per page.
+
+    Then matches the activities in the sync's date range to open workouts,
+    writing the completions in one batch.
+    """
+    total = IngestResult()
+
+    async def accumulate(page: list[dict[str, Any]]) -> None:
+        page_result = await ingest_activity_page(db, user_id, page)
+        total.received += page_result.received
+        total.written += page_result.written
+        total.skipped += page_result.skipped
+        if page_result.first_start_date is not None:
+            total.first_start_date = min(
+                filter(None, (total.first_start_date, page_result.first_start_date))
+            )
+            total.last_start_date = max(
+                filter(None, (total.last_start_date, page_result.last_start_date))
+            )
+
+    if isinstance(pages, AsyncIterable):
+        async for page in pages:
+            await accumulate(page)
+    else:
+        for page in pages:
+            await accumulate(page)
+    if total.first_start_date is not None:
+        matches = await match_activities(
+            db,
+            user_id,
+            total.first_start_date,
+            total.last_start_date + timedelta(microseconds=1),
+        )
+        total.matched = len(matches)
+    return total
@@ -0,0 +1,115 @@
+"""Weekly training load: volume, ramp rate and acute:chronic workload ratio.
+
+Reads the ``weekly_training_load`` buckets that triggers keep up to date on
+every activity write (see ``runcoach.models.training_load``), so a request
+costs one primary-key range read of a row per week rather than a scan of
+the athlete's activities.
+
+Ramp rate and the acute:chronic workload ratio are computed on running
+distance: the ramp rate is the change from the previous week, and the ratio
+compares the week with the mean of the ``CHRONIC_WEEKS`` weeks before it
+(the "uncoupled" form, so the week does not dilute its own baseline).
+"""
+
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from runcoach.models.training_load import WeeklyTrainingLoad
+from runcoach.query_registry import TRAINING_LOAD_BY_USER_WEEKS
+
+CHRONIC_WEEKS = 4
+METERS_PER_MILE = Decimal("1609.344")
+
+
+@dataclass
+class WeekLoad:
+    """One week's training load, zero for weeks without activities."""
+
+    week_start: date
+    activity_count: int
+    moving_time_seconds: int
+    suffer_score: int
+    run_count: int
+    run_distance_meters: Decimal
+    run_moving_time_seconds: int
+    run_elevation_gain_meters: Decimal
+    # Percent change in running distance from the week before
+    ramp_rate_percent: float | None
+    # Running distance over the mean of the CHRONIC_WEEKS weeks before
+    acute_chronic_ratio: float | None
+
+    @property
+    def run_distance_miles(self) -> Decimal:
+        return round(self.run_distance_meters / METERS_PER_MILE, 2)
+
+
+def _empty_week(user_id: uuid.UUID, week_start: date) -> WeeklyTrainingLoad:
+    return WeeklyTrainingLoad(
+        user_id=user_id,
+        week_start=week_start,
+        activity_count=0,
+        moving_time_seconds=0,
+        suffer_score=0,
+        run_count=0,
+        run_distance_meters=Decimal("0.00"),
+        run_moving_time_seconds=0,
+        run_elevation_gain_meters=Decimal("0.00"),
+    )
+
+
+async def get_training_load(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    weeks: int,
+    today: date | None = None,
+) -> list[WeekLoad]:
+    """Return the last ``weeks`` weeks, oldest first, ending with this week."""
+    today = today or date.today()
+    current = today - timedelta(days=today.weekday())
+    first = current - timedelta(weeks=weeks - 1)
+    # The chronic baseline of the first week reaches back further
+    start = first - timedelta(weeks=CHRONIC_WEEKS)
+
+    result = await TRAINING_LOAD_BY_USER_WEEKS.execute(
+        db,
+        user_id=user_id,
+        start=start,
+        end=current + timedelta(weeks=1),
+    )
+    stored = {bucket.week_start: bucket for bucket in result.scalars()}
+    series = [
+        stored.get(week_start) or _empty_week(user_id, week_start)
+        for week_start in (
+            start + timedelta(weeks=i) for i in range(weeks + CHRONIC_WEEKS)
+        )
+    ]
+
+    loads = []
+    for i in range(CHRONIC_WEEKS, len(series)):
+        bucket = series[i]
+        distance = bucket.run_distance_meters
+        previous = series[i - 1].run_distance_meters
+        chronic = sum(b.run_distance_meters for b in series[i - CHRONIC_WEEKS : i]) / CHRONIC_WEEKS
+        loads.append(
+            WeekLoad(
+                week_start=bucket.week_start,
+                activity_count=bucket.activity_count,
+                moving_time_seconds=bucket.moving_time_seconds,
+                suffer_score=bucket.suffer_score,
+                run_count=bucket.run_count,
+                run_distance_meters=distance,
+                run_moving_time_seconds=bucket.run_moving_time_seconds,
+                run_elevation_gain_meters=bucket.run_elevation_gain_meters,
+                ramp_rate_percent=(
+                    round(float((distance - previous) / previous * 100), 1)
+                    if previous
+                    else None
+                ),
+                acute_chronic_ratio=round(float(distance / chronic), 2) if chronic else None,
+            )
+        )
+    return loads
@@ -0,0 +1,144 @@
+"""In-process cache of authenticated user identity records.
+
+Every authenticated request resolves the session cookie to a ``User``. The
+cache keeps a bounded LRU of recently seen users (with a TTL as a backstop)
+so that lookup does not cost a database round trip per request.
+
+Entries are evicted explicitly whenever the ORM updates or deletes a user
+row: once at flush time and again after the transaction commits, so a
+concurrent request cannot repopulate the cache with the pre-commit row.
+Code that changes ``users`` through Core ``update()``/``delete()`` statements
+bypasses the ORM events and must call ``user_cache.invalidate()`` itself.
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from runcoach.config import get_settings
+from runcoach.models.user import User
+from runcoach.services.auth import get_user_by_id
+
+# Columns kept in the cache; the password hash is deliberately left out.
+IDENTITY_COLUMNS = (
+    "id",
+    "invite_code",
+    "name",
+    "email",
+    "session_generation",
+    "created_at",
+    "updated_at",
+)
+
+_PENDING_EVICTIONS_KEY = "runcoach_user_cache_evictions"
+
+
+class UserCache:
+    """Bounded LRU/TTL cache of user identity records keyed by user id."""
+
+    def __init__(self, max_size: int = 10_000, ttl_seconds: float = 60.0) -> None:
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[uuid.UUID, tuple[float, dict[str, Any]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: uuid.UUID) -> User | None:
+        """Return a detached ``User`` for ``user_id``, or None on a miss."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, values = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        # A detached instance keeps its identity, so attaching it to a session
+        # later (e.g. as a relationship target) never triggers an INSERT.
+        user = User(**values)
+        make_transient_to_detached(user)
+        return user
+
+    def put(self, user: User) -> None:
+        """Cache the identity columns of ``user``."""
+        if self.max_size <= 0:
+            return
+        values = {column: getattr(user, column) for column in IDENTITY_COLUMNS}
+        self._entries[user.id] = (time.monotonic() + self.ttl_seconds, values)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        """Evict ``user_id`` from the cache."""
+        if self._entries.pop(user_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        """Evict every entry."""
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Return size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+settings = get_settings()
+user_cache = UserCache(
+    max_size=settings.user_cache_max_size,
+    ttl_seconds=settings.user_cache_ttl_seconds,
+)
+
+
+async def get_user_cached(db: AsyncSession, user_id: uuid.UUID) -> User | None:
+    """Get a user by ID, consulting the cache before the database."""
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+
+    user = await get_user_by_id(db, user_id)
+    if user is not None:
+        user_cache.put(user)
+    return user
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _evict_changed_user(mapper, connection, target: User) -> None:
+    user_cache.invalidate(target.id)
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_EVICTIONS_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_committed_users(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_EVICTIONS_KEY, ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending_evictions(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING_EVICTIONS_KEY, None)
@@ -0,0 +1,385 @@
+"""Export of scheduled workouts as FIT workout files for watches.
+
+A workout's ``structure`` is a list of steps, each a run segment or a block
+of repeated steps:
+
+    {"steps": [
+        {"type": "warmup", "minutes": 15},
+        {"repeat": 6, "steps": [
+            {"type": "interval", "meters": 800, "pace": ["3:55", "4:05"]},
+            {"type": "recovery", "seconds": 90},
+        ]},
+        {"type": "cooldown", "minutes": 10, "heart_rate": [120, 145]},
+    ]}
+
+A step lasts ``seconds``, ``minutes``, ``meters`` or ``km`` (or until the lap
+button without one) and may target a ``pace`` per km ("m:ss", or a
+[fast, slow] range) or a ``heart_rate`` range in bpm; ``name`` and ``notes``
+are shown on the watch. A workout without steps becomes one step of its
+estimated distance or duration.
+
+Encoding is cached: each file is stored under a hash of everything that goes
+into it (the export key), so downloading a workout again, or a week in which
+it has not changed, never re-encodes it. The key is also the file's ETag.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import zipfile
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from fit_tool.fit_file_builder import FitFileBuilder
+from fit_tool.profile.messages.file_id_message import FileIdMessage
+from fit_tool.profile.messages.workout_message import WorkoutMessage
+from fit_tool.profile.messages.workout_step_message import WorkoutStepMessage
+from fit_tool.profile.profile_type import (
+    FileType,
+    Intensity,
+    Manufacturer,
+    Sport,
+    WorkoutStepDuration,
+    WorkoutStepTarget,
+)
+
+from runcoach.config import get_settings
+
+settings = get_settings()
+
+# Bump when the encoding changes, so cached files and ETags are renewed
+EXPORT_VERSION = 1
+# Steps in one file, counting each repeat block as a step
+MAX_STEPS = 200
+# FIT workout sport by workout type; any type not listed is a run
+WORKOUT_FIT_SPORTS = {
+    "strength": Sport.TRAINING,
+    "cross_training": Sport.GENERIC,
+}
+STEP_INTENSITIES = {
+    "warmup": Intensity.WARMUP,
+    "cooldown": Intensity.COOLDOWN,
+    "recovery": Intensity.RECOVERY,
+    "rest": Intensity.REST,
+    "interval": Intensity.INTERVAL,
+}
+# Custom heart rate targets are bpm + 100; 0-100 are % of max heart rate
+HEART_RATE_OFFSET = 100
+# FIT strings are null-terminated in fixed-size fields
+MAX_NAME_LENGTH = 15
+MAX_NOTES_LENGTH = 50
+
+_PACE = re.compile(r"^(\d{1,2}):([0-5]\d)$")
+
+
+class WorkoutStructureError(ValueError):
+    """A workout's structure cannot be encoded as a FIT workout."""
+
+
+@dataclass
+class WorkoutFile:
+    """A workout encoded as a FIT file."""
+
+    filename: str
+    key: str
+    data: bytes
+    scheduled: datetime
+
+
+class WorkoutFileCache:
+    """LRU of encoded workout files keyed by export key, bounded in bytes.
+
+    Keys hash the file's whole content, so entries never go stale and are
+    only evicted for space.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> bytes | None:
+        """Return the file cached under ``key``, or None on a miss."""
+        data = self._entries.get(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Cache ``data`` under ``key``, evicting the least recently used."""
+        if len(data) > self.max_bytes or key in self._entries:
+            return
+        self._entries[key] = data
+        self._size += len(data)
+        while self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Evict every entry."""
+        self._entries.clear()
+        self._size = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+workout_file_cache = WorkoutFileCache(settings.workout_export_cache_max_bytes)
+
+
+def _export_inputs(workout: Any) -> dict[str, Any]:
+    return {
+        "version": EXPORT_VERSION,
+        "id": str(workout.id),
+        "scheduled_date": workout.scheduled_date.isoformat(),
+        "workout_type": workout.workout_type,
+        "title": workout.title,
+        "structure": workout.structure,
+        "estimated_duration_minutes": workout.estimated_duration_minutes,
+        "estimated_distance_meters": workout.estimated_distance_meters,
+    }
+
+
+def export_key(workout: Any) -> str:
+    """Hash of everything encoded into ``workout``'s FIT file."""
+    inputs = json.dumps(_export_inputs(workout), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(inputs.encode()).hexdigest()
+
+
+def export_etag(keys: Iterable[str]) -> str:
+    """ETag of a file, or of an archive of files, from their export keys."""
+    keys = list(keys)
+    if len(keys) == 1:
+        return f'"{keys[0]}"'
+    return f'"{hashlib.sha256(",".join(keys).encode()).hexdigest()}"'
+
+
+def _number(step: dict, field: str) -> float:
+    value = step[field]
+    if isinstance(value, bool) or not isinstance(value, int | float) or value <= 0:
+        raise WorkoutStructureError(f"Step {field} must be a positive number")
+    return float(value)
+
+
+def _speed(pace: Any) -> float:
+    """Speed in m/s of a pace per km."""
+    match = _PACE.match(pace) if isinstance(pace, str) else None
+    if match is None or pace == "0:00":
+        raise WorkoutStructureError(f"Pace {pace!r} is not m:ss per km")
+    return 1000 / (int(match[1]) * 60 + int(match[2]))
+
+
+def _range(value: Any, field: str) -> tuple[Any, Any]:
+    if isinstance(value, list) and len(value) == 2:
+        return value[0], value[1]
+    if field == "pace" and isinstance(value, str):
+        return value, value
+    raise WorkoutStructureError(f"Step {field} must be a [low, high] range")
+
+
+def _step_message(step: dict) -> WorkoutStepMessage:
+    message = WorkoutStepMessage()
+    if isinstance(step.get("name"), str):
+        message.workout_step_name = step["name"][:MAX_NAME_LENGTH]
+    if isinstance(step.get("notes"), str):
+        message.notes = step["notes"][:MAX_NOTES_LENGTH]
+    message.intensity = STEP_INTENSITIES.get(step.get("type"), Intensity.ACTIVE)
+
+    if "seconds" in step or "minutes" in step:
+        seconds = _number(step, "seconds") if "seconds" in step else _number(step, "minutes") * 60
+        message.duration_type = WorkoutStepDuration.TIME
+        message.duration_time = seconds
+    elif "meters" in step or "km" in step:
+        meters = _number(step, "meters") if "meters" in step else _number(step, "km") * 1000
+        message.duration_type = WorkoutStepDuration.DISTANCE
+        message.duration_distance = meters
+    else:
+        message.duration_type = WorkoutStepDuration.OPEN
+
+    if "pace" in step:
+        fast, slow = (_speed(pace) for pace in _range(step["pace"], "pace"))
+        message.target_type = WorkoutStepTarget.SPEED
+        message.target_value = 0
+        message.custom_target_speed_low = min(fast, slow)
+        message.custom_target_speed_high = max(fast, slow)
+    elif "heart_rate" in step:
+        low, high = _range(step["heart_rate"], "heart_rate")
+        if not all(isinstance(bpm, int) and 30 <= bpm <= 250 for bpm in (low, high)):
+            raise WorkoutStructureError("Step heart_rate must be bpm between 30 and 250")
+        message.target_type = WorkoutStepTarget.HEART_RATE
+        message.target_value = 0
+        message.custom_target_heart_rate_low = min(low, high) + HEART_RATE_OFFSET
+        message.custom_target_heart_rate_high = max(low, high) + HEART_RATE_OFFSET
+    else:
+        message.target_type = WorkoutStepTarget.OPEN
+    return message
+
+
+def _step_messages(steps: Any, messages: list[WorkoutStepMessage]) -> None:
+    """Append the messages of ``steps``, flattening repeat blocks.
+
+    A repeat block is its steps followed by a step that jumps back to the
+    first of them until the block has run ``repeat`` times.
+    """
+    if not isinstance(steps, list) or not steps:
+        raise WorkoutStructureError("Steps must be a non-empty list")
+    for step in steps:
+        if not isinstance(step, dict):
+            raise WorkoutStructureError("Each step must be an object")
+        if "repeat" in step:
+            repeat = step["repeat"]
+            if isinstance(repeat, bool) or not isinstance(repeat, int) or repeat < 1:
+                raise WorkoutStructureError("Repeat must be a positive integer")
+            first = len(messages)
+            _step_messages(step.get("steps"), messages)
+            message = WorkoutStepMessage()
+            message.duration_type = WorkoutStepDuration.REPEAT_UNTIL_STEPS_CMPLT
+            message.duration_step = first
+            message.target_type = WorkoutStepTarget.OPEN
+            message.target_repeat_steps = repeat
+            messages.append(message)
+        else:
+            messages.append(_step_message(step))
+        if len(messages) > MAX_STEPS:
+            raise WorkoutStructureError(f"Workouts are limited to {MAX_STEPS} steps")
+
+
+def _fallback_steps(inputs: dict[str, Any]) -> list[dict]:
+    if inputs["estimated_distance_meters"]:
+        return [{"meters": inputs["estimated_distance_meters"]}]
+    if inputs["estimated_duration_minutes"]:
+        return [{"minutes": inputs["estimated_duration_minutes"]}]
+    return [{}]
+
+
+def encode_workout(inputs: dict[str, Any], key: str) -> bytes:
+    """Encode a workout's export inputs (see ``export_key``) as a FIT file."""
+    structure = inputs["structure"]
+    steps = structure.get("steps") if isinstance(structure, dict) else None
+    messages: list[WorkoutStepMessage] = []
+    _step_messages(steps or _fallback_steps(inputs), messages)
+    for index, message in enumerate(messages):
+        message.message_index = index
+
+    file_id = FileIdMessage()
+    file_id.type = FileType.WORKOUT
+    file_id.manufacturer = Manufacturer.DEVELOPMENT.value
+    file_id.product = 0
+    # Watches tell workout files apart by serial number and creation time;
+    # both come from the key so the same workout always encodes the same
+    file_id.serial_number = int(key[:8], 16)
+    file_id.time_created = int(
+        datetime.fromisoformat(inputs["scheduled_date"]).replace(tzinfo=UTC).timestamp() * 1000
+    )
+    workout = WorkoutMessage()
+    workout.workout_name = (inputs["title"] or inputs["workout_type"])[:MAX_NAME_LENGTH]
+    workout.sport = WORKOUT_FIT_SPORTS.get(inputs["workout_type"], Sport.RUNNING)
+    workout.num_valid_steps = len(messages)
+
+    builder = FitFileBuilder(auto_define=True)
+    builder.add(file_id)
+    builder.add(workout)
+    builder.add_all(messages)
+    return builder.build().to_bytes()
+
+
+def _filename(workout: Any) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", (workout.title or workout.workout_type).lower())
+    return f"{workout.scheduled_date.isoformat()}-{slug.strip('-') or 'workout'}.fit"
+
+
+def _encode_all(pending: list[tuple[dict[str, Any], str]]) -> list[bytes]:
+    return [encode_workout(inputs, key) for inputs, key in pending]
+
+
+async def render_workouts(workouts: Sequence[Any]) -> list[WorkoutFile]:
+    """Encode ``workouts`` as FIT files, from the cache where possible.
+
+    Workouts missing from the cache are encoded together in a worker thread.
+    Raises ``WorkoutStructureError`` if any of them cannot be encoded.
+    """
+    keys = [export_key(workout) for workout in workouts]
+    data = {key: workout_file_cache.get(key) for key in keys}
+    pending = {
+        key: (_export_inputs(workout), key)
+        for workout, key in zip(workouts, keys, strict=True)
+        if data[key] is None
+    }
+    if pending:
+        encoded = await asyncio.to_thread(_encode_all, list(pending.values()))
+        for key, file in zip(pending, encoded, strict=True):
+            workout_file_cache.put(key, file)
+            data[key] = file
+
+    files = []
+    seen: dict[str, int] = {}
+    for workout, key in zip(workouts, keys, strict=True):
+        filename = _filename(workout)
+        seen[filename] = seen.get(filename, 0) + 1
+        if seen[filename] > 1:
+            filename = f"{filename.removesuffix('.fit')}-{seen[filename]}.fit"
+        files.append(
+            WorkoutFile(
+                filename=filename,
+                key=key,
+                data=data[key],
+                scheduled=datetime.combine(workout.scheduled_date, datetime.min.time()),
+            )
+        )
+    return files
+
+
+class _ZipSink:
+    """Write-only file that hands over what has been written on ``drain``."""
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def stream_zip(files: Iterable[WorkoutFile]) -> Iterator[bytes]:
+    """Yield a zip archive of ``files`` a member at a time.
+
+    The archive is written to an unseekable sink, so each member's sizes
+    follow its data and nothing is rewritten; memory holds one member.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+        for file in files:
+            info = zipfile.ZipInfo(file.filename, file.scheduled.timetuple()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, file.data)
+            yield sink.drain()
+    yield sink.drain()
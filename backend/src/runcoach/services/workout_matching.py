@@ -0,0 +1,215 @@
+"""Matching synced Strava activities to scheduled workouts.
+
+After a sync, every activity in the sync's date range that is not yet linked
+to a workout is matched against the athlete's open workouts (scheduled, with
+no completion) around it, and the matches are written to
+``workout_completions`` in one batch. A workout has at most one completion
+(a unique index), so when two syncs overlap and match the same workout, the
+later insert skips it instead of completing it twice.
+
+The open workouts are read once and sorted by scheduled date, and each
+activity bisects that index for the days within
+``workout_match_day_window`` of its start, so a season's backfill compares
+each activity with a handful of workouts rather than with all of them. An
+activity completes the closest unclaimed candidate of its sport, by day and
+then by how near it came to the planned distance or duration; activities
+claim workouts in start order.
+"""
+
+import math
+import uuid
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from runcoach.config import get_settings
+from runcoach.models.workout_completion import WorkoutCompletion
+from runcoach.query_registry import (
+    OPEN_WORKOUTS_BY_USER_DATE_RANGE,
+    UNMATCHED_ACTIVITIES_BY_USER_DATE_RANGE,
+)
+
+settings = get_settings()
+
+RUN = "run"
+OTHER = "other"
+# Strava activity types by sport; any other type is OTHER
+ACTIVITY_SPORTS = {
+    "Run": RUN,
+    "TrailRun": RUN,
+    "VirtualRun": RUN,
+    "Ride": "ride",
+    "VirtualRide": "ride",
+    "GravelRide": "ride",
+    "MountainBikeRide": "ride",
+    "EBikeRide": "ride",
+    "Swim": "swim",
+    "WeightTraining": "strength",
+    "Crossfit": "strength",
+    "Workout": "strength",
+}
+# Sports that complete each workout type; rest days are never completed by
+# an activity, and any type not listed is a run
+WORKOUT_SPORTS = {
+    "rest": frozenset(),
+    "strength": frozenset({"strength"}),
+    "cross_training": frozenset({"ride", "swim", "strength", OTHER}),
+}
+DEFAULT_SPORTS = frozenset({RUN})
+
+COMPLETED = "completed"
+
+completions = WorkoutCompletion.__table__
+# Skips a workout completed since it was read, e.g. by an overlapping sync
+INSERT_COMPLETIONS = (
+    insert(completions)
+    .on_conflict_do_nothing(index_elements=[completions.c.workout_id])
+    .returning(completions.c.workout_id)
+)
+
+
+@dataclass
+class WorkoutMatch:
+    """An activity that completes a workout."""
+
+    workout_id: uuid.UUID
+    strava_activity_id: uuid.UUID
+
+
+def deviation(workout: Any, activity: Any) -> float:
+    """How far ``activity`` is from ``workout``'s plan, as a fraction of it.
+
+    Compares distances when both have one, else durations; zero when the
+    workout plans neither, infinite when the activity has neither to compare.
+    """
+    if workout.estimated_distance_meters and activity.distance_meters:
+        return abs(float(activity.distance_meters) / workout.estimated_distance_meters - 1.0)
+    if workout.estimated_duration_minutes and activity.moving_time_seconds:
+        return abs(
+            activity.moving_time_seconds / (60.0 * workout.estimated_duration_minutes) - 1.0
+        )
+    if workout.estimated_distance_meters or workout.estimated_duration_minutes:
+        return math.inf
+    return 0.0
+
+
+class OpenWorkoutIndex:
+    """An athlete's open workouts, sorted by scheduled date for bisecting."""
+
+    def __init__(self, workouts: Iterable[Any]) -> None:
+        self.workouts = sorted(workouts, key=lambda workout: (workout.scheduled_date, workout.id))
+        self.dates = [workout.scheduled_date for workout in self.workouts]
+        self.claimed = [False] * len(self.workouts)
+
+    def claim(self, activity: Any, day_window: int, tolerance: float) -> Any | None:
+        """Claim and return the closest open workout ``activity`` completes."""
+        day = activity.start_date.date()
+        window = timedelta(days=day_window)
+        sport = ACTIVITY_SPORTS.get(activity.activity_type, OTHER)
+        best, best_key = None, None
+        for i in range(
+            bisect_left(self.dates, day - window),
+            bisect_right(self.dates, day + window),
+        ):
+            workout = self.workouts[i]
+            if self.claimed[i]:
+                continue
+            if sport not in WORKOUT_SPORTS.get(workout.workout_type, DEFAULT_SPORTS):
+                continue
+            off = deviation(workout, activity)
+            if off > tolerance:
+                continue
+            key = (abs((workout.scheduled_date - day).days), off)
+            if best_key is None or key < best_key:
+                best, best_key = i, key
+        if best is None:
+            return None
+        self.claimed[best] = True
+        return self.workouts[best]
+
+
+def match_workouts(
+    workouts: Iterable[Any],
+    activities: Iterable[Any],
+    day_window: int | None = None,
+    tolerance: float | None = None,
+) -> list[WorkoutMatch]:
+    """Match activities to the open workouts they complete, each at most once.
+
+    Workouts need ``id``, ``scheduled_date``, ``workout_type`` and the
+    estimated distance and duration; activities need ``id``, ``start_date``,
+    ``activity_type``, ``distance_meters`` and ``moving_time_seconds``.
+    """
+    if day_window is None:
+        day_window = settings.workout_match_day_window
+    if tolerance is None:
+        tolerance = settings.workout_match_tolerance
+    index = OpenWorkoutIndex(workouts)
+    matches = []
+    for activity in sorted(activities, key=lambda activity: (activity.start_date, activity.id)):
+        workout = index.claim(activity, day_window, tolerance)
+        if workout is not None:
+            matches.append(WorkoutMatch(workout.id, activity.id))
+    return matches
+
+
+async def match_activities(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    start: datetime,
+    end: datetime,
+) -> list[WorkoutMatch]:
+    """Complete open workouts with the user's unmatched activities in ``[start, end)``.
+
+    Two reads, then one multi-row insert of the completions. Returns the
+    matches actually written: one whose workout an overlapping sync completed
+    in the meantime is skipped.
+    """
+    activities = (
+        await UNMATCHED_ACTIVITIES_BY_USER_DATE_RANGE.execute(
+            db,
+            user_id=user_id,
+            start=start,
+            end=end,
+        )
+    ).all()
+    if not activities:
+        return []
+    window = timedelta(days=settings.workout_match_day_window)
+    last_day = (end - timedelta(microseconds=1)).date()
+    workouts = (
+        await OPEN_WORKOUTS_BY_USER_DATE_RANGE.execute(
+            db,
+            user_id=user_id,
+            start=start.date() - window,
+            end=last_day + window + timedelta(days=1),
+        )
+    ).all()
+
+    matches = match_workouts(workouts, activities)
+    if not matches:
+        return []
+    created_at = datetime.utcnow()
+    written = set(
+        (
+            await db.execute(
+                INSERT_COMPLETIONS,
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "workout_id": match.workout_id,
+                        "strava_activity_id": match.strava_activity_id,
+                        "completion_status": COMPLETED,
+                        "created_at": created_at,
+                    }
+                    for match in matches
+                ],
+            )
+        ).scalars()
+    )
+    return [match for match in matches if match.workout_id in written]
@@ -0,0 +1,65 @@
+"""Reads of a user's scheduled workouts."""
+
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from runcoach.models.workout import Workout
+from runcoach.query_registry import (
+    WORKOUT_CALENDAR_PAGE,
+    WORKOUT_CALENDAR_PAGE_WITH_STRUCTURE,
+)
+
+# Seeking past (start, NIL_UUID) includes every workout on ``start``
+NIL_UUID = uuid.UUID(int=0)
+
+
+@dataclass
+class CalendarPage:
+    """One page of a workout calendar."""
+
+    workouts: Sequence[Workout]
+    # Sort key of the last workout, if another page follows
+    next_key: tuple[date, uuid.UUID] | None
+
+
+async def get_calendar_page(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    start: date,
+    end: date,
+    limit: int,
+    after: tuple[date, uuid.UUID] | None = None,
+    include_structure: bool = False,
+) -> CalendarPage:
+    """Return up to ``limit`` workouts scheduled in ``[start, end)``.
+
+    Workouts are ordered by ``(scheduled_date, id)``; pass the previous
+    page's ``next_key`` as ``after`` to continue. Unless
+    ``include_structure`` is set, only the calendar columns are loaded and
+    ``structure`` and ``description`` raise if accessed.
+    """
+    after_date, after_id = after if after is not None else (start, NIL_UUID)
+    if after_date < start:
+        after_date, after_id = start, NIL_UUID
+    query = WORKOUT_CALENDAR_PAGE_WITH_STRUCTURE if include_structure else WORKOUT_CALENDAR_PAGE
+    # One extra row tells whether another page follows
+    result = await query.execute(
+        db,
+        user_id=user_id,
+        after_date=after_date,
+        after_id=after_id,
+        end=end,
+        limit=limit + 1,
+    )
+    workouts = result.scalars().all()
+    if len(workouts) <= limit:
+        return CalendarPage(workouts=workouts, next_key=None)
+    last = workouts[limit - 1]
+    return CalendarPage(
+        workouts=workouts[:limit],
+        next_key=(last.scheduled_date, last.id),
+    )
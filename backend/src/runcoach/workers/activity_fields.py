@@ -0,0 +1,34 @@
+"""Promoted Strava field backfill.
+
+Fills the typed columns promoted from the raw Strava payload (see
+``runcoach.services.activity_fields``) for activities stored before the
+columns existed. Run it once after a migration that promotes a field; each
+batch commits on its own, so it can be stopped and restarted at any point.
+
+Run with ``python -m runcoach.workers.activity_fields``.
+"""
+
+import argparse
+import asyncio
+import logging
+
+from runcoach.database import async_session_maker, engine
+from runcoach.services.activity_fields import backfill_promoted_fields
+
+logger = logging.getLogger(__name__)
+
+
+async def main() -> None:
+    """Backfill every stored activity's promoted columns and report the count."""
+    parser = argparse.ArgumentParser(description="Backfill promoted Strava fields")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    changed = await backfill_promoted_fields(async_session_maker, args.batch_size)
+    logger.info("Updated %d activities", changed)
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,307 @@
+"""Nightly fitness batch.
+
+Brings every athlete's cached fitness state (``athlete_fitness``) up to the
+end of yesterday, so a daytime ``get_current_fitness`` folds in at most
+today. Athletes are taken in id order, ``fitness_batch_size`` at a time, and
+each batch is one transaction that
+
+1. locks the batch's athletes (their ``users`` rows) and reads their states,
+2. reads, in one statement, the load inputs of every activity each athlete
+   has after their state (their whole history when they have none),
+3. folds them in with the vectorized engine (``runcoach.services.fitness``):
+   one athletes-by-days load matrix per starting day, usually just two, one
+   for athletes resuming from yesterday's state and one for the rest,
+4. upserts the new states.
+
+An activity written for an already folded day while a batch runs waits for
+the batch's lock and then invalidates the state it wrote. The lock is on the
+``users`` rows, not the states, because an athlete without a state has no
+state row to lock: ``FOR UPDATE`` there conflicts with the ``FOR KEY SHARE``
+the invalidation trigger takes on every activity write.
+
+Run with ``python -m runcoach.workers.fitness``.
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any
+
+import numpy as np
+from sqlalchemy import (
+    Date,
+    Float,
+    Integer,
+    Uuid,
+    any_,
+    bindparam,
+    cast,
+    column,
+    func,
+    literal,
+    select,
+    true,
+    type_coerce,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from runcoach.config import get_settings
+from runcoach.database import engine
+from runcoach.models.fitness import AthleteFitness
+from runcoach.models.strava_activity import StravaActivity
+from runcoach.models.user import User
+from runcoach.services.fitness import (
+    ATL_DAYS,
+    CTL_DAYS,
+    HISTORY_START,
+    exponential_average,
+    trimp,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+states = AthleteFitness.__table__
+activities = StravaActivity.__table__
+users = User.__table__
+
+EPOCH = literal(date(1970, 1, 1), Date)
+
+BATCH_USERS = (
+    select(users.c.id)
+    .where(users.c.id > bindparam("after"))
+    .order_by(users.c.id)
+    .limit(bindparam("batch_size"))
+)
+LOCK_ATHLETES = (
+    select(users.c.id.label("user_id"), states.c.as_of, states.c.ctl, states.c.atl)
+    .select_from(users.outerjoin(states, states.c.user_id == users.c.id))
+    .where(users.c.id == any_(bindparam("user_ids", type_=ARRAY(Uuid))))
+    .order_by(users.c.id)
+    .with_for_update(of=users)
+)
+# Each athlete's first unfolded day, as parallel arrays; the ordinality is
+# the athlete's position in the batch
+_since = (
+    func.unnest(
+        bindparam("user_ids", type_=ARRAY(Uuid)),
+        bindparam("since", type_=ARRAY(Date)),
+    )
+    .table_valued(column("user_id", Uuid), column("since", Date), with_ordinality="position")
+    .render_derived(name="since")
+)
+# Each athlete's activities are an index range scan on (user_id, start_date).
+# OFFSET 0 keeps the lateral subquery from being flattened into a join, for
+# which the planner has no per-athlete bounds and hashes every partition.
+# Days come back as days since EPOCH, which NumPy converts without Python
+# date objects.
+_activity = (
+    select(
+        (cast(activities.c.start_date, Date) - EPOCH).label("day"),
+        activities.c.moving_time_seconds,
+        cast(activities.c.average_heartrate, Float).label("average_heartrate"),
+    )
+    .where(
+        activities.c.user_id == _since.c.user_id,
+        activities.c.start_date >= _since.c.since,
+        activities.c.start_date < bindparam("until"),
+    )
+    .offset(0)
+    .lateral("activity")
+)
+LOAD_INPUTS_SINCE = select(
+    _since.c.position,
+    type_coerce(_activity.c.day, Integer),
+    _activity.c.moving_time_seconds,
+    _activity.c.average_heartrate,
+).join_from(_since, _activity, true())
+_upsert = insert(states)
+UPSERT_STATES = _upsert.on_conflict_do_update(
+    index_elements=[states.c.user_id],
+    set_={
+        name: _upsert.excluded[name] for name in ("as_of", "ctl", "atl", "updated_at")
+    },
+)
+
+
+@dataclass
+class FitnessReport:
+    """What a fitness batch run folded in."""
+
+    as_of: date
+    athletes: int = 0
+    # Athletes without a cached state, computed from their whole history
+    recomputed: int = 0
+    activities: int = 0
+    # Athlete-days folded in
+    days: int = 0
+    seconds: float = 0.0
+    max_batch_seconds: float = 0.0
+
+    def stats(self) -> dict[str, Any]:
+        """Return the report as metrics."""
+        return {
+            "as_of": self.as_of.isoformat(),
+            "athletes": self.athletes,
+            "recomputed": self.recomputed,
+            "activities": self.activities,
+            "days": self.days,
+            "seconds": round(self.seconds, 3),
+            "max_batch_seconds": round(self.max_batch_seconds, 3),
+        }
+
+
+async def refresh_batch(
+    conn: AsyncConnection,
+    user_ids: list[uuid.UUID],
+    as_of: date,
+    report: FitnessReport,
+) -> None:
+    """Fold one batch of athletes' states forward to the end of ``as_of``."""
+    cached = {
+        row.user_id: row
+        for row in await conn.execute(LOCK_ATHLETES, {"user_ids": user_ids})
+        if row.as_of is not None
+    }
+    history_start = HISTORY_START.date()
+    since = [
+        cached[user_id].as_of + timedelta(days=1) if user_id in cached else history_start
+        for user_id in user_ids
+    ]
+    rows = (
+        await conn.execute(
+            LOAD_INPUTS_SINCE,
+            {
+                "user_ids": user_ids,
+                "since": since,
+                "until": datetime.combine(as_of + timedelta(days=1), datetime.min.time()),
+            },
+        )
+    ).all()
+    report.activities += len(rows)
+
+    if rows:
+        positions, days_since_epoch, moving_times, heartrates = zip(*rows)
+        athlete = np.array(positions, dtype=np.int64) - 1
+        day = np.array(days_since_epoch, dtype="datetime64[D]")
+        loads = trimp(
+            np.array(moving_times, dtype=np.float64),
+            np.array(heartrates, dtype=np.float64),
+            settings.fitness_resting_heartrate,
+            settings.fitness_max_heartrate,
+        )
+    else:
+        athlete = np.zeros(0, dtype=np.int64)
+        day = np.zeros(0, dtype="datetime64[D]")
+        loads = np.zeros(0)
+
+    # Athletes without a state start at the earliest of their first
+    # activities; the zero-load days before their own first one leave
+    # fitness at zero
+    fresh = [i for i, user_id in enumerate(user_ids) if user_id not in cached]
+    if fresh:
+        fresh_days = day[np.isin(athlete, fresh)]
+        first = fresh_days.min().item() if len(fresh_days) else as_of
+        for i in fresh:
+            since[i] = first
+    report.recomputed += len(fresh)
+
+    groups: dict[date, list[int]] = {}
+    for i, start in enumerate(since):
+        if start <= as_of:
+            groups.setdefault(start, []).append(i)
+
+    updated_at = datetime.utcnow()
+    new_states = []
+    lookup = np.full(len(user_ids), -1, dtype=np.int64)
+    for start, members in groups.items():
+        days = (as_of - start).days + 1
+        lookup[:] = -1
+        lookup[members] = np.arange(len(members))
+        row = lookup[athlete]
+        selected = row >= 0
+        offsets = (day[selected] - np.datetime64(start, "D")).astype(np.int64)
+        matrix = np.bincount(
+            row[selected] * days + offsets,
+            weights=loads[selected],
+            minlength=len(members) * days,
+        ).reshape(len(members), days)
+
+        initial_ctl = np.array(
+            [cached[user_ids[i]].ctl if user_ids[i] in cached else 0.0 for i in members]
+        )
+        initial_atl = np.array(
+            [cached[user_ids[i]].atl if user_ids[i] in cached else 0.0 for i in members]
+        )
+        ctl = exponential_average(matrix, initial_ctl, CTL_DAYS)[:, -1]
+        atl = exponential_average(matrix, initial_atl, ATL_DAYS)[:, -1]
+        new_states.extend(
+            {
+                "user_id": user_ids[i],
+                "as_of": as_of,
+                "ctl": float(ctl[j]),
+                "atl": float(atl[j]),
+                "updated_at": updated_at,
+            }
+            for j, i in enumerate(members)
+        )
+        report.days += len(members) * days
+
+    if new_states:
+        await conn.execute(UPSERT_STATES, new_states)
+    report.athletes += len(new_states)
+
+
+async def refresh_fitness(
+    db_engine: AsyncEngine,
+    batch_size: int,
+    today: date | None = None,
+) -> FitnessReport:
+    """Fold every athlete's fitness state forward to the end of yesterday."""
+    as_of = (today or datetime.utcnow().date()) - timedelta(days=1)
+    report = FitnessReport(as_of=as_of)
+    started = time.perf_counter()
+    after = uuid.UUID(int=0)
+    while True:
+        batch_started = time.perf_counter()
+        async with db_engine.begin() as conn:
+            user_ids = list(
+                (
+                    await conn.execute(
+                        BATCH_USERS,
+                        {"after": after, "batch_size": batch_size},
+                    )
+                ).scalars()
+            )
+            if not user_ids:
+                break
+            await refresh_batch(conn, user_ids, as_of, report)
+        report.max_batch_seconds = max(
+            report.max_batch_seconds,
+            time.perf_counter() - batch_started,
+        )
+        if len(user_ids) < batch_size:
+            break
+        after = user_ids[-1]
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Update cached athlete fitness states")
+    parser.add_argument("--batch-size", type=int, default=settings.fitness_batch_size)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = await refresh_fitness(engine, batch_size=args.batch_size)
+    logger.info("Fitness batch: %s", report.stats())
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
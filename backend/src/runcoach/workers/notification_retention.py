@@ -0,0 +1,217 @@
+"""Notification retention.
+
+Sent and failed notifications are never read again by the dispatcher, but
+without a retention job they accumulate in ``notifications`` forever. This
+job removes those older than ``notification_retention_days``, deleting them
+or, with ``notification_retention_archive``, moving them to
+``notifications_archive`` in the same statement:
+
+    WITH moved AS (DELETE FROM notifications WHERE id IN (...) RETURNING ...)
+    INSERT INTO notifications_archive SELECT ... FROM moved
+
+Each batch is its own short transaction over at most
+``notification_retention_batch_size`` rows, locked with ``SKIP LOCKED``, so
+the job never blocks the dispatcher or holds locks for long. Old rows are
+found through a partial index on ``created_at`` of finished rows only, which
+stays exact as new rows reuse freed pages. Afterwards the table is
+vacuumed so the space can be reused, and the report compares table and
+index sizes before and after. Plain VACUUM only gives trailing pages back
+to the operating system; space freed earlier in the table is reused by new
+notifications, so a table under retention stops growing rather than
+shrinking.
+
+Run with ``python -m runcoach.workers.notification_retention``.
+"""
+
+import argparse
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import bindparam, delete, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from runcoach.config import get_settings
+from runcoach.database import engine
+from runcoach.models.notification import Notification, NotificationArchive
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+notifications = Notification.__table__
+archive = NotificationArchive.__table__
+
+# Columns carried over to the archive; archived_at is filled in there
+ARCHIVED_COLUMNS = [
+    column.name for column in archive.columns if column.name != "archived_at"
+]
+
+_expired = (
+    select(notifications.c.id)
+    .where(
+        notifications.c.status.in_(("sent", "failed")),
+        notifications.c.created_at < bindparam("cutoff"),
+    )
+    .limit(bindparam("batch_size"))
+    .with_for_update(skip_locked=True)
+)
+DELETE_EXPIRED = delete(notifications).where(
+    notifications.c.id.in_(_expired.scalar_subquery())
+)
+_moved = (
+    delete(notifications)
+    .where(notifications.c.id.in_(_expired.scalar_subquery()))
+    .returning(*(notifications.c[name] for name in ARCHIVED_COLUMNS))
+    .cte("moved")
+)
+ARCHIVE_EXPIRED = insert(archive).from_select(
+    ARCHIVED_COLUMNS,
+    select(*(_moved.c[name] for name in ARCHIVED_COLUMNS)),
+)
+
+
+@dataclass
+class RelationSizes:
+    """On-disk size of a table (heap and TOAST) and each of its indexes."""
+
+    table_bytes: int
+    index_bytes: dict[str, int]
+
+    @property
+    def total_bytes(self) -> int:
+        return self.table_bytes + sum(self.index_bytes.values())
+
+
+async def relation_sizes(conn: AsyncConnection, table: str) -> RelationSizes:
+    """Measure ``table`` and its indexes."""
+    table_bytes = await conn.scalar(
+        text("SELECT pg_table_size(CAST(:table AS regclass))"),
+        {"table": table},
+    )
+    result = await conn.execute(
+        text(
+            "SELECT indexrelid::regclass::text, pg_relation_size(indexrelid) "
+            "FROM pg_index WHERE indrelid = CAST(:table AS regclass) ORDER BY 1"
+        ),
+        {"table": table},
+    )
+    return RelationSizes(table_bytes=table_bytes, index_bytes=dict(result.all()))
+
+
+async def notification_storage(conn: AsyncConnection) -> dict[str, Any]:
+    """Current sizes of the notification queue and archive, for metrics."""
+    storage = {}
+    for table in (notifications.name, archive.name):
+        sizes = await relation_sizes(conn, table)
+        storage[table] = {
+            "table_bytes": sizes.table_bytes,
+            "index_bytes": sizes.index_bytes,
+            "total_bytes": sizes.total_bytes,
+        }
+    return storage
+
+
+@dataclass
+class RetentionReport:
+    """What a retention run removed and the space it gave back."""
+
+    cutoff: datetime
+    archived: bool
+    removed: int
+    batches: int
+    before: RelationSizes
+    after: RelationSizes
+
+    def stats(self) -> dict[str, Any]:
+        """Return the report as metrics."""
+        return {
+            "cutoff": self.cutoff.isoformat(),
+            "archived": self.archived,
+            "removed": self.removed,
+            "batches": self.batches,
+            "table_bytes_before": self.before.table_bytes,
+            "table_bytes_after": self.after.table_bytes,
+            "index_bytes_before": self.before.index_bytes,
+            "index_bytes_after": self.after.index_bytes,
+            "reclaimed_bytes": self.before.total_bytes - self.after.total_bytes,
+        }
+
+
+async def purge_notifications(
+    db_engine: AsyncEngine,
+    older_than: timedelta,
+    batch_size: int,
+    archive_rows: bool = False,
+    pause_seconds: float = 0.0,
+    vacuum: bool = True,
+    now: datetime | None = None,
+) -> RetentionReport:
+    """Remove sent and failed notifications created before ``now - older_than``."""
+    cutoff = (now or datetime.utcnow()) - older_than
+    statement = ARCHIVE_EXPIRED if archive_rows else DELETE_EXPIRED
+
+    async with db_engine.connect() as conn:
+        before = await relation_sizes(conn, notifications.name)
+
+    removed = batches = 0
+    while True:
+        async with db_engine.begin() as conn:
+            result = await conn.execute(
+                statement,
+                {"cutoff": cutoff, "batch_size": batch_size},
+            )
+        removed += result.rowcount
+        batches += 1
+        if result.rowcount < batch_size:
+            break
+        # Let autovacuum and the dispatcher's writes in between batches
+        await asyncio.sleep(pause_seconds)
+
+    async with db_engine.connect() as conn:
+        if vacuum and removed:
+            # VACUUM cannot run inside a transaction block
+            autocommit = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await autocommit.execute(text(f"VACUUM (ANALYZE) {notifications.name}"))
+        after = await relation_sizes(conn, notifications.name)
+
+    return RetentionReport(
+        cutoff=cutoff,
+        archived=archive_rows,
+        removed=removed,
+        batches=batches,
+        before=before,
+        after=after,
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Remove old sent and failed notifications")
+    parser.add_argument("--days", type=int, default=settings.notification_retention_days)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=settings.notification_retention_batch_size,
+    )
+    parser.add_argument(
+        "--archive",
+        action=argparse.BooleanOptionalAction,
+        default=settings.notification_retention_archive,
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    report = await purge_notifications(
+        engine,
+        older_than=timedelta(days=args.days),
+        batch_size=args.batch_size,
+        archive_rows=args.archive,
+        pause_seconds=settings.notification_retention_pause_seconds,
+    )
+    logger.info("Notification retention: %s", report.stats())
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,652 @@
+"""Notification dispatcher.
+
+Consumes the ``notifications`` queue. Each pass claims a batch of due
+notifications in one statement:
+
+    UPDATE notifications SET status = 'sending', locked_until = ...
+    WHERE id IN (SELECT id ... FOR UPDATE SKIP LOCKED LIMIT n)
+
+and commits straight away, so the row locks are held only for the claim.
+Dispatchers running concurrently skip rows another has locked and never see
+rows another has claimed, which makes it safe to run as many processes as
+throughput needs. The claimed notifications are then sent concurrently,
+bounded per channel, and their outcomes written back in one statement.
+
+A dispatcher that dies mid-batch leaves its rows ``sending``; once their
+``locked_until`` lease passes they are claimed again, until they have used
+``max_attempts`` claims: a notification that keeps crashing or hanging its
+dispatcher is then marked ``failed`` by a sweep at the start of each claim
+instead of being redelivered forever. Each claim increments ``attempts``
+and outcomes are only recorded while ``attempts`` still matches, so a
+dispatcher that outlived its lease cannot overwrite the newer claim's
+result. Email sends carry the notification id as an
+idempotency key, so the provider drops a repeat of a send that was already
+accepted.
+
+With a digest window, claiming a batch also claims the same users' other
+pending notifications on the same channel that fall due within the window,
+and each user's notifications on a channel go out as one digest message.
+Every notification in a digest shares its outcome. A digest's members are
+fixed when it is first claimed (``digest_id``, written with the claim): a
+retry reclaims exactly those members and sends them under the same
+idempotency key, and notifications that fell due since are never merged
+into it, so the provider cannot accept a second digest repeating ones it
+already delivered.
+
+Run with ``python -m runcoach.workers.notifications``.
+"""
+
+import asyncio
+import logging
+import random
+import signal
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import (
+    DateTime,
+    Integer,
+    Select,
+    String,
+    Text,
+    Update,
+    Uuid,
+    and_,
+    any_,
+    bindparam,
+    column,
+    func,
+    null,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from runcoach.config import get_settings
+from runcoach.database import async_session_maker
+from runcoach.models.notification import Notification
+from runcoach.models.user import User
+from runcoach.services.email import DeliveryError, ResendEmailSender, create_email_sender
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+notifications = Notification.__table__
+
+
+@dataclass(frozen=True)
+class ClaimedNotification:
+    """A notification this dispatcher holds the lease on."""
+
+    id: uuid.UUID
+    attempts: int
+    user_id: uuid.UUID
+    channel: str
+    subject: str | None
+    content: str
+    email: str
+    digest_id: uuid.UUID | None = None
+
+
+@dataclass(frozen=True)
+class Message:
+    """What a channel sends: one notification, or a digest of several."""
+
+    email: str
+    subject: str
+    content: str
+    idempotency_key: str
+
+
+def render_message(notifications: list[ClaimedNotification]) -> Message:
+    """Render one user's notifications on a channel as a single message.
+
+    A digest is keyed by its ``digest_id``, so every attempt at it carries
+    the same idempotency key.
+    """
+    first = notifications[0]
+    key = (
+        f"digest-{first.digest_id}"
+        if first.digest_id is not None
+        else f"notification-{first.id}"
+    )
+    if len(notifications) == 1:
+        return Message(
+            email=first.email,
+            subject=first.subject or "RunCoach",
+            content=first.content,
+            idempotency_key=key,
+        )
+
+    sections = [
+        f"{n.subject}\n\n{n.content}" if n.subject else n.content for n in notifications
+    ]
+    return Message(
+        email=first.email,
+        subject=f"{len(notifications)} updates from RunCoach",
+        content="\n\n---\n\n".join(sections),
+        idempotency_key=key,
+    )
+
+
+Deliver = Callable[[Message], Awaitable[None]]
+
+
+@dataclass(frozen=True)
+class Channel:
+    """How to deliver one channel's notifications, and how many at once."""
+
+    deliver: Deliver
+    concurrency: int
+
+
+def email_channel(sender: ResendEmailSender, concurrency: int) -> Channel:
+    """Deliver messages to the user's address through ``sender``."""
+
+    async def deliver(message: Message) -> None:
+        await sender.send(
+            to=message.email,
+            subject=message.subject,
+            text=message.content,
+            idempotency_key=message.idempotency_key,
+        )
+
+    return Channel(deliver=deliver, concurrency=concurrency)
+
+
+_due = (
+    select(notifications.c.id)
+    .where(
+        or_(
+            and_(
+                notifications.c.status == "pending",
+                notifications.c.scheduled_for <= bindparam("now"),
+            ),
+            # Abandoned by a dispatcher whose lease ran out, with attempts
+            # left (FAIL_EXHAUSTED_LEASES takes the rest)
+            and_(
+                notifications.c.status == "sending",
+                notifications.c.locked_until <= bindparam("now"),
+                notifications.c.attempts < bindparam("max_attempts"),
+            ),
+        )
+    )
+    .order_by(notifications.c.scheduled_for)
+    .limit(bindparam("batch_size"))
+    .with_for_update(skip_locked=True)
+)
+
+
+def _claim(candidates: Select) -> Update:
+    """Lease the ``candidates`` rows to this dispatcher and return them."""
+    return (
+        update(notifications)
+        .values(
+            status="sending",
+            locked_until=bindparam("lease_until"),
+            attempts=notifications.c.attempts + 1,
+        )
+        .where(
+            notifications.c.id.in_(candidates.scalar_subquery()),
+            notifications.c.user_id == User.id,
+        )
+        .returning(
+            notifications.c.id,
+            notifications.c.attempts,
+            notifications.c.user_id,
+            notifications.c.channel,
+            notifications.c.subject,
+            notifications.c.content,
+            User.email,
+            notifications.c.digest_id,
+        )
+    )
+
+
+CLAIM_DUE = _claim(_due)
+
+# Expired leases on notifications that have had every attempt
+FAIL_EXHAUSTED_LEASES = (
+    update(notifications)
+    .where(
+        notifications.c.status == "sending",
+        notifications.c.locked_until <= bindparam("now"),
+        notifications.c.attempts >= bindparam("max_attempts"),
+    )
+    .values(
+        status="failed",
+        locked_until=null(),
+        last_error="Lease expired on the final attempt",
+    )
+    .returning(notifications.c.id)
+)
+
+# The (user, channel) pairs just claimed, as parallel arrays
+_claimed_pairs = (
+    func.unnest(
+        bindparam("user_ids", type_=ARRAY(Uuid)),
+        bindparam("channels", type_=ARRAY(String)),
+    )
+    .table_valued(column("user_id", Uuid), column("channel", String))
+    .render_derived(name="claimed")
+)
+_digest_candidates = (
+    select(notifications.c.id)
+    .where(
+        notifications.c.status == "pending",
+        # Never attempted: a retry is sent as it was first sent
+        notifications.c.attempts == 0,
+        notifications.c.digest_id.is_(None),
+        notifications.c.scheduled_for <= bindparam("digest_until"),
+        tuple_(notifications.c.user_id, notifications.c.channel).in_(
+            select(_claimed_pairs.c.user_id, _claimed_pairs.c.channel)
+        ),
+    )
+    .with_for_update(skip_locked=True)
+)
+CLAIM_DIGEST_SIBLINGS = _claim(_digest_candidates)
+
+# The rest of the digests being retried, which a batch may have cut short;
+# they share their outcome, so are due (or abandoned) together
+_digest_members = (
+    select(notifications.c.id)
+    .where(
+        notifications.c.digest_id == any_(bindparam("digest_ids", type_=ARRAY(Uuid))),
+        or_(
+            notifications.c.status == "pending",
+            and_(
+                notifications.c.status == "sending",
+                notifications.c.locked_until <= bindparam("now"),
+                notifications.c.attempts < bindparam("max_attempts"),
+            ),
+        ),
+    )
+    .with_for_update(skip_locked=True)
+)
+CLAIM_DIGEST_MEMBERS = _claim(_digest_members)
+
+# New digests' ids, as parallel arrays, written with the claim
+_assignment = (
+    func.unnest(
+        bindparam("notification_ids", type_=ARRAY(Uuid)),
+        bindparam("digest_ids", type_=ARRAY(Uuid)),
+    )
+    .table_valued(column("notification_id", Uuid), column("digest_id", Uuid))
+    .render_derived(name="assignment")
+)
+ASSIGN_DIGESTS = (
+    update(notifications)
+    .where(notifications.c.id == _assignment.c.notification_id)
+    .values(digest_id=_assignment.c.digest_id)
+)
+
+# A batch's outcomes arrive as parallel arrays, one statement per batch.
+# Outcomes are only written under the claim that produced them.
+_outcome = (
+    func.unnest(
+        bindparam("notification_ids", type_=ARRAY(Uuid)),
+        bindparam("claimed_attempts", type_=ARRAY(Integer)),
+        bindparam("statuses", type_=ARRAY(String)),
+        bindparam("retry_ats", type_=ARRAY(DateTime)),
+        bindparam("delivered_ats", type_=ARRAY(DateTime)),
+        bindparam("errors", type_=ARRAY(Text)),
+    )
+    .table_valued(
+        column("notification_id", Uuid),
+        column("claimed_attempts", Integer),
+        column("status", String),
+        column("retry_at", DateTime),
+        column("delivered_at", DateTime),
+        column("error", Text),
+    )
+    .render_derived(name="outcome")
+)
+RECORD_OUTCOMES = (
+    update(notifications)
+    .where(
+        notifications.c.id == _outcome.c.notification_id,
+        notifications.c.attempts == _outcome.c.claimed_attempts,
+        notifications.c.status == "sending",
+    )
+    .values(
+        status=_outcome.c.status,
+        # Only retries move scheduled_for
+        scheduled_for=func.coalesce(_outcome.c.retry_at, notifications.c.scheduled_for),
+        sent_at=_outcome.c.delivered_at,
+        last_error=_outcome.c.error,
+        locked_until=null(),
+    )
+    .returning(notifications.c.id)
+)
+
+
+@dataclass(frozen=True)
+class Outcome:
+    """The result of one delivery attempt."""
+
+    notification: ClaimedNotification
+    status: str
+    retry_at: datetime | None = None
+    delivered_at: datetime | None = None
+    error: str | None = None
+
+
+async def record_outcomes(db: AsyncSession, outcomes: list[Outcome]) -> int:
+    """Write back delivery outcomes; returns how many were still claimed."""
+    result = await db.execute(
+        RECORD_OUTCOMES,
+        {
+            "notification_ids": [o.notification.id for o in outcomes],
+            "claimed_attempts": [o.notification.attempts for o in outcomes],
+            "statuses": [o.status for o in outcomes],
+            "retry_ats": [o.retry_at for o in outcomes],
+            "delivered_ats": [o.delivered_at for o in outcomes],
+            "errors": [o.error for o in outcomes],
+        },
+    )
+    return len(result.all())
+
+
+class NotificationDispatcher:
+    """Claims due notifications in batches and delivers them."""
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        channels: dict[str, Channel],
+        batch_size: int,
+        lease_seconds: float,
+        max_attempts: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+        digest_window_seconds: float,
+    ) -> None:
+        self.session_maker = session_maker
+        self.channels = channels
+        self.batch_size = batch_size
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.digest_window = timedelta(seconds=digest_window_seconds)
+        self._limits = {
+            name: asyncio.Semaphore(channel.concurrency) for name, channel in channels.items()
+        }
+
+        self.batches = 0
+        self.claimed = 0
+        self.messages = 0
+        self.digests = 0
+        self._message_notifications = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.lease_lost = 0
+        self.exhausted = 0
+
+    def retry_delay(self, attempts: int) -> float:
+        """Seconds to wait before the next attempt, with jitter."""
+        delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (attempts - 1))
+        # Spread retries of a failed batch so they do not return together
+        return random.uniform(delay / 2, delay)
+
+    async def claim(self, now: datetime) -> list[ClaimedNotification]:
+        """Claim a batch of due notifications and commit the claim.
+
+        With a digest window, the claimed users' pending notifications on
+        the same channels due within the window are claimed with them, and
+        each new digest's ``digest_id`` is written with the claim. A retried
+        digest brings the rest of its members and nothing else; a retried
+        notification is never merged into a new digest. Expired leases with
+        no attempts left are marked failed first.
+        """
+        lease_until = now + self.lease
+        async with self.session_maker() as db:
+            result = await db.execute(
+                FAIL_EXHAUSTED_LEASES,
+                {"now": now, "max_attempts": self.max_attempts},
+            )
+            exhausted = len(result.all())
+            if exhausted:
+                logger.warning("Failed %d notifications whose final lease expired", exhausted)
+                self.exhausted += exhausted
+                self.failed += exhausted
+            result = await db.execute(
+                CLAIM_DUE,
+                {
+                    "now": now,
+                    "lease_until": lease_until,
+                    "batch_size": self.batch_size,
+                    "max_attempts": self.max_attempts,
+                },
+            )
+            claimed = [ClaimedNotification(*row) for row in result]
+            retried_digests = {n.digest_id for n in claimed if n.digest_id is not None}
+            if retried_digests:
+                result = await db.execute(
+                    CLAIM_DIGEST_MEMBERS,
+                    {
+                        "digest_ids": list(retried_digests),
+                        "now": now,
+                        "lease_until": lease_until,
+                        "max_attempts": self.max_attempts,
+                    },
+                )
+                claimed += [ClaimedNotification(*row) for row in result]
+            # First attempts only: a retry may already have been delivered
+            fresh = [n for n in claimed if n.digest_id is None and n.attempts == 1]
+            if fresh and self.digest_window:
+                pairs = {(n.user_id, n.channel) for n in fresh}
+                result = await db.execute(
+                    CLAIM_DIGEST_SIBLINGS,
+                    {
+                        "user_ids": [user_id for user_id, _ in pairs],
+                        "channels": [channel for _, channel in pairs],
+                        "digest_until": now + self.digest_window,
+                        "lease_until": lease_until,
+                    },
+                )
+                siblings = [ClaimedNotification(*row) for row in result]
+                claimed = await self._assign_digests(db, claimed, fresh + siblings)
+            await db.commit()
+        return claimed
+
+    async def _assign_digests(
+        self,
+        db: AsyncSession,
+        claimed: list[ClaimedNotification],
+        fresh: list[ClaimedNotification],
+    ) -> list[ClaimedNotification]:
+        """Give each user's fresh notifications on a channel one digest id."""
+        groups: dict[tuple[uuid.UUID, str], list[ClaimedNotification]] = {}
+        for notification in fresh:
+            groups.setdefault((notification.user_id, notification.channel), []).append(
+                notification
+            )
+        digest_ids: dict[uuid.UUID, uuid.UUID] = {}
+        for group in groups.values():
+            if len(group) > 1:
+                digest_id = uuid.uuid4()
+                digest_ids.update((notification.id, digest_id) for notification in group)
+        if digest_ids:
+            await db.execute(
+                ASSIGN_DIGESTS,
+                {
+                    "notification_ids": list(digest_ids),
+                    "digest_ids": list(digest_ids.values()),
+                },
+            )
+        fresh_ids = {n.id for n in fresh}
+        return [n for n in claimed if n.id not in fresh_ids] + [
+            replace(n, digest_id=digest_ids.get(n.id)) for n in fresh
+        ]
+
+    def _group(
+        self, claimed: list[ClaimedNotification]
+    ) -> list[list[ClaimedNotification]]:
+        """Split a batch into messages: one per digest, else one each."""
+        groups: dict[uuid.UUID, list[ClaimedNotification]] = {}
+        for notification in claimed:
+            groups.setdefault(notification.digest_id or notification.id, []).append(
+                notification
+            )
+        return list(groups.values())
+
+    async def _deliver(self, group: list[ClaimedNotification]) -> list[Outcome]:
+        first = group[0]
+        channel = self.channels.get(first.channel)
+        if channel is None:
+            self.failed += len(group)
+            error = f"No sender for channel {first.channel!r}"
+            return [Outcome(n, "failed", error=error) for n in group]
+
+        message = render_message(group)
+        self.messages += 1
+        self._message_notifications += len(group)
+        if len(group) > 1:
+            self.digests += 1
+        try:
+            async with self._limits[first.channel]:
+                await channel.deliver(message)
+        except DeliveryError as exc:
+            error, retryable = str(exc), exc.retryable
+        except Exception as exc:
+            logger.exception("Unexpected error delivering notification %s", first.id)
+            error, retryable = f"{type(exc).__name__}: {exc}", True
+        else:
+            self.sent += len(group)
+            delivered_at = datetime.utcnow()
+            return [Outcome(n, "sent", delivered_at=delivered_at) for n in group]
+
+        # A digest's notifications retry together so they coalesce again
+        retry_at = datetime.utcnow() + timedelta(
+            seconds=self.retry_delay(max(n.attempts for n in group))
+        )
+        outcomes = []
+        for notification in group:
+            if retryable and notification.attempts < self.max_attempts:
+                self.retried += 1
+                outcomes.append(
+                    Outcome(notification, "pending", retry_at=retry_at, error=error)
+                )
+            else:
+                self.failed += 1
+                outcomes.append(Outcome(notification, "failed", error=error))
+        return outcomes
+
+    async def dispatch_once(self, now: datetime | None = None) -> int:
+        """Claim, deliver and record one batch; returns how many were claimed."""
+        claimed = await self.claim(now or datetime.utcnow())
+        if not claimed:
+            return 0
+        self.batches += 1
+        self.claimed += len(claimed)
+
+        delivered = await asyncio.gather(*(self._deliver(g) for g in self._group(claimed)))
+        outcomes = [outcome for group in delivered for outcome in group]
+        async with self.session_maker() as db:
+            recorded = await record_outcomes(db, outcomes)
+            await db.commit()
+        self.lease_lost += len(claimed) - recorded
+        return len(claimed)
+
+    async def run(
+        self,
+        stop: asyncio.Event,
+        poll_interval: float,
+        stats_interval: float | None = None,
+    ) -> None:
+        """Dispatch until ``stop`` is set, polling while the queue is empty.
+
+        With ``stats_interval``, logs ``stats()`` at most that often.
+        """
+        reported_at = time.monotonic()
+        while not stop.is_set():
+            try:
+                claimed = await self.dispatch_once()
+            except Exception:
+                logger.exception("Notification dispatch failed")
+                claimed = 0
+            if stats_interval is not None and time.monotonic() - reported_at >= stats_interval:
+                logger.info("Notification dispatcher: %s", self.stats())
+                reported_at = time.monotonic()
+            # A full batch means more are probably due; go straight on
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=poll_interval)
+                except TimeoutError:
+                    pass
+
+    def stats(self) -> dict[str, Any]:
+        """Return dispatch counters.
+
+        ``coalescing_ratio`` is notifications per message sent, the factor
+        by which digests cut provider calls.
+        """
+        return {
+            "batches": self.batches,
+            "claimed": self.claimed,
+            "messages": self.messages,
+            "digests": self.digests,
+            "coalescing_ratio": (
+                round(self._message_notifications / self.messages, 2)
+                if self.messages
+                else None
+            ),
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "lease_lost": self.lease_lost,
+            "exhausted": self.exhausted,
+        }
+
+
+def create_dispatcher(
+    session_maker: async_sessionmaker[AsyncSession],
+    email_sender: ResendEmailSender,
+) -> NotificationDispatcher:
+    """Create a dispatcher from the configured settings."""
+    return NotificationDispatcher(
+        session_maker,
+        channels={
+            "email": email_channel(email_sender, settings.notification_email_concurrency),
+        },
+        batch_size=settings.notification_batch_size,
+        lease_seconds=settings.notification_lease_seconds,
+        max_attempts=settings.notification_max_attempts,
+        retry_base_seconds=settings.notification_retry_base_seconds,
+        retry_max_seconds=settings.notification_retry_max_seconds,
+        digest_window_seconds=settings.notification_digest_window_seconds,
+    )
+
+
+async def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    email_sender = create_email_sender()
+    dispatcher = create_dispatcher(async_session_maker, email_sender)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    try:
+        await dispatcher.run(
+            stop,
+            settings.notification_poll_interval_seconds,
+            settings.notification_stats_interval_seconds,
+        )
+    finally:
+        await email_sender.aclose()
+        logger.info("Notification dispatcher stopped: %s", dispatcher.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,99 @@
+"""Shared test fixtures.
+
+Tests that need a real PostgreSQL database use the ``db_engine`` fixture,
+which creates the schema in the database named by ``TEST_DATABASE_URL`` and
+skips the test when that variable is not set.
+"""
+
+import os
+import uuid
+from datetime import datetime
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from runcoach import models  # noqa: F401
+from runcoach.database import Base, ReadSessionRouter, get_db, get_read_db
+from runcoach.main import app
+from runcoach.models.user import User
+from runcoach.services.admission import auth_admission
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+
+@pytest.fixture(autouse=True)
+def reset_auth_rate_limits():
+    """Start every test with empty auth rate-limit buckets."""
+    auth_admission.reset()
+
+
+@pytest.fixture
+def make_user():
+    """Factory for transient User instances with identity columns populated."""
+
+    def factory(**overrides) -> User:
+        values = {
+            "id": uuid.uuid4(),
+            "invite_code": "INVITE",
+            "name": "Test User",
+            "email": "test@example.com",
+            "password_hash": "$2b$12$not-a-real-hash",
+            "session_generation": 0,
+            "created_at": datetime(2025, 1, 1),
+            "updated_at": datetime(2025, 1, 1),
+        }
+        values.update(overrides)
+        return User(**values)
+
+    return factory
+
+
+@pytest.fixture
+async def db_engine():
+    """Create a fresh schema in the test database."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+@pytest.fixture
+def db_session_maker(db_engine):
+    """Session factory bound to the test database."""
+    return async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+
+@pytest.fixture
+async def db_client(db_engine, db_session_maker):
+    """Async HTTP client whose requests use the test database."""
+    read_router = ReadSessionRouter(db_engine)
+
+    async def override_get_db():
+        async with db_session_maker() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+    async def override_get_read_db():
+        async with read_router.session() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.pop(get_db, None)
+    app.dependency_overrides.pop(get_read_db, None)
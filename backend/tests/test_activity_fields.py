@@ -0,0 +1,120 @@
+"""Tests for promoted Strava payload fields."""
+
+from decimal import Decimal
+
+from sqlalchemy import func, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+
+from runcoach.models.strava_activity import StravaActivity
+from runcoach.services.activity_fields import (
+    PROMOTED_FIELDS,
+    PromotedField,
+    backfill_batch,
+    backfill_promoted_fields,
+    promoted_values,
+)
+from runcoach.services.strava_ingest import ingest_activity_page
+
+SUMMARY = {
+    "id": 1,
+    "type": "Run",
+    "start_date": "2025-06-01T06:00:00Z",
+    "total_elevation_gain": 123.456,
+    "workout_type": 1,
+    "average_cadence": 85.25,
+    "suffer_score": 52.5,
+}
+
+
+class TestPromotedField:
+    """Tests for extracting promoted fields in Python."""
+
+    def test_extracts_and_rounds(self):
+        """Test that values are rounded to the column's scale, half up."""
+        assert promoted_values(SUMMARY) == {
+            "total_elevation_gain_meters": Decimal("123.46"),
+            "workout_type": 1,
+            "average_cadence": Decimal("85.25"),
+            "suffer_score": 53,
+        }
+
+    def test_missing_or_non_numeric_is_null(self):
+        """Test that absent, null and non-numeric values extract as None."""
+        field = PromotedField("suffer_score", "suffer_score")
+
+        assert field.extract({}) is None
+        assert field.extract({"suffer_score": None}) is None
+        assert field.extract({"suffer_score": "high"}) is None
+        assert field.extract({"suffer_score": True}) is None
+
+
+class TestPromotedFieldSQL:
+    """Tests for the SQL projection and the backfill."""
+
+    async def test_sql_matches_python(self, db_session_maker):
+        """Test that the SQL expression extracts what the ingest path does."""
+        payloads = [SUMMARY, {"suffer_score": "high", "workout_type": None}, {}]
+        async with db_session_maker() as session:
+            for payload in payloads:
+                stored = select(literal(payload, JSONB).label("raw_data")).subquery()
+                row = (
+                    await session.execute(
+                        select(
+                            *(field.expression(stored.c.raw_data) for field in PROMOTED_FIELDS)
+                        )
+                    )
+                ).one()
+                assert dict(zip((f.column for f in PROMOTED_FIELDS), row)) == (
+                    promoted_values(payload)
+                )
+
+    async def test_backfill_fills_and_is_idempotent(self, db_session_maker, make_user):
+        """Test that the backfill projects stored payloads in batches."""
+        user = make_user()
+        summaries = [{**SUMMARY, "id": i} for i in range(1, 6)]
+        async with db_session_maker() as session:
+            session.add(user)
+            await ingest_activity_page(session, user.id, summaries)
+            # As if the rows were stored before the columns existed
+            await session.execute(
+                update(StravaActivity).values(
+                    {field.column: None for field in PROMOTED_FIELDS}
+                )
+            )
+            await session.commit()
+
+        first = await backfill_promoted_fields(db_session_maker, batch_size=2)
+        second = await backfill_promoted_fields(db_session_maker, batch_size=2)
+        async with db_session_maker() as session:
+            races = await session.scalar(
+                select(func.count()).where(
+                    StravaActivity.user_id == user.id,
+                    StravaActivity.workout_type == 1,
+                )
+            )
+            elevation = await session.scalar(
+                select(func.sum(StravaActivity.total_elevation_gain_meters))
+            )
+
+        assert (first, second) == (5, 0)
+        assert races == 5
+        assert elevation == Decimal("617.30")
+
+    async def test_batch_stops_at_batch_size(self, db_session_maker, make_user):
+        """Test that a batch covers only the next ``batch_size`` payloads."""
+        user = make_user()
+        summaries = [{**SUMMARY, "id": i} for i in range(1, 6)]
+        async with db_session_maker() as session:
+            session.add(user)
+            await ingest_activity_page(session, user.id, summaries)
+            await session.execute(
+                update(StravaActivity).values(
+                    {field.column: None for field in PROMOTED_FIELDS}
+                )
+            )
+            await session.commit()
+
+        async with db_session_maker() as session:
+            batches = [await backfill_batch(session, after, 2) for after in (0, 2, 4, 5)]
+
+        assert batches == [(2, 2), (2, 4), (1, 5), (0, None)]
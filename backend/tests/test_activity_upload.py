@@ -0,0 +1,261 @@
+"""Tests for the FIT decoder and activity uploads."""
+
+import hashlib
+import io
+import threading
+from datetime import datetime
+
+import numpy as np
+import pytest
+from fit_tool.fit_file_builder import FitFileBuilder
+from fit_tool.profile.messages.file_id_message import FileIdMessage
+from fit_tool.profile.messages.record_message import RecordMessage
+from fit_tool.profile.messages.session_message import SessionMessage
+from fit_tool.profile.profile_type import FileType, Manufacturer, Sport, SubSport
+from sqlalchemy import func, select
+
+from runcoach.config import get_settings
+from runcoach.models.strava_activity import StravaActivity
+from runcoach.services import activity_upload
+from runcoach.services.activity_upload import save_upload
+from runcoach.services.auth import create_session_token, revoke_user_sessions
+from runcoach.services.fit_decoder import FitError, read_activity
+
+START = datetime(2025, 5, 4, 6, 0)
+# Milliseconds since the Unix epoch, as fit_tool takes timestamps
+START_MS = int((START - datetime(1970, 1, 1)).total_seconds() * 1000)
+DAY = 24 * 3600
+
+
+def fit_file(
+    offsets,
+    sport: Sport = Sport.RUNNING,
+    sub_sport: SubSport = SubSport.GENERIC,
+    heartrate: bool = True,
+    file_type: FileType = FileType.ACTIVITY,
+) -> bytes:
+    """A FIT activity with a record at each of ``offsets`` seconds."""
+    builder = FitFileBuilder(auto_define=True)
+    file_id = FileIdMessage()
+    file_id.type = file_type
+    file_id.manufacturer = Manufacturer.GARMIN.value
+    file_id.time_created = START_MS
+    builder.add(file_id)
+    records = []
+    for offset in offsets:
+        record = RecordMessage()
+        record.timestamp = START_MS + offset * 1000
+        record.position_lat = 45.0 + offset * 1e-5
+        record.position_long = 7.0 + offset * 1e-5
+        record.altitude = 100.0 + (offset % 100) / 10
+        record.distance = offset * 3.0
+        record.speed = 3.0
+        record.cadence = 88
+        if heartrate:
+            record.heart_rate = 150
+        records.append(record)
+    builder.add_all(records)
+    session = SessionMessage()
+    session.timestamp = START_MS + offsets[-1] * 1000
+    session.sport = sport
+    session.sub_sport = sub_sport
+    builder.add(session)
+    return builder.build().to_bytes()
+
+
+def read(data: bytes, **kwargs):
+    return read_activity(io.BytesIO(data), kwargs.pop("max_seconds", DAY), **kwargs)
+
+
+class TestFitDecoder:
+    """Tests for decoding FIT files into per-second channels."""
+
+    def test_channels(self):
+        """Test that each record lands on its second, in the channel's units."""
+        channels = read(fit_file(range(600)))
+
+        assert channels.start == START
+        assert channels.seconds == 600
+        assert (channels.sport, channels.sub_sport) == (Sport.RUNNING.value, 0)
+        np.testing.assert_array_equal(channels.time, np.arange(600))
+        assert (channels.heartrate == 150).all()
+        assert (channels.cadence == 88).all()
+        np.testing.assert_allclose(channels.speed, 3.0)
+        np.testing.assert_allclose(channels.distance, np.arange(600) * 3.0)
+        np.testing.assert_allclose(channels.altitude, 100 + (np.arange(600) % 100) / 10, atol=0.2)
+        np.testing.assert_allclose(channels.latitude, 45 + np.arange(600) * 1e-5, atol=1e-6)
+        assert channels.heartrate.dtype == np.float32
+        assert channels.latitude.dtype == np.float64
+
+    def test_gaps(self):
+        """Test that smart-recording gaps are filled and pauses are not."""
+        offsets = [*range(0, 300, 5), *range(900, 1200, 5)]
+
+        channels = read(fit_file(offsets, heartrate=False))
+
+        assert channels.seconds == 1196
+        np.testing.assert_allclose(channels.distance[:296], np.arange(296) * 3.0)
+        assert np.isnan(channels.distance[296:900]).all()
+        assert np.isnan(channels.heartrate).all()
+        assert channels.recording.sum() == 296 * 2
+
+    def test_chunk_boundaries(self):
+        """Test that messages split across reads decode the same."""
+        data = fit_file(range(300))
+
+        whole, chunked = read(data), read(data, chunk_size=7)
+
+        for name in ("time", "heartrate", "speed", "latitude", "altitude"):
+            np.testing.assert_array_equal(getattr(whole, name), getattr(chunked, name))
+
+    @pytest.mark.parametrize(
+        "corrupt",
+        [
+            lambda data: data[:-1] + bytes([data[-1] ^ 0xFF]),
+            lambda data: data[: len(data) // 2],
+            lambda data: b"not a fit file at all",
+        ],
+        ids=["crc", "truncated", "garbage"],
+    )
+    def test_unreadable(self, corrupt):
+        """Test that corrupt and foreign files raise FitError."""
+        with pytest.raises(FitError):
+            read(corrupt(fit_file(range(60))))
+
+    def test_limits(self):
+        """Test that over-long activities and non-activity files are refused."""
+        with pytest.raises(FitError, match="longer"):
+            read(fit_file(range(0, 3600, 10)), max_seconds=600)
+        with pytest.raises(FitError, match="activity file"):
+            read(fit_file(range(60), file_type=FileType.WORKOUT))
+
+
+class TestSaveUpload:
+    """Tests for streaming an upload body to its file."""
+
+    async def test_writes_buffers_off_the_event_loop(self, monkeypatch):
+        """Test that small chunks are written a buffer at a time in a worker thread."""
+        monkeypatch.setattr(activity_upload, "UPLOAD_WRITE_BYTES", 1000)
+        data = fit_file(range(300))
+        writes = []
+
+        class RecordingFile(io.BytesIO):
+            def writelines(self, lines):
+                writes.append(threading.current_thread() is threading.main_thread())
+                super().writelines(lines)
+
+        async def chunks():
+            for start in range(0, len(data), 100):
+                yield data[start : start + 100]
+
+        file = RecordingFile()
+        digest = await save_upload(chunks(), file, len(data))
+
+        assert file.getvalue() == data
+        assert digest == hashlib.sha256(data).digest()
+        assert len(writes) == -(-len(data) // 1000)
+        assert not any(writes)
+
+
+class TestActivityUpload:
+    """Tests for POST /activities/upload."""
+
+    async def test_upload_creates_activity(self, db_client, db_session_maker, make_user):
+        """Test that an upload is ingested once, however often it is sent."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+        db_client.cookies.set("session", create_session_token(user))
+        data = fit_file(range(1800), sub_sport=SubSport.TRAIL)
+
+        first = await db_client.post(
+            "/activities/upload", params={"filename": "morning.fit"}, content=data
+        )
+        again = await db_client.post("/activities/upload", content=data)
+
+        assert first.status_code == 201
+        body = first.json()
+        assert body["strava_activity_id"] < 0
+        assert body["activity_type"] == "TrailRun"
+        assert body["start_date"] == START.isoformat()
+        assert (body["samples"], body["moving_time_seconds"]) == (1800, 1800)
+        assert body["distance_meters"] == 5397.0
+        assert body["average_heartrate"] == 150.0
+        assert again.json()["strava_activity_id"] == body["strava_activity_id"]
+        async with db_session_maker() as session:
+            activity = await session.scalar(select(StravaActivity))
+            count = await session.scalar(select(func.count(StravaActivity.id)))
+        assert count == 1
+        assert activity.strava_activity_id == body["strava_activity_id"]
+        assert activity.user_id == user.id
+        assert activity.average_cadence == 88
+
+    async def test_upload_per_athlete(self, db_client, db_session_maker, make_user):
+        """Test that athletes uploading the same file each get the activity."""
+        users = [
+            make_user(email="owner@example.com", invite_code="OWNER"),
+            make_user(email="other@example.com", invite_code="OTHER"),
+        ]
+        async with db_session_maker() as session:
+            session.add_all(users)
+            await session.commit()
+        data = fit_file(range(600))
+
+        responses = []
+        for user in users:
+            db_client.cookies.set("session", create_session_token(user))
+            responses.append(await db_client.post("/activities/upload", content=data))
+        repeated = await db_client.post("/activities/upload", content=data)
+
+        assert [response.status_code for response in responses] == [201, 201]
+        first, second = (response.json()["strava_activity_id"] for response in responses)
+        assert first != second
+        assert repeated.status_code == 409
+        async with db_session_maker() as session:
+            rows = await session.execute(
+                select(StravaActivity.strava_activity_id, StravaActivity.user_id)
+            )
+            owners = dict(rows.all())
+        assert owners == {first: users[0].id, second: users[1].id}
+
+    async def test_requires_current_session(
+        self, db_client, db_session_maker, make_user, monkeypatch
+    ):
+        """Test 401 for a deleted user or a revoked session on this write route."""
+        monkeypatch.setattr(get_settings(), "session_revocation_check", False)
+        user, deleted = make_user(), make_user(email="gone@example.com", invite_code="GONE")
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+        revoked = create_session_token(user)
+        async with db_session_maker() as session:
+            await revoke_user_sessions(session, user.id)
+            await session.commit()
+        data = fit_file(range(600))
+
+        db_client.cookies.set("session", create_session_token(deleted))
+        missing = await db_client.post("/activities/upload", content=data)
+        db_client.cookies.set("session", revoked)
+        stale = await db_client.post("/activities/upload", content=data)
+
+        assert (missing.status_code, stale.status_code) == (401, 401)
+        async with db_session_maker() as session:
+            assert await session.scalar(select(func.count(StravaActivity.id))) == 0
+
+    async def test_rejects_bad_uploads(self, db_client, db_session_maker, make_user, monkeypatch):
+        """Test 422 for an unreadable file and 413 for an oversized one."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+        db_client.cookies.set("session", create_session_token(user))
+
+        garbage = await db_client.post("/activities/upload", content=b"x" * 100)
+        monkeypatch.setattr(get_settings(), "fit_upload_max_bytes", 1000)
+        oversized = await db_client.post("/activities/upload", content=fit_file(range(600)))
+
+        assert garbage.status_code == 422
+        assert oversized.status_code == 413
+        async with db_session_maker() as session:
+            assert await session.scalar(select(func.count(StravaActivity.id))) == 0
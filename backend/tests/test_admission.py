@@ -0,0 +1,126 @@
+"""Tests for admission control on expensive auth routes."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from runcoach.main import app
+from runcoach.services.admission import (
+    ConcurrencyLimiter,
+    Overloaded,
+    TokenBucketLimiter,
+    auth_admission,
+)
+
+
+class TestTokenBucketLimiter:
+    """Tests for TokenBucketLimiter."""
+
+    def test_burst_then_reject(self):
+        """Test that a bucket allows its burst and then asks callers to wait."""
+        limiter = TokenBucketLimiter(capacity=3, refill_per_second=1.0)
+
+        assert [limiter.acquire("ip") for _ in range(3)] == [0, 0, 0]
+        wait = limiter.acquire("ip")
+        assert 0 < wait <= 1.0
+        assert limiter.stats()["rejected"] == 1
+
+    def test_keys_are_independent(self):
+        """Test that one key's exhaustion does not affect another."""
+        limiter = TokenBucketLimiter(capacity=1, refill_per_second=0.01)
+        limiter.acquire("a")
+
+        assert limiter.acquire("a") > 0
+        assert limiter.acquire("b") == 0
+
+    async def test_refill(self):
+        """Test that tokens come back over time."""
+        limiter = TokenBucketLimiter(capacity=1, refill_per_second=100.0)
+        limiter.acquire("ip")
+        await asyncio.sleep(0.02)
+
+        assert limiter.acquire("ip") == 0
+
+    def test_bounded_keys(self):
+        """Test that the number of tracked keys is capped."""
+        limiter = TokenBucketLimiter(capacity=1, refill_per_second=1.0, max_keys=2)
+        for key in ("a", "b", "c"):
+            limiter.acquire(key)
+
+        assert limiter.stats()["tracked_keys"] == 2
+
+
+class TestConcurrencyLimiter:
+    """Tests for ConcurrencyLimiter."""
+
+    async def test_sheds_when_queue_full(self):
+        """Test that callers beyond the queue bound are rejected immediately."""
+        limiter = ConcurrencyLimiter("login", max_concurrency=1, max_queue=1, queue_timeout=1.0)
+        admitted_at = await limiter.acquire()
+        queued = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded) as exc_info:
+            await limiter.acquire()
+        assert exc_info.value.retry_after >= 1
+
+        limiter.release(admitted_at)
+        limiter.release(await queued)
+        assert limiter.stats()["shed"] == 1
+        assert limiter.stats()["admitted"] == 2
+
+    async def test_queue_timeout(self):
+        """Test that a queued caller gives up after the wait timeout."""
+        limiter = ConcurrencyLimiter("login", max_concurrency=1, max_queue=5, queue_timeout=0.01)
+        admitted_at = await limiter.acquire()
+
+        with pytest.raises(Overloaded):
+            await limiter.acquire()
+
+        limiter.release(admitted_at)
+        assert limiter.stats()["timed_out"] == 1
+        assert limiter.stats()["waiting"] == 0
+
+
+class TestAuthRouteAdmission:
+    """Tests for admission control wired into the auth routes."""
+
+    @pytest.fixture
+    async def client(self):
+        """Async client sharing the test's event loop with the limiters."""
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+
+    async def test_login_rate_limited_per_email(self, client):
+        """Test that repeated logins for one account get 429 with Retry-After."""
+        capacity = auth_admission.email_buckets.capacity
+        for _ in range(capacity):
+            auth_admission.check_email("victim@example.com")
+
+        response = await client.post(
+            "/auth/login",
+            json={"email": "Victim@example.com", "password": "guess"},
+        )
+
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+
+    async def test_login_shed_when_saturated(self, client, monkeypatch):
+        """Test that a saturated login route answers 503 without doing work."""
+        limiter = auth_admission.routes["login"]
+        monkeypatch.setattr(limiter, "max_queue", 0)
+        slots = [await limiter.acquire() for _ in range(limiter.max_concurrency)]
+
+        response = await client.post(
+            "/auth/login",
+            json={"email": "runner@example.com", "password": "secret"},
+        )
+        health = await client.get("/health")
+
+        for admitted_at in slots:
+            limiter.release(admitted_at)
+        assert response.status_code == 503
+        assert "Retry-After" in response.headers
+        assert health.status_code == 200
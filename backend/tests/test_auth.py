@@ -3,11 +3,14 @@
 import pytest
 from fastapi.testclient import TestClient
 
+from runcoach.config import get_settings
 from runcoach.main import app
 from runcoach.services.auth import (
     create_session_token,
     hash_password,
+    session_serializer,
     verify_password,
+    verify_session_claims,
     verify_session_token,
 )
 
@@ -47,25 +50,20 @@ class TestPasswordHashing:
 class TestSessionTokens:
     """Tests for session token functions."""
 
-    def test_create_session_token(self):
+    def test_create_session_token(self, make_user):
         """Test creating session token."""
-        import uuid
-
-        user_id = uuid.uuid4()
-        token = create_session_token(user_id)
+        token = create_session_token(make_user())
 
         assert isinstance(token, str)
         assert len(token) > 0
 
-    def test_verify_session_token_valid(self):
+    def test_verify_session_token_valid(self, make_user):
         """Test verifying valid session token."""
-        import uuid
-
-        user_id = uuid.uuid4()
-        token = create_session_token(user_id)
+        user = make_user()
+        token = create_session_token(user)
         verified_id = verify_session_token(token)
 
-        assert verified_id == user_id
+        assert verified_id == user.id
 
     def test_verify_session_token_invalid(self):
         """Test verifying invalid session token."""
@@ -73,18 +71,50 @@ class TestSessionTokens:
 
         assert verified_id is None
 
-    def test_verify_session_token_tampered(self):
+    def test_verify_session_token_tampered(self, make_user):
         """Test verifying tampered session token."""
-        import uuid
-
-        user_id = uuid.uuid4()
-        token = create_session_token(user_id)
+        token = create_session_token(make_user())
         tampered_token = token[:-5] + "xxxxx"
         verified_id = verify_session_token(tampered_token)
 
         assert verified_id is None
 
 
+class TestSessionClaims:
+    """Tests for v2 session claims and legacy token compatibility."""
+
+    def test_claims_round_trip(self, make_user):
+        """Test that v2 tokens carry the identity claims."""
+        user = make_user(session_generation=3)
+        claims = verify_session_claims(create_session_token(user))
+
+        assert claims.user_id == user.id
+        assert claims.name == user.name
+        assert claims.email == user.email
+        assert claims.created_at == user.created_at
+        assert claims.generation == 3
+        assert claims.is_legacy is False
+
+    def test_legacy_token_accepted(self):
+        """Test that v1 tokens (user ID only) are still accepted."""
+        import uuid
+
+        user_id = uuid.uuid4()
+        legacy_token = session_serializer.dumps(str(user_id))
+        claims = verify_session_claims(legacy_token)
+
+        assert claims.user_id == user_id
+        assert claims.is_legacy is True
+        assert verify_session_token(legacy_token) == user_id
+
+    def test_v1_signature_is_not_a_v2_token(self, make_user):
+        """Test that a v1-signed claims payload is not accepted as v2."""
+        user = make_user()
+        forged = session_serializer.dumps({"v": 2, "uid": str(user.id)})
+
+        assert verify_session_claims(forged) is None
+
+
 class TestAuthEndpoints:
     """Tests for auth endpoints (without database)."""
 
@@ -110,6 +140,40 @@ class TestAuthEndpoints:
         assert response.status_code == 401
         assert response.json()["detail"] == "Invalid or expired session"
 
+    def test_get_me_from_session_claims(self, client, make_user, monkeypatch):
+        """Test /me is answered from the token claims when the check is off."""
+        monkeypatch.setattr(get_settings(), "session_revocation_check", False)
+        user = make_user()
+        client.cookies.set("session", create_session_token(user))
+        response = client.get("/auth/me")
+
+        assert response.status_code == 200
+        assert response.json()["id"] == str(user.id)
+        assert response.json()["email"] == user.email
+
+
+class TestSessionRevocation:
+    """Tests that revoked sessions are refused on data routes."""
+
+    async def test_logout_all_revokes_data_routes(self, db_client, db_session_maker, make_user):
+        """Test that a token issued before logout-all gets 401 on the dashboard."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+        token = create_session_token(user)
+        db_client.cookies.set("session", token)
+
+        before = await db_client.get("/dashboard")
+        logout = await db_client.post("/auth/logout-all")
+        db_client.cookies.set("session", token)
+        after = await db_client.get("/dashboard")
+
+        assert before.status_code == 200
+        assert logout.status_code == 200
+        assert after.status_code == 401
+        assert after.json()["detail"] == "Session has been revoked"
+
 
 class TestAuthSchemas:
     """Tests for auth schemas validation."""
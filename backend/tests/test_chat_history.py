@@ -0,0 +1,129 @@
+"""Tests for chat history reads."""
+
+import json
+from datetime import datetime, timedelta
+
+from runcoach.models.chat_message import ChatMessage
+from runcoach.services.auth import create_session_token
+from runcoach.services.chat_history import stream_history
+from runcoach.utils.pagination import encode_cursor
+
+FIRST_AT = datetime(2025, 3, 3, 7, 0)
+
+
+async def seed_history(db_session_maker, user, count: int) -> None:
+    """Store ``count`` messages, two per timestamp, with context snapshots."""
+    async with db_session_maker() as session:
+        session.add(user)
+        session.add_all(
+            ChatMessage(
+                user=user,
+                role="user" if i % 2 == 0 else "assistant",
+                content=f"message {i}",
+                context_snapshot={"turn": i},
+                created_at=FIRST_AT + timedelta(minutes=i // 2),
+            )
+            for i in range(count)
+        )
+        await session.commit()
+
+
+class TestChatHistory:
+    """Tests for GET /chat/history."""
+
+    async def test_pages_backwards_once(self, db_client, db_session_maker, make_user):
+        """Test that paging visits every message once, newest first, across ties."""
+        user = make_user()
+        await seed_history(db_session_maker, user, count=11)
+        db_client.cookies.set("session", create_session_token(user))
+
+        params = {"limit": 3}
+        seen = []
+        while True:
+            response = await db_client.get("/chat/history", params=params)
+            assert response.status_code == 200
+            body = response.json()
+            seen.extend((m["created_at"], m["id"]) for m in body["messages"])
+            if body["next_cursor"] is None:
+                break
+            params["cursor"] = body["next_cursor"]
+
+        assert len(set(seen)) == 11
+        assert seen == sorted(seen, reverse=True)
+
+    async def test_context_only_when_asked(self, db_client, db_session_maker, make_user):
+        """Test that context snapshots are only returned when asked for."""
+        user = make_user()
+        await seed_history(db_session_maker, user, count=2)
+        db_client.cookies.set("session", create_session_token(user))
+
+        compact = (await db_client.get("/chat/history")).json()
+        detailed = (
+            await db_client.get("/chat/history", params={"include_context": "true"})
+        ).json()
+
+        assert "context_snapshot" not in compact["messages"][0]
+        assert {m["context_snapshot"]["turn"] for m in detailed["messages"]} == {0, 1}
+
+    async def test_bad_cursor(self, db_client, db_session_maker, make_user):
+        """Test that a malformed cursor is a client error."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+        db_client.cookies.set("session", create_session_token(user))
+
+        garbage = await db_client.get("/chat/history", params={"cursor": "garbage"})
+        tampered = await db_client.get(
+            "/chat/history", params={"cursor": encode_cursor("2024-01-01", 123)}
+        )
+
+        assert (garbage.status_code, tampered.status_code) == (400, 400)
+
+
+class TestChatHistoryExport:
+    """Tests for the streaming chat history export."""
+
+    async def test_export_is_ndjson_oldest_first(self, db_client, db_session_maker, make_user):
+        """Test that the export streams every message as one JSON line each."""
+        user = make_user()
+        await seed_history(db_session_maker, user, count=7)
+        db_client.cookies.set("session", create_session_token(user))
+
+        response = await db_client.get("/chat/history/export")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["content"] for line in lines) == [f"message {i}" for i in range(7)]
+        keys = [(line["created_at"], line["id"]) for line in lines]
+        assert keys == sorted(keys)
+        assert "context_snapshot" not in lines[0]
+
+    async def test_export_with_context(self, db_client, db_session_maker, make_user):
+        """Test that the export can include context snapshots."""
+        user = make_user()
+        await seed_history(db_session_maker, user, count=2)
+        db_client.cookies.set("session", create_session_token(user))
+
+        response = await db_client.get(
+            "/chat/history/export",
+            params={"include_context": "true"},
+        )
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(line["context_snapshot"]["turn"] for line in lines) == [0, 1]
+
+    async def test_stream_yields_bounded_batches(self, db_session_maker, make_user):
+        """Test that rows arrive in batches and are released from the session."""
+        user = make_user()
+        await seed_history(db_session_maker, user, count=7)
+
+        async with db_session_maker() as session:
+            sizes = [
+                len(batch)
+                async for batch in stream_history(session, user.id, batch_size=3)
+            ]
+            assert len(session.identity_map) == 0
+
+        assert sizes == [3, 3, 1]
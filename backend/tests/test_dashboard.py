@@ -0,0 +1,169 @@
+"""Tests for the athlete dashboard."""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from runcoach.models.goal import Goal
+from runcoach.models.training_plan import TrainingPlan
+from runcoach.models.user_profile import UserProfile
+from runcoach.models.workout import Workout
+from runcoach.models.workout_completion import WorkoutCompletion
+from runcoach.services.auth import create_session_token
+from runcoach.services.dashboard import week_bounds
+from runcoach.services.strava_ingest import ingest_activity_page
+
+TODAY = date.today()
+
+
+def count_queries(db_engine) -> list[str]:
+    """Record every statement the engine executes from now on."""
+    statements: list[str] = []
+
+    @event.listens_for(db_engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    return statements
+
+
+async def seed_athlete(db_session_maker, user) -> None:
+    """Store a profile, goals, a plan with workouts and some activities."""
+    monday, _ = week_bounds(TODAY)
+    plan = TrainingPlan(
+        user=user,
+        title="Marathon block",
+        start_date=monday - timedelta(weeks=4),
+        end_date=monday + timedelta(weeks=8),
+    )
+    goal = Goal(
+        user=user,
+        goal_type="race",
+        title="Autumn marathon",
+        target_race_date=monday + timedelta(weeks=8),
+    )
+    workouts = [
+        Workout(
+            training_plan=plan,
+            user=user,
+            scheduled_date=monday + timedelta(days=offset),
+            workout_type="easy",
+            structure={},
+        )
+        for offset in (-1, 0, 2, 6, 7)
+    ]
+    workouts[1].completions.append(WorkoutCompletion(completion_status="completed"))
+    workouts[2].completions.append(WorkoutCompletion(completion_status="partial"))
+    async with db_session_maker() as session:
+        session.add_all(
+            [
+                user,
+                UserProfile(user=user, current_weekly_mileage_miles=Decimal("30.00")),
+                goal,
+                Goal(user=user, goal_type="non_race", title="Run more"),
+                Goal(user=user, goal_type="race", title="Old race", status="completed"),
+                *workouts,
+            ]
+        )
+        await session.flush()
+        await ingest_activity_page(
+            session,
+            user.id,
+            [
+                {
+                    "id": i,
+                    "type": "Run",
+                    "start_date": f"{TODAY - timedelta(days=days_ago)}T06:00:00Z",
+                    "distance": 8000.0,
+                    "total_elevation_gain": 42.0,
+                }
+                for i, days_ago in enumerate((1, 3, 100), start=1)
+            ],
+        )
+        await session.commit()
+
+
+class TestWeekBounds:
+    """Tests for week_bounds."""
+
+    def test_monday_to_monday(self):
+        """Test that the week runs Monday to the next Monday, exclusive."""
+        assert week_bounds(date(2025, 6, 11)) == (date(2025, 6, 9), date(2025, 6, 16))
+        assert week_bounds(date(2025, 6, 9)) == (date(2025, 6, 9), date(2025, 6, 16))
+        assert week_bounds(date(2025, 6, 15)) == (date(2025, 6, 9), date(2025, 6, 16))
+
+
+class TestDashboard:
+    """Tests for GET /dashboard."""
+
+    async def test_requires_session(self, db_client):
+        """Test that anonymous requests are rejected."""
+        response = await db_client.get("/dashboard")
+
+        assert response.status_code == 401
+
+    async def test_dashboard_contents(self, db_client, db_session_maker, make_user):
+        """Test that the dashboard shows the athlete's current state."""
+        user = make_user()
+        await seed_athlete(db_session_maker, user)
+        db_client.cookies.set("session", create_session_token(user))
+
+        response = await db_client.get("/dashboard")
+
+        assert response.status_code == 200
+        body = response.json()
+        monday, _ = week_bounds(TODAY)
+        assert body["week_start"] == monday.isoformat()
+        assert body["profile"]["current_weekly_mileage_miles"] == "30.00"
+        # The dated race wins over the open-ended goal
+        assert body["active_goal"]["title"] == "Autumn marathon"
+        assert body["current_plan"]["title"] == "Marathon block"
+        assert [
+            (w["scheduled_date"], [c["completion_status"] for c in w["completions"]])
+            for w in body["workouts"]
+        ] == [
+            (monday.isoformat(), ["completed"]),
+            ((monday + timedelta(days=2)).isoformat(), ["partial"]),
+            ((monday + timedelta(days=6)).isoformat(), []),
+        ]
+        # Newest first, and only from the last four weeks
+        assert [a["strava_activity_id"] for a in body["recent_activities"]] == [1, 2]
+        assert body["recent_activities"][0]["total_elevation_gain_meters"] == "42.00"
+        # Eight weeks ending with this one; the run from 100 days ago is older
+        assert len(body["training_load"]) == 8
+        assert body["training_load"][-1]["week_start"] == monday.isoformat()
+        assert sum(week["run_count"] for week in body["training_load"]) == 2
+
+    async def test_new_athlete(self, db_client, db_session_maker, make_user):
+        """Test that an athlete with no data gets an empty dashboard."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+        db_client.cookies.set("session", create_session_token(user))
+
+        response = await db_client.get("/dashboard")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["profile"] is None
+        assert body["active_goal"] is None
+        assert body["current_plan"] is None
+        assert body["workouts"] == []
+        assert body["recent_activities"] == []
+        assert [week["activity_count"] for week in body["training_load"]] == [0] * 8
+
+    async def test_fixed_query_count(self, db_client, db_engine, db_session_maker, make_user):
+        """Test that the dashboard costs four queries regardless of data."""
+        user = make_user()
+        await seed_athlete(db_session_maker, user)
+        db_client.cookies.set("session", create_session_token(user))
+        # The session check's user lookup is then served from the user cache
+        await db_client.get("/dashboard")
+
+        statements = count_queries(db_engine)
+        response = await db_client.get("/dashboard")
+
+        assert response.status_code == 200
+        assert len(statements) == 4
@@ -0,0 +1,140 @@
+"""Tests for the database engine and pool instrumentation (requires PostgreSQL)."""
+
+import pytest
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from runcoach.config import Settings
+from runcoach.database import (
+    PoolMetrics,
+    ReadSessionRouter,
+    create_engine_from_settings,
+    get_pool_stats,
+)
+from tests.conftest import TEST_DATABASE_URL
+
+
+@pytest.fixture
+async def small_pool():
+    """Engine with a single-connection pool and a short checkout timeout."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+    settings = Settings(
+        database_url=TEST_DATABASE_URL,
+        db_pool_size=1,
+        db_max_overflow=0,
+        db_pool_timeout_seconds=0.1,
+        db_statement_timeout_ms=1234,
+        db_application_name="runcoach-tests",
+    )
+    metrics = PoolMetrics()
+    engine = create_engine_from_settings(settings.database_url, settings, metrics)
+    yield engine, metrics
+    await engine.dispose()
+
+
+class TestPoolInstrumentation:
+    """Tests for pool settings and statistics."""
+
+    async def test_server_settings_applied(self, small_pool):
+        """Test that application_name and statement_timeout reach the server."""
+        engine, _ = small_pool
+        async with engine.connect() as conn:
+            application_name = await conn.scalar(text("SHOW application_name"))
+            statement_timeout = await conn.scalar(text("SHOW statement_timeout"))
+
+        assert application_name == "runcoach-tests"
+        assert statement_timeout == "1234ms"
+
+    async def test_checkout_and_timeout_counters(self, small_pool):
+        """Test that checkouts, occupancy and timeouts are reported.
+
+        A checkout that times out counts as a timeout, not as a checkout, so
+        its wait does not skew the average.
+        """
+        engine, metrics = small_pool
+        async with engine.connect():
+            stats = get_pool_stats(engine, metrics)
+            assert stats["checked_out"] == 1
+
+            with pytest.raises(exc.TimeoutError):
+                async with engine.connect():
+                    pass
+
+        stats = get_pool_stats(engine, metrics)
+        assert stats["checked_out"] == 0
+        assert stats["checkouts"] == 1
+        assert stats["timeouts"] == 1
+        assert stats["avg_wait_ms"] < 100
+        # From the engine's pool, not the global settings
+        assert stats["max_overflow"] == 0
+
+
+class TestReadSessions:
+    """Tests for read-only sessions and replica routing."""
+
+    async def test_session_is_read_only(self, db_engine):
+        """Test that read sessions run in READ ONLY transactions."""
+        router = ReadSessionRouter(db_engine)
+        async with router.session() as session:
+            read_only = await session.scalar(text("SHOW transaction_read_only"))
+            with pytest.raises(exc.DBAPIError):
+                await session.execute(
+                    text(
+                        "INSERT INTO goals (id, user_id, goal_type, title, status) "
+                        "VALUES (gen_random_uuid(), gen_random_uuid(), 'race', 'x', 'active')"
+                    )
+                )
+
+        assert read_only == "on"
+        assert router.stats()["primary_sessions"] == 1
+
+    async def test_reads_use_replica(self, db_engine):
+        """Test that a reachable replica serves reads."""
+        replica = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+        router = ReadSessionRouter(db_engine, replica)
+        async with router.session() as session:
+            assert await session.scalar(text("SELECT 1")) == 1
+        async with router.session(prefer_replica=False) as session:
+            assert await session.scalar(text("SELECT 1")) == 1
+        await replica.dispose()
+
+        assert router.stats()["replica_sessions"] == 1
+        assert router.stats()["primary_sessions"] == 1
+
+    async def test_unreachable_replica_falls_back(self, db_engine, tmp_path):
+        """Test that reads fall back to the primary when the replica is down."""
+        replica = create_async_engine(
+            f"postgresql+asyncpg://postgres@/runcoach?host={tmp_path}",
+            poolclass=NullPool,
+        )
+        router = ReadSessionRouter(db_engine, replica)
+        async with router.session() as session:
+            assert await session.scalar(text("SELECT 1")) == 1
+        await replica.dispose()
+
+        assert router.stats()["replica_fallbacks"] == 1
+        assert router.stats()["primary_sessions"] == 1
+
+    async def test_down_replica_is_skipped_until_retry(self, db_engine, tmp_path):
+        """Test that after a failed connect reads skip the replica for a while."""
+        replica = create_async_engine(
+            f"postgresql+asyncpg://postgres@/runcoach?host={tmp_path}",
+            poolclass=NullPool,
+        )
+        router = ReadSessionRouter(db_engine, replica, retry_seconds=30)
+
+        for _ in range(3):
+            async with router.session() as session:
+                assert await session.scalar(text("SELECT 1")) == 1
+        skipped = router.stats()
+        # The retry interval has passed
+        router._replica_down_until = 0.0
+        async with router.session():
+            pass
+        await replica.dispose()
+
+        assert (skipped["replica_fallbacks"], skipped["replica_skips"]) == (1, 2)
+        assert skipped["replica_available"] is False
+        assert router.stats()["replica_fallbacks"] == 2
@@ -0,0 +1,301 @@
+"""Tests for the fitness model and the nightly fitness batch."""
+
+import asyncio
+import math
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import delete, select, update
+
+from runcoach.models.fitness import AthleteFitness
+from runcoach.models.strava_activity import StravaActivity
+from runcoach.services.fitness import (
+    ATL_DAYS,
+    CTL_DAYS,
+    exponential_average,
+    fitness_curve,
+    get_current_fitness,
+    get_fitness_curve,
+    trimp,
+)
+from runcoach.services.strava_ingest import ingest_activity_page
+from runcoach.workers.fitness import FitnessReport, refresh_batch, refresh_fitness
+
+TODAY = date(2025, 6, 11)
+
+
+def reference_average(loads: list[float], initial: float, time_constant: float) -> list[float]:
+    """The per-day loop the vectorized form replaces."""
+    decay = math.exp(-1.0 / time_constant)
+    averages, state = [], initial
+    for load in loads:
+        state = decay * state + (1 - decay) * load
+        averages.append(state)
+    return averages
+
+
+def run(strava_id: int, day: date, minutes: int = 60, heartrate: float | None = 150.0) -> dict:
+    """A Strava run summary."""
+    summary = {
+        "id": strava_id,
+        "type": "Run",
+        "start_date": f"{day}T06:00:00Z",
+        "distance": 10000.0,
+        "moving_time": minutes * 60,
+    }
+    if heartrate is not None:
+        summary["average_heartrate"] = heartrate
+    return summary
+
+
+def history(days: int = 120) -> list[dict]:
+    """A run every other day up to yesterday, some without heart rate."""
+    return [
+        run(
+            i,
+            TODAY - timedelta(days=days - i),
+            minutes=30 + i % 40,
+            heartrate=None if i % 7 == 0 else 140 + i % 30,
+        )
+        for i in range(0, days, 2)
+    ]
+
+
+async def seed(db_session_maker, user, summaries: list[dict]) -> None:
+    async with db_session_maker() as session:
+        session.add(user)
+        await session.flush()
+        await ingest_activity_page(session, user.id, summaries)
+        await session.commit()
+
+
+class TestTrimp:
+    """Tests for the per-activity training load."""
+
+    def test_banister_weighting(self):
+        """Test TRIMP at a known heart-rate reserve, clipped and assumed."""
+        loads = trimp(
+            np.array([3600.0, 3600.0, 3600.0, np.nan]),
+            np.array([125.0, 250.0, np.nan, 150.0]),
+            resting_heartrate=60,
+            max_heartrate=190,
+        )
+
+        assert loads[0] == pytest.approx(60 * 0.5 * 0.64 * math.exp(1.92 * 0.5))
+        # Above max counts as max; no heart rate assumes half the reserve
+        assert loads[1] == pytest.approx(60 * 0.64 * math.exp(1.92))
+        assert loads[2] == pytest.approx(loads[0])
+        assert loads[3] == 0
+
+
+class TestExponentialAverage:
+    """Tests for the closed-form exponentially weighted average."""
+
+    def test_matches_daily_loop(self):
+        """Test that blocks of days reproduce the day-by-day recurrence."""
+        loads = np.random.default_rng(0).uniform(0, 200, size=1000)
+        loads[300:420] = 0
+
+        for time_constant in (ATL_DAYS, CTL_DAYS):
+            np.testing.assert_allclose(
+                exponential_average(loads, 35.0, time_constant),
+                reference_average(loads.tolist(), 35.0, time_constant),
+                rtol=1e-9,
+            )
+
+    def test_rows_are_independent(self):
+        """Test that each row of a matrix starts from its own state."""
+        loads = np.random.default_rng(1).uniform(0, 200, size=(3, 300))
+        initial = np.array([0.0, 50.0, 100.0])
+
+        averages = exponential_average(loads, initial, CTL_DAYS)
+
+        for row in range(3):
+            np.testing.assert_allclose(
+                averages[row],
+                reference_average(loads[row].tolist(), initial[row], CTL_DAYS),
+                rtol=1e-9,
+            )
+
+    def test_form_is_carried_into_the_day(self):
+        """Test that TSB is the previous day's CTL minus ATL."""
+        curve = fitness_curve(np.array([100.0, 0.0, 50.0]), TODAY, ctl=40.0, atl=30.0)
+
+        assert curve.tsb[0] == 10.0
+        np.testing.assert_allclose(curve.tsb[1:], curve.ctl[:-1] - curve.atl[:-1])
+        assert curve.end == TODAY + timedelta(days=2)
+
+
+class TestFitnessReads:
+    """Tests for computing and resuming an athlete's fitness."""
+
+    async def test_curve_from_history(self, db_session_maker, make_user):
+        """Test the whole-history curve against the daily loop."""
+        user = make_user()
+        await seed(db_session_maker, user, history())
+
+        async with db_session_maker() as session:
+            curve = await get_fitness_curve(session, user.id, TODAY)
+
+        assert curve.start == TODAY - timedelta(days=120)
+        assert curve.end == TODAY
+        assert np.count_nonzero(curve.load) == 60
+        np.testing.assert_allclose(
+            curve.ctl,
+            reference_average(curve.load.tolist(), 0.0, CTL_DAYS),
+        )
+
+    async def test_resumes_from_cached_state(self, db_session_maker, db_engine, make_user):
+        """Test that a read after the batch equals a full recompute."""
+        user = make_user()
+        await seed(db_session_maker, user, history())
+        report = await refresh_fitness(db_engine, batch_size=10, today=TODAY)
+        # Today's activity, after the batch
+        await seed(db_session_maker, user, [run(999, TODAY, 45, 170.0)])
+
+        async with db_session_maker() as session:
+            state = await session.get(AthleteFitness, user.id)
+            resumed = await get_current_fitness(session, user.id, TODAY)
+            curve = await get_fitness_curve(session, user.id, TODAY)
+
+        assert report.recomputed == 1
+        assert state.as_of == TODAY - timedelta(days=1)
+        assert resumed.ctl == pytest.approx(curve.ctl[-1])
+        assert resumed.atl == pytest.approx(curve.atl[-1])
+        assert resumed.tsb == pytest.approx(curve.ctl[-1] - curve.atl[-1])
+
+    async def test_no_activities(self, db_session_maker, make_user):
+        """Test that an athlete without activities has zero fitness."""
+        user = make_user()
+        await seed(db_session_maker, user, [])
+
+        async with db_session_maker() as session:
+            point = await get_current_fitness(session, user.id, TODAY)
+            curve = await get_fitness_curve(session, user.id, TODAY)
+
+        assert (point.ctl, point.atl, point.tsb) == (0.0, 0.0, 0.0)
+        assert curve is None
+
+
+class TestFitnessBatch:
+    """Tests for the nightly fitness batch."""
+
+    async def test_incremental_batch(self, db_session_maker, db_engine, make_user):
+        """Test that a later run folds in only the new days."""
+        athletes = [
+            make_user(email=f"runner{i}@example.com", invite_code=f"INVITE{i}")
+            for i in range(3)
+        ]
+        for i, user in enumerate(athletes):
+            summaries = [{**s, "id": s["id"] + 1000 * i} for s in history(60 + 30 * i)]
+            await seed(db_session_maker, user, summaries)
+        # A fourth athlete has no activities at all
+        await seed(
+            db_session_maker,
+            make_user(email="new@example.com", invite_code="NEW"),
+            [],
+        )
+
+        first = await refresh_fitness(db_engine, batch_size=2, today=TODAY - timedelta(days=1))
+        second = await refresh_fitness(db_engine, batch_size=2, today=TODAY)
+
+        assert (first.athletes, first.recomputed) == (4, 4)
+        assert (second.athletes, second.recomputed, second.days) == (4, 0, 4)
+        async with db_session_maker() as session:
+            for user in athletes:
+                state = await session.get(AthleteFitness, user.id)
+                curve = await get_fitness_curve(session, user.id, TODAY - timedelta(days=1))
+                assert state.as_of == TODAY - timedelta(days=1)
+                assert state.ctl == pytest.approx(curve.ctl[-1])
+                assert state.atl == pytest.approx(curve.atl[-1])
+
+    async def test_rerun_is_a_no_op(self, db_session_maker, db_engine, make_user):
+        """Test that running twice on one day folds nothing the second time."""
+        user = make_user()
+        await seed(db_session_maker, user, history(30))
+
+        await refresh_fitness(db_engine, batch_size=10, today=TODAY)
+        again = await refresh_fitness(db_engine, batch_size=10, today=TODAY)
+
+        assert (again.athletes, again.days) == (0, 0)
+
+
+class TestInvalidation:
+    """Tests that activity writes drop states they make stale."""
+
+    async def cached_state(self, db_session_maker, db_engine, make_user):
+        user = make_user()
+        await seed(db_session_maker, user, history(30))
+        await refresh_fitness(db_engine, batch_size=10, today=TODAY)
+        return user
+
+    async def states(self, db_session_maker) -> list:
+        async with db_session_maker() as session:
+            return (await session.scalars(select(AthleteFitness.user_id))).all()
+
+    async def test_late_activity(self, db_session_maker, db_engine, make_user):
+        """Test that an activity for a folded day drops the state."""
+        user = await self.cached_state(db_session_maker, db_engine, make_user)
+
+        await seed(db_session_maker, user, [run(500, TODAY - timedelta(days=3))])
+
+        assert await self.states(db_session_maker) == []
+
+    async def test_todays_activity(self, db_session_maker, db_engine, make_user):
+        """Test that an activity after the state's day keeps it."""
+        user = await self.cached_state(db_session_maker, db_engine, make_user)
+
+        await seed(db_session_maker, user, [run(500, TODAY)])
+
+        assert await self.states(db_session_maker) == [user.id]
+
+    async def test_updates(self, db_session_maker, db_engine, make_user):
+        """Test that only changes to an activity's load inputs drop the state."""
+        user = await self.cached_state(db_session_maker, db_engine, make_user)
+
+        async with db_session_maker() as session:
+            await session.execute(update(StravaActivity).values(suffer_score=10))
+            await session.commit()
+        assert await self.states(db_session_maker) == [user.id]
+
+        async with db_session_maker() as session:
+            await session.execute(
+                update(StravaActivity)
+                .where(StravaActivity.strava_activity_id == 10)
+                .values(average_heartrate=180)
+            )
+            await session.commit()
+        assert await self.states(db_session_maker) == []
+
+    async def test_delete(self, db_session_maker, db_engine, make_user):
+        """Test that deleting a folded activity drops the state."""
+        await self.cached_state(db_session_maker, db_engine, make_user)
+
+        async with db_session_maker() as session:
+            await session.execute(
+                delete(StravaActivity).where(StravaActivity.strava_activity_id == 10)
+            )
+            await session.commit()
+
+        assert await self.states(db_session_maker) == []
+
+    async def test_activity_during_batch(self, db_session_maker, db_engine, make_user):
+        """Test that an activity committed mid-batch drops the state it writes.
+
+        The athlete has no state yet, so there is no state row for the
+        batch to lock; the activity must still wait for the batch.
+        """
+        user = make_user()
+        await seed(db_session_maker, user, history(30))
+
+        async with db_engine.begin() as conn:
+            await refresh_batch(conn, [user.id], TODAY - timedelta(days=1), FitnessReport(TODAY))
+            late = asyncio.create_task(
+                seed(db_session_maker, user, [run(500, TODAY - timedelta(days=3))])
+            )
+            await asyncio.sleep(0.5)
+            assert not late.done()
+        await late
+
+        assert await self.states(db_session_maker) == []
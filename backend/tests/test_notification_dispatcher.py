@@ -0,0 +1,394 @@
+"""Tests for the notification dispatcher, against a stub email server."""
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+
+from runcoach.models.notification import Notification
+from runcoach.services.email import ResendEmailSender
+from runcoach.workers.notifications import (
+    NotificationDispatcher,
+    Outcome,
+    email_channel,
+    record_outcomes,
+    render_message,
+)
+
+NOW = datetime(2025, 6, 1, 12, 0)
+
+
+class StubEmailServer:
+    """Resend-compatible stub that records sends and can fail on demand.
+
+    Recipients starting with ``flaky`` get a 503, ``bounce`` a 422.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.requests: list[tuple[dict, str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.app = FastAPI()
+        self.app.post("/emails")(self.send)
+
+    async def send(self, request: Request) -> JSONResponse:
+        payload = await request.json()
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        self.requests.append((payload, request.headers["idempotency-key"]))
+
+        recipient = payload["to"][0]
+        if recipient.startswith("flaky"):
+            return JSONResponse({"message": "unavailable"}, status_code=503)
+        if recipient.startswith("bounce"):
+            return JSONResponse({"message": "invalid recipient"}, status_code=422)
+        return JSONResponse({"id": f"email-{len(self.requests)}"})
+
+    def sender(self) -> ResendEmailSender:
+        return ResendEmailSender(
+            api_key="test-key",
+            base_url="http://resend.test",
+            from_address="coach@example.com",
+            max_connections=10,
+            timeout=5.0,
+            transport=httpx.ASGITransport(app=self.app),
+        )
+
+
+def make_dispatcher(session_maker, server: StubEmailServer, **overrides):
+    options = {
+        "channels": {"email": email_channel(server.sender(), concurrency=10)},
+        "batch_size": 10,
+        "lease_seconds": 300,
+        "max_attempts": 3,
+        "retry_base_seconds": 30,
+        "retry_max_seconds": 3600,
+        "digest_window_seconds": 0,
+    }
+    options.update(overrides)
+    return NotificationDispatcher(session_maker, **options)
+
+
+async def queue(db_session_maker, user, count: int = 1, **overrides) -> list[Notification]:
+    """Store ``count`` due notifications for ``user``."""
+    values = {
+        "notification_type": "workout_reminder",
+        "channel": "email",
+        "subject": "Tomorrow's workout",
+        "content": "Easy 5 miles",
+        "scheduled_for": NOW - timedelta(minutes=1),
+    }
+    values.update(overrides)
+    notifications = [Notification(user_id=user.id, **values) for _ in range(count)]
+    async with db_session_maker() as session:
+        session.add_all(notifications)
+        await session.commit()
+    return notifications
+
+
+async def load(db_session_maker) -> dict:
+    async with db_session_maker() as session:
+        rows = (await session.execute(select(Notification))).scalars().all()
+    return {row.id: row for row in rows}
+
+
+@pytest.fixture
+async def runner(db_session_maker, make_user):
+    user = make_user(email="runner@example.com")
+    async with db_session_maker() as session:
+        session.add(user)
+        await session.commit()
+    return user
+
+
+class TestNotificationDispatcher:
+    """Tests for NotificationDispatcher."""
+
+    async def test_sends_due_notifications(self, db_session_maker, runner):
+        """Test that due notifications are sent once and marked sent."""
+        server = StubEmailServer()
+        due = await queue(db_session_maker, runner, count=2)
+        later = await queue(db_session_maker, runner, scheduled_for=NOW + timedelta(hours=1))
+        dispatcher = make_dispatcher(db_session_maker, server)
+
+        assert await dispatcher.dispatch_once(NOW) == 2
+        assert await dispatcher.dispatch_once(NOW) == 0
+
+        rows = await load(db_session_maker)
+        assert {rows[n.id].status for n in due} == {"sent"}
+        assert all(rows[n.id].sent_at is not None for n in due)
+        assert rows[later[0].id].status == "pending"
+        payload, key = server.requests[0]
+        assert payload == {
+            "from": "coach@example.com",
+            "to": ["runner@example.com"],
+            "subject": "Tomorrow's workout",
+            "text": "Easy 5 miles",
+        }
+        assert sorted(key for _, key in server.requests) == sorted(
+            f"notification-{n.id}" for n in due
+        )
+
+    async def test_run_logs_stats(self, db_session_maker, runner, caplog):
+        """Test that a running dispatcher reports its counters periodically."""
+        caplog.set_level(logging.INFO, logger="runcoach.workers.notifications")
+        await queue(db_session_maker, runner, count=2)
+        dispatcher = make_dispatcher(db_session_maker, StubEmailServer())
+        stop = asyncio.Event()
+
+        running = asyncio.create_task(dispatcher.run(stop, 0.01, stats_interval=0))
+        await asyncio.sleep(0.2)
+        stop.set()
+        await running
+
+        reports = [
+            record.getMessage()
+            for record in caplog.records
+            if record.getMessage().startswith("Notification dispatcher:")
+        ]
+        assert reports
+        assert "'coalescing_ratio': 1.0" in reports[-1]
+
+    async def test_retries_with_backoff_then_fails(self, db_session_maker, make_user):
+        """Test that provider errors are retried later, up to max_attempts."""
+        user = make_user(email="flaky@example.com")
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+        [notification] = await queue(db_session_maker, user)
+        dispatcher = make_dispatcher(db_session_maker, StubEmailServer())
+
+        await dispatcher.dispatch_once(NOW)
+        row = (await load(db_session_maker))[notification.id]
+        assert (row.status, row.attempts) == ("pending", 1)
+        assert "HTTP 503" in row.last_error
+        assert row.scheduled_for > NOW
+
+        for _ in range(2):
+            await dispatcher.dispatch_once(row.scheduled_for + timedelta(hours=2))
+            row = (await load(db_session_maker))[notification.id]
+        assert (row.status, row.attempts) == ("failed", 3)
+        assert dispatcher.stats()["retried"] == 2
+
+    def test_backoff_grows_and_is_capped(self, db_session_maker):
+        """Test that retry delays double per attempt up to the cap."""
+        dispatcher = make_dispatcher(db_session_maker, StubEmailServer())
+
+        assert 15 <= dispatcher.retry_delay(1) <= 30
+        assert 60 <= dispatcher.retry_delay(3) <= 120
+        assert 1800 <= dispatcher.retry_delay(20) <= 3600
+
+    async def test_permanent_errors_fail_immediately(self, db_session_maker, make_user):
+        """Test that a rejected recipient is not retried."""
+        user = make_user(email="bounce@example.com")
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+        [notification] = await queue(db_session_maker, user)
+        dispatcher = make_dispatcher(db_session_maker, StubEmailServer())
+
+        await dispatcher.dispatch_once(NOW)
+
+        row = (await load(db_session_maker))[notification.id]
+        assert (row.status, row.attempts) == ("failed", 1)
+        assert "HTTP 422" in row.last_error
+
+    async def test_unknown_channel_fails(self, db_session_maker, runner):
+        """Test that a channel without a sender is marked failed."""
+        [notification] = await queue(db_session_maker, runner, channel="sms")
+        dispatcher = make_dispatcher(db_session_maker, StubEmailServer())
+
+        await dispatcher.dispatch_once(NOW)
+
+        row = (await load(db_session_maker))[notification.id]
+        assert row.status == "failed"
+        assert "sms" in row.last_error
+
+    async def test_channel_concurrency_limit(self, db_session_maker, runner):
+        """Test that no more than the channel's limit are sent at once."""
+        server = StubEmailServer(latency=0.02)
+        await queue(db_session_maker, runner, count=10)
+        dispatcher = make_dispatcher(
+            db_session_maker,
+            server,
+            channels={"email": email_channel(server.sender(), concurrency=3)},
+        )
+
+        await dispatcher.dispatch_once(NOW)
+
+        assert len(server.requests) == 10
+        assert server.max_in_flight == 3
+
+    async def test_concurrent_dispatchers_send_once(self, db_session_maker, runner):
+        """Test that several dispatchers draining one queue never double-send."""
+        server = StubEmailServer(latency=0.005)
+        queued = await queue(db_session_maker, runner, count=60)
+        dispatchers = [
+            make_dispatcher(db_session_maker, server, batch_size=7) for _ in range(4)
+        ]
+
+        async def drain(dispatcher):
+            while await dispatcher.dispatch_once(NOW):
+                pass
+
+        await asyncio.gather(*(drain(d) for d in dispatchers))
+
+        sends = Counter(key for _, key in server.requests)
+        assert len(sends) == 60
+        assert set(sends.values()) == {1}
+        assert sum(d.stats()["sent"] for d in dispatchers) == 60
+        assert sum(d.stats()["lease_lost"] for d in dispatchers) == 0
+        rows = await load(db_session_maker)
+        assert {rows[n.id].status for n in queued} == {"sent"}
+
+    async def test_expired_lease_is_reclaimed_and_fenced(self, db_session_maker, runner):
+        """Test that abandoned claims are retaken and stale outcomes ignored."""
+        server = StubEmailServer()
+        [notification] = await queue(db_session_maker, runner)
+        crashed = make_dispatcher(db_session_maker, server)
+        survivor = make_dispatcher(db_session_maker, server)
+
+        [claimed] = await crashed.claim(NOW)
+        assert await survivor.dispatch_once(NOW) == 0
+        assert await survivor.dispatch_once(NOW + timedelta(minutes=6)) == 1
+
+        async with db_session_maker() as session:
+            recorded = await record_outcomes(
+                session,
+                [Outcome(claimed, "failed", error="too late")],
+            )
+            await session.commit()
+
+        row = (await load(db_session_maker))[notification.id]
+        assert recorded == 0
+        assert (row.status, row.attempts) == ("sent", 2)
+
+
+    async def test_exhausted_lease_is_failed(self, db_session_maker, runner):
+        """Test that a notification whose last lease expires is not sent again."""
+        server = StubEmailServer()
+        [notification] = await queue(db_session_maker, runner)
+        dispatcher = make_dispatcher(db_session_maker, server, max_attempts=2)
+
+        # Two dispatchers take it and die without recording an outcome
+        assert len(await dispatcher.claim(NOW)) == 1
+        assert len(await dispatcher.claim(NOW + timedelta(minutes=6))) == 1
+        assert await dispatcher.dispatch_once(NOW + timedelta(minutes=12)) == 0
+
+        row = (await load(db_session_maker))[notification.id]
+        assert (row.status, row.attempts, row.locked_until) == ("failed", 2, None)
+        assert server.requests == []
+        assert dispatcher.stats()["exhausted"] == 1
+
+
+class TestNotificationDigests:
+    """Tests for coalescing a user's notifications into one message."""
+
+    async def test_coalesces_per_user_and_channel(
+        self, db_session_maker, runner, make_user
+    ):
+        """Test that notifications due within the window share one email."""
+        other = make_user(email="other@example.com", invite_code="OTHER")
+        async with db_session_maker() as session:
+            session.add(other)
+            await session.commit()
+        server = StubEmailServer()
+        reminder = await queue(db_session_maker, runner, subject="Workout reminder")
+        plan_change = await queue(
+            db_session_maker,
+            runner,
+            subject="Plan updated",
+            content="Tempo moved to Thursday",
+            scheduled_for=NOW + timedelta(minutes=20),
+        )
+        outside = await queue(db_session_maker, runner, scheduled_for=NOW + timedelta(hours=2))
+        single = await queue(db_session_maker, other)
+        dispatcher = make_dispatcher(db_session_maker, server, digest_window_seconds=1800)
+
+        assert await dispatcher.dispatch_once(NOW) == 3
+
+        assert len(server.requests) == 2
+        digest = next(p for p, _ in server.requests if p["to"] == ["runner@example.com"])
+        assert digest["subject"] == "2 updates from RunCoach"
+        assert "Workout reminder\n\nEasy 5 miles" in digest["text"]
+        assert "Plan updated\n\nTempo moved to Thursday" in digest["text"]
+        rows = await load(db_session_maker)
+        assert {rows[n.id].status for n in reminder + plan_change + single} == {"sent"}
+        assert rows[outside[0].id].status == "pending"
+        stats = dispatcher.stats()
+        assert (stats["messages"], stats["digests"]) == (2, 1)
+        assert stats["coalescing_ratio"] == 1.5
+
+    async def test_digest_key_is_stable(self, db_session_maker, runner):
+        """Test that a digest's idempotency key does not depend on member order."""
+        server = StubEmailServer()
+        await queue(db_session_maker, runner, count=3)
+        dispatcher = make_dispatcher(db_session_maker, server, digest_window_seconds=60)
+
+        claimed = await dispatcher.claim(NOW)
+
+        assert len(claimed) == 3
+        keys = {
+            render_message(order).idempotency_key
+            for order in (claimed, claimed[::-1])
+        }
+        assert len(keys) == 1
+        assert keys.pop().startswith("digest-")
+
+    async def test_failed_digest_retries_together(self, db_session_maker, make_user):
+        """Test that every notification in a failed digest is rescheduled alike."""
+        user = make_user(email="flaky@example.com")
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+        queued = await queue(db_session_maker, user, count=3)
+        dispatcher = make_dispatcher(
+            db_session_maker, StubEmailServer(), digest_window_seconds=1800
+        )
+
+        await dispatcher.dispatch_once(NOW)
+
+        rows = await load(db_session_maker)
+        assert {rows[n.id].status for n in queued} == {"pending"}
+        assert len({rows[n.id].scheduled_for for n in queued}) == 1
+        assert dispatcher.stats()["retried"] == 3
+
+    async def test_retried_digest_keeps_its_members(self, db_session_maker, make_user):
+        """Test that a retry resends the same digest under the same key.
+
+        A notification that fell due since is not merged into it, and the
+        members a batch left out are claimed with it.
+        """
+        user = make_user(email="flaky@example.com")
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+        server = StubEmailServer()
+        queued = await queue(db_session_maker, user, count=2)
+        dispatcher = make_dispatcher(
+            db_session_maker, server, batch_size=1, digest_window_seconds=1800
+        )
+        await dispatcher.dispatch_once(NOW)
+        retry_at = datetime.utcnow() + timedelta(hours=1)
+        later = await queue(db_session_maker, user, scheduled_for=retry_at)
+
+        await dispatcher.dispatch_once(retry_at + timedelta(minutes=1))
+
+        (first, first_key), (retry, retry_key) = server.requests
+        assert first_key == retry_key
+        assert retry["text"] == first["text"]
+        assert retry["subject"] == "2 updates from RunCoach"
+        rows = await load(db_session_maker)
+        assert {rows[n.id].attempts for n in queued} == {2}
+        assert rows[later[0].id].attempts == 0
@@ -0,0 +1,196 @@
+"""Tests for notification indexes and retention."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, func, select, text
+
+from runcoach.config import get_settings
+from runcoach.models.notification import Notification, NotificationArchive
+from runcoach.workers.notification_retention import DELETE_EXPIRED, purge_notifications
+from runcoach.workers.notifications import CLAIM_DUE
+
+NOW = datetime(2025, 6, 1, 12, 0)
+
+
+async def store(db_session_maker, user, rows: list[tuple[str, int]]) -> None:
+    """Store one notification per ``(status, age in days)``."""
+    async with db_session_maker() as session:
+        session.add_all(
+            Notification(
+                user_id=user.id,
+                notification_type="workout_reminder",
+                channel="email",
+                content="Easy 5 miles",
+                status=status,
+                scheduled_for=NOW - timedelta(days=age),
+                created_at=NOW - timedelta(days=age),
+            )
+            for status, age in rows
+        )
+        await session.commit()
+
+
+async def explain(db_session_maker, statement, params: dict) -> str:
+    """The plan of ``statement``, with sequential scans discouraged.
+
+    The statement is executed normally and rewritten on its way to the
+    driver, so parameters are bound exactly as the app binds them.
+    """
+    plan = []
+
+    def rewrite(conn, cursor, statement, parameters, context, executemany):
+        return f"EXPLAIN {statement}", parameters
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        plan.extend(row[0] for row in cursor.fetchall())
+
+    async with db_session_maker() as session:
+        conn = await session.connection()
+        await conn.execute(text("ANALYZE notifications"))
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        sync_conn = conn.sync_connection
+        event.listen(sync_conn, "before_cursor_execute", rewrite, retval=True)
+        event.listen(sync_conn, "after_cursor_execute", capture)
+        try:
+            await conn.execute(statement, params)
+        finally:
+            event.remove(sync_conn, "before_cursor_execute", rewrite)
+            event.remove(sync_conn, "after_cursor_execute", capture)
+    return "\n".join(plan)
+
+
+@pytest.fixture
+async def runner(db_session_maker, make_user):
+    user = make_user()
+    async with db_session_maker() as session:
+        session.add(user)
+        await session.commit()
+    return user
+
+
+class TestNotificationIndexes:
+    """Tests that the dispatcher's claim uses the partial indexes."""
+
+    async def test_claim_uses_partial_indexes(self, db_session_maker, runner):
+        """Test that claiming reads only the pending and sending indexes."""
+        await store(db_session_maker, runner, [("sent", 1)] * 50 + [("pending", 0)] * 5)
+
+        plan = await explain(
+            db_session_maker,
+            CLAIM_DUE,
+            {"now": NOW, "lease_until": NOW, "batch_size": 10, "max_attempts": 5},
+        )
+
+        assert "idx_notifications_pending" in plan
+        assert "idx_notifications_sending" in plan
+
+    async def test_retention_uses_finished_index(self, db_session_maker, runner):
+        """Test that finding expired rows reads the finished-rows index."""
+        await store(db_session_maker, runner, [("sent", 100)] * 50 + [("pending", 0)] * 50)
+
+        plan = await explain(
+            db_session_maker,
+            DELETE_EXPIRED,
+            {"cutoff": NOW - timedelta(days=90), "batch_size": 10},
+        )
+
+        assert "idx_notifications_finished_created" in plan
+
+    async def test_sent_rows_are_not_indexed(self, db_session_maker, runner):
+        """Test that finished rows add nothing to the partial indexes."""
+        await store(db_session_maker, runner, [("sent", 1)] * 500)
+        async with db_session_maker() as session:
+            pages = await session.scalar(
+                text(
+                    "SELECT pg_relation_size('idx_notifications_pending') / "
+                    "current_setting('block_size')::int"
+                )
+            )
+
+        # Only the metapage and an empty root
+        assert pages <= 2
+
+
+class TestNotificationRetention:
+    """Tests for purge_notifications."""
+
+    async def test_deletes_old_finished_rows_in_batches(
+        self, db_engine, db_session_maker, runner
+    ):
+        """Test that only old sent and failed rows are deleted."""
+        await store(
+            db_session_maker,
+            runner,
+            [("sent", 100)] * 5
+            + [("failed", 120)] * 2
+            + [("pending", 100), ("sending", 100), ("sent", 10)],
+        )
+
+        report = await purge_notifications(
+            db_engine,
+            older_than=timedelta(days=90),
+            batch_size=3,
+            now=NOW,
+        )
+
+        assert (report.removed, report.batches) == (7, 3)
+        async with db_session_maker() as session:
+            left = (
+                await session.execute(
+                    select(Notification.status).order_by(Notification.status)
+                )
+            ).scalars().all()
+        assert left == ["pending", "sending", "sent"]
+        stats = report.stats()
+        assert stats["table_bytes_before"] > 0
+        assert "idx_notifications_pending" in stats["index_bytes_after"]
+
+    async def test_archives_instead_of_deleting(self, db_engine, db_session_maker, runner):
+        """Test that archive mode moves rows with their delivery history."""
+        await store(db_session_maker, runner, [("failed", 100), ("sent", 100), ("sent", 1)])
+
+        report = await purge_notifications(
+            db_engine,
+            older_than=timedelta(days=90),
+            batch_size=10,
+            archive_rows=True,
+            now=NOW,
+        )
+
+        assert report.removed == 2
+        async with db_session_maker() as session:
+            archived = (
+                await session.execute(
+                    select(NotificationArchive).order_by(NotificationArchive.status)
+                )
+            ).scalars().all()
+            remaining = await session.scalar(select(func.count()).select_from(Notification))
+        assert [row.status for row in archived] == ["failed", "sent"]
+        assert {row.user_id for row in archived} == {runner.id}
+        assert all(row.archived_at is not None for row in archived)
+        assert remaining == 1
+
+    async def test_storage_metrics(self, db_client, db_session_maker, runner, monkeypatch):
+        """Test that the storage endpoint reports table and index sizes."""
+        monkeypatch.setattr(get_settings(), "metrics_token", "metrics-secret")
+        await store(db_session_maker, runner, [("sent", 1)])
+
+        response = await db_client.get(
+            "/metrics/notification-storage",
+            headers={"Authorization": "Bearer metrics-secret"},
+        )
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["notifications"]["table_bytes"] > 0
+        assert set(body["notifications"]["index_bytes"]) == {
+            "idx_notifications_digest",
+            "idx_notifications_finished_created",
+            "idx_notifications_pending",
+            "idx_notifications_pending_user",
+            "idx_notifications_sending",
+            "idx_notifications_user",
+            "notifications_pkey",
+        }
+        assert "notifications_archive" in body
@@ -0,0 +1,225 @@
+"""Tests for the strava_activities storage layout."""
+
+import uuid
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError, InvalidRequestError
+from sqlalchemy.orm import selectinload
+
+from runcoach.models.strava_activity import StravaActivity, StravaActivityKey
+from runcoach.models.training_plan import TrainingPlan
+from runcoach.models.workout import Workout
+from runcoach.models.workout_completion import WorkoutCompletion
+from runcoach.partitions import partition_ddl, partition_name
+from runcoach.query_registry import ACTIVITIES_BY_USER_DATE_RANGE
+from runcoach.services.activities import get_recent_activities, recent_window
+from runcoach.services.strava_ingest import ingest_activity_page
+
+
+def make_activity(user, strava_activity_id: int, start_date: datetime) -> StravaActivity:
+    """Build an activity row with only the required columns."""
+    return StravaActivity(
+        user=user,
+        strava_activity_id=strava_activity_id,
+        start_date=start_date,
+    )
+
+
+class TestPartitionNames:
+    """Tests for partition naming and bounds."""
+
+    def test_yearly_partition(self):
+        """Test that each year from 2010 gets its own partition."""
+        assert partition_name(2025) == "strava_activities_y2025"
+        assert "FROM ('2025-01-01') TO ('2026-01-01')" in partition_ddl(2025)
+
+    def test_history_partition(self):
+        """Test that years before 2010 share one open-ended partition."""
+        assert partition_name(2003) == partition_name(2009) == "strava_activities_pre2010"
+        assert "FROM (MINVALUE) TO ('2010-01-01')" in partition_ddl(2003)
+
+
+class TestRecentWindow:
+    """Tests for the "last N weeks" bounds."""
+
+    def test_bounds(self):
+        """Test that the window is half-open and covers the current day."""
+        start, end = recent_window(4, now=datetime(2025, 3, 29, 12))
+
+        assert start == datetime(2025, 3, 1, 12)
+        assert end == datetime(2025, 3, 30, 12)
+
+
+class TestOnDemandPartitions:
+    """Tests for partitions created by the ingest path."""
+
+    async def test_rolled_back_partition_is_created_again(self, db_session_maker, make_user):
+        """Test that a partition lost to a rollback is not assumed to exist."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+        summary = {"id": 1, "type": "Run", "start_date": "2041-06-01T06:00:00Z"}
+
+        async with db_session_maker() as session:
+            await ingest_activity_page(session, user.id, [summary])
+            await session.rollback()
+        async with db_session_maker() as session:
+            await ingest_activity_page(session, user.id, [summary])
+            await session.commit()
+        async with db_session_maker() as session:
+            partition = await session.scalar(
+                text("SELECT tableoid::regclass::text FROM strava_activities")
+            )
+
+        assert partition == partition_name(2041)
+
+
+class TestStravaActivityKeys:
+    """Tests for global uniqueness of strava_activity_id across partitions."""
+
+    async def test_duplicate_in_other_partition_rejected(self, db_session_maker, make_user):
+        """Test that the same Strava id cannot exist in two partitions."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(make_activity(user, 1, datetime(2024, 6, 1)))
+            await session.commit()
+
+        other = make_user(email="other@example.com", invite_code="OTHER")
+        async with db_session_maker() as session:
+            session.add(other)
+            session.add(make_activity(other, 1, datetime(2025, 6, 1)))
+            with pytest.raises(IntegrityError):
+                await session.commit()
+
+    async def test_delete_releases_key(self, db_session_maker, make_user):
+        """Test that deleting an activity frees its Strava id."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(make_activity(user, 1, datetime(2024, 6, 1)))
+            await session.commit()
+
+        async with db_session_maker() as session:
+            await session.execute(delete(StravaActivity))
+            await session.commit()
+            keys = (await session.scalars(select(StravaActivityKey))).all()
+
+        assert keys == []
+
+    async def test_changed_start_date_moves_row(self, db_session_maker, make_user):
+        """Test that a re-synced start date moves the row and keeps its links."""
+        user = make_user()
+        summary = {"id": 1, "type": "Run", "start_date": "2024-12-31T23:30:00Z"}
+        plan = TrainingPlan(
+            user=user,
+            title="Plan",
+            start_date=date(2024, 12, 1),
+            end_date=date(2025, 1, 31),
+        )
+        workout = Workout(
+            training_plan=plan,
+            user=user,
+            scheduled_date=date(2024, 12, 31),
+            workout_type="easy",
+            structure={},
+        )
+        async with db_session_maker() as session:
+            session.add(workout)
+            await ingest_activity_page(session, user.id, [summary])
+            activity = await session.scalar(select(StravaActivity))
+            session.add(
+                WorkoutCompletion(
+                    workout=workout,
+                    strava_activity_id=activity.id,
+                    completion_status="completed",
+                )
+            )
+            await session.commit()
+
+        async with db_session_maker() as session:
+            result = await ingest_activity_page(
+                session,
+                user.id,
+                [{**summary, "start_date": "2025-01-01T00:30:00Z"}],
+            )
+            await session.commit()
+            rows = (
+                await session.execute(
+                    text("SELECT id, tableoid::regclass::text FROM strava_activities")
+                )
+            ).all()
+            completion = await session.scalar(select(WorkoutCompletion))
+
+        assert result.written == 1
+        assert rows == [(activity.id, "strava_activities_y2025")]
+        assert completion.strava_activity_id == activity.id
+
+
+class TestPartitionPruning:
+    """Tests that date-bounded reads only touch the partitions they need."""
+
+    async def test_recent_read_scans_one_partition(self, db_session_maker, make_user):
+        """Test that a "last N weeks" read is pruned to a single partition."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add_all(
+                make_activity(user, i, datetime(year, 6, 1))
+                for i, year in enumerate((2008, 2023, 2024, 2025))
+            )
+            await session.commit()
+
+        now = datetime(2025, 6, 15)
+        start, end = recent_window(4, now=now)
+        statement = ACTIVITIES_BY_USER_DATE_RANGE.statement.params(
+            user_id=user.id,
+            start=start,
+            end=end,
+        )
+        sql = statement.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"literal_binds": True},
+        )
+        async with db_session_maker() as session:
+            plan = "\n".join((await session.execute(text(f"EXPLAIN {sql}"))).scalars())
+            recent = await get_recent_activities(session, user.id, weeks=4, now=now)
+
+        assert "strava_activities_y2025" in plan
+        assert "strava_activities_y2024" not in plan
+        assert "strava_activities_pre2010" not in plan
+        assert [activity.start_date for activity in recent] == [datetime(2025, 6, 1)]
+
+
+class TestActivityPayloads:
+    """Tests that raw payloads stay out of activity reads."""
+
+    def test_list_query_skips_payload(self):
+        """Test that the activity range read selects typed columns only."""
+        sql = str(ACTIVITIES_BY_USER_DATE_RANGE.statement)
+
+        assert "raw_data" not in sql
+        assert "strava_activity_payloads" not in sql
+
+    async def test_payload_not_loaded_implicitly(self, db_session_maker, make_user):
+        """Test that the payload relationship must be loaded explicitly."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await ingest_activity_page(
+                session,
+                user.id,
+                [{"id": 1, "type": "Run", "start_date": "2025-06-01T06:00:00Z"}],
+            )
+            await session.commit()
+
+        async with db_session_maker() as session:
+            activity = await session.scalar(select(StravaActivity))
+            with pytest.raises(InvalidRequestError):
+                activity.payload
+            loaded = await session.scalar(
+                select(StravaActivity).options(selectinload(StravaActivity.payload))
+            )
+
+        assert loaded.payload.raw_data["type"] == "Run"
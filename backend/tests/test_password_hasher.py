@@ -0,0 +1,157 @@
+"""Tests for the async password hashing pool."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from runcoach.config import get_settings
+from runcoach.main import app
+from runcoach.models.user import User
+from runcoach.services.auth import authenticate_user, get_password_cost_distribution
+from runcoach.services.password_hasher import (
+    PasswordHasher,
+    calibrate_rounds,
+    hash_password,
+    password_cost,
+    password_hasher,
+)
+
+
+@pytest.fixture
+def hasher():
+    """Create a small thread-backed hasher."""
+    pool = PasswordHasher(executor_kind="thread", max_workers=2)
+    yield pool
+    pool.shutdown()
+
+
+class TestPasswordHasher:
+    """Tests for PasswordHasher."""
+
+    async def test_hash_and_verify(self, hasher):
+        """Test hashing and verifying through the pool."""
+        hashed = await hasher.hash("testpassword123")
+
+        assert hashed.startswith("$2b$")
+        assert await hasher.verify("testpassword123", hashed) is True
+        assert await hasher.verify("wrongpassword", hashed) is False
+
+    async def test_concurrency_cap(self, hasher):
+        """Test that no more than max_workers calls run at once."""
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def slow_call() -> None:
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+
+        await asyncio.gather(*(hasher.run(slow_call) for _ in range(6)))
+
+        stats = hasher.stats()
+        assert peak == 2
+        assert stats["completed"] == 6
+        assert stats["max_queue_depth"] >= 4
+        assert stats["queue_depth"] == 0
+        assert stats["in_flight"] == 0
+
+    async def test_event_loop_stays_responsive(self, hasher):
+        """Test that the loop keeps ticking while hashes are running."""
+        ticks = 0
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        await asyncio.gather(hasher.hash("password-one"), hasher.hash("password-two"))
+        task.cancel()
+
+        assert ticks > 0
+
+    async def test_failures_are_counted(self, hasher):
+        """Test that exceptions propagate and are counted."""
+
+        def broken() -> None:
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            await hasher.run(broken)
+
+        assert hasher.stats()["failed"] == 1
+
+    def test_invalid_executor_kind(self):
+        """Test that unknown executor kinds are rejected."""
+        with pytest.raises(ValueError):
+            PasswordHasher(executor_kind="fiber")
+
+
+class TestCostCalibration:
+    """Tests for bcrypt cost calibration and rehash-on-login."""
+
+    def test_password_cost(self):
+        """Test reading the work factor from a stored hash."""
+        assert password_cost(hash_password("testpassword123", rounds=5)) == 5
+        assert password_cost("not-a-bcrypt-hash") is None
+
+    def test_calibrate_rounds_clamps(self):
+        """Test that calibration stays within the configured bounds."""
+        assert calibrate_rounds(target_ms=0.001, min_rounds=4, max_rounds=6) == 4
+        assert calibrate_rounds(target_ms=1e9, min_rounds=4, max_rounds=6) == 6
+
+    async def test_calibrate_sets_rounds(self, hasher):
+        """Test that calibration updates the hashing cost."""
+        rounds = await hasher.calibrate(target_ms=1e9, min_rounds=4, max_rounds=5)
+        hashed = await hasher.hash("testpassword123")
+
+        assert rounds == 5
+        assert password_cost(hashed) == 5
+        assert hasher.needs_rehash(hashed) is False
+        assert hasher.needs_rehash(hash_password("testpassword123", rounds=4)) is True
+
+    async def test_rehash_on_login(self, db_session_maker, monkeypatch):
+        """Test that a login persists a hash at the current target cost."""
+        monkeypatch.setattr(password_hasher, "rounds", 5)
+        async with db_session_maker() as session:
+            session.add(
+                User(
+                    invite_code="INVITE",
+                    name="Runner",
+                    email="runner@example.com",
+                    password_hash=hash_password("testpassword123", rounds=4),
+                )
+            )
+            await session.commit()
+
+        async with db_session_maker() as session:
+            user = await authenticate_user(session, "runner@example.com", "testpassword123")
+            await session.commit()
+        async with db_session_maker() as session:
+            distribution = await get_password_cost_distribution(session)
+
+        assert password_cost(user.password_hash) == 5
+        assert distribution == {5: 1}
+
+
+def test_metrics_endpoint(monkeypatch):
+    """Test that the metrics endpoint reports the hasher pool to internal callers."""
+    client = TestClient(app)
+    disabled = client.get("/metrics")
+    monkeypatch.setattr(get_settings(), "metrics_token", "metrics-secret")
+    anonymous = client.get("/metrics")
+    wrong = client.get("/metrics/password-costs", headers={"Authorization": "Bearer guess"})
+    response = client.get("/metrics", headers={"Authorization": "Bearer metrics-secret"})
+
+    assert (disabled.status_code, anonymous.status_code, wrong.status_code) == (403, 401, 401)
+    assert response.status_code == 200
+    assert "queue_depth" in response.json()["password_hasher"]
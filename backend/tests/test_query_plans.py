@@ -0,0 +1,465 @@
+"""Query-plan regression tests.
+
+Seeds a few hundred athletes' worth of data into the test database and runs
+``EXPLAIN (ANALYZE, BUFFERS)`` on a catalogue of the app's queries: every
+registered hot query, the notification workers' statements, and the lookup
+PostgreSQL makes on each foreign key when a referenced row is deleted or its
+key changes (ORM cascades make the same lookup). A query fails if it reads a
+large table with a sequential scan or touches more shared buffers than its
+budget.
+
+Every statement runs in a transaction that is rolled back, so the UPDATEs
+and DELETEs in the catalogue leave the seeded data as it was.
+"""
+
+import json
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import Executable, bindparam, event, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from runcoach import models  # noqa: F401
+from runcoach.database import Base
+from runcoach.query_registry import hot_queries
+from runcoach.workers.fitness import LOAD_INPUTS_SINCE, LOCK_ATHLETES
+from runcoach.workers.notification_retention import ARCHIVE_EXPIRED, DELETE_EXPIRED
+from runcoach.workers.notifications import (
+    ASSIGN_DIGESTS,
+    CLAIM_DIGEST_MEMBERS,
+    CLAIM_DIGEST_SIBLINGS,
+    CLAIM_DUE,
+    FAIL_EXHAUSTED_LEASES,
+)
+from tests.conftest import TEST_DATABASE_URL
+
+ATHLETES = 200
+# Tables with more rows than this must not be read with a sequential scan,
+# though one that stops early under a LIMIT may read up to this many rows
+LARGE_TABLE_ROWS = 1000
+# Shared buffers (8 KiB pages, hit or read) one query may touch
+DEFAULT_BUFFER_BUDGET = 100
+HOT_QUERY_BUFFER_BUDGETS = {
+    # A month of workouts plus an index probe per workout for completions
+    "workouts_with_completions_by_user_date_range": 150,
+}
+
+SEED = [
+    "INSERT INTO users (id, invite_code, name, email, password_hash, "
+    "session_generation, created_at, updated_at) "
+    "SELECT gen_random_uuid(), 'INVITE-' || i, 'Runner ' || i, "
+    "'runner' || i || '@example.com', 'x', 0, now(), now() "
+    "FROM generate_series(1, :athletes) AS i",
+    "INSERT INTO user_profiles (id, user_id, created_at, updated_at) "
+    "SELECT gen_random_uuid(), id, now(), now() FROM users",
+    "INSERT INTO strava_tokens (id, user_id, access_token, refresh_token, "
+    "expires_at, strava_athlete_id, created_at, updated_at) "
+    "SELECT gen_random_uuid(), id, 'access', 'refresh', now(), "
+    "row_number() OVER (), now(), now() FROM users",
+    "INSERT INTO user_memory_summaries (id, user_id, summary_type, content, "
+    "created_at, updated_at) "
+    "SELECT gen_random_uuid(), id, 'weekly', 'Steady week', now(), now() "
+    "FROM users, generate_series(1, 10)",
+    # One active goal and two finished ones each
+    "INSERT INTO goals (id, user_id, goal_type, title, status, target_race_date, "
+    "created_at, updated_at) "
+    "SELECT gen_random_uuid(), id, 'race', 'Goal ' || g, "
+    "CASE WHEN g = 1 THEN 'active' ELSE 'completed' END, "
+    "DATE '2025-12-14' - 180 * (g - 1), now(), now() "
+    "FROM users, generate_series(1, 3) AS g",
+    # A finished first half of the year and an active second half
+    "INSERT INTO training_plans (id, user_id, goal_id, title, start_date, "
+    "end_date, status, created_at, updated_at) "
+    "SELECT gen_random_uuid(), goals.user_id, goals.id, 'Plan', "
+    "CASE WHEN goals.status = 'active' THEN DATE '2025-07-07' ELSE DATE '2025-01-06' END, "
+    "CASE WHEN goals.status = 'active' THEN DATE '2025-12-28' ELSE DATE '2025-06-29' END, "
+    "goals.status, now(), now() "
+    "FROM goals WHERE goals.target_race_date >= DATE '2025-06-01'",
+    "INSERT INTO workouts (id, training_plan_id, user_id, scheduled_date, "
+    "workout_type, title, structure, status, created_at, updated_at) "
+    "SELECT gen_random_uuid(), training_plans.id, training_plans.user_id, "
+    "training_plans.start_date + d, 'easy', 'Easy run', '{}', 'scheduled', now(), now() "
+    "FROM training_plans, generate_series(0, 174) AS d",
+    "INSERT INTO workout_completions (id, workout_id, completion_status, created_at) "
+    "SELECT gen_random_uuid(), id, 'completed', now() "
+    "FROM workouts WHERE scheduled_date < DATE '2025-09-01'",
+    "INSERT INTO workout_edits (id, workout_id, edited_by, previous_structure, "
+    "new_structure, created_at) "
+    "SELECT gen_random_uuid(), id, 'coach', '{}', '{}', now() "
+    "FROM workouts WHERE extract(dow FROM scheduled_date) = 2",
+    "INSERT INTO strava_activities (id, user_id, strava_activity_id, start_date, "
+    "created_at) "
+    "SELECT gen_random_uuid(), id, row_number() OVER (), "
+    "TIMESTAMP '2025-01-01 07:00' + d * interval '2 days', now() "
+    "FROM users, generate_series(0, 149) AS d",
+    "INSERT INTO chat_messages (id, user_id, role, content, created_at) "
+    "SELECT gen_random_uuid(), id, 'user', 'How was my week?', "
+    "TIMESTAMP '2025-01-01' + m * interval '3 hours' "
+    "FROM users, generate_series(1, 150) AS m",
+    "INSERT INTO notifications (id, user_id, notification_type, channel, content, "
+    "scheduled_for, status, attempts, created_at) "
+    "SELECT gen_random_uuid(), id, 'workout_reminder', 'email', 'Easy 5 miles', "
+    "at, CASE WHEN n > 145 THEN 'pending' ELSE 'sent' END, 1, at "
+    "FROM users, generate_series(1, 150) AS n, "
+    "LATERAL (SELECT TIMESTAMP '2025-01-01' + n * interval '2 days' AS at) AS t",
+]
+
+
+@dataclass
+class PlanCase:
+    """A catalogued statement and the parameters to explain it with."""
+
+    name: str
+    statement: Executable
+    params: dict[str, Any] = field(default_factory=dict)
+    buffer_budget: int = DEFAULT_BUFFER_BUDGET
+
+
+@dataclass
+class Seeded:
+    """Handles on the seeded database."""
+
+    conn: AsyncConnection
+    athlete: dict[str, Any]
+    table_rows: dict[str, float]
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def seeded():
+    """Create the schema and seed it once for the whole module."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL not set")
+
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        for statement in SEED:
+            await conn.execute(text(statement), {"athletes": ATHLETES})
+    async with engine.connect() as conn:
+        autocommit = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await autocommit.execute(text("VACUUM ANALYZE"))
+
+    async with engine.connect() as conn:
+        athlete = (
+            (await conn.execute(text("SELECT * FROM users ORDER BY email LIMIT 1")))
+            .mappings()
+            .one()
+        )
+        table_rows = dict(
+            (
+                await conn.execute(
+                    text(
+                        "SELECT relname, reltuples FROM pg_class "
+                        "WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+                    )
+                )
+            ).all()
+        )
+        await conn.rollback()
+        yield Seeded(conn, dict(athlete), table_rows)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    await engine.dispose()
+
+
+def hot_query_cases(athlete: dict[str, Any]) -> list[PlanCase]:
+    user_id = athlete["id"]
+    month = {"user_id": user_id, "start": date(2025, 9, 1), "end": date(2025, 10, 1)}
+    params = {
+        "user_by_id": {"user_id": user_id},
+        "user_by_email": {"email": athlete["email"]},
+        "user_by_invite_code": {"invite_code": athlete["invite_code"]},
+        "workouts_by_user_date_range": month,
+        "workouts_with_completions_by_user_date_range": month,
+        "activities_by_user_date_range": {
+            "user_id": user_id,
+            "start": datetime(2025, 9, 1),
+            "end": datetime(2025, 10, 1),
+        },
+        "dashboard_header": {"user_id": user_id, "today": date(2025, 9, 10)},
+        "activity_load_inputs_by_user_date_range": {
+            "user_id": user_id,
+            "start": datetime(2025, 6, 1),
+            "end": datetime(2025, 9, 1),
+        },
+        "unmatched_activities_by_user_date_range": {
+            "user_id": user_id,
+            "start": datetime(2025, 9, 1),
+            "end": datetime(2025, 10, 1),
+        },
+        "open_workouts_by_user_date_range": month,
+        "workout_export_by_id": {"user_id": user_id, "workout_id": uuid.UUID(int=1)},
+        "workout_exports_by_user_date_range": {
+            "user_id": user_id,
+            "start": date(2025, 9, 1),
+            "end": date(2025, 9, 8),
+        },
+        "training_load_by_user_weeks": {
+            "user_id": user_id,
+            "start": date(2025, 6, 2),
+            "end": date(2025, 9, 15),
+        },
+    }
+    for name in ("workout_calendar_page", "workout_calendar_page_with_structure"):
+        params[name] = {
+            "user_id": user_id,
+            "after_date": date(2025, 9, 1),
+            "after_id": uuid.UUID(int=0),
+            "end": date(2025, 12, 1),
+            "limit": 51,
+        }
+    for name in ("chat_history_page", "chat_history_page_with_context"):
+        params[name] = {
+            "user_id": user_id,
+            "before_created_at": datetime(2025, 2, 1),
+            "before_id": uuid.UUID(int=0),
+            "limit": 51,
+        }
+    return [
+        PlanCase(
+            query.name,
+            query.statement,
+            params[query.name],
+            HOT_QUERY_BUFFER_BUDGETS.get(query.name, DEFAULT_BUFFER_BUDGET),
+        )
+        for query in hot_queries
+    ]
+
+
+def worker_cases(athlete: dict[str, Any]) -> list[PlanCase]:
+    now = datetime(2025, 12, 1)
+    return [
+        # Claiming updates each row's heap tuple and every notifications
+        # index: about 20 buffers a row
+        PlanCase(
+            "claim_due",
+            CLAIM_DUE,
+            {"now": now, "lease_until": now, "batch_size": 100, "max_attempts": 5},
+            buffer_budget=2500,
+        ),
+        PlanCase(
+            "fail_exhausted_leases",
+            FAIL_EXHAUSTED_LEASES,
+            {"now": now, "max_attempts": 5},
+        ),
+        PlanCase(
+            "claim_digest_siblings",
+            CLAIM_DIGEST_SIBLINGS,
+            {
+                "user_ids": [athlete["id"]],
+                "channels": ["email"],
+                "digest_until": now,
+                "lease_until": now,
+            },
+            buffer_budget=250,
+        ),
+        PlanCase(
+            "claim_digest_members",
+            CLAIM_DIGEST_MEMBERS,
+            {
+                "digest_ids": [uuid.UUID(int=i) for i in range(1, 20)],
+                "now": now,
+                "lease_until": now,
+                "max_attempts": 5,
+            },
+        ),
+        # A primary key probe of about 2 buffers a notification
+        PlanCase(
+            "assign_digests",
+            ASSIGN_DIGESTS,
+            {
+                "notification_ids": [uuid.UUID(int=i) for i in range(1, 100)],
+                "digest_ids": [uuid.UUID(int=1)] * 99,
+            },
+            buffer_budget=250,
+        ),
+        # Batches are scaled down with the table: a production batch is a
+        # sliver of the queue, and so must this one be for the same plan
+        PlanCase(
+            "delete_expired_notifications",
+            DELETE_EXPIRED,
+            {"cutoff": datetime(2025, 2, 1), "batch_size": 100},
+            buffer_budget=1000,
+        ),
+        PlanCase(
+            "archive_expired_notifications",
+            ARCHIVE_EXPIRED,
+            {"cutoff": datetime(2025, 2, 1), "batch_size": 100},
+            buffer_budget=1500,
+        ),
+        # A batch's worth of athletes resuming from yesterday, as on most
+        # nights, since the planner sizes the join by the arrays: one index
+        # probe of about 2 buffers per athlete
+        PlanCase(
+            "fitness_load_inputs_since",
+            LOAD_INPUTS_SINCE,
+            {
+                "user_ids": [athlete["id"], *(uuid.UUID(int=i) for i in range(1, 200))],
+                "since": [date(2025, 9, 1)] * 200,
+                "until": datetime(2025, 9, 2),
+            },
+            buffer_budget=1000,
+        ),
+        PlanCase(
+            "fitness_lock_athletes",
+            LOCK_ATHLETES,
+            {"user_ids": [athlete["id"], *(uuid.UUID(int=i) for i in range(1, 200))]},
+            buffer_budget=1000,
+        ),
+    ]
+
+
+async def foreign_key_cases(conn: AsyncConnection) -> list[PlanCase]:
+    """The lookup made on each foreign key when a referenced row goes away."""
+    cases = []
+    for table in Base.metadata.sorted_tables:
+        for constraint in table.foreign_key_constraints:
+            referenced = [element.column for element in constraint.elements]
+            key = (await conn.execute(select(*referenced).limit(1))).one()
+            statement = select(literal(1)).select_from(table).where(
+                *(
+                    column == bindparam(column.name, type_=column.type)
+                    for column in constraint.columns
+                )
+            )
+            cases.append(
+                PlanCase(
+                    f"{table.name}.{','.join(constraint.columns.keys())}",
+                    statement,
+                    dict(zip(constraint.columns.keys(), key)),
+                )
+            )
+    await conn.rollback()
+    return cases
+
+
+async def explain(conn: AsyncConnection, case: PlanCase) -> dict[str, Any]:
+    """Run ``EXPLAIN (ANALYZE, BUFFERS)`` on ``case`` and roll it back.
+
+    The statement is executed normally and rewritten on its way to the
+    driver, so parameters are bound exactly as the app binds them.
+    """
+    plans = []
+
+    def rewrite(conn, cursor, statement, parameters, context, executemany):
+        return f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        plans.append(cursor.fetchone()[0])
+
+    sync_conn = conn.sync_connection
+    event.listen(sync_conn, "before_cursor_execute", rewrite, retval=True)
+    event.listen(sync_conn, "after_cursor_execute", capture)
+    try:
+        async with conn.begin() as transaction:
+            await conn.execute(case.statement, case.params)
+            await transaction.rollback()
+    finally:
+        event.remove(sync_conn, "before_cursor_execute", rewrite)
+        event.remove(sync_conn, "after_cursor_execute", capture)
+    [plan] = plans
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def plan_nodes(node: dict[str, Any]):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def rows_read(node: dict[str, Any]) -> int:
+    return (node["Actual Rows"] + node.get("Rows Removed by Filter", 0)) * node["Actual Loops"]
+
+
+async def plan_problems(seeded: Seeded, case: PlanCase) -> list[str]:
+    """Explain ``case`` and describe any scans or overspend it shows."""
+    plan = await explain(seeded.conn, case)
+    problems = [
+        f"{case.name}: sequential scan of {node['Relation Name']}"
+        for node in plan_nodes(plan)
+        if "Seq Scan" in node["Node Type"]
+        and seeded.table_rows.get(node["Relation Name"], 0) > LARGE_TABLE_ROWS
+        and rows_read(node) > LARGE_TABLE_ROWS
+    ]
+    buffers = plan["Shared Hit Blocks"] + plan["Shared Read Blocks"]
+    if buffers > case.buffer_budget:
+        problems.append(f"{case.name}: {buffers} buffers, budget {case.buffer_budget}")
+    return problems
+
+
+async def catalogue_problems(seeded: Seeded, cases: list[PlanCase]) -> list[str]:
+    problems = []
+    for case in cases:
+        problems += await plan_problems(seeded, case)
+    return problems
+
+
+class TestForeignKeyIndexes:
+    """Tests that every foreign key can be looked up through an index."""
+
+    def test_every_foreign_key_is_indexed(self):
+        """Test that each foreign key leads a primary key, unique or index."""
+        missing = []
+        for table in Base.metadata.sorted_tables:
+            leading = [list(table.primary_key.columns.keys())]
+            leading += [
+                list(constraint.columns.keys())
+                for constraint in table.constraints
+                if constraint.__class__.__name__ == "UniqueConstraint"
+            ]
+            # A partial index only finds some of the referencing rows
+            leading += [
+                [column.name for column in index.columns]
+                for index in table.indexes
+                if index.dialect_options["postgresql"]["where"] is None
+            ]
+            leading += [[column.name] for column in table.columns if column.unique]
+            for constraint in table.foreign_key_constraints:
+                columns = list(constraint.columns.keys())
+                if not any(key[: len(columns)] == columns for key in leading):
+                    missing.append(f"{table.name}({', '.join(columns)})")
+
+        assert not missing, f"Foreign keys without an index: {missing}"
+
+
+# Only the async tests share the module's event loop (and its seeded data)
+@pytest.mark.asyncio(loop_scope="module")
+class TestQueryPlans:
+    """Tests that catalogued queries use indexes and stay within budget."""
+
+    async def test_hot_queries(self, seeded):
+        """Test every registered hot query."""
+        assert await catalogue_problems(seeded, hot_query_cases(seeded.athlete)) == []
+
+    async def test_worker_statements(self, seeded):
+        """Test the notification dispatcher and retention statements."""
+        assert await catalogue_problems(seeded, worker_cases(seeded.athlete)) == []
+
+    async def test_foreign_key_lookups(self, seeded):
+        """Test the lookups behind cascades and SET NULL on every foreign key."""
+        cases = await foreign_key_cases(seeded.conn)
+
+        assert await catalogue_problems(seeded, cases) == []
+
+    async def test_dataset_is_large_enough(self, seeded):
+        """Test that the seeded tables are large enough to expose scans."""
+        large = {name for name, rows in seeded.table_rows.items() if rows > LARGE_TABLE_ROWS}
+
+        assert {
+            "workouts",
+            "workout_completions",
+            "workout_edits",
+            "chat_messages",
+            "notifications",
+            "strava_activity_keys",
+            "user_memory_summaries",
+        } <= large
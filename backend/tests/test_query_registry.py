@@ -0,0 +1,83 @@
+"""Tests for the hot query registry."""
+
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from runcoach.models.training_plan import TrainingPlan
+from runcoach.models.user import User
+from runcoach.models.workout import Workout
+from runcoach.query_registry import (
+    USER_BY_EMAIL,
+    WORKOUTS_BY_USER_DATE_RANGE,
+    QueryRegistry,
+)
+
+
+class TestQueryRegistry:
+    """Tests for QueryRegistry."""
+
+    def test_duplicate_name_rejected(self):
+        """Test that a name can only be registered once."""
+        registry = QueryRegistry()
+        registry.register("q", select(User))
+
+        with pytest.raises(ValueError):
+            registry.register("q", select(User))
+
+    def test_lookup_by_name(self):
+        """Test that registered queries can be looked up and listed."""
+        registry = QueryRegistry()
+        query = registry.register("q", select(User))
+
+        assert registry["q"] is query
+        assert list(registry) == [query]
+        assert registry.stats() == {"q": query.stats()}
+
+    async def test_execute_records_calls(self, db_session_maker, make_user):
+        """Test that executions are counted and return ORM rows."""
+        user = make_user(email="hot@example.com")
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+
+        calls_before = USER_BY_EMAIL.calls
+        async with db_session_maker() as session:
+            found = (await USER_BY_EMAIL.execute(session, email="hot@example.com")).scalar_one()
+            missing = (await USER_BY_EMAIL.execute(session, email="nobody@example.com")).first()
+
+        assert found.id == user.id
+        assert missing is None
+        assert USER_BY_EMAIL.calls == calls_before + 2
+        assert USER_BY_EMAIL.stats()["max_ms"] > 0
+
+    async def test_date_range_is_half_open(self, db_session_maker, make_user):
+        """Test the per-user workout range read."""
+        user = make_user()
+        start = date(2025, 3, 3)
+        plan = TrainingPlan(user=user, title="Plan", start_date=start, end_date=start)
+        async with db_session_maker() as session:
+            session.add(user)
+            session.add_all(
+                Workout(
+                    training_plan=plan,
+                    user=user,
+                    scheduled_date=start + timedelta(days=offset),
+                    workout_type="easy",
+                    structure={},
+                )
+                for offset in (2, 0, 1, 7)
+            )
+            await session.commit()
+
+        async with db_session_maker() as session:
+            result = await WORKOUTS_BY_USER_DATE_RANGE.execute(
+                session,
+                user_id=user.id,
+                start=start,
+                end=start + timedelta(days=7),
+            )
+            dates = [workout.scheduled_date for workout in result.scalars()]
+
+        assert dates == [start + timedelta(days=offset) for offset in (0, 1, 2)]
@@ -0,0 +1,70 @@
+"""Tests for atomic user registration (requires PostgreSQL)."""
+
+import asyncio
+
+from sqlalchemy import func, select
+
+from runcoach.models.user import User
+
+
+def signup(invite_code: str, email: str) -> dict:
+    """Build a registration payload."""
+    return {
+        "invite_code": invite_code,
+        "name": "Runner",
+        "email": email,
+        "password": "securepassword123",
+    }
+
+
+async def count_users(db_session_maker) -> int:
+    """Count rows in the users table."""
+    async with db_session_maker() as session:
+        return await session.scalar(select(func.count()).select_from(User))
+
+
+class TestRegistration:
+    """Tests for POST /auth/register against a real database."""
+
+    async def test_register_returns_created_user(self, db_client):
+        """Test a successful registration."""
+        response = await db_client.post("/auth/register", json=signup("CODE1", "a@example.com"))
+
+        assert response.status_code == 201
+        assert response.json()["email"] == "a@example.com"
+        assert "session" in response.cookies
+
+    async def test_duplicate_invite_code(self, db_client):
+        """Test that a used invite code maps to the existing error."""
+        await db_client.post("/auth/register", json=signup("CODE1", "a@example.com"))
+        response = await db_client.post("/auth/register", json=signup("CODE1", "b@example.com"))
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Invite code already used"
+
+    async def test_duplicate_email(self, db_client):
+        """Test that a registered email maps to the existing error."""
+        await db_client.post("/auth/register", json=signup("CODE1", "a@example.com"))
+        response = await db_client.post("/auth/register", json=signup("CODE2", "a@example.com"))
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Email already registered"
+
+    async def test_concurrent_signups_sharing_invite_code(self, db_client, db_session_maker):
+        """Test that racing signups create one user and never fail with 500."""
+        responses = await asyncio.gather(
+            *(
+                db_client.post("/auth/register", json=signup("SHARED", f"runner{i}@example.com"))
+                for i in range(12)
+            )
+        )
+        statuses = sorted(response.status_code for response in responses)
+
+        assert statuses.count(201) == 1
+        assert statuses.count(400) == 11
+        assert all(
+            response.json()["detail"] == "Invite code already used"
+            for response in responses
+            if response.status_code == 400
+        )
+        assert await count_users(db_session_maker) == 1
@@ -0,0 +1,153 @@
+"""Tests for bulk Strava activity ingest."""
+
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+from runcoach.models.strava_activity import StravaActivity
+from runcoach.services.activities import get_activity_raw_data
+from runcoach.services.strava_ingest import (
+    activity_row,
+    ingest_activity_page,
+    ingest_activity_pages,
+)
+
+
+def make_summary(activity_id: int, **overrides) -> dict:
+    """Build a Strava activity summary as returned by the list endpoint."""
+    summary = {
+        "id": activity_id,
+        "name": f"Run {activity_id}",
+        "type": "Run",
+        "sport_type": "Run",
+        "start_date": "2025-03-03T06:30:00Z",
+        "distance": 10000.0,
+        "moving_time": 3000,
+        "elapsed_time": 3100,
+        "average_heartrate": 150.4,
+        "max_heartrate": 171.0,
+    }
+    summary.update(overrides)
+    return summary
+
+
+class TestActivityRow:
+    """Tests for column extraction."""
+
+    def test_extracts_typed_columns(self):
+        """Test that summary fields map onto the typed columns."""
+        user_id = uuid.uuid4()
+        row = activity_row(user_id, make_summary(42))
+
+        assert row["user_id"] == user_id
+        assert row["strava_activity_id"] == 42
+        assert row["activity_type"] == "Run"
+        assert row["start_date"] == datetime(2025, 3, 3, 6, 30)
+        assert row["distance_meters"] == Decimal("10000.00")
+        assert row["moving_time_seconds"] == 3000
+        assert row["elapsed_time_seconds"] == 3100
+        assert row["average_heartrate"] == Decimal("150.40")
+        assert row["average_pace_seconds_per_meter"] == Decimal("0.300000")
+
+    def test_missing_metrics_are_null(self):
+        """Test that manual activities without metrics extract as NULLs."""
+        row = activity_row(
+            uuid.uuid4(),
+            {"id": 7, "type": "Workout", "start_date": "2025-03-03T06:30:00Z"},
+        )
+
+        assert row["activity_type"] == "Workout"
+        assert row["distance_meters"] is None
+        assert row["average_heartrate"] is None
+        assert row["average_pace_seconds_per_meter"] is None
+
+
+class TestIngest:
+    """Tests for the batched upsert."""
+
+    async def test_resync_is_idempotent(self, db_session_maker, make_user):
+        """Test that re-ingesting the same pages writes nothing new."""
+        user = make_user()
+        pages = [
+            [make_summary(i) for i in range(0, 5)],
+            [make_summary(i) for i in range(5, 8)],
+        ]
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+
+        async with db_session_maker() as session:
+            first = await ingest_activity_pages(session, user.id, pages)
+            await session.commit()
+        async with db_session_maker() as session:
+            second = await ingest_activity_pages(session, user.id, pages)
+            await session.commit()
+            count = await session.scalar(select(func.count(StravaActivity.id)))
+
+        assert (first.received, first.written) == (8, 8)
+        assert (second.received, second.written) == (8, 0)
+        assert count == 8
+
+    async def test_changed_activity_is_updated(self, db_session_maker, make_user):
+        """Test that an edited activity overwrites its typed columns."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await ingest_activity_page(session, user.id, [make_summary(1)])
+            await session.commit()
+
+        async with db_session_maker() as session:
+            result = await ingest_activity_page(
+                session,
+                user.id,
+                # Duplicates within a page collapse to the last copy
+                [make_summary(1, distance=5000.0), make_summary(1, distance=8000.0)],
+            )
+            await session.commit()
+            activity = await session.scalar(select(StravaActivity))
+            raw_data = await get_activity_raw_data(session, 1)
+
+        assert result.written == 1
+        assert activity.distance_meters == Decimal("8000.00")
+        assert raw_data["distance"] == 8000.0
+
+    async def test_payload_only_change_is_written(self, db_session_maker, make_user):
+        """Test that an edit outside the typed columns still updates the payload."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await ingest_activity_page(session, user.id, [make_summary(1)])
+            await session.commit()
+
+        async with db_session_maker() as session:
+            result = await ingest_activity_page(
+                session, user.id, [make_summary(1, name="Renamed")]
+            )
+            await session.commit()
+            raw_data = await get_activity_raw_data(session, 1)
+
+        assert result.written == 1
+        assert raw_data["name"] == "Renamed"
+
+    async def test_activity_not_moved_between_users(self, db_session_maker, make_user):
+        """Test that one athlete's sync cannot claim another's activity."""
+        owner = make_user(email="owner@example.com", invite_code="OWNER")
+        other = make_user(email="other@example.com", invite_code="OTHER")
+        async with db_session_maker() as session:
+            session.add_all([owner, other])
+            await ingest_activity_page(session, owner.id, [make_summary(1)])
+            await session.commit()
+
+        async with db_session_maker() as session:
+            result = await ingest_activity_page(
+                session, other.id, [make_summary(1, name="Stolen")]
+            )
+            await session.commit()
+            activity = await session.scalar(select(StravaActivity))
+            raw_data = await get_activity_raw_data(session, 1)
+
+        assert result.written == 0
+        assert activity.user_id == owner.id
+        assert raw_data["name"] == "Run 1"
@@ -0,0 +1,247 @@
+"""Tests for the weekly training load aggregate."""
+
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import delete, select, text, update
+
+from runcoach.models.strava_activity import StravaActivity
+from runcoach.models.training_load import WeeklyTrainingLoad
+from runcoach.models.user import User
+from runcoach.services.strava_ingest import ingest_activity_page
+from runcoach.services.training_load import get_training_load
+
+# The buckets as a from-scratch aggregate of the activities would build them
+RECOMPUTED = text(
+    """
+    SELECT user_id, date_trunc('week', start_date)::date AS week_start,
+        count(*) AS activity_count,
+        sum(coalesce(moving_time_seconds, 0)) AS moving_time_seconds,
+        sum(coalesce(suffer_score, 0)) AS suffer_score,
+        count(*) FILTER (WHERE activity_type IN ('Run', 'TrailRun', 'VirtualRun'))
+            AS run_count,
+        coalesce(sum(distance_meters)
+            FILTER (WHERE activity_type IN ('Run', 'TrailRun', 'VirtualRun')), 0)
+            AS run_distance_meters
+    FROM strava_activities
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+    """
+)
+STORED = text(
+    """
+    SELECT user_id, week_start, activity_count, moving_time_seconds,
+        suffer_score, run_count, run_distance_meters
+    FROM weekly_training_load
+    ORDER BY 1, 2
+    """
+)
+
+
+def run(strava_id: int, start_date: str, distance: float = 10000.0, **fields) -> dict:
+    """A Strava run summary."""
+    return {
+        "id": strava_id,
+        "type": "Run",
+        "start_date": start_date,
+        "distance": distance,
+        "moving_time": 3000,
+        "suffer_score": 40,
+        **fields,
+    }
+
+
+async def assert_buckets_match(session) -> None:
+    """Assert the stored buckets equal a from-scratch aggregate."""
+    assert (await session.execute(STORED)).all() == (
+        await session.execute(RECOMPUTED)
+    ).all()
+
+
+class TestTriggerMaintenance:
+    """Tests that the buckets follow every write to strava_activities."""
+
+    async def test_ingest(self, db_session_maker, make_user):
+        """Test that ingested activities are added to their weeks."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.flush()
+            await ingest_activity_page(
+                session,
+                user.id,
+                [
+                    run(1, "2025-06-02T06:00:00Z"),
+                    run(2, "2025-06-08T18:00:00Z", 5000.0),
+                    run(3, "2025-06-09T06:00:00Z"),
+                    {**run(4, "2025-06-03T07:00:00Z"), "type": "Ride", "distance": 40000.0},
+                ],
+            )
+            await session.commit()
+            buckets = (
+                await session.scalars(
+                    select(WeeklyTrainingLoad).order_by(WeeklyTrainingLoad.week_start)
+                )
+            ).all()
+            await assert_buckets_match(session)
+
+        assert [
+            (b.week_start, b.activity_count, b.run_count, b.run_distance_meters)
+            for b in buckets
+        ] == [
+            (date(2025, 6, 2), 3, 2, Decimal("15000.00")),
+            (date(2025, 6, 9), 1, 1, Decimal("10000.00")),
+        ]
+        assert buckets[0].moving_time_seconds == 9000
+        assert buckets[0].suffer_score == 120
+
+    async def test_resync_adjusts_only_the_difference(self, db_session_maker, make_user):
+        """Test that re-ingesting an edited activity replaces its contribution."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.flush()
+            await ingest_activity_page(
+                session,
+                user.id,
+                [run(1, "2025-06-02T06:00:00Z"), run(2, "2025-06-03T06:00:00Z")],
+            )
+            await ingest_activity_page(
+                session,
+                user.id,
+                [run(1, "2025-06-02T06:00:00Z", 12000.0), run(3, "2025-06-04T06:00:00Z")],
+            )
+            await session.commit()
+            bucket = await session.scalar(select(WeeklyTrainingLoad))
+            await assert_buckets_match(session)
+
+        assert bucket.activity_count == 3
+        assert bucket.run_distance_meters == Decimal("32000.00")
+
+    async def test_moved_activity_changes_weeks(self, db_session_maker, make_user):
+        """Test that a changed start date moves the activity's contribution."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.flush()
+            await ingest_activity_page(
+                session,
+                user.id,
+                [run(1, "2024-12-29T23:30:00Z"), run(2, "2024-12-28T06:00:00Z")],
+            )
+            # Crosses into the 2025 partition as well as the next week
+            await ingest_activity_page(session, user.id, [run(1, "2025-01-01T00:30:00Z")])
+            await session.commit()
+            buckets = (
+                await session.execute(
+                    select(WeeklyTrainingLoad.week_start, WeeklyTrainingLoad.activity_count)
+                    .order_by(WeeklyTrainingLoad.week_start)
+                )
+            ).all()
+            await assert_buckets_match(session)
+
+        assert buckets == [(date(2024, 12, 23), 1), (date(2024, 12, 30), 1)]
+
+    async def test_changed_type_moves_between_totals(self, db_session_maker, make_user):
+        """Test that retyping a run removes it from the running totals."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.flush()
+            await ingest_activity_page(session, user.id, [run(1, "2025-06-02T06:00:00Z")])
+            await session.execute(update(StravaActivity).values(activity_type="Walk"))
+            await session.commit()
+            bucket = await session.scalar(select(WeeklyTrainingLoad))
+            await assert_buckets_match(session)
+
+        assert (bucket.activity_count, bucket.run_count) == (1, 0)
+        assert bucket.run_distance_meters == 0
+
+    async def test_delete_empties_week(self, db_session_maker, make_user):
+        """Test that deleting a week's last activity removes its bucket."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.flush()
+            await ingest_activity_page(
+                session,
+                user.id,
+                [run(1, "2025-06-02T06:00:00Z"), run(2, "2025-06-09T06:00:00Z")],
+            )
+            await session.execute(
+                delete(StravaActivity).where(StravaActivity.strava_activity_id == 1)
+            )
+            await session.commit()
+            weeks = (await session.scalars(select(WeeklyTrainingLoad.week_start))).all()
+            await assert_buckets_match(session)
+
+        assert weeks == [date(2025, 6, 9)]
+
+    async def test_deleted_athlete(self, db_session_maker, make_user):
+        """Test that deleting an athlete cascades through activities and buckets."""
+        user = make_user()
+        other = make_user(email="other@example.com", invite_code="OTHER")
+        async with db_session_maker() as session:
+            session.add_all([user, other])
+            await session.flush()
+            await ingest_activity_page(session, user.id, [run(1, "2025-06-02T06:00:00Z")])
+            await ingest_activity_page(session, other.id, [run(2, "2025-06-02T06:00:00Z")])
+            await session.commit()
+
+        async with db_session_maker() as session:
+            await session.execute(delete(User).where(User.id == user.id))
+            await session.commit()
+            owners = (await session.scalars(select(WeeklyTrainingLoad.user_id))).all()
+            await assert_buckets_match(session)
+
+        assert owners == [other.id]
+
+
+class TestGetTrainingLoad:
+    """Tests for the weekly training load read."""
+
+    async def test_ramp_rate_and_ratio(self, db_session_maker, make_user):
+        """Test week-on-week ramp rate and the acute:chronic ratio."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.flush()
+            # 10 km a week for four weeks, then 15 km, then a week off
+            await ingest_activity_page(
+                session,
+                user.id,
+                [
+                    run(1, "2025-05-05T06:00:00Z"),
+                    run(2, "2025-05-12T06:00:00Z"),
+                    run(3, "2025-05-19T06:00:00Z"),
+                    run(4, "2025-05-26T06:00:00Z"),
+                    run(5, "2025-06-02T06:00:00Z", 15000.0),
+                ],
+            )
+            await session.commit()
+            weeks = await get_training_load(session, user.id, 3, today=date(2025, 6, 11))
+
+        assert [w.week_start for w in weeks] == [
+            date(2025, 5, 26),
+            date(2025, 6, 2),
+            date(2025, 6, 9),
+        ]
+        assert [w.ramp_rate_percent for w in weeks] == [0.0, 50.0, -100.0]
+        assert [w.acute_chronic_ratio for w in weeks] == [1.33, 1.5, 0.0]
+        assert weeks[1].run_distance_miles == Decimal("9.32")
+        assert weeks[2].activity_count == 0
+
+    async def test_no_history(self, db_session_maker, make_user):
+        """Test that an athlete without activities gets empty weeks."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+            weeks = await get_training_load(session, user.id, 2, today=date(2025, 6, 11))
+
+        assert [(w.week_start, w.run_count) for w in weeks] == [
+            (date(2025, 6, 2), 0),
+            (date(2025, 6, 9), 0),
+        ]
+        assert weeks[0].ramp_rate_percent is None
+        assert weeks[0].acute_chronic_ratio is None
@@ -0,0 +1,109 @@
+"""Tests for the authenticated-user cache."""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import Session
+
+from runcoach.main import app
+from runcoach.models.user import User
+from runcoach.services.auth import session_serializer
+from runcoach.services.user_cache import UserCache, user_cache
+
+
+class TestUserCache:
+    """Tests for UserCache."""
+
+    def test_hit_and_miss_counters(self, make_user):
+        """Test that lookups are counted."""
+        cache = UserCache()
+        user = make_user()
+
+        assert cache.get(user.id) is None
+        cache.put(user)
+        cached = cache.get(user.id)
+
+        assert cached is not None
+        assert cached.id == user.id
+        assert cached.email == user.email
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_password_hash_not_cached(self, make_user):
+        """Test that the cached record omits the password hash."""
+        cache = UserCache()
+        user = make_user()
+        cache.put(user)
+
+        assert "password_hash" in inspect(cache.get(user.id)).unloaded
+
+    def test_ttl_expiry(self, make_user):
+        """Test that expired entries are treated as misses."""
+        cache = UserCache(ttl_seconds=0)
+        user = make_user()
+        cache.put(user)
+
+        assert cache.get(user.id) is None
+
+    def test_lru_eviction(self, make_user):
+        """Test that the least recently used entry is evicted first."""
+        cache = UserCache(max_size=2)
+        first, second, third = make_user(), make_user(), make_user()
+        cache.put(first)
+        cache.put(second)
+        cache.get(first.id)
+        cache.put(third)
+
+        assert cache.get(second.id) is None
+        assert cache.get(first.id) is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_invalidate(self, make_user):
+        """Test explicit eviction."""
+        cache = UserCache()
+        user = make_user()
+        cache.put(user)
+        cache.invalidate(user.id)
+
+        assert cache.get(user.id) is None
+        assert cache.stats()["invalidations"] == 1
+
+
+class TestWriteInvalidation:
+    """Tests for eviction on ORM writes."""
+
+    @pytest.fixture
+    def session(self):
+        """Provide a session over an in-memory users table."""
+        engine = create_engine("sqlite://")
+        User.__table__.create(engine)
+        with Session(engine) as session:
+            yield session
+        engine.dispose()
+
+    def test_update_evicts(self, session, make_user):
+        """Test that updating a user row evicts it."""
+        user = make_user()
+        session.add(user)
+        session.commit()
+        user_cache.put(user)
+
+        user.name = "Renamed"
+        session.commit()
+
+        assert user_cache.get(user.id) is None
+
+
+def test_get_me_served_from_cache(make_user):
+    """Test that a cached user is resolved without a database round trip."""
+    client = TestClient(app)
+    user = make_user()
+    user_cache.put(user)
+    # Legacy tokens carry no claims, so /auth/me has to resolve the user
+    client.cookies.set("session", session_serializer.dumps(str(user.id)))
+
+    response = client.get("/auth/me")
+    user_cache.invalidate(user.id)
+
+    assert response.status_code == 200
+    assert response.json()["email"] == user.email
@@ -0,0 +1,143 @@
+"""Tests for the keyset-paginated workout calendar."""
+
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+from runcoach.models.training_plan import TrainingPlan
+from runcoach.models.workout import Workout
+from runcoach.services.auth import create_session_token
+from runcoach.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+START = date(2025, 3, 3)
+
+
+async def seed_calendar(db_session_maker, user, days: int, per_day: int = 1) -> None:
+    """Schedule ``per_day`` workouts on each of ``days`` days from START."""
+    plan = TrainingPlan(user=user, title="Plan", start_date=START, end_date=START)
+    async with db_session_maker() as session:
+        session.add(user)
+        session.add_all(
+            Workout(
+                training_plan=plan,
+                user=user,
+                scheduled_date=START + timedelta(days=day),
+                workout_type="easy",
+                description="Easy miles",
+                structure={"steps": [{"type": "run", "minutes": 30}]},
+            )
+            for day in range(days)
+            for _ in range(per_day)
+        )
+        await session.commit()
+
+
+class TestCursor:
+    """Tests for pagination cursors."""
+
+    def test_round_trip(self):
+        """Test that a cursor decodes to the key it was built from."""
+        key = (date(2025, 3, 3), uuid.uuid4())
+
+        assert decode_cursor(encode_cursor(*key), date, uuid.UUID) == key
+
+    @pytest.mark.parametrize(
+        "cursor",
+        [
+            "",
+            "not base64!",
+            encode_cursor("x"),
+            encode_cursor("2025-03-03", "not-a-uuid"),
+            encode_cursor("2025-03-03", 123),
+            encode_cursor(20250303, str(uuid.uuid4())),
+        ],
+    )
+    def test_malformed(self, cursor):
+        """Test that malformed cursors raise InvalidCursor."""
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor, date, uuid.UUID)
+
+
+class TestWorkoutCalendar:
+    """Tests for GET /workouts/calendar."""
+
+    async def test_pages_cover_range_once(self, db_client, db_session_maker, make_user):
+        """Test that paging visits every workout once, in order, across ties."""
+        user = make_user()
+        await seed_calendar(db_session_maker, user, days=10, per_day=3)
+        db_client.cookies.set("session", create_session_token(user))
+
+        params = {"start": "2025-03-04", "end": "2025-03-12", "limit": 4}
+        seen, pages = [], 0
+        while True:
+            response = await db_client.get("/workouts/calendar", params=params)
+            assert response.status_code == 200
+            body = response.json()
+            seen.extend((w["scheduled_date"], w["id"]) for w in body["workouts"])
+            pages += 1
+            if body["next_cursor"] is None:
+                break
+            params["cursor"] = body["next_cursor"]
+
+        # Eight days of three workouts each
+        assert len(seen) == 24
+        assert len(set(seen)) == 24
+        assert seen == sorted(seen)
+        assert seen[0][0] == "2025-03-04"
+        assert seen[-1][0] == "2025-03-11"
+        assert pages == 6
+
+    async def test_compact_rows_by_default(self, db_client, db_session_maker, make_user):
+        """Test that structure is only returned when asked for."""
+        user = make_user()
+        await seed_calendar(db_session_maker, user, days=2)
+        db_client.cookies.set("session", create_session_token(user))
+        params = {"start": "2025-03-03", "end": "2025-03-10"}
+
+        compact = (await db_client.get("/workouts/calendar", params=params)).json()
+        detailed = (
+            await db_client.get(
+                "/workouts/calendar",
+                params={**params, "include_structure": "true"},
+            )
+        ).json()
+
+        assert "structure" not in compact["workouts"][0]
+        assert "description" not in compact["workouts"][0]
+        assert detailed["workouts"][0]["structure"] == {
+            "steps": [{"type": "run", "minutes": 30}]
+        }
+        assert detailed["workouts"][0]["description"] == "Easy miles"
+
+    async def test_only_own_workouts(self, db_client, db_session_maker, make_user):
+        """Test that another athlete's workouts are not returned."""
+        owner = make_user()
+        other = make_user(invite_code="OTHER", email="other@example.com")
+        await seed_calendar(db_session_maker, owner, days=3)
+        async with db_session_maker() as session:
+            session.add(other)
+            await session.commit()
+        db_client.cookies.set("session", create_session_token(other))
+
+        response = await db_client.get(
+            "/workouts/calendar",
+            params={"start": "2025-03-03", "end": "2025-03-10"},
+        )
+
+        assert response.json() == {"workouts": [], "next_cursor": None}
+
+    async def test_bad_cursor(self, db_client, db_session_maker, make_user):
+        """Test that a malformed cursor is a client error."""
+        user = make_user()
+        async with db_session_maker() as session:
+            session.add(user)
+            await session.commit()
+        db_client.cookies.set("session", create_session_token(user))
+
+        response = await db_client.get(
+            "/workouts/calendar",
+            params={"start": "2025-03-03", "end": "2025-03-10", "cursor": "garbage"},
+        )
+
+        assert response.status_code == 400
@@ -0,0 +1,251 @@
+"""Tests for FIT workout export."""
+
+import io
+import uuid
+import zipfile
+from datetime import date, timedelta
+
+import pytest
+from fit_tool.fit_file import FitFile
+from fit_tool.profile.messages.workout_message import WorkoutMessage
+from fit_tool.profile.messages.workout_step_message import WorkoutStepMessage
+from fit_tool.profile.profile_type import Intensity, WorkoutStepDuration, WorkoutStepTarget
+
+from runcoach.models.training_plan import TrainingPlan
+from runcoach.models.workout import Workout
+from runcoach.services import workout_export
+from runcoach.services.auth import create_session_token
+from runcoach.services.workout_export import (
+    WorkoutFileCache,
+    WorkoutStructureError,
+    export_key,
+    workout_file_cache,
+)
+
+MONDAY = date(2025, 9, 1)
+INTERVALS = {
+    "steps": [
+        {"type": "warmup", "minutes": 15},
+        {
+            "repeat": 6,
+            "steps": [
+                {"type": "interval", "meters": 800, "pace": ["3:55", "4:05"]},
+                {"type": "recovery", "seconds": 90},
+            ],
+        },
+        {"type": "cooldown", "km": 2, "heart_rate": [120, 145]},
+    ]
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start every test with an empty workout file cache."""
+    workout_file_cache.clear()
+    yield
+    workout_file_cache.clear()
+
+
+def make_workout(**overrides) -> Workout:
+    values = {
+        "id": uuid.uuid4(),
+        "scheduled_date": MONDAY,
+        "workout_type": "intervals",
+        "title": "6 x 800m",
+        "structure": INTERVALS,
+        "estimated_duration_minutes": None,
+        "estimated_distance_meters": None,
+    }
+    return Workout(**{**values, **overrides})
+
+
+def steps_of(data: bytes) -> tuple[WorkoutMessage, list[WorkoutStepMessage]]:
+    messages = [record.message for record in FitFile.from_bytes(data).records]
+    [workout] = [m for m in messages if isinstance(m, WorkoutMessage)]
+    return workout, [m for m in messages if isinstance(m, WorkoutStepMessage)]
+
+
+async def encode(workout: Workout) -> bytes:
+    [file] = await workout_export.render_workouts([workout])
+    return file.data
+
+
+async def seed_week(db_session_maker, user, workouts: list[dict]) -> list[Workout]:
+    plan = TrainingPlan(user=user, title="Plan", start_date=MONDAY, end_date=MONDAY)
+    rows = [
+        Workout(
+            training_plan=plan,
+            user=user,
+            **{"workout_type": "easy", "structure": {}, **values},
+        )
+        for values in workouts
+    ]
+    async with db_session_maker() as session:
+        session.add(user)
+        session.add_all(rows)
+        await session.commit()
+    return rows
+
+
+class TestWorkoutEncoding:
+    """Tests for encoding workout structures as FIT workouts."""
+
+    async def test_steps(self):
+        """Test durations, targets and repeat blocks."""
+        workout, steps = steps_of(await encode(make_workout()))
+
+        assert (workout.workout_name, workout.num_valid_steps) == ("6 x 800m", 5)
+        warmup, interval, recovery, repeat, cooldown = steps
+        assert warmup.intensity == Intensity.WARMUP.value
+        assert (warmup.duration_type, warmup.duration_time) == (WorkoutStepDuration.TIME.value, 900)
+        assert interval.duration_distance == 800
+        assert interval.target_type == WorkoutStepTarget.SPEED.value
+        assert interval.custom_target_speed_low == pytest.approx(1000 / 245, abs=1e-3)
+        assert interval.custom_target_speed_high == pytest.approx(1000 / 235, abs=1e-3)
+        assert recovery.duration_time == 90
+        assert repeat.duration_type == WorkoutStepDuration.REPEAT_UNTIL_STEPS_CMPLT.value
+        assert (repeat.duration_step, repeat.target_repeat_steps) == (1, 6)
+        assert cooldown.duration_distance == 2000
+        assert (cooldown.custom_target_heart_rate_low, cooldown.custom_target_heart_rate_high) == (
+            220,
+            245,
+        )
+
+    async def test_estimate_fallback(self):
+        """Test that a workout without steps becomes one step of its estimate."""
+        _, [step] = steps_of(
+            await encode(make_workout(structure={}, estimated_distance_meters=10_000))
+        )
+
+        assert (step.duration_type, step.duration_distance) == (
+            WorkoutStepDuration.DISTANCE.value,
+            10_000,
+        )
+
+    @pytest.mark.parametrize(
+        "structure",
+        [
+            {"steps": [{"minutes": -5}]},
+            {"steps": [{"minutes": 5, "pace": "fast"}]},
+            {"steps": [{"minutes": 5, "heart_rate": 150}]},
+            {"steps": [{"repeat": 0, "steps": [{"minutes": 1}]}]},
+            {"steps": [{"repeat": 300, "steps": [{"minutes": 1}] * 300}]},
+        ],
+        ids=["duration", "pace", "heart_rate", "repeat", "too_many"],
+    )
+    async def test_invalid(self, structure):
+        """Test that structures a watch could not follow are refused."""
+        with pytest.raises(WorkoutStructureError):
+            await encode(make_workout(structure=structure))
+
+    async def test_cached_by_content(self, monkeypatch):
+        """Test that a workout is encoded again only when its content changes."""
+        encoded = []
+        encode_workout = workout_export.encode_workout
+        monkeypatch.setattr(
+            workout_export,
+            "encode_workout",
+            lambda inputs, key: encoded.append(key) or encode_workout(inputs, key),
+        )
+        workout = make_workout()
+
+        first = await encode(workout)
+        again = await encode(workout)
+        workout.structure = {"steps": [{"minutes": 40}]}
+        changed = await encode(workout)
+
+        assert first == again != changed
+        assert len(encoded) == 2
+        assert encoded[1] == export_key(workout)
+
+
+class TestWorkoutFileCache:
+    """Tests for the byte-bounded LRU of encoded files."""
+
+    def test_evicts_least_recently_used(self):
+        """Test that entries are evicted oldest-used first to fit the budget."""
+        cache = WorkoutFileCache(max_bytes=10)
+        cache.put("a", b"aaaa")
+        cache.put("b", b"bbbb")
+        cache.get("a")
+        cache.put("c", b"cccc")
+
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == (b"aaaa", b"cccc")
+        assert cache.stats()["bytes"] == 8
+        assert cache.stats()["evictions"] == 1
+
+
+class TestWorkoutExport:
+    """Tests for GET /workouts/{id}/fit and GET /workouts/export."""
+
+    async def test_download_workout(self, db_client, db_session_maker, make_user):
+        """Test a single download and its revalidation by ETag."""
+        user = make_user()
+        [workout] = await seed_week(
+            db_session_maker,
+            user,
+            [{"scheduled_date": MONDAY, "title": "6 x 800m", "structure": INTERVALS}],
+        )
+        db_client.cookies.set("session", create_session_token(user))
+
+        response = await db_client.get(f"/workouts/{workout.id}/fit")
+        revalidated = await db_client.get(
+            f"/workouts/{workout.id}/fit",
+            headers={"If-None-Match": response.headers["etag"]},
+        )
+        missing = await db_client.get(f"/workouts/{uuid.uuid4()}/fit")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.ant.fit"
+        assert 'filename="2025-09-01-6-x-800m.fit"' in response.headers["content-disposition"]
+        assert steps_of(response.content)[0].num_valid_steps == 5
+        assert revalidated.status_code == 304
+        assert missing.status_code == 404
+
+    async def test_export_week(self, db_client, db_session_maker, make_user):
+        """Test that a week's workouts, except rest days, come as one zip."""
+        user = make_user()
+        await seed_week(
+            db_session_maker,
+            user,
+            [
+                {"scheduled_date": MONDAY, "title": "6 x 800m", "structure": INTERVALS},
+                {"scheduled_date": MONDAY + timedelta(days=2), "title": "Easy"},
+                {"scheduled_date": MONDAY + timedelta(days=2), "title": "Easy"},
+                {"scheduled_date": MONDAY + timedelta(days=3), "workout_type": "rest"},
+                {"scheduled_date": MONDAY + timedelta(days=7), "title": "Next week"},
+            ],
+        )
+        db_client.cookies.set("session", create_session_token(user))
+
+        response = await db_client.get(
+            "/workouts/export", params={"week": (MONDAY + timedelta(days=4)).isoformat()}
+        )
+        empty = await db_client.get("/workouts/export", params={"week": "2025-08-20"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        assert archive.testzip() is None
+        assert archive.namelist() == [
+            "2025-09-01-6-x-800m.fit",
+            "2025-09-03-easy.fit",
+            "2025-09-03-easy-2.fit",
+        ]
+        assert steps_of(archive.read("2025-09-01-6-x-800m.fit"))[0].num_valid_steps == 5
+        assert empty.status_code == 404
+
+    async def test_invalid_structure(self, db_client, db_session_maker, make_user):
+        """Test 422 for a workout whose structure cannot be encoded."""
+        user = make_user()
+        [workout] = await seed_week(
+            db_session_maker,
+            user,
+            [{"scheduled_date": MONDAY, "structure": {"steps": "run a bit"}}],
+        )
+        db_client.cookies.set("session", create_session_token(user))
+
+        response = await db_client.get(f"/workouts/{workout.id}/fit")
+
+        assert response.status_code == 422
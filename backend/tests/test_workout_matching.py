@@ -0,0 +1,195 @@
+"""Tests for matching synced activities to scheduled workouts."""
+
+import asyncio
+import uuid
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import delete, select
+
+from runcoach.models.strava_activity import StravaActivity
+from runcoach.models.training_plan import TrainingPlan
+from runcoach.models.workout import Workout
+from runcoach.models.workout_completion import WorkoutCompletion
+from runcoach.services.strava_ingest import ingest_activity_pages
+from runcoach.services.workout_matching import match_activities, match_workouts
+
+MONDAY = date(2025, 3, 3)
+
+
+def workout(day: int, workout_type: str = "easy", meters: int | None = 10000, minutes=None):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        scheduled_date=MONDAY + timedelta(days=day),
+        workout_type=workout_type,
+        estimated_distance_meters=meters,
+        estimated_duration_minutes=minutes,
+    )
+
+
+def activity(day: int, activity_type: str = "Run", meters: float | None = 10000, seconds=3000):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        start_date=datetime.combine(MONDAY + timedelta(days=day), datetime.min.time())
+        + timedelta(hours=7),
+        activity_type=activity_type,
+        distance_meters=meters,
+        moving_time_seconds=seconds,
+    )
+
+
+def pairs(matches) -> set:
+    return {(match.workout_id, match.strava_activity_id) for match in matches}
+
+
+class TestMatchWorkouts:
+    """Tests for the in-memory matcher."""
+
+    def test_same_day_preferred(self):
+        """Test that an activity completes its own day's workout over a neighbour's."""
+        workouts = [workout(0), workout(1), workout(2)]
+        run = activity(1)
+
+        matches = match_workouts(workouts, [run], day_window=1, tolerance=0.3)
+
+        assert pairs(matches) == {(workouts[1].id, run.id)}
+
+    def test_shifted_day(self):
+        """Test that a run a day late still completes the workout."""
+        planned = workout(0)
+        late, too_late = activity(1), activity(2)
+
+        assert len(match_workouts([planned], [late], day_window=1, tolerance=0.3)) == 1
+        assert match_workouts([planned], [too_late], day_window=1, tolerance=0.3) == []
+
+    def test_each_workout_claimed_once(self):
+        """Test that a double day completes one workout, not the same one twice."""
+        workouts = [workout(0), workout(1)]
+        morning, evening = activity(0), activity(0, meters=9000)
+        evening.start_date += timedelta(hours=10)
+
+        matches = match_workouts(workouts, [evening, morning], day_window=1, tolerance=0.3)
+
+        assert pairs(matches) == {(workouts[0].id, morning.id), (workouts[1].id, evening.id)}
+
+    def test_tolerance(self):
+        """Test distance first, then duration, against the plan."""
+        by_distance = workout(0, meters=10000)
+        by_duration = workout(2, meters=None, minutes=50)
+
+        assert match_workouts([by_distance], [activity(0, meters=5000)], 0, 0.3) == []
+        assert len(match_workouts([by_distance], [activity(0, meters=12000)], 0, 0.3)) == 1
+        assert len(match_workouts([by_duration], [activity(2, meters=None)], 0, 0.3)) == 1
+        assert match_workouts([by_duration], [activity(2, seconds=1200)], 0, 0.3) == []
+
+    def test_sports(self):
+        """Test that runs complete run workouts and cross-training the rest."""
+        workouts = [workout(0), workout(0, "cross_training", meters=None), workout(0, "rest")]
+        ride, swim = activity(0, "Ride", meters=30000), activity(0, "Swim")
+        swim.start_date += timedelta(hours=10)
+
+        matches = match_workouts(workouts, [ride, swim], day_window=0, tolerance=0.3)
+
+        assert pairs(matches) == {(workouts[1].id, ride.id)}
+
+
+class TestSyncMatching:
+    """Tests that a sync writes completions for its activities."""
+
+    async def seed_week(self, db_session_maker, user) -> list[Workout]:
+        plan = TrainingPlan(user=user, title="Plan", start_date=MONDAY, end_date=MONDAY)
+        workouts = [
+            Workout(
+                training_plan=plan,
+                user=user,
+                scheduled_date=MONDAY + timedelta(days=day),
+                workout_type="easy",
+                structure={},
+                estimated_distance_meters=10000,
+            )
+            for day in range(0, 7, 2)
+        ]
+        async with db_session_maker() as session:
+            session.add_all(workouts)
+            await session.commit()
+        return workouts
+
+    def summary(self, strava_id: int, day: int, meters: float = 10000.0) -> dict:
+        return {
+            "id": strava_id,
+            "type": "Run",
+            "start_date": f"{MONDAY + timedelta(days=day)}T07:00:00Z",
+            "distance": meters,
+            "moving_time": 3000,
+        }
+
+    async def completions(self, db_session_maker) -> dict:
+        async with db_session_maker() as session:
+            rows = await session.execute(
+                select(Workout.scheduled_date, StravaActivity.strava_activity_id)
+                .join(WorkoutCompletion, WorkoutCompletion.workout_id == Workout.id)
+                .join(StravaActivity, StravaActivity.id == WorkoutCompletion.strava_activity_id)
+            )
+            return {strava_id: day for day, strava_id in rows}
+
+    async def test_sync_completes_workouts(self, db_session_maker, make_user):
+        """Test that a sync's runs complete their workouts, once across re-syncs."""
+        user = make_user()
+        await self.seed_week(db_session_maker, user)
+        pages = [
+            [self.summary(1, 0), self.summary(2, 3)],
+            # Too short to count, then a day late for the workout it skipped
+            [self.summary(3, 4, meters=3000.0), self.summary(4, 5)],
+        ]
+
+        async with db_session_maker() as session:
+            first = await ingest_activity_pages(session, user.id, pages)
+            await session.commit()
+        async with db_session_maker() as session:
+            second = await ingest_activity_pages(session, user.id, pages)
+            await session.commit()
+
+        assert (first.matched, second.matched) == (3, 0)
+        assert await self.completions(db_session_maker) == {
+            1: MONDAY,
+            2: MONDAY + timedelta(days=2),
+            4: MONDAY + timedelta(days=4),
+        }
+
+    async def test_completed_workouts_stay_closed(self, db_session_maker, make_user):
+        """Test that a workout completed by hand is not matched again."""
+        user = make_user()
+        workouts = await self.seed_week(db_session_maker, user)
+        async with db_session_maker() as session:
+            session.add(WorkoutCompletion(workout_id=workouts[0].id, completion_status="completed"))
+            await session.commit()
+
+        async with db_session_maker() as session:
+            result = await ingest_activity_pages(session, user.id, [[self.summary(1, 0)]])
+            await session.commit()
+
+        assert result.matched == 0
+        assert await self.completions(db_session_maker) == {}
+
+    async def test_overlapping_matches_complete_once(self, db_session_maker, make_user):
+        """Test that a workout matched by two overlapping syncs is completed once."""
+        user = make_user()
+        await self.seed_week(db_session_maker, user)
+        async with db_session_maker() as session:
+            await ingest_activity_pages(session, user.id, [[self.summary(1, 0)]])
+            await session.execute(delete(WorkoutCompletion))
+            await session.commit()
+        start = datetime.combine(MONDAY, datetime.min.time())
+        end = start + timedelta(days=1)
+
+        async with db_session_maker() as first, db_session_maker() as second:
+            first_matches = await match_activities(first, user.id, start, end)
+            # Waits on the first sync's uncommitted completion of the workout
+            second_match = asyncio.create_task(match_activities(second, user.id, start, end))
+            await asyncio.sleep(0.2)
+            await first.commit()
+            second_matches = await second_match
+            await second.commit()
+
+        assert (len(first_matches), second_matches) == (1, [])
+        assert await self.completions(db_session_maker) == {1: MONDAY}